@@ -0,0 +1 @@
+# Advance orders module
\ No newline at end of file
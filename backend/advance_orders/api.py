@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from backend.database import get_db
+from . import crud, schemas
+
+router = APIRouter(prefix="/advance-orders", tags=["advance-orders"])
+
+@router.post("/", response_model=schemas.AdvanceOrder)
+def create_advance_order(
+    order: schemas.AdvanceOrderCreate,
+    user_id: int = Query(..., description="ID of the user creating the order"),
+    db: Session = Depends(get_db)
+):
+    """Create an advance order and reserve its stock"""
+    try:
+        return crud.create_advance_order(db, order, user_id)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/", response_model=List[schemas.AdvanceOrderSummary])
+def list_advance_orders(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    customer_id: Optional[int] = Query(None, description="Filter by customer"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    db: Session = Depends(get_db)
+):
+    return crud.get_advance_orders(
+        db, skip=skip, limit=limit, store_id=store_id, customer_id=customer_id, status=status
+    )
+
+@router.post("/bulk-status", response_model=schemas.AdvanceOrderStatusResult)
+def bulk_update_status(
+    update: schemas.AdvanceOrderBulkStatusUpdate,
+    user_id: int = Query(..., description="ID of the user updating the orders"),
+    db: Session = Depends(get_db)
+):
+    """Change the status of many orders at once, releasing their reservations in bulk"""
+    return crud.update_advance_order_status(db, update.advance_order_ids, update.status, user_id)
+
+@router.get("/{advance_order_id}", response_model=schemas.AdvanceOrder)
+def get_advance_order(advance_order_id: int, db: Session = Depends(get_db)):
+    order = crud.get_advance_order(db, advance_order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Advance order not found")
+    return order
+
+@router.put("/{advance_order_id}/status", response_model=schemas.AdvanceOrder)
+def update_status(
+    advance_order_id: int,
+    update: schemas.AdvanceOrderStatusUpdate,
+    user_id: int = Query(..., description="ID of the user updating the order"),
+    db: Session = Depends(get_db)
+):
+    result = crud.update_advance_order_status(db, [advance_order_id], update.status, user_id)
+    if not result["updated"]:
+        order = crud.get_advance_order(db, advance_order_id)
+        if not order:
+            raise HTTPException(status_code=404, detail="Advance order not found")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot change advance order status from {order['status']} to {update.status}"
+        )
+    return crud.get_advance_order(db, advance_order_id)
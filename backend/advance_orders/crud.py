@@ -0,0 +1,249 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from decimal import Decimal
+from . import schemas
+import random
+import string
+
+# Orders in these statuses hold their quantities in inventory.reserved_stock
+RESERVING_STATUSES = ("PENDING", "CONFIRMED")
+
+ALLOWED_TRANSITIONS = {
+    "CONFIRMED": ("PENDING",),
+    "COMPLETED": ("PENDING", "CONFIRMED"),
+    "CANCELLED": ("PENDING", "CONFIRMED"),
+    "REFUNDED": ("PENDING", "CONFIRMED", "CANCELLED"),
+}
+
+_ORDER_COLUMNS = """
+    ao.advance_order_id, ao.order_number, ao.customer_id,
+    c.first_name || ' ' || c.last_name AS customer_name,
+    ao.store_id, st.store_name, ao.order_date, ao.delivery_pickup_date,
+    ao.total_amount, ao.advance_paid, ao.balance_due, ao.status,
+    (SELECT COUNT(*) FROM advance_order_items aoi WHERE aoi.advance_order_id = ao.advance_order_id) AS items_count
+"""
+
+def generate_order_number(db: Session) -> str:
+    """Generate a unique advance order number"""
+    prefix = f"ADV-{datetime.now().strftime('%Y%m%d')}"
+    count = db.execute(
+        text("SELECT COUNT(*) FROM advance_orders WHERE order_number LIKE :pattern"),
+        {"pattern": f"{prefix}-%"}
+    ).scalar() or 0
+    order_number = f"{prefix}-{count + 1:04d}"
+
+    # Ensure uniqueness
+    while db.execute(
+        text("SELECT 1 FROM advance_orders WHERE order_number = :order_number"),
+        {"order_number": order_number}
+    ).first():
+        random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
+        order_number = f"{prefix}-{count + 1:04d}-{random_suffix}"
+    return order_number
+
+def create_advance_order(db: Session, order: schemas.AdvanceOrderCreate, user_id: int) -> Dict[str, Any]:
+    """
+    Create an advance order and reserve its stock.
+
+    The reservation is a single conditional UPDATE: a line is reserved only if
+    current_stock - reserved_stock covers it, so it cannot race with checkout.
+    """
+    total_amount = sum((item.unit_price * item.quantity for item in order.items), Decimal("0.00"))
+    if order.advance_paid > total_amount:
+        raise ValueError("Advance paid cannot exceed the order total")
+
+    advance_order_id = db.execute(text("""
+        INSERT INTO advance_orders
+            (order_number, customer_id, store_id, delivery_pickup_date, total_amount,
+             advance_paid, balance_due, status, user_id, notes)
+        VALUES (:order_number, :customer_id, :store_id, :delivery_pickup_date, :total_amount,
+                :advance_paid, :balance_due, 'PENDING', :user_id, :notes)
+        RETURNING advance_order_id
+    """), {
+        "order_number": generate_order_number(db),
+        "customer_id": order.customer_id,
+        "store_id": order.store_id,
+        "delivery_pickup_date": order.delivery_pickup_date,
+        "total_amount": total_amount,
+        "advance_paid": order.advance_paid,
+        "balance_due": total_amount - order.advance_paid,
+        "user_id": user_id,
+        "notes": order.notes,
+    }).scalar()
+
+    params = {
+        "advance_order_id": advance_order_id,
+        "store_id": order.store_id,
+        "product_ids": [item.product_id for item in order.items],
+        "variant_ids": [item.variant_id for item in order.items],
+        "quantities": [item.quantity for item in order.items],
+        "unit_prices": [item.unit_price for item in order.items],
+    }
+    db.execute(text("""
+        INSERT INTO advance_order_items (advance_order_id, product_id, variant_id, quantity, unit_price, line_total)
+        SELECT :advance_order_id, t.product_id, t.variant_id, t.quantity, t.unit_price, t.quantity * t.unit_price
+        FROM unnest(
+            CAST(:product_ids AS INTEGER[]),
+            CAST(:variant_ids AS INTEGER[]),
+            CAST(:quantities AS INTEGER[]),
+            CAST(:unit_prices AS NUMERIC[])
+        ) AS t(product_id, variant_id, quantity, unit_price)
+    """), params)
+
+    requested = db.execute(text("""
+        WITH lines AS (
+            SELECT t.product_id, t.variant_id, SUM(t.quantity) AS quantity
+            FROM unnest(CAST(:product_ids AS INTEGER[]), CAST(:variant_ids AS INTEGER[]), CAST(:quantities AS INTEGER[]))
+                 AS t(product_id, variant_id, quantity)
+            GROUP BY t.product_id, t.variant_id
+        ),
+        reserved AS (
+            UPDATE inventory i
+            SET reserved_stock = i.reserved_stock + lines.quantity,
+                updated_at = CURRENT_TIMESTAMP
+            FROM lines
+            WHERE i.store_id = :store_id
+              AND i.product_id = lines.product_id
+              AND i.variant_id IS NOT DISTINCT FROM lines.variant_id
+              AND i.current_stock - i.reserved_stock >= lines.quantity
+            RETURNING i.product_id, i.variant_id
+        )
+        SELECT lines.product_id, lines.variant_id, lines.quantity, reserved.product_id IS NOT NULL AS is_reserved
+        FROM lines
+        LEFT JOIN reserved ON reserved.product_id = lines.product_id
+             AND reserved.variant_id IS NOT DISTINCT FROM lines.variant_id
+    """), params).all()
+    short = [row for row in requested if not row.is_reserved]
+    if short:
+        details = ", ".join(f"product {row.product_id} (requested {row.quantity})" for row in short)
+        raise ValueError(f"Insufficient unreserved stock for {details}")
+
+    db.commit()
+    return get_advance_order(db, advance_order_id)
+
+def get_advance_orders(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    store_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+    status: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """List advance orders with customer and store names"""
+    where_clauses = ["1=1"]
+    params: Dict[str, Any] = {"skip": skip, "limit": limit}
+    if store_id is not None:
+        where_clauses.append("ao.store_id = :store_id")
+        params["store_id"] = store_id
+    if customer_id is not None:
+        where_clauses.append("ao.customer_id = :customer_id")
+        params["customer_id"] = customer_id
+    if status:
+        where_clauses.append("ao.status = :status")
+        params["status"] = status
+
+    rows = db.execute(text(f"""
+        SELECT {_ORDER_COLUMNS}
+        FROM advance_orders ao
+        JOIN customers c ON c.customer_id = ao.customer_id
+        JOIN stores st ON st.store_id = ao.store_id
+        WHERE {" AND ".join(where_clauses)}
+        ORDER BY ao.order_date DESC, ao.advance_order_id DESC
+        OFFSET :skip LIMIT :limit
+    """), params).mappings().all()
+    return [dict(row) for row in rows]
+
+def get_advance_order(db: Session, advance_order_id: int) -> Optional[Dict[str, Any]]:
+    """Get an advance order with its items"""
+    header = db.execute(text(f"""
+        SELECT {_ORDER_COLUMNS}, ao.user_id, ao.notes, ao.created_at, ao.updated_at
+        FROM advance_orders ao
+        JOIN customers c ON c.customer_id = ao.customer_id
+        JOIN stores st ON st.store_id = ao.store_id
+        WHERE ao.advance_order_id = :advance_order_id
+    """), {"advance_order_id": advance_order_id}).mappings().first()
+    if header is None:
+        return None
+    items = db.execute(text("""
+        SELECT aoi.*, p.product_code, p.product_name
+        FROM advance_order_items aoi
+        JOIN products p ON p.product_id = aoi.product_id
+        WHERE aoi.advance_order_id = :advance_order_id
+        ORDER BY aoi.adv_order_item_id
+    """), {"advance_order_id": advance_order_id}).mappings().all()
+    return {**dict(header), "items": [dict(item) for item in items]}
+
+def update_advance_order_status(
+    db: Session,
+    advance_order_ids: List[int],
+    status: str,
+    user_id: int
+) -> Dict[str, List[int]]:
+    """
+    Move advance orders to a new status in bulk.
+
+    Orders leaving PENDING/CONFIRMED release their reservations with one
+    UPDATE over all affected inventory rows. COMPLETED orders also take the
+    goods out of current_stock and log SALE movements referencing the order.
+    """
+    allowed_from = ALLOWED_TRANSITIONS.get(status)
+    if allowed_from is None:
+        raise ValueError(f"Unsupported status: {status}")
+
+    changed = db.execute(text("""
+        WITH previous AS (
+            SELECT advance_order_id, status
+            FROM advance_orders
+            WHERE advance_order_id = ANY(:ids) AND status = ANY(:allowed_from)
+            FOR UPDATE
+        )
+        UPDATE advance_orders ao
+        SET status = :status, updated_at = CURRENT_TIMESTAMP
+        FROM previous
+        WHERE ao.advance_order_id = previous.advance_order_id
+        RETURNING ao.advance_order_id, previous.status AS previous_status
+    """), {"ids": advance_order_ids, "allowed_from": list(allowed_from), "status": status}).all()
+
+    updated = [row.advance_order_id for row in changed]
+    releasing = [
+        row.advance_order_id for row in changed
+        if row.previous_status in RESERVING_STATUSES and status not in RESERVING_STATUSES
+    ]
+    if releasing:
+        fulfil = status == "COMPLETED"
+        db.execute(text("""
+            WITH released AS (
+                SELECT ao.store_id, aoi.product_id, aoi.variant_id, SUM(aoi.quantity) AS quantity
+                FROM advance_order_items aoi
+                JOIN advance_orders ao ON ao.advance_order_id = aoi.advance_order_id
+                WHERE ao.advance_order_id = ANY(:ids)
+                GROUP BY ao.store_id, aoi.product_id, aoi.variant_id
+            )
+            UPDATE inventory i
+            SET reserved_stock = GREATEST(i.reserved_stock - released.quantity, 0),
+                current_stock = i.current_stock - CASE WHEN :fulfil THEN released.quantity ELSE 0 END,
+                updated_at = CURRENT_TIMESTAMP
+            FROM released
+            WHERE i.store_id = released.store_id
+              AND i.product_id = released.product_id
+              AND i.variant_id IS NOT DISTINCT FROM released.variant_id
+        """), {"ids": releasing, "fulfil": fulfil})
+        if fulfil:
+            db.execute(text("""
+                INSERT INTO inventory_movements
+                    (product_id, variant_id, store_id, movement_type, quantity, reference_id, user_id, notes)
+                SELECT aoi.product_id, aoi.variant_id, ao.store_id, 'SALE', -aoi.quantity,
+                       ao.advance_order_id, :user_id, 'Advance order ' || ao.order_number
+                FROM advance_order_items aoi
+                JOIN advance_orders ao ON ao.advance_order_id = aoi.advance_order_id
+                WHERE ao.advance_order_id = ANY(:ids)
+            """), {"ids": releasing, "user_id": user_id})
+
+    db.commit()
+    updated_ids = set(updated)
+    return {
+        "updated": updated,
+        "skipped": [order_id for order_id in advance_order_ids if order_id not in updated_ids],
+    }
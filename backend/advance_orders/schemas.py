@@ -0,0 +1,64 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+from decimal import Decimal
+
+ADVANCE_ORDER_STATUS_PATTERN = "^(CONFIRMED|COMPLETED|CANCELLED|REFUNDED)$"
+
+class AdvanceOrderItemCreate(BaseModel):
+    product_id: int
+    variant_id: Optional[int] = None
+    quantity: int = Field(..., gt=0)
+    unit_price: Decimal = Field(..., ge=0)
+
+class AdvanceOrderCreate(BaseModel):
+    customer_id: int
+    store_id: int
+    delivery_pickup_date: Optional[datetime] = None
+    advance_paid: Decimal = Field(Decimal("0.00"), ge=0)
+    notes: Optional[str] = None
+    items: List[AdvanceOrderItemCreate] = Field(..., min_length=1)
+
+class AdvanceOrderStatusUpdate(BaseModel):
+    status: str = Field(..., pattern=ADVANCE_ORDER_STATUS_PATTERN)
+
+class AdvanceOrderBulkStatusUpdate(BaseModel):
+    advance_order_ids: List[int] = Field(..., min_length=1)
+    status: str = Field(..., pattern=ADVANCE_ORDER_STATUS_PATTERN)
+
+class AdvanceOrderStatusResult(BaseModel):
+    updated: List[int]
+    # Orders that were not found or cannot move to the requested status
+    skipped: List[int]
+
+class AdvanceOrderItem(BaseModel):
+    adv_order_item_id: int
+    product_id: int
+    product_code: str
+    product_name: str
+    variant_id: Optional[int] = None
+    quantity: int
+    unit_price: Decimal
+    line_total: Decimal
+
+class AdvanceOrderSummary(BaseModel):
+    advance_order_id: int
+    order_number: str
+    customer_id: int
+    customer_name: str
+    store_id: int
+    store_name: str
+    order_date: Optional[datetime] = None
+    delivery_pickup_date: Optional[datetime] = None
+    total_amount: Decimal
+    advance_paid: Decimal
+    balance_due: Decimal
+    status: str
+    items_count: int
+
+class AdvanceOrder(AdvanceOrderSummary):
+    user_id: int
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    items: List[AdvanceOrderItem]
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from datetime import date
+from . import export, reports
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+def _run_report(report, start_date: date, end_date: date, store_id: Optional[int]):
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    try:
+        return report(start_date, end_date, store_id=store_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.post("/export")
+def export_sales(full: bool = Query(False, description="Rewrite every partition")):
+    """Bring the columnar analytics store up to date with the sales tables"""
+    try:
+        return export.export_sales(full=full)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/sales/summary")
+def get_summary(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store")
+):
+    return _run_report(reports.get_summary, start_date, end_date, store_id)
+
+@router.get("/sales/hourly")
+def get_hourly_curve(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store")
+):
+    return _run_report(reports.get_hourly_curve, start_date, end_date, store_id)
+
+@router.get("/sales/daily")
+def get_daily_totals(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store")
+):
+    return _run_report(reports.get_daily_totals, start_date, end_date, store_id)
+
+@router.get("/sales/basket-size")
+def get_basket_size(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store")
+):
+    return _run_report(reports.get_basket_size, start_date, end_date, store_id)
+
+@router.get("/sales/category-mix")
+def get_category_mix(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store")
+):
+    return _run_report(reports.get_category_mix, start_date, end_date, store_id)
+
+@router.get("/sales/payment-mix")
+def get_payment_mix(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store")
+):
+    return _run_report(reports.get_payment_mix, start_date, end_date, store_id)
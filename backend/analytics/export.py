@@ -0,0 +1,261 @@
+"""
+Incremental export of sales data into a columnar store for analytics.
+
+Sales, sale items and payments are written as Parquet files partitioned by
+store and month (hive layout: ``<table>/store_id=<id>/month=<YYYY-MM>``).
+Each partition carries a signature (row count, latest update, latest return)
+in ``manifest.json``; an export only rewrites partitions whose signature
+changed, so a nightly or hourly run touches the current month and whatever
+was voided or returned since the last run.
+
+Item and payment rows are denormalised with the sale date, status and the
+category / payment method name so reports never need to join.
+
+Usage:
+    python -m backend.analytics.export [--data-dir DIR] [--full]
+
+Requires the optional ``pyarrow`` dependency.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.database import engine
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency, only needed for analytics
+    pa = None
+    pq = None
+
+DATA_DIR = os.getenv(
+    'ANALYTICS_DATA_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+)
+MANIFEST_FILE = 'manifest.json'
+
+TABLES = ('sales', 'sale_items', 'payments')
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("Sales analytics requires pyarrow (pip install pyarrow numpy)")
+
+
+def _schemas() -> Dict[str, Any]:
+    # Partition keys (store_id, month) live in the directory names, not in the files
+    return {
+        'sales': pa.schema([
+            ('sale_id', pa.int64()),
+            ('pos_terminal_id', pa.int32()),
+            ('customer_id', pa.int32()),
+            ('user_id', pa.int32()),
+            ('sale_date', pa.timestamp('us')),
+            ('sub_total', pa.float64()),
+            ('discount_amount', pa.float64()),
+            ('tax_amount', pa.float64()),
+            ('grand_total', pa.float64()),
+            ('payment_status', pa.string()),
+        ]),
+        'sale_items': pa.schema([
+            ('sale_item_id', pa.int64()),
+            ('sale_id', pa.int64()),
+            ('sale_date', pa.timestamp('us')),
+            ('payment_status', pa.string()),
+            ('product_id', pa.int32()),
+            ('variant_id', pa.int32()),
+            ('category_id', pa.int32()),
+            ('category_name', pa.string()),
+            ('quantity', pa.int32()),
+            ('return_quantity', pa.int32()),
+            ('unit_price', pa.float64()),
+            ('discount_per_item', pa.float64()),
+            ('tax_per_item', pa.float64()),
+            ('line_total', pa.float64()),
+        ]),
+        'payments': pa.schema([
+            ('payment_id', pa.int64()),
+            ('sale_id', pa.int64()),
+            ('sale_date', pa.timestamp('us')),
+            ('payment_status', pa.string()),
+            ('payment_method_id', pa.int32()),
+            ('method_name', pa.string()),
+            ('amount', pa.float64()),
+        ]),
+    }
+
+
+# One query per table, each restricted to a single store/month partition
+_PARTITION_QUERIES = {
+    'sales': """
+        SELECT st.sale_id, st.pos_terminal_id, st.customer_id, st.user_id, st.sale_date,
+               st.sub_total, st.discount_amount, st.tax_amount, st.grand_total, st.payment_status
+        FROM sales_transactions st
+        WHERE st.store_id = %(store_id)s AND st.sale_date >= %(start)s AND st.sale_date < %(end)s
+        ORDER BY st.sale_date, st.sale_id
+    """,
+    'sale_items': """
+        SELECT si.sale_item_id, si.sale_id, st.sale_date, st.payment_status,
+               si.product_id, si.variant_id, p.category_id, c.category_name,
+               si.quantity, COALESCE(si.return_quantity, 0), si.unit_price,
+               si.discount_per_item, si.tax_per_item, si.line_total
+        FROM sale_items si
+        JOIN sales_transactions st ON st.sale_id = si.sale_id AND st.sale_date = si.sale_date
+        JOIN products p ON p.product_id = si.product_id
+        LEFT JOIN categories c ON c.category_id = p.category_id
+        WHERE st.store_id = %(store_id)s AND st.sale_date >= %(start)s AND st.sale_date < %(end)s
+          AND si.sale_date >= %(start)s AND si.sale_date < %(end)s
+        ORDER BY st.sale_date, si.sale_item_id
+    """,
+    'payments': """
+        SELECT pay.payment_id, pay.sale_id, st.sale_date, st.payment_status,
+               pay.payment_method_id, pm.method_name, pay.amount
+        FROM payments pay
+        JOIN sales_transactions st ON st.sale_id = pay.sale_id AND st.sale_date = pay.sale_date
+        JOIN payment_methods pm ON pm.payment_method_id = pay.payment_method_id
+        WHERE st.store_id = %(store_id)s AND st.sale_date >= %(start)s AND st.sale_date < %(end)s
+          AND pay.sale_date >= %(start)s AND pay.sale_date < %(end)s
+        ORDER BY st.sale_date, pay.payment_id
+    """,
+}
+
+_SIGNATURE_QUERY = """
+    SELECT st.store_id,
+           to_char(date_trunc('month', st.sale_date), 'YYYY-MM') AS month,
+           COUNT(*) AS sales,
+           MAX(st.updated_at) AS last_update,
+           MAX(r.last_return_id) AS last_return_id
+    FROM sales_transactions st
+    LEFT JOIN (
+        SELECT sale_id, MAX(return_id) AS last_return_id FROM returns GROUP BY sale_id
+    ) r ON r.sale_id = st.sale_id
+    WHERE st.sale_date IS NOT NULL
+    GROUP BY 1, 2
+"""
+
+
+def partition_path(data_dir: str, table: str, store_id: int, month: str) -> str:
+    return os.path.join(data_dir, table, f"store_id={store_id}", f"month={month}", "part-0.parquet")
+
+
+def month_bounds(month: str) -> Tuple[date, date]:
+    year, mon = (int(part) for part in month.split('-'))
+    start = date(year, mon, 1)
+    end = date(year + 1, 1, 1) if mon == 12 else date(year, mon + 1, 1)
+    return start, end
+
+
+def load_manifest(data_dir: str) -> Dict[str, str]:
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_atomic(path: str, write) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _save_manifest(data_dir: str, manifest: Dict[str, str]) -> None:
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    _write_atomic(os.path.join(data_dir, MANIFEST_FILE), write)
+
+
+def _to_table(rows: List[tuple], schema) -> Any:
+    columns = list(zip(*rows)) if rows else [[] for _ in schema.names]
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_floating(field.type):
+            # NUMERIC comes back as Decimal; analytics work in float64
+            values = [None if v is None else float(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _export_partition(cur, data_dir: str, store_id: int, month: str) -> Dict[str, int]:
+    start, end = month_bounds(month)
+    params = {'store_id': store_id, 'start': start, 'end': end}
+    counts = {}
+    for table, schema in _schemas().items():
+        cur.execute(_PARTITION_QUERIES[table], params)
+        arrow_table = _to_table(cur.fetchall(), schema)
+        _write_atomic(
+            partition_path(data_dir, table, store_id, month),
+            lambda tmp_path: pq.write_table(arrow_table, tmp_path, compression='zstd')
+        )
+        counts[table] = arrow_table.num_rows
+    return counts
+
+
+def export_sales(data_dir: Optional[str] = None, full: bool = False) -> Dict[str, Any]:
+    """
+    Bring the columnar store up to date.
+
+    Returns the partitions that were rewritten and the rows written per table.
+    """
+    require_pyarrow()
+    data_dir = data_dir or DATA_DIR
+    manifest = {} if full else load_manifest(data_dir)
+
+    summary: Dict[str, Any] = {
+        'partitions_checked': 0,
+        'partitions_exported': [],
+        'rows_written': {table: 0 for table in TABLES},
+    }
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        # One snapshot for the signature scan and every partition read
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        cur.execute(_SIGNATURE_QUERY)
+        signatures = {
+            f"{store_id}/{month}": f"{count}:{last_update}:{last_return_id}"
+            for store_id, month, count, last_update, last_return_id in cur.fetchall()
+        }
+        summary['partitions_checked'] = len(signatures)
+
+        for key, signature in sorted(signatures.items()):
+            if manifest.get(key) == signature:
+                continue
+            store_id, month = key.split('/')
+            counts = _export_partition(cur, data_dir, int(store_id), month)
+            for table, count in counts.items():
+                summary['rows_written'][table] += count
+            manifest[key] = signature
+            summary['partitions_exported'].append(key)
+            # Persist progress so an interrupted run resumes where it stopped
+            _save_manifest(data_dir, manifest)
+        conn.rollback()
+        cur.close()
+    finally:
+        conn.close()
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export sales data to the columnar analytics store")
+    parser.add_argument("--data-dir", default=None, help=f"Output directory (default {DATA_DIR})")
+    parser.add_argument("--full", action="store_true", help="Rewrite every partition")
+    args = parser.parse_args()
+    print(json.dumps(export_sales(args.data_dir, full=args.full), indent=2))
+
+
+if __name__ == "__main__":
+    main()
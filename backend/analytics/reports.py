@@ -0,0 +1,198 @@
+"""
+Date-range sales reports computed from the columnar store.
+
+Each report reads only the columns it needs from the store/month partitions
+that overlap the requested range, then aggregates with vectorised NumPy /
+Arrow group-bys. Postgres is not touched; run ``backend.analytics.export`` to
+refresh the data. Voided sales are excluded, matching ``get_sales_stats``.
+"""
+
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+
+from .export import DATA_DIR, pa, require_pyarrow
+
+try:
+    import numpy as np
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:  # optional dependency, only needed for analytics
+    np = None
+    pc = None
+    ds = None
+
+BASKET_SIZE_BUCKETS = 10  # units per basket; the last bucket is "10 or more"
+
+
+def _load(
+    table: str,
+    columns: List[str],
+    start_date: date,
+    end_date: date,
+    store_id: Optional[int] = None,
+    data_dir: Optional[str] = None
+):
+    """Read the given columns of one table for [start_date, end_date] (inclusive)"""
+    require_pyarrow()
+    if np is None:
+        raise RuntimeError("Sales analytics requires numpy (pip install numpy)")
+    path = os.path.join(data_dir or DATA_DIR, table)
+    if not os.path.isdir(path):
+        raise RuntimeError("Analytics store is empty; run python -m backend.analytics.export first")
+
+    dataset = ds.dataset(
+        path,
+        format='parquet',
+        partitioning=ds.partitioning(
+            pa.schema([('store_id', pa.int32()), ('month', pa.string())]),
+            flavor='hive'
+        )
+    )
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(end_date + timedelta(days=1), time.min)
+    # Partition keys prune whole directories; sale_date prunes row groups
+    condition = (
+        (ds.field('month') >= start_date.strftime('%Y-%m'))
+        & (ds.field('month') <= end_date.strftime('%Y-%m'))
+        & (ds.field('sale_date') >= pa.scalar(start, type=pa.timestamp('us')))
+        & (ds.field('sale_date') < pa.scalar(end, type=pa.timestamp('us')))
+        & (ds.field('payment_status') != 'VOID')
+    )
+    if store_id is not None:
+        condition = condition & (ds.field('store_id') == store_id)
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+def _money(value: float) -> float:
+    return round(float(value), 2)
+
+
+def _column(table, name: str, fill=0):
+    return table.column(name).fill_null(fill).to_numpy()
+
+
+def get_summary(start_date: date, end_date: date, store_id: Optional[int] = None,
+                data_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Totals for the range, same figures as /sales/stats/summary"""
+    sales = _load('sales', ['grand_total', 'tax_amount', 'discount_amount'],
+                  start_date, end_date, store_id, data_dir)
+    grand_total = _column(sales, 'grand_total')
+    count = len(grand_total)
+    return {
+        "total_sales": _money(grand_total.sum()),
+        "sales_count": count,
+        "average_sale": _money(grand_total.mean()) if count else 0.0,
+        "total_tax": _money(_column(sales, 'tax_amount').sum()),
+        "total_discount": _money(_column(sales, 'discount_amount').sum()),
+    }
+
+
+def get_hourly_curve(start_date: date, end_date: date, store_id: Optional[int] = None,
+                     data_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Sales count and revenue per hour of day over the range"""
+    sales = _load('sales', ['sale_date', 'grand_total'], start_date, end_date, store_id, data_dir)
+    hours = pc.hour(sales.column('sale_date')).to_numpy(zero_copy_only=False).astype(np.int64)
+    counts = np.bincount(hours, minlength=24)
+    revenue = np.bincount(hours, weights=_column(sales, 'grand_total'), minlength=24)
+    return [
+        {"hour": hour, "sales_count": int(counts[hour]), "revenue": _money(revenue[hour])}
+        for hour in range(24)
+    ]
+
+
+def get_daily_totals(start_date: date, end_date: date, store_id: Optional[int] = None,
+                     data_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Sales count, revenue and tax per calendar day (days without sales are omitted)"""
+    sales = _load('sales', ['sale_date', 'grand_total', 'tax_amount'],
+                  start_date, end_date, store_id, data_dir)
+    days = sales.column('sale_date').to_numpy(zero_copy_only=False).astype('datetime64[D]')
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(unique_days))
+    revenue = np.bincount(inverse, weights=_column(sales, 'grand_total'), minlength=len(unique_days))
+    tax = np.bincount(inverse, weights=_column(sales, 'tax_amount'), minlength=len(unique_days))
+    return [
+        {
+            "date": str(day),
+            "sales_count": int(counts[i]),
+            "revenue": _money(revenue[i]),
+            "tax": _money(tax[i]),
+        }
+        for i, day in enumerate(unique_days)
+    ]
+
+
+def get_basket_size(start_date: date, end_date: date, store_id: Optional[int] = None,
+                    data_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Units and lines per basket, with a units-per-basket histogram"""
+    items = _load('sale_items', ['sale_id', 'quantity', 'line_total'],
+                  start_date, end_date, store_id, data_dir)
+    sale_ids = _column(items, 'sale_id')
+    _, inverse = np.unique(sale_ids, return_inverse=True)
+    baskets = int(inverse.max()) + 1 if len(inverse) else 0
+    units = np.bincount(inverse, weights=_column(items, 'quantity'), minlength=baskets)
+    lines = np.bincount(inverse, minlength=baskets)
+    values = np.bincount(inverse, weights=_column(items, 'line_total'), minlength=baskets)
+
+    histogram = np.bincount(
+        np.clip(units.astype(np.int64), 1, BASKET_SIZE_BUCKETS) - 1,
+        minlength=BASKET_SIZE_BUCKETS
+    ) if baskets else np.zeros(BASKET_SIZE_BUCKETS, dtype=np.int64)
+    return {
+        "baskets": baskets,
+        "average_units": round(float(units.mean()), 2) if baskets else 0.0,
+        "median_units": float(np.median(units)) if baskets else 0.0,
+        "average_lines": round(float(lines.mean()), 2) if baskets else 0.0,
+        "average_value": _money(values.mean()) if baskets else 0.0,
+        "units_histogram": [
+            {
+                "units": f"{i + 1}+" if i + 1 == BASKET_SIZE_BUCKETS else str(i + 1),
+                "baskets": int(histogram[i]),
+            }
+            for i in range(BASKET_SIZE_BUCKETS)
+        ],
+    }
+
+
+def get_category_mix(start_date: date, end_date: date, store_id: Optional[int] = None,
+                     data_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Units, net units and revenue per category, largest revenue first"""
+    items = _load('sale_items', ['category_id', 'category_name', 'quantity', 'return_quantity', 'line_total'],
+                  start_date, end_date, store_id, data_dir)
+    grouped = items.group_by(['category_id', 'category_name']).aggregate([
+        ('quantity', 'sum'),
+        ('return_quantity', 'sum'),
+        ('line_total', 'sum'),
+    ]).sort_by([('line_total_sum', 'descending')])
+    total_revenue = float(pc.sum(grouped.column('line_total_sum')).as_py() or 0)
+    return [
+        {
+            "category_id": row['category_id'],
+            "category_name": row['category_name'] or "Uncategorized",
+            "units": int(row['quantity_sum'] or 0),
+            "net_units": int((row['quantity_sum'] or 0) - (row['return_quantity_sum'] or 0)),
+            "revenue": _money(row['line_total_sum'] or 0),
+            "revenue_share": round(float(row['line_total_sum'] or 0) / total_revenue, 4) if total_revenue else 0.0,
+        }
+        for row in grouped.to_pylist()
+    ]
+
+
+def get_payment_mix(start_date: date, end_date: date, store_id: Optional[int] = None,
+                    data_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Payment count and amount per payment method, largest amount first"""
+    payments = _load('payments', ['payment_method_id', 'method_name', 'amount'],
+                     start_date, end_date, store_id, data_dir)
+    grouped = payments.group_by(['payment_method_id', 'method_name']).aggregate([
+        ('amount', 'sum'),
+        ('amount', 'count'),
+    ]).sort_by([('amount_sum', 'descending')])
+    return [
+        {
+            "payment_method_id": row['payment_method_id'],
+            "method_name": row['method_name'],
+            "payments": int(row['amount_count']),
+            "amount": _money(row['amount_sum'] or 0),
+        }
+        for row in grouped.to_pylist()
+    ]
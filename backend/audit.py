@@ -0,0 +1,223 @@
+"""
+Audit trail writer for the audit_logs table.
+
+Events are either written synchronously (durable) or handed to a bounded
+in-process queue that a background thread drains in batches with
+``execute_values``, so routine events cost the request nothing but a queue
+put. Which events are durable is configurable:
+
+    AUDIT_MODE          async (default) | sync (every event durable) | off
+    AUDIT_SYNC_EVENTS   comma-separated event types that are always durable
+                        (default: voids and price changes, see DEFAULT_SYNC_EVENTS)
+    AUDIT_QUEUE_SIZE    bounded queue capacity (default 10000)
+    AUDIT_BATCH_SIZE    max rows per INSERT (default 500)
+    AUDIT_FLUSH_INTERVAL  seconds between flushes when idle (default 1.0)
+
+A durable event recorded with a ``db`` session (or a DBAPI ``cursor``, for
+the raw-connection CRUD modules) is inserted in the caller's transaction, so
+it commits or rolls back with the change it describes; record it before the
+commit. One recorded without either is written on its own connection; as
+its change has already committed, a failed write is logged, not raised.
+If the queue is full, the event is written synchronously rather than dropped.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+from sqlalchemy import text
+
+from backend.database import engine
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYNC_EVENTS = (
+    "SALE_VOID",
+    "PRODUCT_PRICE_UPDATE",
+    "PRODUCT_BULK_UPDATE",
+    "PRODUCT_BULK_PRICE_UPDATE",
+    "TAX_CATEGORY_UPDATE",
+)
+
+AUDIT_MODE = os.getenv("AUDIT_MODE", "async").lower()
+SYNC_EVENTS = frozenset(
+    event.strip().upper()
+    for event in os.getenv("AUDIT_SYNC_EVENTS", ",".join(DEFAULT_SYNC_EVENTS)).split(",")
+    if event.strip()
+)
+QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+
+# (user_id, event_type, event_details, timestamp, ip_address)
+AuditRow = Tuple[Optional[int], str, Optional[str], datetime, Optional[str]]
+
+_INSERT_SQL = "INSERT INTO audit_logs (user_id, event_type, event_details, timestamp, ip_address) VALUES %s"
+
+_queue: "queue.Queue[AuditRow]" = queue.Queue(maxsize=QUEUE_SIZE)
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+_stats_lock = threading.Lock()
+_stats = {"queued": 0, "written": 0, "written_sync": 0, "overflow_sync": 0, "failed": 0}
+
+
+def _count(key: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def is_durable(event_type: str) -> bool:
+    return AUDIT_MODE == "sync" or event_type.upper() in SYNC_EVENTS
+
+
+def _write_rows(rows: List[AuditRow]) -> None:
+    """Insert rows on a pooled connection and commit"""
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        execute_values(cur, _INSERT_SQL, rows, page_size=BATCH_SIZE)
+        conn.commit()
+        cur.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def record(
+    event_type: str,
+    details: Optional[Dict[str, Any]] = None,
+    user_id: Optional[int] = None,
+    ip_address: Optional[str] = None,
+    durable: Optional[bool] = None,
+    db=None,
+    cursor=None
+) -> None:
+    """
+    Record an audit event.
+
+    durable=None picks the mode from the event type. Durable events go into
+    the caller's transaction when ``db`` or ``cursor`` is given, else straight
+    to the table; everything else is queued for the background writer.
+    """
+    if AUDIT_MODE == "off":
+        return
+    row: AuditRow = (
+        user_id,
+        event_type,
+        json.dumps(details, default=str) if details is not None else None,
+        datetime.now(),
+        ip_address,
+    )
+    if durable is None:
+        durable = is_durable(event_type)
+
+    if durable:
+        if db is not None:
+            db.execute(
+                text("""
+                    INSERT INTO audit_logs (user_id, event_type, event_details, timestamp, ip_address)
+                    VALUES (:user_id, :event_type, :event_details, :timestamp, :ip_address)
+                """),
+                dict(zip(("user_id", "event_type", "event_details", "timestamp", "ip_address"), row))
+            )
+        elif cursor is not None:
+            execute_values(cursor, _INSERT_SQL, [row])
+        else:
+            try:
+                _write_rows([row])
+            except Exception:
+                _count("failed")
+                logger.exception("Failed to write audit event %s", event_type)
+                return
+        _count("written_sync")
+        return
+
+    if _thread is None and not _stop.is_set():
+        # Entry points without startup hooks (main_exe) start the writer lazily
+        start()
+    try:
+        _queue.put_nowait(row)
+        _count("queued")
+    except queue.Full:
+        # Never drop audit events: degrade to a synchronous write under overload
+        _count("overflow_sync")
+        try:
+            _write_rows([row])
+        except Exception:
+            _count("failed")
+            logger.exception("Failed to write audit event %s", event_type)
+
+
+def _drain(limit: int) -> List[AuditRow]:
+    rows = []
+    while len(rows) < limit:
+        try:
+            rows.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return rows
+
+
+def flush() -> int:
+    """Write everything currently queued; returns the number of rows written"""
+    written = 0
+    while True:
+        rows = _drain(BATCH_SIZE)
+        if not rows:
+            return written
+        try:
+            _write_rows(rows)
+            written += len(rows)
+            _count("written", len(rows))
+        except Exception:
+            _count("failed", len(rows))
+            logger.exception("Failed to write %d audit events", len(rows))
+
+
+def _run() -> None:
+    while not _stop.is_set():
+        try:
+            first = _queue.get(timeout=FLUSH_INTERVAL)
+        except queue.Empty:
+            continue
+        # Put the row back at the head of the next batch
+        rows = [first] + _drain(BATCH_SIZE - 1)
+        try:
+            _write_rows(rows)
+            _count("written", len(rows))
+        except Exception:
+            _count("failed", len(rows))
+            logger.exception("Failed to write %d audit events", len(rows))
+    flush()
+
+
+def start() -> None:
+    """Start the background writer (idempotent)"""
+    global _thread
+    if AUDIT_MODE == "off" or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="audit-writer", daemon=True)
+    _thread.start()
+
+
+def stop(timeout: float = 10.0) -> None:
+    """Stop the background writer after flushing the queue"""
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
+    flush()
+
+
+def stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return {**_stats, "pending": _queue.qsize(), "mode": AUDIT_MODE}
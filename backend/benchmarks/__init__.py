@@ -0,0 +1,7 @@
+"""
+Microbenchmarks for CPU hot paths that do not need a database.
+
+Usage:
+    pip install pytest pytest-benchmark
+    python -m pytest backend/benchmarks --benchmark-group-by=group
+"""
@@ -0,0 +1,306 @@
+"""
+Row-to-JSON cost for the large listing responses at 1k, 10k and 100k rows.
+
+Each shape is measured along these paths:
+
+* ``fastapi``        what a ``response_model`` endpoint does by default:
+                     build the schema objects, re-validate them, dump them to
+                     JSON-ready objects and render a ``JSONResponse``.
+* ``default_class``  the same with ``FastJSONResponse`` as the app's
+                     ``default_response_class``.
+* ``model_response`` ``fastjson.encode_model``: one pydantic-core pass,
+                     byte-for-byte the same JSON as ``fastapi``.
+* ``orjson``         ``fastjson.dumps`` on the already-shaped dicts, with no
+                     validation at all.
+
+Raw RealDictCursor rows, as the bulk-data endpoints return them without a
+response model, are measured through ``jsonable_encoder`` + ``JSONResponse``
+against ``fastjson.response``.
+
+Usage:
+    python -m pytest backend/benchmarks/test_serialization.py --benchmark-group-by=group
+    python -m pytest backend/benchmarks/test_serialization.py -k "10000" --benchmark-columns=mean,stddev,ops
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import List
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from backend import fastjson
+from backend.inventory import schemas as inventory_schemas
+from backend.inventory.crud import inventory_row_to_item
+from backend.sales import schemas as sales_schemas
+
+SIZES = [1_000, 10_000, 100_000]
+BASE_TIME = datetime(2024, 1, 1, 9, 30)
+
+
+def inventory_rows(count: int) -> List[dict]:
+    """Rows as get_inventory_with_details reads them from RealDictCursor"""
+    rows = []
+    for i in range(count):
+        has_variant = i % 3 == 0
+        stamp = BASE_TIME + timedelta(minutes=i)
+        rows.append({
+            'inventory_id': i + 1,
+            'product_id': i // 3 + 1,
+            'variant_id': i + 1 if has_variant else None,
+            'store_id': i % 4 + 1,
+            'current_stock': i % 250,
+            'reserved_stock': i % 7,
+            'last_reorder_date': stamp,
+            'last_stock_take_date': None,
+            'updated_at': stamp,
+            'product_code': f"P{i:07d}",
+            'product_name': f"Product {i}",
+            'description': "Synthetic benchmark product",
+            'category_id': i % 20 + 1,
+            'brand_id': i % 50 + 1,
+            'supplier_id': i % 10 + 1,
+            'base_price': Decimal("120.50"),
+            'retail_price': Decimal("199.99"),
+            'tax_category_id': 1,
+            'product_active': True,
+            'barcode': f"89{i:011d}",
+            'unit_of_measure': "pcs",
+            'weight': Decimal("0.250"),
+            'reorder_level': 10,
+            'max_stock_level': 500,
+            'product_created_at': BASE_TIME,
+            'product_updated_at': stamp,
+            'size': "M" if has_variant else None,
+            'color': "Black" if has_variant else None,
+            'sku_suffix': "-M-BLK" if has_variant else None,
+            'variant_barcode': f"79{i:011d}" if has_variant else None,
+            'variant_retail_price': Decimal("209.99") if has_variant else None,
+            'variant_base_price': Decimal("125.00") if has_variant else None,
+            'variant_active': True if has_variant else None,
+            'store_name': f"Store {i % 4 + 1}",
+            'address': "1 Main Boulevard",
+            'phone_number': "042-0000000",
+            'email': "store@example.com",
+            'city': "Lahore",
+            'province': "Punjab",
+            'postal_code': "54000",
+            'store_active': True,
+            'created_at': BASE_TIME,
+        })
+    return rows
+
+
+def sales_transactions(count: int) -> List[dict]:
+    """SalesTransaction dicts with three items and one payment each"""
+    sales = []
+    for i in range(count):
+        stamp = BASE_TIME + timedelta(seconds=i * 30)
+        sale_id = i + 1
+        items = [{
+            'sale_item_id': sale_id * 3 + n,
+            'sale_id': sale_id,
+            'product_id': n + 1,
+            'variant_id': None,
+            'quantity': n + 1,
+            'unit_price': Decimal("199.99"),
+            'discount_per_item': Decimal("0.00"),
+            'tax_per_item': Decimal("32.00"),
+            'line_total': Decimal("199.99") * (n + 1),
+            'return_quantity': 0,
+            'product_name': f"Product {n}",
+            'product_code': f"P{n:07d}",
+        } for n in range(3)]
+        sales.append({
+            'sale_id': sale_id,
+            'invoice_number': f"INV-{sale_id:08d}",
+            'store_id': i % 4 + 1,
+            'pos_terminal_id': i % 12 + 1,
+            'customer_id': None,
+            'user_id': i % 30 + 1,
+            'sale_date': stamp,
+            'sub_total': Decimal("1199.94"),
+            'tax_amount': Decimal("192.00"),
+            'discount_amount': Decimal("0.00"),
+            'grand_total': Decimal("1391.94"),
+            'amount_paid': Decimal("1400.00"),
+            'change_given': Decimal("8.06"),
+            'payment_status': sales_schemas.PaymentStatus.PAID,
+            'notes': None,
+            'created_at': stamp,
+            'updated_at': stamp,
+            'sale_items': items,
+            'payments': [{
+                'payment_id': sale_id,
+                'sale_id': sale_id,
+                'payment_method_id': 1,
+                'amount': Decimal("1400.00"),
+                'transaction_reference': None,
+                'payment_date': stamp,
+                'method_name': "Cash",
+            }],
+            'customer_name': None,
+            'cashier_name': "Benchmark Cashier",
+            'store_name': f"Store {i % 4 + 1}",
+        })
+    return sales
+
+
+def fastapi_render(tp, content, response_class=JSONResponse) -> bytes:
+    """The response_model path of FastAPI's request handler"""
+    field = create_response_field(name="Response", type_=tp)
+    body = asyncio.run(serialize_response(field=field, response_content=content))
+    return response_class(body).body
+
+
+def _rounds(size: int) -> int:
+    return 3 if size >= 100_000 else 10
+
+
+def _run(benchmark, size, func, *args):
+    return benchmark.pedantic(func, args=args, rounds=_rounds(size), iterations=1, warmup_rounds=1)
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=str)
+def inventory_items(request):
+    return request.param, [inventory_row_to_item(row) for row in inventory_rows(request.param)]
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=str)
+def sales(request):
+    return request.param, sales_transactions(request.param)
+
+
+@pytest.fixture(scope="module")
+def summaries(sales):
+    size, content = sales
+    return size, [sales_schemas.SalesTransactionSummary(
+        sale_id=sale['sale_id'],
+        invoice_number=sale['invoice_number'],
+        sale_date=sale['sale_date'],
+        customer_name=sale['customer_name'],
+        grand_total=sale['grand_total'],
+        payment_status=sale['payment_status'],
+        items_count=len(sale['sale_items']),
+        cashier_name=sale['cashier_name'],
+    ) for sale in content]
+
+
+# Inventory: GET /inventory/
+
+def test_inventory_row_transform(benchmark):
+    rows = inventory_rows(10_000)
+    benchmark.group = "inventory row transform 10000"
+    result = benchmark(lambda: [inventory_row_to_item(row) for row in rows])
+    assert len(result) == 10_000
+
+
+def test_inventory_fastapi(benchmark, inventory_items):
+    size, items = inventory_items
+    tp = List[inventory_schemas.InventoryWithDetails]
+    benchmark.group = f"inventory {size}"
+    _run(benchmark, size, lambda: fastapi_render(tp, [inventory_schemas.InventoryWithDetails(**item) for item in items]))
+
+
+def test_inventory_default_class(benchmark, inventory_items):
+    size, items = inventory_items
+    tp = List[inventory_schemas.InventoryWithDetails]
+    benchmark.group = f"inventory {size}"
+    _run(benchmark, size, lambda: fastapi_render(
+        tp, [inventory_schemas.InventoryWithDetails(**item) for item in items], fastjson.FastJSONResponse))
+
+
+def test_inventory_model_response(benchmark, inventory_items):
+    size, items = inventory_items
+    tp = List[inventory_schemas.InventoryWithDetails]
+    benchmark.group = f"inventory {size}"
+    body = _run(benchmark, size, fastjson.encode_model, tp, items)
+    assert json.loads(body) == json.loads(fastapi_render(tp, items))
+
+
+def test_inventory_orjson(benchmark, inventory_items):
+    size, items = inventory_items
+    benchmark.group = f"inventory {size}"
+    body = _run(benchmark, size, fastjson.dumps, items)
+    # Raw crud dicts, for comparison only: no endpoint serves them, since they
+    # carry top-level ids InventoryWithDetails drops and skip its validation
+    expected = json.loads(fastapi_render(List[inventory_schemas.InventoryWithDetails], items[:100]))
+    actual = [{k: v for k, v in item.items() if k not in ('product_id', 'variant_id', 'store_id')}
+              for item in json.loads(body)[:100]]
+    assert actual == expected
+
+
+# Sales: GET /sales/{sale_id} shape, as a listing
+
+def test_sales_fastapi(benchmark, sales):
+    size, content = sales
+    tp = List[sales_schemas.SalesTransaction]
+    benchmark.group = f"sales transactions {size}"
+    _run(benchmark, size, fastapi_render, tp, content)
+
+
+def test_sales_default_class(benchmark, sales):
+    size, content = sales
+    tp = List[sales_schemas.SalesTransaction]
+    benchmark.group = f"sales transactions {size}"
+    body = _run(benchmark, size, fastapi_render, tp, content, fastjson.FastJSONResponse)
+    assert json.loads(body) == json.loads(fastapi_render(tp, content))
+
+
+def test_sales_model_response(benchmark, sales):
+    size, content = sales
+    tp = List[sales_schemas.SalesTransaction]
+    benchmark.group = f"sales transactions {size}"
+    body = _run(benchmark, size, fastjson.encode_model, tp, content)
+    assert json.loads(body) == json.loads(fastapi_render(tp, content))
+
+
+def test_sales_orjson(benchmark, sales):
+    size, content = sales
+    benchmark.group = f"sales transactions {size}"
+    _run(benchmark, size, fastjson.dumps, content)
+
+
+# Sales: GET /sales/ summaries, built as schema objects by the endpoint
+
+def test_sales_summary_model_response(benchmark, summaries):
+    size, summaries = summaries
+    tp = List[sales_schemas.SalesTransactionSummary]
+    benchmark.group = f"sales summaries {size}"
+    body = _run(benchmark, size, fastjson.encode_model, tp, summaries)
+    assert json.loads(body) == json.loads(fastapi_render(tp, summaries))
+
+
+def test_sales_summary_fastapi(benchmark, summaries):
+    size, summaries = summaries
+    tp = List[sales_schemas.SalesTransactionSummary]
+    benchmark.group = f"sales summaries {size}"
+    _run(benchmark, size, fastapi_render, tp, summaries)
+
+
+# Bulk data: raw rows without a response model
+
+@pytest.fixture(scope="module", params=SIZES, ids=str)
+def raw_rows(request):
+    return request.param, inventory_rows(request.param)
+
+
+def test_raw_rows_jsonable_encoder(benchmark, raw_rows):
+    size, rows = raw_rows
+    benchmark.group = f"raw rows {size}"
+    _run(benchmark, size, lambda: JSONResponse(jsonable_encoder(rows)).body)
+
+
+def test_raw_rows_fastjson(benchmark, raw_rows):
+    size, rows = raw_rows
+    benchmark.group = f"raw rows {size}"
+    body = _run(benchmark, size, lambda: fastjson.response(rows).body)
+    assert json.loads(body) == json.loads(JSONResponse(jsonable_encoder(rows)).body)
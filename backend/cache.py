@@ -0,0 +1,58 @@
+"""
+In-process cache for frequently polled query results.
+
+Entries live in named namespaces so CRUD write paths can drop everything a
+change affects with a single ``invalidate(namespace)`` call. Every entry also
+carries a TTL, which bounds staleness when another server process (or a direct
+database edit) changes the underlying rows.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_TTL = 60.0
+
+_lock = threading.RLock()
+_namespaces: Dict[str, Dict[Hashable, Tuple[float, Any]]] = {}
+
+
+def get(namespace: str, key: Hashable = None) -> Optional[Any]:
+    """Return a cached value, or None if it is missing or expired"""
+    with _lock:
+        entry = _namespaces.get(namespace, {}).get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del _namespaces[namespace][key]
+            return None
+        return value
+
+
+def put(namespace: str, value: Any, key: Hashable = None, ttl: float = DEFAULT_TTL) -> Any:
+    """Store a value under namespace/key for ttl seconds"""
+    with _lock:
+        _namespaces.setdefault(namespace, {})[key] = (time.monotonic() + ttl, value)
+    return value
+
+
+def get_or_load(namespace: str, loader: Callable[[], Any], key: Hashable = None, ttl: float = DEFAULT_TTL) -> Any:
+    """Return the cached value or compute it with loader() and cache the result"""
+    value = get(namespace, key)
+    if value is None:
+        value = put(namespace, loader(), key=key, ttl=ttl)
+    return value
+
+
+def invalidate(*namespaces: str) -> None:
+    """Drop every entry in the given namespaces"""
+    with _lock:
+        for namespace in namespaces:
+            _namespaces.pop(namespace, None)
+
+
+def clear() -> None:
+    """Drop all cached entries"""
+    with _lock:
+        _namespaces.clear()
@@ -0,0 +1,175 @@
+"""
+Response compression for the API.
+
+``CompressionMiddleware`` compresses JSON and text responses above a size
+threshold with brotli (``pip install brotli``) or gzip, whichever the client
+accepts, brotli first. The large listings (``/inventory/bulk-data``,
+``/settings/bulk-data``, ``/inventory/``, ``/products/``, ``/sales/``) shrink
+to a fraction of their size, which is what matters to Electron clients on
+store Wi-Fi.
+
+Compressed bodies are kept in a byte-bounded LRU keyed by a digest of the
+uncompressed body, so a payload served again unchanged (reference data from
+``backend.cache``, repeated bulk-data polls) is only hashed, not recompressed.
+Compression itself runs in the threadpool to keep multi-megabyte bodies off
+the event loop.
+
+    COMPRESSION_ENABLED     1 (default) | 0
+    COMPRESSION_MIN_SIZE    smallest body compressed, in bytes (default 1024)
+    GZIP_LEVEL              gzip compresslevel (default 6)
+    BROTLI_QUALITY          brotli quality (default 5)
+    COMPRESSION_CACHE_MB    compressed bodies kept for reuse (default 64)
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENABLED = os.getenv("COMPRESSION_ENABLED", "1") != "0"
+MINIMUM_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+CACHE_BYTES = int(float(os.getenv("COMPRESSION_CACHE_MB", "64")) * 1024 * 1024)
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+_lock = threading.Lock()
+_cache: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+_cache_size = 0
+_hits = 0
+_misses = 0
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, or None"""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                pass
+        accepted.add(name.strip().lower())
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def _encode(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime=0 keeps identical bodies byte-identical once compressed
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress body, reusing the cached result for an identical body"""
+    global _cache_size, _hits, _misses
+    key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            _hits += 1
+            return cached
+        _misses += 1
+
+    compressed = _encode(body, encoding)
+    if len(compressed) > CACHE_BYTES:
+        return compressed
+    with _lock:
+        if key not in _cache:
+            _cache[key] = compressed
+            _cache_size += len(compressed)
+            while _cache_size > CACHE_BYTES:
+                _, evicted = _cache.popitem(last=False)
+                _cache_size -= len(evicted)
+    return compressed
+
+
+def cache_info() -> Dict[str, int]:
+    """Hit/miss counters and size of the compressed-body cache"""
+    with _lock:
+        return {"hits": _hits, "misses": _misses, "entries": len(_cache), "bytes": _cache_size}
+
+
+def clear() -> None:
+    """Drop all cached compressed bodies"""
+    global _cache_size, _hits, _misses
+    with _lock:
+        _cache.clear()
+        _cache_size = _hits = _misses = 0
+
+
+def _compressible(headers: Headers, body: bytes, minimum_size: int) -> bool:
+    if len(body) < minimum_size or "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware that compresses complete response bodies. Streaming
+    responses (more than one body message) are passed through unchanged.
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            if message.get("more_body", False) or not _compressible(headers, body, self.minimum_size):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = await run_in_threadpool(compress, body, encoding)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            start["headers"] = headers.raw
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,94 @@
+"""
+Fixtures for the tests that run against a live database. Those modules skip
+themselves unless POS_TEST_DATABASE names the database to use.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def store_refs():
+    """Ids to ring up a sale with: a store with a terminal, a cashier, a stocked product and a tender"""
+    from sqlalchemy import text
+
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        row = db.execute(text("""
+            SELECT i.store_id, i.product_id, t.terminal_id, u.user_id
+            FROM inventory i
+            JOIN pos_terminals t ON t.store_id = i.store_id
+            JOIN users u ON u.store_id = i.store_id
+            WHERE i.variant_id IS NULL AND i.current_stock - i.reserved_stock > 10
+            ORDER BY i.product_id
+            LIMIT 1
+        """)).first()
+        payment_method_id = db.execute(text(
+            "SELECT payment_method_id FROM payment_methods ORDER BY payment_method_id LIMIT 1"
+        )).scalar()
+    finally:
+        db.close()
+    if row is None or payment_method_id is None:
+        pytest.skip("no stocked product with a terminal and user in the test database")
+    return {**row._asdict(), "payment_method_id": payment_method_id}
+
+
+@pytest.fixture
+def discard_sales():
+    """
+    Sale ids a test committed. Afterwards the sales come back out: buckets,
+    returns, SALE/RETURN movements and the stock they moved, payments, lines,
+    offline claims and invoice numbers.
+    """
+    from sqlalchemy import text
+
+    from backend.database import SessionLocal
+    from backend.returns.crud import rebuild_returns_rollups
+    from backend.sales.crud import apply_sale_to_buckets
+
+    sale_ids = []
+    yield sale_ids
+    if not sale_ids:
+        return
+
+    db = SessionLocal()
+    try:
+        params = {"sale_ids": sale_ids}
+        sales = db.execute(text("""
+            SELECT sale_id, sale_date, invoice_number, payment_status FROM sales_transactions
+            WHERE sale_id = ANY(:sale_ids)
+        """), params).all()
+        for sale in sales:
+            if sale.payment_status != "VOID":
+                apply_sale_to_buckets(db, sale.sale_id, sale.sale_date, sign=-1)
+        db.execute(text("""
+            UPDATE inventory i
+            SET current_stock = i.current_stock - m.quantity
+            FROM (
+                SELECT store_id, product_id, variant_id, SUM(quantity) AS quantity
+                FROM inventory_movements
+                WHERE movement_type IN ('SALE', 'RETURN') AND reference_id = ANY(:sale_ids)
+                GROUP BY 1, 2, 3
+            ) m
+            WHERE i.store_id = m.store_id AND i.product_id = m.product_id
+              AND i.variant_id IS NOT DISTINCT FROM m.variant_id
+        """), params)
+        db.execute(text("""
+            DELETE FROM inventory_movements
+            WHERE movement_type IN ('SALE', 'RETURN') AND reference_id = ANY(:sale_ids)
+        """), params)
+        returns = db.execute(text("""
+            DELETE FROM return_items
+            WHERE return_id IN (SELECT return_id FROM returns WHERE sale_id = ANY(:sale_ids))
+        """), params).rowcount
+        returns += db.execute(text("DELETE FROM returns WHERE sale_id = ANY(:sale_ids)"), params).rowcount
+        for table in ("payments", "sale_items", "offline_sales", "sales_transactions"):
+            db.execute(text(f"DELETE FROM {table} WHERE sale_id = ANY(:sale_ids)"), params)
+        db.execute(text("DELETE FROM invoice_numbers WHERE invoice_number = ANY(:invoice_numbers)"),
+                   {"invoice_numbers": [sale.invoice_number for sale in sales]})
+        db.commit()
+        if returns:
+            rebuild_returns_rollups(db)
+    finally:
+        db.close()
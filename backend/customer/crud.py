@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 from typing import List, Optional
+from backend import cache
 from . import models, schemas
 
+STATS_CACHE = "customer_stats"
+
 def get_customers(db: Session, skip: int = 0, limit: int = 100, search: Optional[str] = None, is_active: Optional[bool] = None):
     query = db.query(models.Customer)
     
@@ -38,6 +41,7 @@ def create_customer(db: Session, customer: schemas.CustomerCreate):
     db.add(db_customer)
     db.commit()
     db.refresh(db_customer)
+    cache.invalidate(STATS_CACHE)
     return db_customer
 
 def update_customer(db: Session, customer_id: int, customer: schemas.CustomerUpdate):
@@ -48,6 +52,7 @@ def update_customer(db: Session, customer_id: int, customer: schemas.CustomerUpd
             setattr(db_customer, field, value)
         db.commit()
         db.refresh(db_customer)
+        cache.invalidate(STATS_CACHE)
     return db_customer
 
 def delete_customer(db: Session, customer_id: int):
@@ -55,19 +60,27 @@ def delete_customer(db: Session, customer_id: int):
     if db_customer:
         db.delete(db_customer)
         db.commit()
+        cache.invalidate(STATS_CACHE)
         return True
     return False
 
 def get_customer_stats(db: Session):
-    total_customers = db.query(func.count(models.Customer.customer_id)).scalar()
-    active_customers = db.query(func.count(models.Customer.customer_id)).filter(models.Customer.is_active == True).scalar()
-    loyalty_members = db.query(func.count(models.Customer.customer_id)).filter(models.Customer.loyalty_member_id.isnot(None)).scalar()
+    return cache.get_or_load(STATS_CACHE, lambda: _compute_customer_stats(db))
+
+def _compute_customer_stats(db: Session):
+    # One pass over customers; each counter is a FILTERed aggregate
+    customer_id = models.Customer.customer_id
+    row = db.query(
+        func.count(customer_id).label("total_customers"),
+        func.count(customer_id).filter(models.Customer.is_active == True).label("active_customers"),
+        func.count(customer_id).filter(models.Customer.loyalty_member_id.isnot(None)).label("loyalty_members")
+    ).one()
     
     return {
-        "total_customers": total_customers,
-        "active_customers": active_customers,
-        "loyalty_members": loyalty_members,
-        "inactive_customers": total_customers - active_customers
+        "total_customers": row.total_customers,
+        "active_customers": row.active_customers,
+        "loyalty_members": row.loyalty_members,
+        "inactive_customers": row.total_customers - row.active_customers
     }
 
 def get_loyalty_points_history(db: Session, customer_id: int, skip: int = 0, limit: int = 50):
@@ -27,7 +27,7 @@ class LoyaltyPointsHistory(Base):
 
     history_id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.customer_id"), nullable=False)
-    sale_id = Column(Integer, ForeignKey("sales_transactions.sale_id"))
+    sale_id = Column(Integer)  # sales_transactions is partitioned, so no FK on sale_id alone
     points_change = Column(Integer, nullable=False)
     description = Column(Text)
     change_date = Column(DateTime, default=func.now()) 
\ No newline at end of file
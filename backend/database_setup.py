@@ -13,6 +13,12 @@ import platform
 from pathlib import Path
 from dotenv import load_dotenv
 
+try:
+    from migrate import MigrationRunner
+except ImportError:
+    # Fallback for when running as module
+    from .migrate import MigrationRunner
+
 class DatabaseSetup:
     def __init__(self, logger=None):
         self.logger = logger or logging.getLogger(__name__)
@@ -174,7 +180,51 @@ class DatabaseSetup:
             return False
     
     def apply_schema(self):
-        """Apply the database schema using psql"""
+        """Create the baseline schema on a new database, then apply pending migrations"""
+        try:
+            conn = psycopg2.connect(
+                host="localhost",
+                port=self.postgres_port,
+                database=self.database_name,
+                user=self.postgres_user,
+                password=self.postgres_password
+            )
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT to_regclass('users') IS NOT NULL")
+                has_schema = cursor.fetchone()[0]
+                cursor.close()
+                conn.rollback()
+
+                if has_schema:
+                    self.logger.info("Existing database found, skipping baseline schema")
+                elif not self.apply_baseline_schema():
+                    return False
+
+                return self.apply_migrations(conn)
+            finally:
+                conn.close()
+
+        except Exception as e:
+            self.logger.error(f"Error applying schema: {e}")
+            return False
+
+    def apply_migrations(self, conn, dry_run=False):
+        """Apply the versioned migrations the database doesn't have yet"""
+        try:
+            runner = MigrationRunner(conn, logger=self.logger)
+            applied = runner.upgrade(dry_run=dry_run)
+            if applied:
+                self.logger.info(f"Applied {len(applied)} migrations: {', '.join(m.version for m in applied)}")
+            else:
+                self.logger.info("Database schema is up to date")
+            return True
+        except Exception as e:
+            self.logger.error(f"Migration failed: {e}")
+            return False
+
+    def apply_baseline_schema(self):
+        """Apply dataschema.sql to a new database using psql"""
         try:
             self.logger.info("Applying database schema...")
             
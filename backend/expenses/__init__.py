@@ -0,0 +1 @@
+# Expenses module
\ No newline at end of file
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
+from datetime import date
+from backend.database import get_db
+from . import crud, schemas
+
+router = APIRouter(prefix="/expenses", tags=["expenses"])
+
+@router.post("/", response_model=schemas.Expense)
+def create_expense(expense: schemas.ExpenseCreate, db: Session = Depends(get_db)):
+    try:
+        expense_ids = crud.create_expenses(db, [expense])
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid store, category or user: {e.orig}")
+    return crud.get_expense(db, expense_ids[0])
+
+@router.post("/bulk", response_model=schemas.ExpenseBulkResult)
+def create_expenses_bulk(bulk: schemas.ExpenseBulkCreate, db: Session = Depends(get_db)):
+    """Create many expenses in one transaction (all or nothing)"""
+    try:
+        expense_ids = crud.create_expenses(db, bulk.expenses)
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid store, category or user: {e.orig}")
+    return {"created": len(expense_ids), "expense_ids": expense_ids}
+
+@router.get("/", response_model=List[schemas.Expense])
+def list_expenses(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    expense_category_id: Optional[int] = Query(None, description="Filter by expense category"),
+    start_date: Optional[date] = Query(None, description="Start date"),
+    end_date: Optional[date] = Query(None, description="End date (inclusive)"),
+    db: Session = Depends(get_db)
+):
+    return crud.get_expenses(
+        db,
+        skip=skip,
+        limit=limit,
+        store_id=store_id,
+        expense_category_id=expense_category_id,
+        start_date=start_date,
+        end_date=end_date
+    )
+
+@router.get("/rollups", response_model=List[schemas.ExpenseRollup])
+def get_expense_rollups(
+    start_month: date = Query(..., description="Any date in the first month"),
+    end_month: date = Query(..., description="Any date in the last month (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    db: Session = Depends(get_db)
+):
+    """Expense totals per store, month and category"""
+    return crud.get_expense_rollups(db, start_month, end_month, store_id=store_id)
+
+@router.get("/profit-and-loss", response_model=List[schemas.ProfitAndLossRow])
+def get_profit_and_loss(
+    start_month: date = Query(..., description="Any date in the first month"),
+    end_month: date = Query(..., description="Any date in the last month (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    db: Session = Depends(get_db)
+):
+    """Monthly profit and loss per store from the sales and expense rollups"""
+    if end_month < start_month:
+        raise HTTPException(status_code=400, detail="end_month must not be before start_month")
+    return crud.get_profit_and_loss(db, start_month, end_month, store_id=store_id)
+
+@router.get("/{expense_id}", response_model=schemas.Expense)
+def get_expense(expense_id: int, db: Session = Depends(get_db)):
+    expense = crud.get_expense(db, expense_id)
+    if not expense:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return expense
+
+@router.put("/{expense_id}", response_model=schemas.Expense)
+def update_expense(expense_id: int, expense: schemas.ExpenseUpdate, db: Session = Depends(get_db)):
+    try:
+        updated = crud.update_expense(db, expense_id, expense)
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Invalid store, category or user: {e.orig}")
+    if not updated:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return updated
+
+@router.delete("/{expense_id}")
+def delete_expense(expense_id: int, db: Session = Depends(get_db)):
+    if not crud.delete_expense(db, expense_id):
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return {"message": "Expense deleted successfully"}
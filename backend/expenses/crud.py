@@ -0,0 +1,316 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from datetime import date
+from decimal import Decimal
+from . import schemas
+
+_EXPENSE_COLUMNS = """
+    e.expense_id, e.store_id, st.store_name, e.expense_category_id, ec.category_name,
+    e.amount, e.expense_date, e.description, e.paid_by_user_id,
+    u.first_name || ' ' || u.last_name AS paid_by_name,
+    e.receipt_url, e.created_at, e.updated_at
+"""
+_EXPENSE_JOINS = """
+    JOIN stores st ON st.store_id = e.store_id
+    JOIN expense_categories ec ON ec.category_id = e.expense_category_id
+    LEFT JOIN users u ON u.user_id = e.paid_by_user_id
+"""
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def next_month(value: date) -> date:
+    return date(value.year + 1, 1, 1) if value.month == 12 else date(value.year, value.month + 1, 1)
+
+
+def _apply_to_rollups(db: Session, rows: Iterable[Tuple[int, date, int, Decimal]], sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) expenses from expense_monthly_totals.
+
+    rows are (store_id, expense_date, expense_category_id, amount); all of
+    them are folded in with one upsert inside the caller's transaction.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    db.execute(text("""
+        INSERT INTO expense_monthly_totals (store_id, month, expense_category_id, total_amount, expense_count)
+        SELECT t.store_id, CAST(date_trunc('month', t.expense_date) AS DATE), t.expense_category_id,
+               :sign * SUM(t.amount), :sign * COUNT(*)
+        FROM unnest(
+            CAST(:store_ids AS INTEGER[]),
+            CAST(:expense_dates AS DATE[]),
+            CAST(:category_ids AS INTEGER[]),
+            CAST(:amounts AS NUMERIC[])
+        ) AS t(store_id, expense_date, expense_category_id, amount)
+        GROUP BY 1, 2, 3
+        ON CONFLICT (store_id, month, expense_category_id) DO UPDATE
+        SET total_amount = expense_monthly_totals.total_amount + EXCLUDED.total_amount,
+            expense_count = expense_monthly_totals.expense_count + EXCLUDED.expense_count
+    """), {
+        "sign": sign,
+        "store_ids": [row[0] for row in rows],
+        "expense_dates": [row[1] for row in rows],
+        "category_ids": [row[2] for row in rows],
+        "amounts": [row[3] for row in rows],
+    })
+
+
+def create_expenses(db: Session, expenses: List[schemas.ExpenseCreate]) -> List[int]:
+    """Insert expenses and update the monthly rollups in one transaction"""
+    expense_ids = db.execute(text("""
+        INSERT INTO expenses
+            (store_id, expense_category_id, amount, expense_date, description, paid_by_user_id, receipt_url)
+        SELECT * FROM unnest(
+            CAST(:store_ids AS INTEGER[]),
+            CAST(:category_ids AS INTEGER[]),
+            CAST(:amounts AS NUMERIC[]),
+            CAST(:expense_dates AS DATE[]),
+            CAST(:descriptions AS TEXT[]),
+            CAST(:user_ids AS INTEGER[]),
+            CAST(:receipt_urls AS VARCHAR[])
+        )
+        RETURNING expense_id
+    """), {
+        "store_ids": [e.store_id for e in expenses],
+        "category_ids": [e.expense_category_id for e in expenses],
+        "amounts": [e.amount for e in expenses],
+        "expense_dates": [e.expense_date for e in expenses],
+        "descriptions": [e.description for e in expenses],
+        "user_ids": [e.paid_by_user_id for e in expenses],
+        "receipt_urls": [e.receipt_url for e in expenses],
+    }).scalars().all()
+    _apply_to_rollups(
+        db, ((e.store_id, e.expense_date, e.expense_category_id, e.amount) for e in expenses)
+    )
+    db.commit()
+    return list(expense_ids)
+
+
+def get_expenses(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    store_id: Optional[int] = None,
+    expense_category_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """List expenses with store, category and payer names"""
+    where_clauses = ["1=1"]
+    params: Dict[str, Any] = {"skip": skip, "limit": limit}
+    if store_id is not None:
+        where_clauses.append("e.store_id = :store_id")
+        params["store_id"] = store_id
+    if expense_category_id is not None:
+        where_clauses.append("e.expense_category_id = :expense_category_id")
+        params["expense_category_id"] = expense_category_id
+    if start_date:
+        where_clauses.append("e.expense_date >= :start_date")
+        params["start_date"] = start_date
+    if end_date:
+        where_clauses.append("e.expense_date <= :end_date")
+        params["end_date"] = end_date
+
+    rows = db.execute(text(f"""
+        SELECT {_EXPENSE_COLUMNS}
+        FROM expenses e
+        {_EXPENSE_JOINS}
+        WHERE {" AND ".join(where_clauses)}
+        ORDER BY e.expense_date DESC, e.expense_id DESC
+        OFFSET :skip LIMIT :limit
+    """), params).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def get_expense(db: Session, expense_id: int) -> Optional[Dict[str, Any]]:
+    row = db.execute(text(f"""
+        SELECT {_EXPENSE_COLUMNS}
+        FROM expenses e
+        {_EXPENSE_JOINS}
+        WHERE e.expense_id = :expense_id
+    """), {"expense_id": expense_id}).mappings().first()
+    return dict(row) if row else None
+
+
+def update_expense(db: Session, expense_id: int, expense: schemas.ExpenseUpdate) -> Optional[Dict[str, Any]]:
+    """Update an expense, moving its amount between rollup buckets if needed"""
+    old = db.execute(text("""
+        SELECT store_id, expense_date, expense_category_id, amount
+        FROM expenses WHERE expense_id = :expense_id FOR UPDATE
+    """), {"expense_id": expense_id}).first()
+    if old is None:
+        return None
+
+    update_data = expense.dict(exclude_unset=True)
+    if update_data:
+        set_clause = ", ".join(f"{field} = :{field}" for field in update_data)
+        new = db.execute(text(f"""
+            UPDATE expenses
+            SET {set_clause}, updated_at = CURRENT_TIMESTAMP
+            WHERE expense_id = :expense_id
+            RETURNING store_id, expense_date, expense_category_id, amount
+        """), {**update_data, "expense_id": expense_id}).first()
+        if tuple(new) != tuple(old):
+            _apply_to_rollups(db, [tuple(old)], sign=-1)
+            _apply_to_rollups(db, [tuple(new)])
+    db.commit()
+    return get_expense(db, expense_id)
+
+
+def delete_expense(db: Session, expense_id: int) -> bool:
+    deleted = db.execute(text("""
+        DELETE FROM expenses WHERE expense_id = :expense_id
+        RETURNING store_id, expense_date, expense_category_id, amount
+    """), {"expense_id": expense_id}).first()
+    if deleted is None:
+        return False
+    _apply_to_rollups(db, [tuple(deleted)], sign=-1)
+    db.commit()
+    return True
+
+
+def rebuild_expense_rollups(db: Session) -> int:
+    """Recompute expense_monthly_totals from the expenses table"""
+    db.execute(text("DELETE FROM expense_monthly_totals"))
+    count = db.execute(text("""
+        INSERT INTO expense_monthly_totals (store_id, month, expense_category_id, total_amount, expense_count)
+        SELECT store_id, CAST(date_trunc('month', expense_date) AS DATE), expense_category_id, SUM(amount), COUNT(*)
+        FROM expenses
+        GROUP BY 1, 2, 3
+    """)).rowcount
+    db.commit()
+    return count
+
+
+def get_expense_rollups(
+    db: Session,
+    start_month: date,
+    end_month: date,
+    store_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Per store / month / category totals from the rollup table"""
+    rows = db.execute(text("""
+        SELECT t.store_id, t.month, t.expense_category_id, ec.category_name, t.total_amount, t.expense_count
+        FROM expense_monthly_totals t
+        JOIN expense_categories ec ON ec.category_id = t.expense_category_id
+        WHERE t.month >= :start_month AND t.month < :end_month
+          AND t.expense_count > 0
+          AND (CAST(:store_id AS INTEGER) IS NULL OR t.store_id = :store_id)
+        ORDER BY t.month, t.store_id, ec.category_name
+    """), {
+        "start_month": month_start(start_month),
+        "end_month": next_month(end_month),
+        "store_id": store_id,
+    }).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def get_profit_and_loss(
+    db: Session,
+    start_month: date,
+    end_month: date,
+    store_id: Optional[int] = None
+) -> List[schemas.ProfitAndLossRow]:
+    """
+    Monthly profit and loss per store.
+
+    Sales, tax and cost of goods come from the hourly sales buckets less
+    returns_monthly_totals, so a refund comes off the month the goods came
+    back; expenses come from expense_monthly_totals. Raw transactions are
+    not read.
+    """
+    params = {
+        "start": month_start(start_month),
+        "end": next_month(end_month),
+        "store_id": store_id,
+    }
+    rows = db.execute(text("""
+        WITH refunds AS (
+            SELECT store_id, month, refund_amount, tax_refunded, cost_returned
+            FROM returns_monthly_totals
+            WHERE month >= :start AND month < :end AND return_count > 0
+              AND (CAST(:store_id AS INTEGER) IS NULL OR store_id = :store_id)
+        ),
+        sold AS (
+            SELECT store_id, CAST(date_trunc('month', bucket_start) AS DATE) AS month,
+                   SUM(sales_count) AS sales_count, SUM(revenue) AS gross_sales, SUM(tax_amount) AS tax_collected
+            FROM sales_hourly_totals
+            WHERE bucket_start >= :start AND bucket_start < :end
+              AND (CAST(:store_id AS INTEGER) IS NULL OR store_id = :store_id)
+            GROUP BY 1, 2
+        ),
+        sales AS (
+            SELECT COALESCE(s.store_id, r.store_id) AS store_id, COALESCE(s.month, r.month) AS month,
+                   COALESCE(s.sales_count, 0) AS sales_count,
+                   COALESCE(s.gross_sales, 0) - COALESCE(r.refund_amount, 0) AS gross_sales,
+                   COALESCE(s.tax_collected, 0) - COALESCE(r.tax_refunded, 0) AS tax_collected
+            FROM sold s
+            FULL JOIN refunds r ON r.store_id = s.store_id AND r.month = s.month
+        ),
+        cogs AS (
+            SELECT COALESCE(c.store_id, r.store_id) AS store_id, COALESCE(c.month, r.month) AS month,
+                   COALESCE(c.cost_of_goods, 0) - COALESCE(r.cost_returned, 0) AS cost_of_goods
+            FROM (
+                SELECT store_id, CAST(date_trunc('month', bucket_start) AS DATE) AS month, SUM(cost) AS cost_of_goods
+                FROM product_sales_hourly
+                WHERE bucket_start >= :start AND bucket_start < :end
+                  AND (CAST(:store_id AS INTEGER) IS NULL OR store_id = :store_id)
+                GROUP BY 1, 2
+            ) c
+            FULL JOIN refunds r ON r.store_id = c.store_id AND r.month = c.month
+        ),
+        spent AS (
+            SELECT t.store_id, t.month,
+                   json_object_agg(ec.category_name, t.total_amount) AS by_category,
+                   SUM(t.total_amount) AS total_expenses
+            FROM expense_monthly_totals t
+            JOIN expense_categories ec ON ec.category_id = t.expense_category_id
+            WHERE t.month >= :start AND t.month < :end AND t.expense_count > 0
+              AND (CAST(:store_id AS INTEGER) IS NULL OR t.store_id = :store_id)
+            GROUP BY 1, 2
+        ),
+        periods AS (
+            SELECT store_id, month FROM sales
+            UNION
+            SELECT store_id, month FROM spent
+        )
+        SELECT p.store_id, st.store_name, p.month,
+               COALESCE(s.sales_count, 0) AS sales_count,
+               COALESCE(s.gross_sales, 0) AS gross_sales,
+               COALESCE(s.tax_collected, 0) AS tax_collected,
+               COALESCE(c.cost_of_goods, 0) AS cost_of_goods,
+               x.by_category,
+               COALESCE(x.total_expenses, 0) AS total_expenses
+        FROM periods p
+        JOIN stores st ON st.store_id = p.store_id
+        LEFT JOIN sales s ON s.store_id = p.store_id AND s.month = p.month
+        LEFT JOIN cogs c ON c.store_id = p.store_id AND c.month = p.month
+        LEFT JOIN spent x ON x.store_id = p.store_id AND x.month = p.month
+        ORDER BY p.month, p.store_id
+    """), params).mappings().all()
+
+    report = []
+    for row in rows:
+        net_sales = row["gross_sales"] - row["tax_collected"]
+        gross_profit = net_sales - row["cost_of_goods"]
+        report.append(schemas.ProfitAndLossRow(
+            store_id=row["store_id"],
+            store_name=row["store_name"],
+            month=row["month"],
+            sales_count=row["sales_count"],
+            gross_sales=row["gross_sales"],
+            tax_collected=row["tax_collected"],
+            net_sales=net_sales,
+            cost_of_goods=row["cost_of_goods"],
+            gross_profit=gross_profit,
+            expenses={
+                name: Decimal(str(amount)) for name, amount in (row["by_category"] or {}).items()
+            },
+            total_expenses=row["total_expenses"],
+            net_profit=gross_profit - row["total_expenses"]
+        ))
+    return report
@@ -0,0 +1,63 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+from datetime import date, datetime
+from decimal import Decimal
+
+class ExpenseBase(BaseModel):
+    store_id: int
+    expense_category_id: int
+    amount: Decimal = Field(..., gt=0)
+    expense_date: date
+    description: str = Field(..., min_length=1)
+    paid_by_user_id: int
+    receipt_url: Optional[str] = Field(None, max_length=500)
+
+class ExpenseCreate(ExpenseBase):
+    pass
+
+class ExpenseBulkCreate(BaseModel):
+    expenses: List[ExpenseCreate] = Field(..., min_length=1, max_length=10000)
+
+class ExpenseUpdate(BaseModel):
+    store_id: Optional[int] = None
+    expense_category_id: Optional[int] = None
+    amount: Optional[Decimal] = Field(None, gt=0)
+    expense_date: Optional[date] = None
+    description: Optional[str] = Field(None, min_length=1)
+    paid_by_user_id: Optional[int] = None
+    receipt_url: Optional[str] = Field(None, max_length=500)
+
+class Expense(ExpenseBase):
+    expense_id: int
+    category_name: str
+    store_name: str
+    paid_by_name: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class ExpenseBulkResult(BaseModel):
+    created: int
+    expense_ids: List[int]
+
+class ExpenseRollup(BaseModel):
+    store_id: int
+    month: date
+    expense_category_id: int
+    category_name: str
+    total_amount: Decimal
+    expense_count: int
+
+class ProfitAndLossRow(BaseModel):
+    store_id: int
+    store_name: str
+    month: date
+    sales_count: int
+    gross_sales: Decimal
+    tax_collected: Decimal
+    net_sales: Decimal
+    cost_of_goods: Decimal
+    gross_profit: Decimal
+    # Expense totals keyed by expense category name
+    expenses: Dict[str, Decimal]
+    total_expenses: Decimal
+    net_profit: Decimal
@@ -0,0 +1,215 @@
+"""
+EXPLAIN every SQL query template in the backend and flag sequential scans.
+
+Query templates are the string literals (and f-strings whose placeholders are
+module-level string constants) that start with SELECT, WITH, INSERT, UPDATE
+or DELETE. Bind parameters in either style (psycopg2 ``%s`` / ``%(name)s``
+or SQLAlchemy ``:name``) become ``$n`` and each template is planned without
+being executed: with ``EXPLAIN (GENERIC_PLAN)`` on PostgreSQL 16+, or as a
+prepared statement with a forced generic plan before that.
+
+Sequential scans are disabled while planning (unless --allow-seqscan), so a
+Seq Scan that remains means no index can serve the query. Scans of small
+reference tables are ignored; partitions are reported under their parent.
+Exits with status 1 when anything is flagged.
+
+Usage:
+    python -m backend.explain_queries [--path DIR] [--ignore-table NAME] [--allow-seqscan] [--verbose]
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.database import engine
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Small lookup tables that are fine to read in full
+DEFAULT_IGNORED_TABLES = frozenset({
+    "roles", "permissions", "role_permissions", "payment_methods", "tax_categories",
+    "expense_categories", "settings", "stores", "pos_terminals", "categories", "brands",
+    "schema_migrations",
+})
+
+_STATEMENT_START = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+_PSYCOPG_PARAM = re.compile(r"%\((\w+)\)s|%s|%%")
+_SQLALCHEMY_PARAM = re.compile(r"(?<![:\w]):(\w+)(?!:)")
+_PARTITION_SUFFIX = re.compile(r"_(\d{4}_\d{2}|default)$")
+
+
+@dataclass
+class QueryTemplate:
+    path: str
+    line: int
+    sql: str
+
+
+@dataclass
+class ExplainResult:
+    template: QueryTemplate
+    seq_scans: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _module_constants(tree: ast.Module) -> Dict[str, str]:
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    constants[target.id] = node.value.value
+    return constants
+
+
+def _render_fstring(node: ast.JoinedStr, constants: Dict[str, str]) -> Optional[str]:
+    parts = []
+    for value in node.values:
+        if isinstance(value, ast.Constant):
+            parts.append(str(value.value))
+        elif isinstance(value, ast.FormattedValue) and isinstance(value.value, ast.Name) \
+                and value.value.id in constants:
+            parts.append(constants[value.value.id])
+        else:
+            return None
+    return "".join(parts)
+
+
+def find_query_templates(root: str = BACKEND_DIR) -> Iterator[QueryTemplate]:
+    """Yield the SQL statement literals found in the Python files under root"""
+    for directory, _, files in os.walk(root):
+        for filename in sorted(files):
+            if not filename.endswith(".py"):
+                continue
+            path = os.path.join(directory, filename)
+            with open(path, encoding="utf-8") as f:
+                try:
+                    tree = ast.parse(f.read(), filename=path)
+                except SyntaxError:
+                    continue
+            constants = _module_constants(tree)
+            fstring_parts = set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.JoinedStr):
+                    fstring_parts.update(id(value) for value in node.values)
+                    sql = _render_fstring(node, constants)
+                elif isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in fstring_parts:
+                    sql = node.value
+                else:
+                    continue
+                if sql and _STATEMENT_START.match(sql):
+                    yield QueryTemplate(os.path.relpath(path, root), node.lineno, sql)
+
+
+def to_positional(sql: str) -> Tuple[str, int]:
+    """Rewrite psycopg2 / SQLAlchemy bind parameters as $1..$n"""
+    numbers: Dict[str, int] = {}
+    counter = [0]
+
+    def number(name: Optional[str]) -> str:
+        if name is None:
+            counter[0] += 1
+            return f"${counter[0]}"
+        if name not in numbers:
+            counter[0] += 1
+            numbers[name] = counter[0]
+        return f"${numbers[name]}"
+
+    def psycopg(match):
+        if match.group(0) == "%%":
+            return "%"
+        return number(match.group(1))
+
+    if "%s" in sql or "%(" in sql:
+        sql = _PSYCOPG_PARAM.sub(psycopg, sql)
+    else:
+        sql = _SQLALCHEMY_PARAM.sub(lambda match: number(match.group(1)), sql)
+    return sql, counter[0]
+
+
+def _seq_scans(plan: dict) -> Iterator[str]:
+    if plan.get("Node Type") == "Seq Scan":
+        yield _PARTITION_SUFFIX.sub("", plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+def explain(template: QueryTemplate, cursor, generic_plan_option: bool) -> ExplainResult:
+    result = ExplainResult(template)
+    sql, param_count = to_positional(template.sql)
+    try:
+        if generic_plan_option:
+            cursor.execute(f"EXPLAIN (GENERIC_PLAN, FORMAT JSON) {sql}")
+        else:
+            cursor.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+            cursor.execute(f"PREPARE _explain_template AS {sql}")
+            args = f"({', '.join(['NULL'] * param_count)})" if param_count else ""
+            cursor.execute(f"EXPLAIN (FORMAT JSON) EXECUTE _explain_template{args}")
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        result.seq_scans = sorted(set(_seq_scans(plan[0]["Plan"])))
+    except Exception as e:
+        result.error = str(e).strip().splitlines()[0]
+    return result
+
+
+def explain_all(root: str = BACKEND_DIR, allow_seqscan: bool = False) -> List[ExplainResult]:
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SHOW server_version_num")
+        generic_plan_option = int(cursor.fetchone()[0]) >= 160000
+        conn.rollback()
+        results = []
+        for template in find_query_templates(root):
+            if not allow_seqscan:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            results.append(explain(template, cursor, generic_plan_option))
+            # Plans only, nothing is executed; the rollback clears errors and the SET LOCALs
+            conn.rollback()
+            if not generic_plan_option:
+                # Prepared statements outlive the transaction
+                cursor.execute("DEALLOCATE ALL")
+                conn.rollback()
+        cursor.close()
+        return results
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the backend's SQL templates and flag sequential scans")
+    parser.add_argument("--path", default=BACKEND_DIR, help="Directory to scan (default: backend)")
+    parser.add_argument("--ignore-table", action="append", default=[], help="Table whose seq scans are fine")
+    parser.add_argument("--allow-seqscan", action="store_true",
+                        help="Plan with sequential scans enabled (flags what the planner actually picks)")
+    parser.add_argument("--verbose", action="store_true", help="Also list clean and unplannable templates")
+    args = parser.parse_args()
+
+    ignored = DEFAULT_IGNORED_TABLES | set(args.ignore_table)
+    results = explain_all(args.path, allow_seqscan=args.allow_seqscan)
+    flagged = errors = 0
+    for result in results:
+        where = f"{result.template.path}:{result.template.line}"
+        scans = [table for table in result.seq_scans if table not in ignored]
+        if result.error:
+            errors += 1
+            if args.verbose:
+                print(f"⚠️  {where}: could not plan ({result.error})")
+        elif scans:
+            flagged += 1
+            print(f"❌ {where}: Seq Scan on {', '.join(scans)}")
+        elif args.verbose:
+            print(f"✅ {where}")
+    print(f"\n{len(results)} templates: {flagged} with sequential scans, {errors} could not be planned")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
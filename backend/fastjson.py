@@ -0,0 +1,112 @@
+"""
+Fast JSON encoding for API responses.
+
+``FastJSONResponse`` is the app-wide ``default_response_class`` (see main.py):
+it renders with orjson when it is installed and the standard library
+otherwise. ``default`` converts Decimal, Enum, date/time/timedelta, UUID and
+pydantic models the same way ``jsonable_encoder`` does, so raw-SQL rows no
+longer need piecemeal ``float()`` calls to come out as JSON numbers.
+
+FastAPI still serializes a ``response_model`` endpoint in several passes: it
+re-validates the return value against the model and dumps it to JSON-ready
+Python objects, and endpoints without a model go through ``jsonable_encoder``
+first. For a 10k-row listing those passes cost more CPU than the query, so
+large listings return a Response directly when ``ENABLED``:
+
+* ``model_response`` validates and dumps content shaped like the response
+  model (prevalidated model instances, ORM objects or dicts) in one
+  pydantic-core pass, with exactly the JSON the ``response_model`` path
+  would produce.
+* ``response`` encodes plain dicts/lists from the raw-SQL CRUD modules
+  directly.
+
+Endpoints with a ``response_model`` only use ``model_response``, so their
+body is the same whichever path serves it. The fast paths are on by default;
+set ``FAST_JSON_RESPONSES=0`` to send every endpoint back through FastAPI's
+own serialization. ``backend/benchmarks`` measures the paths.
+"""
+
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENABLED = os.getenv("FAST_JSON_RESPONSES", "1").lower() in ("1", "true", "yes")
+
+MEDIA_TYPE = "application/json"
+
+
+def default(obj: Any) -> Any:
+    """Convert values json/orjson cannot encode natively, matching jsonable_encoder"""
+    if isinstance(obj, Decimal):
+        # Whole-number decimals (quantities, integer NUMERIC columns) stay integers
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(content, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps() instead of json.dumps"""
+
+    media_type = MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def encode_model(tp: Any, content: Any) -> bytes:
+    """Validate content against tp and dump it to JSON bytes in pydantic-core.
+
+    Model instances of the right type pass validation without being rebuilt,
+    so endpoints that already construct their schemas pay for them once.
+    ORM objects are read through from_attributes, as FastAPI does.
+    """
+    adapter = _adapter(tp)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True), by_alias=True)
+
+
+def model_response(tp: Any, content: Any, status_code: int = 200) -> Response:
+    """Response with the same body as ``response_model=tp``, serialized in one pass"""
+    return Response(encode_model(tp, content), status_code=status_code, media_type=MEDIA_TYPE)
+
+
+def response(content: Any, status_code: int = 200) -> Response:
+    """Response for plain dict/list content, skipping jsonable_encoder"""
+    return FastJSONResponse(content, status_code=status_code)
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import Optional, List
 from . import crud, schemas
 from backend.database import get_db
+from backend import audit, fastjson
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
@@ -25,6 +26,9 @@ def get_inventory(
             low_stock_only=low_stock_only,
             out_of_stock_only=out_of_stock_only
         )
+        if fastjson.ENABLED:
+            # Same body as the response_model path, validated and dumped in one pass
+            return fastjson.model_response(List[schemas.InventoryWithDetails], inventory_items)
         # Convert dicts to Pydantic models
         return [schemas.InventoryWithDetails(**item) for item in inventory_items]
     except Exception as e:
@@ -67,6 +71,7 @@ def adjust_stock(adjustment: schemas.StockAdjustment):
             reason=adjustment.reason
         )
         if success:
+            audit.record("STOCK_ADJUST", adjustment.dict(exclude={"user_id"}), user_id=adjustment.user_id)
             return {"message": "Stock adjusted successfully"}
         else:
             raise HTTPException(status_code=404, detail="Inventory item not found")
@@ -84,6 +89,7 @@ def perform_stock_take(stock_take: schemas.StockTake):
             notes=stock_take.notes
         )
         if success:
+            audit.record("STOCK_TAKE", stock_take.dict(exclude={"user_id"}), user_id=stock_take.user_id)
             return {"message": "Stock take completed successfully"}
         else:
             raise HTTPException(status_code=404, detail="Inventory item not found")
@@ -102,6 +108,7 @@ def transfer_stock(transfer: schemas.StockTransfer):
             notes=transfer.notes
         )
         if success:
+            audit.record("STOCK_TRANSFER", transfer.dict(exclude={"user_id"}), user_id=transfer.user_id)
             return {"message": "Stock transfer completed successfully"}
         else:
             raise HTTPException(status_code=400, detail="Transfer failed - insufficient stock or invalid inventory")
@@ -243,7 +250,7 @@ def get_all_inventory_data(
 ):
     """Get all inventory data in a single optimized call for faster loading"""
     try:
-        return crud.get_all_inventory_data(
+        data = crud.get_all_inventory_data(
             store_id=store_id,
             category_id=category_id,
             brand_id=brand_id,
@@ -251,5 +258,8 @@ def get_all_inventory_data(
             low_stock_only=low_stock_only,
             out_of_stock_only=out_of_stock_only
         )
+        if fastjson.ENABLED:
+            return fastjson.response(data)
+        return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch bulk data: {str(e)}") 
\ No newline at end of file
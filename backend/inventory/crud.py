@@ -1,13 +1,14 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from psycopg2 import pool
 import os
 from dotenv import load_dotenv
 from . import models, schemas
+from backend import profiling
 
 # Load environment variables from .env file
 load_dotenv()
@@ -34,7 +35,7 @@ def get_connection_pool():
             password=DB_PASS,
             host=DB_HOST,
             port=DB_PORT,
-            cursor_factory=RealDictCursor
+            cursor_factory=profiling.ProfiledDictCursor
         )
     return _connection_pool
 
@@ -276,6 +277,66 @@ def get_user(user_id: int) -> Optional[Dict[str, Any]]:
         return_db_connection(conn)
 
 # Inventory CRUD operations
+def inventory_row_to_item(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a get_inventory_with_details row like schemas.InventoryWithDetails"""
+    item = {
+        'inventory_id': row['inventory_id'],
+        'product_id': row['product_id'],
+        'variant_id': row['variant_id'],
+        'store_id': row['store_id'],
+        'current_stock': row['current_stock'],
+        'reserved_stock': row['reserved_stock'],
+        'last_reorder_date': row['last_reorder_date'],
+        'last_stock_take_date': row['last_stock_take_date'],
+        'updated_at': row['updated_at'],
+        'product': {
+            'product_id': row['product_id'],
+            'product_code': row['product_code'],
+            'product_name': row['product_name'],
+            'description': row['description'],
+            'category_id': row['category_id'],
+            'brand_id': row['brand_id'],
+            'supplier_id': row['supplier_id'],
+            'base_price': float(row['base_price']) if row['base_price'] else 0,
+            'retail_price': float(row['retail_price']) if row['retail_price'] else 0,
+            'tax_category_id': row['tax_category_id'],
+            'is_active': row['product_active'],
+            'barcode': row['barcode'],
+            'unit_of_measure': row['unit_of_measure'],
+            'weight': float(row['weight']) if row['weight'] else None,
+            'reorder_level': row['reorder_level'],
+            'max_stock_level': row['max_stock_level'],
+            'created_at': row['product_created_at'],
+            'updated_at': row['product_updated_at']
+        },
+        'variant': None,
+        'store': {
+            'store_id': row['store_id'],
+            'store_name': row['store_name'],
+            'address': row['address'],
+            'phone_number': row['phone_number'],
+            'email': row['email'],
+            'city': row['city'],
+            'province': row['province'],
+            'postal_code': row['postal_code'],
+            'is_active': row['store_active'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+    }
+    if row['variant_id']:  # variant_id exists
+        item['variant'] = {
+            'variant_id': row['variant_id'],
+            'size': row['size'],
+            'color': row['color'],
+            'sku_suffix': row['sku_suffix'],
+            'barcode': row['variant_barcode'],
+            'retail_price': float(row['variant_retail_price']) if row['variant_retail_price'] else None,
+            'base_price': float(row['variant_base_price']) if row['variant_base_price'] else None,
+            'is_active': row['variant_active']
+        }
+    return item
+
 def get_inventory_with_details(
     store_id: Optional[int] = None,
     category_id: Optional[int] = None,
@@ -294,6 +355,7 @@ def get_inventory_with_details(
                 i.variant_id,
                 i.store_id,
                 i.current_stock,
+                i.reserved_stock,
                 i.last_reorder_date,
                 i.last_stock_take_date,
                 i.updated_at,
@@ -364,65 +426,7 @@ def get_inventory_with_details(
             query += " AND i.current_stock = 0"
         query += " ORDER BY p.product_name, pv.size, pv.color"
         cur.execute(query, params)
-        inventory_items = []
-        for row in cur.fetchall():
-            item = {
-                'inventory_id': row['inventory_id'],
-                'product_id': row['product_id'],
-                'variant_id': row['variant_id'],
-                'store_id': row['store_id'],
-                'current_stock': row['current_stock'],
-                'last_reorder_date': row['last_reorder_date'],
-                'last_stock_take_date': row['last_stock_take_date'],
-                'updated_at': row['updated_at'],
-                'product': {
-                    'product_id': row['product_id'],
-                    'product_code': row['product_code'],
-                    'product_name': row['product_name'],
-                    'description': row['description'],
-                    'category_id': row['category_id'],
-                    'brand_id': row['brand_id'],
-                    'supplier_id': row['supplier_id'],
-                    'base_price': float(row['base_price']) if row['base_price'] else 0,
-                    'retail_price': float(row['retail_price']) if row['retail_price'] else 0,
-                    'tax_category_id': row['tax_category_id'],
-                    'is_active': row['product_active'],
-                    'barcode': row['barcode'],
-                    'unit_of_measure': row['unit_of_measure'],
-                    'weight': float(row['weight']) if row['weight'] else None,
-                    'reorder_level': row['reorder_level'],
-                    'max_stock_level': row['max_stock_level'],
-                    'created_at': row['product_created_at'],
-                    'updated_at': row['product_updated_at']
-                },
-                'variant': None,
-                'store': {
-                    'store_id': row['store_id'],
-                    'store_name': row['store_name'],
-                    'address': row['address'],
-                    'phone_number': row['phone_number'],
-                    'email': row['email'],
-                    'city': row['city'],
-                    'province': row['province'],
-                    'postal_code': row['postal_code'],
-                    'is_active': row['store_active'],
-                    'created_at': row['created_at'],
-                    'updated_at': row['updated_at']
-                }
-            }
-            if row['variant_id']:  # variant_id exists
-                item['variant'] = {
-                    'variant_id': row['variant_id'],
-                    'size': row['size'],
-                    'color': row['color'],
-                    'sku_suffix': row['sku_suffix'],
-                    'barcode': row['variant_barcode'],
-                    'retail_price': float(row['variant_retail_price']) if row['variant_retail_price'] else None,
-                    'base_price': float(row['variant_base_price']) if row['variant_base_price'] else None,
-                    'is_active': row['variant_active']
-                }
-            inventory_items.append(item)
-        return inventory_items
+        return [inventory_row_to_item(row) for row in cur.fetchall()]
     finally:
         cur.close()
         return_db_connection(conn)
@@ -582,7 +586,7 @@ def transfer_stock(from_inventory_id: int, to_store_id: int, quantity: int, user
     try:
         # Get source inventory details
         cur.execute("""
-            SELECT product_id, variant_id, store_id, current_stock
+            SELECT product_id, variant_id, store_id, current_stock, reserved_stock
             FROM inventory 
             WHERE inventory_id = %s
         """, (from_inventory_id,))
@@ -596,13 +600,16 @@ def transfer_stock(from_inventory_id: int, to_store_id: int, quantity: int, user
             variant_id = row['variant_id']
             from_store_id = row['store_id']
             current_stock = row['current_stock']
+            reserved_stock = row['reserved_stock']
         else:
             product_id = row[0]
             variant_id = row[1]
             from_store_id = row[2]
             current_stock = row[3]
+            reserved_stock = row[4]
         
-        if current_stock < quantity:
+        # Stock reserved for advance orders cannot be transferred away
+        if current_stock - reserved_stock < quantity:
             return False
         
         # Check if destination inventory exists (handle NULL variant_id correctly)
@@ -917,72 +924,6 @@ def delete_inventory(inventory_id: int):
         return_db_connection(conn)
 
 # Inventory Movement CRUD operations
-def update_inventory_for_sale(
-    product_id: int,
-    variant_id: Optional[int],
-    store_id: int,
-    quantity: int,
-    sale_id: int,
-    user_id: int
-) -> bool:
-    """Update inventory for a sale transaction"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        # Get current inventory
-        if variant_id is None:
-            cur.execute("""
-                SELECT inventory_id, current_stock
-                FROM inventory 
-                WHERE product_id = %s AND store_id = %s AND variant_id IS NULL
-            """, (product_id, store_id))
-        else:
-            cur.execute("""
-                SELECT inventory_id, current_stock
-                FROM inventory 
-                WHERE product_id = %s AND store_id = %s AND variant_id = %s
-            """, (product_id, store_id, variant_id))
-        
-        row = cur.fetchone()
-        if not row:
-            raise ValueError(f"No inventory found for product {product_id} in store {store_id}")
-        
-        # Handle both dict and tuple responses
-        if isinstance(row, dict):
-            inventory_id = row['inventory_id']
-            current_stock = row['current_stock']
-        else:
-            inventory_id = row[0]
-            current_stock = row[1]
-        
-        # Check if enough stock
-        if current_stock < quantity:
-            raise ValueError(f"Insufficient stock. Available: {current_stock}, Required: {quantity}")
-        
-        # Update inventory
-        new_stock = current_stock - quantity
-        cur.execute("""
-            UPDATE inventory 
-            SET current_stock = %s, updated_at = CURRENT_TIMESTAMP
-            WHERE inventory_id = %s
-        """, (new_stock, inventory_id))
-        
-        # Record movement
-        cur.execute("""
-            INSERT INTO inventory_movements 
-            (product_id, variant_id, store_id, movement_type, quantity, reference_id, user_id, notes)
-            VALUES (%s, %s, %s, 'SALE', %s, %s, %s, %s)
-        """, (product_id, variant_id, store_id, -quantity, sale_id, user_id, f"Sale transaction {sale_id}"))
-        
-        conn.commit()
-        return True
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        cur.close()
-        return_db_connection(conn)
-
 def update_inventory_for_return(
     product_id: int,
     variant_id: Optional[int],
@@ -1103,13 +1044,23 @@ def get_inventory_movements(
             query += " AND im.movement_type = %s"
             params.append(movement_type)
         
-        query += " ORDER BY im.movement_date DESC LIMIT %s"
-        params.append(limit)
-        
-        cur.execute(query, params)
+        # inventory_movements is partitioned by month: look in the current and
+        # previous month first so only those partitions are scanned, and only
+        # fall back to the full history when they hold fewer than `limit` rows
+        recent_since = (datetime.now().replace(day=1) - timedelta(days=1)).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        cur.execute(
+            query + " AND im.movement_date >= %s ORDER BY im.movement_date DESC LIMIT %s",
+            params + [recent_since, limit]
+        )
+        rows = cur.fetchall()
+        if len(rows) < limit:
+            cur.execute(query + " ORDER BY im.movement_date DESC LIMIT %s", params + [limit])
+            rows = cur.fetchall()
         movements = []
         
-        for row in cur.fetchall():
+        for row in rows:
             dt = '1970-01-01T00:00:00Z'
             movement = {
                 'movement_id': row['movement_id'],
@@ -40,6 +40,7 @@ class Inventory(Base):
     variant_id = Column(Integer, ForeignKey('product_variants.variant_id'))
     store_id = Column(Integer, ForeignKey('stores.store_id'), nullable=False)
     current_stock = Column(Integer, nullable=False, default=0)
+    reserved_stock = Column(Integer, nullable=False, default=0)
     last_reorder_date = Column(DateTime)
     last_stock_take_date = Column(DateTime)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -58,7 +59,7 @@ class InventoryMovement(Base):
     movement_type = Column(String(20), nullable=False)  # SALE, RETURN, PURCHASE, ADJUSTMENT, TRANSFER_OUT, TRANSFER_IN, WASTE
     quantity = Column(Integer, nullable=False)
     reference_id = Column(Integer)  # For linking to sales, purchases, etc.
-    movement_date = Column(DateTime, default=datetime.utcnow)
+    movement_date = Column(DateTime, default=datetime.utcnow, nullable=False)  # partition key
     user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
     notes = Column(Text)
 
@@ -72,17 +73,18 @@ class Expense(Base):
     __tablename__ = 'expenses'
     expense_id = Column(Integer, primary_key=True, index=True)
     store_id = Column(Integer, ForeignKey('stores.store_id'), nullable=False)
-    category_id = Column(Integer, ForeignKey('expense_categories.category_id'), nullable=False)
+    expense_category_id = Column(Integer, ForeignKey('expense_categories.category_id'), nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
-    description = Column(Text)
     expense_date = Column(Date, nullable=False)
-    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    description = Column(Text, nullable=False)
+    paid_by_user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    receipt_url = Column(String(500))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     store = relationship('Store', backref='expenses')
-    user = relationship('User', backref='expenses')
+    paid_by = relationship('User', backref='expenses')
 
 # Payment model is defined in sales/models.py to avoid conflicts
 
@@ -104,6 +104,7 @@ class InventoryUpdate(BaseModel):
 
 class Inventory(InventoryBase):
     inventory_id: int
+    reserved_stock: int = 0
     updated_at: datetime
     product: Product
     variant: Optional[ProductVariant] = None
@@ -192,6 +193,8 @@ class InventoryWithDetails(BaseModel):
     variant: Optional[ProductVariant] = None
     store: Store
     current_stock: int
+    # Units held for advance orders; available to sell is current_stock - reserved_stock
+    reserved_stock: int = 0
     last_reorder_date: Optional[datetime] = None
     last_stock_take_date: Optional[datetime] = None
     updated_at: datetime
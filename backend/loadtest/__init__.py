@@ -0,0 +1,16 @@
+"""
+Load-testing harness for the POS API.
+
+* ``seed``  fills a local database with synthetic stores, terminals, cashiers,
+  products with variants, inventory, customers and months of sales history.
+  Every generated row is tagged with the ``LT`` prefix so ``--reset`` can
+  remove it again.
+* ``run``   drives a running server with concurrent POS workloads (checkouts
+  per terminal, type-ahead search, returns, dashboard polling) and reports
+  p50/p95/p99 latency and throughput per endpoint.
+
+Usage:
+    python -m backend.loadtest.seed --products 500000 --sales 2000000
+    uvicorn backend.main:app --workers 4
+    python -m backend.loadtest.run --base-url http://localhost:8000 --duration 120 --out results.json
+"""
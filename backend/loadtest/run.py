@@ -0,0 +1,324 @@
+"""
+Drive a running POS server with concurrent workloads and report latency.
+
+Workers run for --duration seconds (after --warmup seconds whose samples are
+discarded), each in its own thread with its own HTTP session:
+
+* checkout   one per terminal: type-ahead search for a few products, then
+             POST /sales/ with 1-5 lines, back to back like a busy till
+* search     type-ahead only: one request per keystroke of a product name
+* returns    look up returnable sales at a store and return one line
+* dashboard  poll the dashboard and analytics summary every --poll-interval
+
+Test fixtures (LT stores, terminals, cashiers, products) are read from the
+database, so run ``python -m backend.loadtest.seed`` first. Results are
+grouped by endpoint template; --out writes them as JSON and --compare prints
+the p95 change against an earlier --out file.
+
+Usage:
+    python -m backend.loadtest.run [--base-url http://localhost:8000] [--duration 60]
+                                   [--warmup 5] [--terminals 20] [--searchers 10]
+                                   [--returns 2] [--dashboards 5] [--out FILE] [--compare FILE]
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import requests
+from sqlalchemy import text
+
+from backend.database import SessionLocal
+
+SAMPLE_PRODUCTS = 5000
+
+
+@dataclass
+class Fixtures:
+    terminals: List[dict]
+    products: List[dict]
+    payment_method_id: int
+
+
+@dataclass
+class Samples:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+
+class Recorder:
+    """Thread-safe latency samples per endpoint template"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Samples] = defaultdict(Samples)
+        self.recording = False
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+
+    def start(self):
+        with self._lock:
+            self._samples.clear()
+            self.recording = True
+            self.started_at = time.monotonic()
+
+    def stop(self):
+        self.recording = False
+        self.stopped_at = time.monotonic()
+
+    def add(self, endpoint: str, seconds: float, ok: bool):
+        if not self.recording:
+            return
+        with self._lock:
+            samples = self._samples[endpoint]
+            samples.latencies.append(seconds)
+            if not ok:
+                samples.errors += 1
+
+    def summary(self) -> Dict[str, dict]:
+        elapsed = max(self.stopped_at - self.started_at, 1e-9)
+        with self._lock:
+            items = sorted(self._samples.items())
+        return {endpoint: summarize(samples, elapsed) for endpoint, samples in items}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples: Samples, elapsed: float) -> dict:
+    values = sorted(samples.latencies)
+    return {
+        "requests": len(values),
+        "errors": samples.errors,
+        "throughput_rps": round(len(values) / elapsed, 2),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+def load_fixtures() -> Fixtures:
+    db = SessionLocal()
+    try:
+        terminals = [dict(row) for row in db.execute(text("""
+            SELECT t.terminal_id, t.store_id, u.user_id
+            FROM pos_terminals t
+            JOIN stores s ON s.store_id = t.store_id
+            JOIN users u ON u.username = 'lt_cashier_' || t.terminal_id
+            WHERE s.store_name LIKE 'LT %'
+            ORDER BY t.terminal_id
+        """)).mappings()]
+        products = [dict(row) for row in db.execute(text("""
+            SELECT product_id, product_name, retail_price
+            FROM products
+            WHERE product_code LIKE 'LT%' AND is_active
+            ORDER BY random()
+            LIMIT :limit
+        """), {"limit": SAMPLE_PRODUCTS}).mappings()]
+        payment_method_id = db.execute(text("""
+            SELECT payment_method_id FROM payment_methods
+            WHERE is_active ORDER BY (method_type = 'CASH') DESC, payment_method_id LIMIT 1
+        """)).scalar()
+    finally:
+        db.close()
+    if not terminals or not products:
+        raise SystemExit("❌ No load test data found; run python -m backend.loadtest.seed first")
+    return Fixtures(terminals, products, payment_method_id)
+
+
+class Worker(threading.Thread, ABC):
+    def __init__(self, name: str, base_url: str, recorder: Recorder, fixtures: Fixtures,
+                 stop: threading.Event, seed: int):
+        super().__init__(name=name, daemon=True)
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.fixtures = fixtures
+        self.stop_event = stop
+        self.random = random.Random(seed)
+        self.session = requests.Session()
+
+    def call(self, endpoint: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        """Issue a request and record it under endpoint (the route template)"""
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=30, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.recorder.add(endpoint, time.perf_counter() - started, ok)
+        return response if ok else None
+
+    def type_ahead(self, store_id: int, product: dict) -> None:
+        word = product["product_name"].split()[0]
+        for length in range(2, len(word) + 1):
+            self.call("GET /sales/products/search", "GET", "/sales/products/search",
+                      params={"search": word[:length], "store_id": store_id, "limit": 20})
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.iteration()
+
+    @abstractmethod
+    def iteration(self):
+        """One pass of this worker's traffic mix; run() repeats it until stopped"""
+
+
+class CheckoutWorker(Worker):
+    def __init__(self, *args, terminal: dict, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.terminal = terminal
+
+    def iteration(self):
+        lines = self.random.sample(self.fixtures.products, self.random.randint(1, 5))
+        self.type_ahead(self.terminal["store_id"], lines[0])
+        items = [
+            {"product_id": p["product_id"], "quantity": self.random.randint(1, 3), "unit_price": str(p["retail_price"])}
+            for p in lines
+        ]
+        # Overpay in cash; tax is applied server side
+        amount = sum(float(p["retail_price"]) * item["quantity"] for p, item in zip(lines, items)) * 1.5
+        self.call("POST /sales/", "POST", "/sales/", params={"user_id": self.terminal["user_id"]}, json={
+            "store_id": self.terminal["store_id"],
+            "pos_terminal_id": self.terminal["terminal_id"],
+            "sale_items": items,
+            "payments": [{"payment_method_id": self.fixtures.payment_method_id, "amount": f"{amount:.2f}"}],
+        })
+
+
+class SearchWorker(Worker):
+    def iteration(self):
+        terminal = self.random.choice(self.fixtures.terminals)
+        self.type_ahead(terminal["store_id"], self.random.choice(self.fixtures.products))
+
+
+class ReturnsWorker(Worker):
+    def iteration(self):
+        terminal = self.random.choice(self.fixtures.terminals)
+        response = self.call("GET /returns/sales/returnable", "GET", "/returns/sales/returnable",
+                             params={"store_id": terminal["store_id"], "limit": 50})
+        sales = response.json() if response is not None else []
+        if not sales:
+            self.stop_event.wait(1)
+            return
+        sale = self.random.choice(sales)
+        item = sale["returnable_items"][0]
+        self.call("POST /returns/", "POST", "/returns/", params={"user_id": terminal["user_id"]}, json={
+            "sale_id": sale["sale_id"],
+            "reason": "Load test return",
+            "refund_method_id": self.fixtures.payment_method_id,
+            "return_items": [{
+                "sale_item_id": item["sale_item_id"],
+                "quantity_returned": 1,
+                "refund_per_item": str(item["unit_price"]),
+            }],
+        })
+
+
+class DashboardWorker(Worker):
+    def __init__(self, *args, poll_interval: float, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.poll_interval = poll_interval
+
+    def iteration(self):
+        store_id = self.random.choice(self.fixtures.terminals)["store_id"]
+        today = date.today()
+        self.call("GET /dashboard/sales-summary", "GET", "/dashboard/sales-summary")
+        self.call("GET /dashboard/recent-transactions", "GET", "/dashboard/recent-transactions")
+        self.call("GET /analytics/sales/summary", "GET", "/analytics/sales/summary", params={
+            "start_date": (today - timedelta(days=30)).isoformat(),
+            "end_date": today.isoformat(),
+            "store_id": store_id,
+        })
+        self.stop_event.wait(self.poll_interval)
+
+
+def run(base_url: str, duration: float, warmup: float, terminals: int, searchers: int, returns: int,
+        dashboards: int, poll_interval: float) -> Dict[str, dict]:
+    fixtures = load_fixtures()
+    recorder = Recorder()
+    stop = threading.Event()
+    common = dict(recorder=recorder, fixtures=fixtures, stop=stop)
+    workers: List[Worker] = []
+    for index in range(terminals):
+        terminal = fixtures.terminals[index % len(fixtures.terminals)]
+        workers.append(CheckoutWorker(f"checkout-{index}", base_url, seed=index, terminal=terminal, **common))
+    workers += [SearchWorker(f"search-{i}", base_url, seed=1000 + i, **common) for i in range(searchers)]
+    workers += [ReturnsWorker(f"returns-{i}", base_url, seed=2000 + i, **common) for i in range(returns)]
+    workers += [
+        DashboardWorker(f"dashboard-{i}", base_url, seed=3000 + i, poll_interval=poll_interval, **common)
+        for i in range(dashboards)
+    ]
+
+    print(f"=== {len(workers)} workers against {base_url}: {warmup:g}s warmup, {duration:g}s measured ===\n")
+    for worker in workers:
+        worker.start()
+    time.sleep(warmup)
+    recorder.start()
+    time.sleep(duration)
+    recorder.stop()
+    stop.set()
+    for worker in workers:
+        worker.join(timeout=30)
+    return recorder.summary()
+
+
+def print_report(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None) -> None:
+    header = f"{'endpoint':<40} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'p95 vs base':>12}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, stats in results.items():
+        line = (f"{endpoint:<40} {stats['requests']:>7} {stats['errors']:>5} {stats['throughput_rps']:>8.1f} "
+                f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+        if baseline:
+            before = baseline.get(endpoint, {}).get("p95_ms")
+            line += f" {(stats['p95_ms'] - before) / before * 100:>+11.1f}%" if before else f" {'-':>12}"
+        print(line)
+    total = sum(stats["throughput_rps"] for stats in results.values())
+    print(f"\nTotal throughput: {total:.1f} requests/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run POS load test workloads against a server")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds before measuring starts")
+    parser.add_argument("--terminals", type=int, default=20, help="Concurrent checkout terminals")
+    parser.add_argument("--searchers", type=int, default=10, help="Concurrent type-ahead searchers")
+    parser.add_argument("--returns", type=int, default=2, help="Concurrent returns desks")
+    parser.add_argument("--dashboards", type=int, default=5, help="Polling dashboards")
+    parser.add_argument("--poll-interval", type=float, default=5, help="Dashboard poll interval in seconds")
+    parser.add_argument("--out", help="Write results as JSON")
+    parser.add_argument("--compare", help="Earlier --out file to compare p95 latency against")
+    args = parser.parse_args()
+
+    results = run(args.base_url, args.duration, args.warmup, args.terminals, args.searchers, args.returns,
+                  args.dashboards, args.poll_interval)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_report(results, baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"✅ Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
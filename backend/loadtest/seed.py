@@ -0,0 +1,364 @@
+"""
+Synthetic data generator for load tests.
+
+Rows are generated server-side with generate_series in chunks, so millions
+of sales take minutes rather than hours. Everything is deterministic for a
+given set of options (no random seed to track) and tagged so it can be
+removed: stores/categories/brands named "LT ...", product codes and
+invoice numbers starting with "LT", usernames starting with "lt_".
+Sales created by load test runs at the LT stores are removed by --reset too.
+
+Usage:
+    python -m backend.loadtest.seed [--stores 5] [--terminals 4] [--products 500000]
+                                    [--variant-every 5] [--customers 50000]
+                                    [--sales 2000000] [--months 12] [--reset]
+"""
+
+import argparse
+import time
+from datetime import date
+
+from sqlalchemy import text
+
+from backend.database import SessionLocal
+from backend import partitions
+from backend.sales import crud as sales_crud
+
+CHUNK_SIZE = 50000
+INITIAL_STOCK = 1000000
+SALES_TABLES = ("sales_transactions", "sale_items", "payments")
+
+ADJECTIVES = [
+    "Classic", "Fresh", "Organic", "Premium", "Golden", "Crispy", "Spicy", "Sweet", "Creamy", "Natural",
+    "Royal", "Family", "Instant", "Super", "Mini", "Large", "Light", "Double", "Herbal", "Pure",
+    "Smart", "Ultra", "Daily", "Special",
+]
+NOUNS = [
+    "Basmati Rice", "Green Tea", "Biscuits", "Cooking Oil", "Shampoo", "Toothpaste", "Detergent", "Milk",
+    "Yogurt", "Butter", "Cheese", "Bread", "Juice", "Cola", "Water", "Chips", "Chocolate", "Coffee",
+    "Sugar", "Flour", "Lentils", "Chickpeas", "Ketchup", "Mayonnaise", "Noodles", "Pasta", "Soap",
+    "Face Wash", "Lotion", "Tissue", "Dates", "Honey", "Jam", "Cereal", "Oats", "Salt", "Spice Mix",
+    "Vinegar", "Pickle", "Ghee",
+]
+
+LT_STORES = "SELECT store_id FROM stores WHERE store_name LIKE 'LT %'"
+
+RESET = f"""
+DELETE FROM return_items WHERE return_id IN (
+    SELECT r.return_id FROM returns r
+    JOIN sales_transactions st ON st.sale_id = r.sale_id AND st.sale_date = r.sale_date
+    WHERE st.store_id IN ({LT_STORES})
+);
+DELETE FROM returns WHERE (sale_id, sale_date) IN (
+    SELECT sale_id, sale_date FROM sales_transactions WHERE store_id IN ({LT_STORES})
+);
+DELETE FROM loyalty_points_history WHERE customer_id IN (
+    SELECT customer_id FROM customers WHERE loyalty_member_id LIKE 'LT%'
+);
+DELETE FROM sales_transactions WHERE store_id IN ({LT_STORES});
+DELETE FROM inventory_movements WHERE store_id IN ({LT_STORES});
+DELETE FROM sales_hourly_totals WHERE store_id IN ({LT_STORES});
+DELETE FROM product_sales_hourly WHERE store_id IN ({LT_STORES});
+DELETE FROM inventory WHERE store_id IN ({LT_STORES});
+DELETE FROM audit_logs WHERE user_id IN (SELECT user_id FROM users WHERE username LIKE 'lt\\_%');
+DELETE FROM users WHERE username LIKE 'lt\\_%';
+DELETE FROM pos_terminals WHERE store_id IN ({LT_STORES});
+DELETE FROM stores WHERE store_name LIKE 'LT %';
+DELETE FROM customers WHERE loyalty_member_id LIKE 'LT%';
+DELETE FROM product_variants WHERE product_id IN (SELECT product_id FROM products WHERE product_code LIKE 'LT%');
+DELETE FROM products WHERE product_code LIKE 'LT%';
+DELETE FROM categories WHERE category_name LIKE 'LT %';
+DELETE FROM brands WHERE brand_name LIKE 'LT %';
+"""
+
+INSERT_PRODUCTS = """
+INSERT INTO products
+    (product_code, product_name, category_id, brand_id, base_price, retail_price,
+     tax_category_id, barcode, unit_of_measure, reorder_level)
+SELECT 'LT' || lpad(CAST(g AS TEXT), 8, '0'),
+       (CAST(:adjectives AS TEXT[]))[1 + g % :adjective_count] || ' '
+           || (CAST(:nouns AS TEXT[]))[1 + (g / :adjective_count) % :noun_count] || ' ' || g,
+       (CAST(:category_ids AS INTEGER[]))[1 + g % :category_count],
+       (CAST(:brand_ids AS INTEGER[]))[1 + g % :brand_count],
+       ROUND((50 + (g * 37) % 4950) * 0.7, 2),
+       50 + (g * 37) % 4950,
+       (CAST(:tax_category_ids AS INTEGER[]))[1 + g % :tax_category_count],
+       '99' || lpad(CAST(g AS TEXT), 11, '0'),
+       'pcs',
+       10
+FROM generate_series(:first, :last) g
+"""
+
+INSERT_VARIANTS = """
+INSERT INTO product_variants (product_id, size, sku_suffix, barcode, retail_price, base_price)
+SELECT p.product_id, s.size, s.size, p.barcode || s.size, p.retail_price, p.base_price
+FROM products p
+CROSS JOIN (VALUES ('S'), ('M'), ('L')) AS s(size)
+WHERE p.product_code LIKE 'LT%' AND p.product_id % :every = 0
+"""
+
+INSERT_INVENTORY = """
+INSERT INTO inventory (product_id, variant_id, store_id, current_stock)
+SELECT p.product_id, NULL, :store_id, :stock FROM products p WHERE p.product_code LIKE 'LT%'
+UNION ALL
+SELECT v.product_id, v.variant_id, :store_id, :stock
+FROM product_variants v JOIN products p ON p.product_id = v.product_id
+WHERE p.product_code LIKE 'LT%'
+"""
+
+INSERT_CUSTOMERS = """
+INSERT INTO customers (first_name, last_name, phone_number, loyalty_member_id, city)
+SELECT 'Customer', 'LT' || g, '03' || lpad(CAST(g AS TEXT), 9, '0'), 'LT' || g, 'Lahore'
+FROM generate_series(1, :count) g
+"""
+
+# One statement per chunk: sales, their lines and payments are generated together so
+# totals match the lines. Terminal, store and cashier come from aligned arrays.
+INSERT_SALES = """
+WITH sales AS (
+    SELECT nextval(pg_get_serial_sequence('sales_transactions', 'sale_id')) AS sale_id,
+           g,
+           CAST(:month_start AS TIMESTAMP) + ((g * 7919) % :month_seconds) * INTERVAL '1 second' AS sale_date,
+           (CAST(:terminal_ids AS INTEGER[]))[1 + g % :terminal_count] AS terminal_id,
+           (CAST(:store_ids AS INTEGER[]))[1 + g % :terminal_count] AS store_id,
+           (CAST(:user_ids AS INTEGER[]))[1 + g % :terminal_count] AS user_id
+    FROM generate_series(:first, :last) g
+),
+lines AS (
+    SELECT s.sale_id, s.sale_date, p.product_id, 1 + (s.g + n) % 3 AS quantity, p.retail_price AS unit_price,
+           p.base_price AS unit_cost,
+           ROUND(p.retail_price * COALESCE(tc.tax_rate, 0) / 100, 2) AS tax
+    FROM sales s
+    CROSS JOIN LATERAL generate_series(1, 1 + s.g % :max_lines) AS n
+    JOIN products p ON p.product_id = :first_product_id + (s.g * 104729 + n * 7919) % :product_count
+    LEFT JOIN tax_categories tc ON tc.tax_category_id = p.tax_category_id
+),
+items AS (
+    INSERT INTO sale_items (sale_id, sale_date, product_id, quantity, unit_price, tax_per_item, line_total, unit_cost)
+    SELECT sale_id, sale_date, product_id, quantity, unit_price, tax, quantity * (unit_price + tax), unit_cost
+    FROM lines
+),
+totals AS (
+    SELECT sale_id, SUM(quantity * unit_price) AS sub_total, SUM(quantity * tax) AS tax_amount
+    FROM lines
+    GROUP BY sale_id
+),
+transactions AS (
+    INSERT INTO sales_transactions
+        (sale_id, invoice_number, store_id, pos_terminal_id, customer_id, user_id, sale_date,
+         sub_total, tax_amount, grand_total, amount_paid, payment_status)
+    SELECT s.sale_id, 'LT-' || s.sale_id, s.store_id, s.terminal_id,
+           CASE WHEN s.g % 3 = 0 THEN :first_customer_id + s.g % :customer_count END,
+           s.user_id, s.sale_date, t.sub_total, t.tax_amount, t.sub_total + t.tax_amount,
+           t.sub_total + t.tax_amount, 'PAID'
+    FROM sales s JOIN totals t ON t.sale_id = s.sale_id
+)
+INSERT INTO payments (sale_id, sale_date, payment_method_id, amount, payment_date)
+SELECT s.sale_id, s.sale_date, (CAST(:payment_method_ids AS INTEGER[]))[1 + s.g % :payment_method_count],
+       t.sub_total + t.tax_amount, s.sale_date
+FROM sales s JOIN totals t ON t.sale_id = s.sale_id
+"""
+
+
+def _ids(db, sql: str, params=None) -> list:
+    return list(db.execute(text(sql), params or {}).scalars().all())
+
+
+def _chunks(first: int, last: int, size: int = CHUNK_SIZE):
+    for start in range(first, last + 1, size):
+        yield start, min(start + size - 1, last)
+
+
+def _step(message: str, started: float) -> None:
+    print(f"✅ {message} ({time.monotonic() - started:.1f}s)")
+
+
+def reset(db) -> None:
+    started = time.monotonic()
+    db.execute(text(RESET))
+    db.commit()
+    _step("Removed load test data", started)
+
+
+def seed_reference_data(db, stores: int, terminals: int) -> dict:
+    started = time.monotonic()
+    db.execute(text("""
+        INSERT INTO categories (category_name)
+        SELECT 'LT Category ' || g FROM generate_series(1, 20) g;
+        INSERT INTO brands (brand_name)
+        SELECT 'LT Brand ' || g FROM generate_series(1, 50) g;
+        INSERT INTO stores (store_name, address, city)
+        SELECT 'LT Store ' || g, 'Synthetic load test store ' || g, 'Lahore' FROM generate_series(1, :stores) g;
+        INSERT INTO pos_terminals (store_id, terminal_name)
+        SELECT s.store_id, 'LT-T' || lpad(CAST(t AS TEXT), 2, '0')
+        FROM stores s CROSS JOIN generate_series(1, :terminals) t
+        WHERE s.store_name LIKE 'LT %';
+    """), {"stores": stores, "terminals": terminals})
+    role_id = db.execute(text(
+        "SELECT role_id FROM roles ORDER BY (role_name = 'Cashier') DESC, role_id LIMIT 1"
+    )).scalar()
+    db.execute(text("""
+        INSERT INTO users (username, password_hash, first_name, last_name, email, role_id, store_id)
+        SELECT 'lt_cashier_' || t.terminal_id, 'loadtest', 'Cashier', CAST(t.terminal_id AS TEXT),
+               'lt_cashier_' || t.terminal_id || '@loadtest.local', :role_id, t.store_id
+        FROM pos_terminals t JOIN stores s ON s.store_id = t.store_id
+        WHERE s.store_name LIKE 'LT %'
+    """), {"role_id": role_id})
+    if not _ids(db, "SELECT tax_category_id FROM tax_categories WHERE is_active"):
+        db.execute(text("""
+            INSERT INTO tax_categories (tax_category_name, tax_rate, effective_date)
+            VALUES ('LT Standard', 18.00, CURRENT_DATE)
+        """))
+    db.commit()
+    _step(f"Created {stores} stores with {terminals} terminals and a cashier each", started)
+
+    terminal_rows = db.execute(text("""
+        SELECT t.terminal_id, t.store_id, u.user_id
+        FROM pos_terminals t
+        JOIN users u ON u.username = 'lt_cashier_' || t.terminal_id
+        ORDER BY t.terminal_id
+    """)).all()
+    return {
+        "category_ids": _ids(db, "SELECT category_id FROM categories WHERE category_name LIKE 'LT %' ORDER BY 1"),
+        "brand_ids": _ids(db, "SELECT brand_id FROM brands WHERE brand_name LIKE 'LT %' ORDER BY 1"),
+        "tax_category_ids": _ids(db, "SELECT tax_category_id FROM tax_categories WHERE is_active ORDER BY 1"),
+        "payment_method_ids": _ids(db, "SELECT payment_method_id FROM payment_methods WHERE is_active ORDER BY 1"),
+        "store_ids": _ids(db, f"{LT_STORES} ORDER BY 1"),
+        "terminals": terminal_rows,
+    }
+
+
+def seed_products(db, count: int, variant_every: int, ref: dict) -> None:
+    started = time.monotonic()
+    params = {
+        "adjectives": ADJECTIVES, "adjective_count": len(ADJECTIVES),
+        "nouns": NOUNS, "noun_count": len(NOUNS),
+        "category_ids": ref["category_ids"], "category_count": len(ref["category_ids"]),
+        "brand_ids": ref["brand_ids"], "brand_count": len(ref["brand_ids"]),
+        "tax_category_ids": ref["tax_category_ids"], "tax_category_count": len(ref["tax_category_ids"]),
+    }
+    for first, last in _chunks(1, count):
+        db.execute(text(INSERT_PRODUCTS), {**params, "first": first, "last": last})
+        db.commit()
+    variants = 0
+    if variant_every:
+        variants = db.execute(text(INSERT_VARIANTS), {"every": variant_every}).rowcount
+        db.commit()
+    _step(f"Created {count} products and {variants} variants", started)
+
+    started = time.monotonic()
+    for store_id in ref["store_ids"]:
+        db.execute(text(INSERT_INVENTORY), {"store_id": store_id, "stock": INITIAL_STOCK})
+        db.commit()
+    _step(f"Stocked {len(ref['store_ids'])} stores", started)
+
+
+def seed_customers(db, count: int) -> None:
+    started = time.monotonic()
+    db.execute(text(INSERT_CUSTOMERS), {"count": count})
+    db.commit()
+    _step(f"Created {count} customers", started)
+
+
+def seed_sales(db, count: int, months: int, max_lines: int, ref: dict) -> None:
+    started = time.monotonic()
+    current = date.today().replace(day=1)
+    first_month = partitions.add_months(current, -(months - 1))
+    for table in SALES_TABLES:
+        partitions.create_future_partitions(db, table, ahead=months, today=first_month)
+
+    product_range = db.execute(text(
+        "SELECT MIN(product_id), COUNT(*) FROM products WHERE product_code LIKE 'LT%'"
+    )).one()
+    customer_range = db.execute(text(
+        "SELECT MIN(customer_id), COUNT(*) FROM customers WHERE loyalty_member_id LIKE 'LT%'"
+    )).one()
+    terminals = ref["terminals"]
+    params = {
+        "terminal_ids": [row.terminal_id for row in terminals],
+        "store_ids": [row.store_id for row in terminals],
+        "user_ids": [row.user_id for row in terminals],
+        "terminal_count": len(terminals),
+        "payment_method_ids": ref["payment_method_ids"],
+        "payment_method_count": len(ref["payment_method_ids"]),
+        "first_product_id": product_range[0],
+        "product_count": product_range[1],
+        "first_customer_id": customer_range[0] or 0,
+        "customer_count": max(customer_range[1], 1),
+        "max_lines": max_lines,
+    }
+    per_month = max(count // months, 1)
+    for index in range(months):
+        month = partitions.add_months(first_month, index)
+        month_seconds = (partitions.add_months(month, 1) - month).days * 86400
+        if month == current:
+            # Keep the current month's history in the past
+            elapsed = (date.today() - month).days * 86400
+            month_seconds = max(elapsed, 3600)
+        first = index * per_month + 1
+        for chunk_first, chunk_last in _chunks(first, first + per_month - 1):
+            db.execute(text(INSERT_SALES), {
+                **params,
+                "month_start": month,
+                "month_seconds": month_seconds,
+                "first": chunk_first,
+                "last": chunk_last,
+            })
+            db.commit()
+        print(f"   {month:%Y-%m}: {per_month} sales")
+    _step(f"Created {per_month * months} sales over {months} months", started)
+
+    started = time.monotonic()
+    sales_crud.rebuild_sales_buckets(db, since=first_month)
+    _step("Rebuilt hourly sales buckets", started)
+
+
+def seed(stores: int = 5, terminals: int = 4, products: int = 500000, variant_every: int = 5,
+         customers: int = 50000, sales: int = 2000000, months: int = 12, max_lines: int = 5,
+         reset_first: bool = False):
+    db = SessionLocal()
+    try:
+        print("=== Seeding load test data ===\n")
+        if reset_first:
+            reset(db)
+        elif db.execute(text("SELECT EXISTS (SELECT 1 FROM products WHERE product_code LIKE 'LT%')")).scalar():
+            print("❌ Load test data already exists; run with --reset to replace it")
+            return
+        ref = seed_reference_data(db, stores, terminals)
+        seed_products(db, products, variant_every, ref)
+        seed_customers(db, customers)
+        seed_sales(db, sales, months, max_lines, ref)
+        started = time.monotonic()
+        db.execute(text("ANALYZE"))
+        db.commit()
+        _step("Analyzed", started)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic POS data for load tests")
+    parser.add_argument("--stores", type=int, default=5)
+    parser.add_argument("--terminals", type=int, default=4, help="Terminals (and cashiers) per store")
+    parser.add_argument("--products", type=int, default=500000)
+    parser.add_argument("--variant-every", type=int, default=5,
+                        help="Every Nth product gets S/M/L variants (0 for none)")
+    parser.add_argument("--customers", type=int, default=50000)
+    parser.add_argument("--sales", type=int, default=2000000)
+    parser.add_argument("--months", type=int, default=12, help="Months of sales history")
+    parser.add_argument("--max-lines", type=int, default=5, help="Most lines per sale")
+    parser.add_argument("--reset", action="store_true", help="Remove existing load test data first")
+    parser.add_argument("--reset-only", action="store_true", help="Remove load test data and exit")
+    args = parser.parse_args()
+    if args.reset_only:
+        session = SessionLocal()
+        try:
+            reset(session)
+        finally:
+            session.close()
+    else:
+        seed(args.stores, args.terminals, args.products, args.variant_every, args.customers,
+             args.sales, args.months, args.max_lines, args.reset)
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi import Request
 from pydantic import BaseModel
 import psycopg2
@@ -10,7 +11,21 @@ from datetime import date, datetime, timedelta
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI()
+from backend import audit, compression, fastjson, profiling
+
+# orjson-rendered JSON for every router; see backend/fastjson.py
+app = FastAPI(default_response_class=fastjson.FastJSONResponse)
+from backend.database import engine
+
+profiling.install(engine)
+
+@app.on_event("startup")
+def start_audit_writer():
+    audit.start()
+
+@app.on_event("shutdown")
+def stop_audit_writer():
+    audit.stop()
 
 from backend.product.api import router as product_router
 app.include_router(product_router)
@@ -36,6 +51,26 @@ app.include_router(returns_router)
 from backend.suppliers.api import router as suppliers_router
 app.include_router(suppliers_router)
 
+from backend.analytics.api import router as analytics_router
+app.include_router(analytics_router)
+
+from backend.purchasing.api import router as purchasing_router
+app.include_router(purchasing_router)
+
+from backend.advance_orders.api import router as advance_orders_router
+app.include_router(advance_orders_router)
+
+from backend.expenses.api import router as expenses_router
+app.include_router(expenses_router)
+
+from backend.sync.api import router as sync_router
+app.include_router(sync_router)
+
+# Innermost, so the profiled request time includes compressing the body
+app.add_middleware(compression.CompressionMiddleware)
+
+app.add_middleware(profiling.ProfilingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # For development only! Restrict in production.
@@ -63,7 +98,8 @@ def login(data: LoginRequest):
             user=DB_USER,
             password=DB_PASS,
             host=DB_HOST,
-            port=DB_PORT
+            port=DB_PORT,
+            cursor_factory=profiling.ProfiledCursor
         )
         cur = conn.cursor()
         cur.execute(
@@ -92,6 +128,19 @@ def login(data: LoginRequest):
 def read_root():
     return {"message": "Backend is running!"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-endpoint request, query count and DB time counters (Prometheus text format)"""
+    return PlainTextResponse(profiling.render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics/slow-queries")
+def slow_queries(limit: int = 20):
+    """Slowest SQL statements since startup"""
+    return {
+        "threshold_ms": profiling.SLOW_QUERY_SECONDS * 1000,
+        "queries": profiling.slowest_queries(limit)
+    }
+
 @app.get("/dashboard/sales-summary")
 def sales_summary():
     try:
@@ -100,15 +149,16 @@ def sales_summary():
             user=DB_USER,
             password=DB_PASS,
             host=DB_HOST,
-            port=DB_PORT
+            port=DB_PORT,
+            cursor_factory=profiling.ProfiledCursor
         )
         cur = conn.cursor()
         today = date.today()
         cur.execute("""
             SELECT COALESCE(SUM(grand_total), 0), COUNT(*)
             FROM sales_transactions
-            WHERE sale_date::date = %s
-        """, (today,))
+            WHERE sale_date >= %s AND sale_date < %s
+        """, (today, today + timedelta(days=1)))
         result = cur.fetchone()
         total_sales, num_sales = result if result else (0, 0)
         cur.close()
@@ -125,7 +175,8 @@ def customer_count():
             user=DB_USER,
             password=DB_PASS,
             host=DB_HOST,
-            port=DB_PORT
+            port=DB_PORT,
+            cursor_factory=profiling.ProfiledCursor
         )
         cur = conn.cursor()
         cur.execute("SELECT COUNT(*) FROM customers WHERE is_active=TRUE")
@@ -145,7 +196,8 @@ def inventory_alerts():
             user=DB_USER,
             password=DB_PASS,
             host=DB_HOST,
-            port=DB_PORT
+            port=DB_PORT,
+            cursor_factory=profiling.ProfiledCursor
         )
         cur = conn.cursor()
         cur.execute("""
@@ -179,7 +231,8 @@ def recent_transactions():
             user=DB_USER,
             password=DB_PASS,
             host=DB_HOST,
-            port=DB_PORT
+            port=DB_PORT,
+            cursor_factory=profiling.ProfiledCursor
         )
         cur = conn.cursor()
         cur.execute("""
@@ -10,7 +10,16 @@ from datetime import date, datetime, timedelta
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI()
+try:
+    from compression import CompressionMiddleware
+    from fastjson import FastJSONResponse
+except ImportError:
+    # Fallback for when running as module
+    from backend.compression import CompressionMiddleware
+    from backend.fastjson import FastJSONResponse
+
+# orjson-rendered JSON for every router; see fastjson.py
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Use relative imports for the .exe build
 # Skip product router for now since it has SQLAlchemy dependency
@@ -26,6 +35,8 @@ app.include_router(inventory_router)
 from settings.api import router as settings_router
 app.include_router(settings_router)
 
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # For development only! Restrict in production.
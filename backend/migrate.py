@@ -0,0 +1,427 @@
+"""
+Versioned schema migrations.
+
+Migrations live in backend/migrations as ``NNNN_name.sql`` or ``NNNN_name.py``
+and are applied in version order; each applied version is recorded in the
+``schema_migrations`` table. dataschema.sql is the baseline for new installs
+and records the versions it already contains, so a new database only runs
+migrations added after it.
+
+* ``.sql`` files run in a single transaction together with their version row.
+  A ``-- migrate:no-transaction`` line makes each statement autocommit instead,
+  which ``CREATE INDEX CONCURRENTLY`` needs; such files must be idempotent.
+* ``.py`` files define ``upgrade(op)`` and may set ``TRANSACTIONAL = False``.
+  ``op`` offers ``execute``, online-safe ``create_index`` / ``drop_index``
+  (concurrent when not in a transaction, per partition on partitioned tables)
+  ``backfill``, which updates a table in key-range batches that each commit
+  on their own, and ``create_month_partitions`` for converting a table to
+  the monthly layout of backend/partitions.py.
+
+Versions are never renumbered once shipped: a recorded version whose name no
+longer matches its file stops the run instead of being silently skipped.
+
+Only one runner works at a time (advisory lock) and DDL gives up after
+MIGRATION_LOCK_TIMEOUT rather than queueing behind long transactions and
+blocking the tills. Dry-run mode prints the statements each pending
+migration would run without changing anything.
+
+Usage:
+    python -m backend.migrate status
+    python -m backend.migrate up [--target VERSION] [--dry-run]
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional, Sequence
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# How long DDL may wait for a table lock before failing (retry off-peak)
+LOCK_TIMEOUT = os.getenv('MIGRATION_LOCK_TIMEOUT', '5s')
+DEFAULT_BATCH_SIZE = int(os.getenv('MIGRATION_BATCH_SIZE', '5000'))
+
+# pg_advisory_lock key held while migrating ("POSMIGR" in hex)
+ADVISORY_LOCK_ID = 0x504F534D49475200
+
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+
+VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version     VARCHAR(20) PRIMARY KEY,
+    name        VARCHAR(200) NOT NULL,
+    applied_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+_DOLLAR_QUOTE = re.compile(r"\$(\w*)\$")
+
+
+@dataclass
+class Migration:
+    version: str
+    name: str
+    path: str
+
+    @property
+    def kind(self) -> str:
+        return os.path.splitext(self.path)[1][1:]
+
+
+def discover(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+    """Return the migrations in directory, ordered by version"""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        version, name, _ = match.groups()
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {filename}")
+        migrations[version] = Migration(version, name, os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split a SQL script on top-level semicolons, honouring quotes and comments"""
+    statements = []
+    current = []
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            end = len(sql) if end == -1 else end
+            current.append(sql[i:end])
+            i = end
+            continue
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            end = len(sql) if end == -1 else end + 2
+            current.append(sql[i:end])
+            i = end
+            continue
+        if char in ("'", '"'):
+            end = i + 1
+            while end < len(sql):
+                if sql[end] == char:
+                    if sql.startswith(char * 2, end):
+                        end += 2
+                        continue
+                    break
+                end += 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        dollar = _DOLLAR_QUOTE.match(sql, i) if char == "$" else None
+        if dollar:
+            end = sql.find(dollar.group(0), dollar.end())
+            end = len(sql) if end == -1 else end + len(dollar.group(0))
+            current.append(sql[i:end])
+            i = end
+            continue
+        if char == ";":
+            statements.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statements.append("".join(current))
+    return [s.strip() for s in statements if _strip_comments(s).strip()]
+
+
+def _strip_comments(sql: str) -> str:
+    sql = re.sub(r"/\*.*?\*/", "", sql, flags=re.DOTALL)
+    return re.sub(r"--[^\n]*", "", sql)
+
+
+class Operations:
+    """What a migration can do; in dry-run mode changes are printed instead of executed"""
+
+    def __init__(self, conn, transactional: bool, dry_run: bool = False, logger=None):
+        self.conn = conn
+        self.transactional = transactional
+        self.dry_run = dry_run
+        self.logger = logger or logging.getLogger(__name__)
+        self.planned: List[str] = []
+
+    def execute(self, sql: str, params=None) -> None:
+        """Run a statement that changes the database (recorded only in dry-run mode)"""
+        if self.dry_run:
+            self.planned.append(sql.strip())
+            return
+        started = time.monotonic()
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql, params)
+        self.logger.info(f"  {_summary(sql)} ({time.monotonic() - started:.2f}s)")
+
+    def query(self, sql: str, params=None) -> list:
+        """Run a read-only query; also runs in dry-run mode"""
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def scalar(self, sql: str, params=None):
+        rows = self.query(sql, params)
+        return rows[0][0] if rows else None
+
+    def table_exists(self, table: str) -> bool:
+        return self.scalar("SELECT to_regclass(%s) IS NOT NULL", (table,))
+
+    def column_exists(self, table: str, column: str) -> bool:
+        return self.scalar("""
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s
+            )
+        """, (table, column))
+
+    def partitions(self, table: str) -> List[str]:
+        """Direct partitions of table (empty unless it is partitioned)"""
+        rows = self.query("""
+            SELECT CAST(inhrelid AS regclass)::text
+            FROM pg_inherits
+            WHERE inhparent = to_regclass(%s)
+            ORDER BY 1
+        """, (table,))
+        return [row[0] for row in rows]
+
+    def is_partitioned(self, table: str) -> bool:
+        return self.scalar("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+                           (table,))
+
+    def _index_state(self, name: str):
+        """(relkind, valid) of an index, or None when it does not exist"""
+        rows = self.query("""
+            SELECT c.relkind, i.indisvalid
+            FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+            WHERE c.oid = to_regclass(%s)
+        """, (name,))
+        return rows[0] if rows else None
+
+    def create_index(self, name: str, table: str, columns: Sequence[str], where: Optional[str] = None,
+                     unique: bool = False) -> None:
+        """
+        Create an index without blocking writes where possible. Outside a
+        transaction plain tables get CREATE INDEX CONCURRENTLY (an invalid
+        leftover from an interrupted build is dropped first). Partitioned
+        tables can't build concurrently, so the index is created on the
+        parent only and each partition's index is built concurrently and
+        attached; the parent index becomes valid once all are attached.
+        """
+        create = "CREATE UNIQUE INDEX" if unique else "CREATE INDEX"
+        definition = f"({', '.join(columns)})" + (f" WHERE {where}" if where else "")
+        state = self._index_state(name)
+        if state and state[1]:
+            return
+        if self.is_partitioned(table):
+            self.execute(f"{create} IF NOT EXISTS {name} ON ONLY {table} {definition}")
+            for partition in self.partitions(table):
+                suffix = partition[len(table) + 1:] if partition.startswith(f"{table}_") else partition
+                partition_index = f"{name}_{suffix}"[:63]
+                self.create_index(partition_index, partition, columns, where=where, unique=unique)
+                self.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+            return
+        if state and not self.transactional:
+            self.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        concurrently = "" if self.transactional else " CONCURRENTLY"
+        self.execute(f"{create}{concurrently} IF NOT EXISTS {name} ON {table} {definition}")
+
+    def drop_index(self, name: str) -> None:
+        """Drop an index, concurrently when possible (not for partitioned indexes)"""
+        state = self._index_state(name)
+        if state is None:
+            return
+        concurrently = "" if self.transactional or state[0] == "I" else " CONCURRENTLY"
+        self.execute(f"DROP INDEX{concurrently} IF EXISTS {name}")
+
+    def create_month_partitions(self, table: str, first: date, ahead: int = 3) -> List[str]:
+        """
+        Attach a ``<table>_YYYY_MM`` partition for every month from first
+        through `ahead` months after the current one that doesn't have one
+        yet, and return their names. Meant for a freshly created partitioned
+        table: rows already in its default partition are not moved
+        (backend/partitions.py does that).
+        """
+        today = date.today()
+        last = date(today.year + (today.month - 1 + ahead) // 12, (today.month - 1 + ahead) % 12 + 1, 1)
+        created = []
+        month = first.replace(day=1)
+        while month <= last:
+            following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            name = f"{table}_{month:%Y_%m}"
+            if not self.table_exists(name):
+                self.execute(f"CREATE TABLE {name} PARTITION OF {table} "
+                             f"FOR VALUES FROM ('{month}') TO ('{following}')")
+                created.append(name)
+            month = following
+        return created
+
+    def backfill(self, table: str, assignments: str, key: str, where: Optional[str] = None,
+                 params: Optional[dict] = None, batch_size: int = DEFAULT_BATCH_SIZE, pause: float = 0) -> int:
+        """
+        UPDATE table SET <assignments> [WHERE <where>] in ranges of batch_size
+        values of the integer column key. Outside a transaction every batch
+        commits on its own, so row locks are short and progress survives an
+        interruption (where should then skip rows already done).
+        Returns the number of rows updated.
+        """
+        condition = f" AND ({where})" if where else ""
+        params = dict(params or {})
+        low, high = self.query(f"SELECT MIN({key}), MAX({key}) FROM {table} WHERE TRUE{condition}",
+                                params or None)[0]
+        if low is None:
+            return 0
+        statement = (f"UPDATE {table} SET {assignments} "
+                     f"WHERE {key} >= %(_batch_start)s AND {key} < %(_batch_end)s{condition}")
+        if self.dry_run:
+            batches = (high - low) // batch_size + 1
+            self.planned.append(f"{statement}  -- {batches} batches of {batch_size} over {key} {low}..{high}")
+            return 0
+        updated = 0
+        with self.conn.cursor() as cursor:
+            for start in range(low, high + 1, batch_size):
+                cursor.execute(statement, {**params, "_batch_start": start, "_batch_end": start + batch_size})
+                updated += cursor.rowcount
+                if pause:
+                    time.sleep(pause)
+        self.logger.info(f"  Backfilled {updated} {table} rows")
+        return updated
+
+
+class MigrationRunner:
+    def __init__(self, conn, directory: str = MIGRATIONS_DIR, logger=None):
+        self.conn = conn
+        self.directory = directory
+        self.logger = logger or logging.getLogger(__name__)
+
+    def _execute(self, sql: str, params=None):
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall() if cursor.description else None
+
+    def applied_versions(self) -> dict:
+        """Applied version -> the name it was recorded under"""
+        if not self._execute("SELECT to_regclass('schema_migrations') IS NOT NULL")[0][0]:
+            return {}
+        return dict(self._execute("SELECT version, name FROM schema_migrations"))
+
+    def pending(self, target: Optional[str] = None) -> List[Migration]:
+        applied = self.applied_versions()
+        migrations = discover(self.directory)
+        for migration in migrations:
+            recorded = applied.get(migration.version)
+            if recorded is not None and recorded != migration.name:
+                raise RuntimeError(
+                    f"schema_migrations records {migration.version} as {recorded}, "
+                    f"but the migration file is {os.path.basename(migration.path)}"
+                )
+        return [
+            migration for migration in migrations
+            if migration.version not in applied and (target is None or migration.version <= target)
+        ]
+
+    def upgrade(self, target: Optional[str] = None, dry_run: bool = False) -> List[Migration]:
+        """Apply (or with dry_run, plan) pending migrations up to target; returns them"""
+        self.conn.autocommit = True
+        if not self._execute("SELECT pg_try_advisory_lock(%s)", (ADVISORY_LOCK_ID,))[0][0]:
+            raise RuntimeError("Another migration run holds the migration lock")
+        try:
+            if not dry_run:
+                self._execute(VERSION_TABLE)
+                self._execute("SELECT set_config('lock_timeout', %s, false)", (LOCK_TIMEOUT,))
+            migrations = self.pending(target)
+            for migration in migrations:
+                self._apply(migration, dry_run)
+            return migrations
+        finally:
+            self.conn.autocommit = True
+            self._execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_ID,))
+
+    def _apply(self, migration: Migration, dry_run: bool) -> None:
+        if migration.kind == "sql":
+            with open(migration.path, encoding="utf-8") as f:
+                sql = f.read()
+            transactional = NO_TRANSACTION_MARKER not in sql
+            statements = split_statements(sql)
+
+            def upgrade(op):
+                for statement in statements:
+                    op.execute(statement)
+        else:
+            spec = importlib.util.spec_from_file_location(f"migration_{migration.version}", migration.path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            transactional = getattr(module, "TRANSACTIONAL", True)
+            upgrade = module.upgrade
+
+        mode = "in one transaction" if transactional else "without a transaction"
+        self.logger.info(f"{'Plan for' if dry_run else 'Applying'} {migration.version} {migration.name} ({mode})")
+        op = Operations(self.conn, transactional, dry_run=dry_run, logger=self.logger)
+        if dry_run:
+            upgrade(op)
+            for statement in op.planned:
+                self.logger.info(f"  {statement};")
+            return
+
+        started = time.monotonic()
+        self.conn.autocommit = not transactional
+        try:
+            upgrade(op)
+            self._execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (migration.version, migration.name)
+            )
+            if transactional:
+                self.conn.commit()
+        except Exception:
+            if transactional:
+                self.conn.rollback()
+            raise
+        finally:
+            self.conn.autocommit = True
+        self.logger.info(f"Applied {migration.version} in {time.monotonic() - started:.1f}s")
+
+
+def _summary(sql: str) -> str:
+    line = " ".join(_strip_comments(sql).split())
+    return line if len(line) <= 100 else line[:97] + "..."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument("command", choices=["status", "up"], nargs="?", default="status")
+    parser.add_argument("--target", help="Stop after this version")
+    parser.add_argument("--dry-run", action="store_true", help="Print what would run without changing anything")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    import psycopg2
+    from backend.database import SQLALCHEMY_DATABASE_URL
+
+    conn = psycopg2.connect(SQLALCHEMY_DATABASE_URL)
+    try:
+        runner = MigrationRunner(conn)
+        if args.command == "status":
+            applied = runner.applied_versions()
+            for migration in discover():
+                mark = "✅" if migration.version in applied else "⏳"
+                print(f"{mark} {migration.version} {migration.name}")
+            return
+        migrations = runner.upgrade(target=args.target, dry_run=args.dry_run)
+        if not migrations:
+            print("✅ Database is up to date")
+        elif not args.dry_run:
+            print(f"✅ Applied {len(migrations)} migrations")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
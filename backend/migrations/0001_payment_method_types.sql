@@ -0,0 +1,18 @@
+-- 0001: payment_methods.method_type, so reports can group tenders (cash,
+-- card, ...) without matching on names. Existing methods are classified by
+-- name once; afterwards the type is managed through the settings API.
+
+ALTER TABLE payment_methods
+    ADD COLUMN IF NOT EXISTS method_type VARCHAR(20) NOT NULL DEFAULT 'OTHER'
+        CHECK (method_type IN ('CASH','CARD','MOBILE','BANK','CHEQUE','OTHER'));
+
+UPDATE payment_methods
+SET method_type = CASE
+    WHEN lower(method_name) = 'cash' THEN 'CASH'
+    WHEN lower(method_name) LIKE '%card%' THEN 'CARD'
+    WHEN lower(method_name) LIKE '%wallet%' OR lower(method_name) LIKE '%mobile%' THEN 'MOBILE'
+    WHEN lower(method_name) LIKE '%bank%' OR lower(method_name) LIKE '%transfer%' THEN 'BANK'
+    WHEN lower(method_name) LIKE '%cheque%' OR lower(method_name) LIKE '%check%' THEN 'CHEQUE'
+    ELSE 'OTHER'
+END
+WHERE method_type = 'OTHER';
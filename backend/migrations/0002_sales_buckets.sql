@@ -0,0 +1,56 @@
+-- 0002: hourly sales buckets for the heatmap, velocity and profit reports,
+-- and sale_items.unit_cost, the cost of goods a line was sold at.
+-- Lines sold before unit costs were stored take today's cost, once; from
+-- here on every bucket, void and rebuild reads the stored cost. The buckets
+-- are then rebuilt from sales history (see sales.crud.rebuild_sales_buckets).
+
+CREATE TABLE IF NOT EXISTS sales_hourly_totals (
+    store_id      INTEGER NOT NULL REFERENCES stores(store_id),
+    bucket_start  TIMESTAMP NOT NULL,
+    sales_count   INTEGER NOT NULL DEFAULT 0,
+    revenue       DECIMAL(12,2) NOT NULL DEFAULT 0,
+    tax_amount    DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (store_id, bucket_start)
+);
+
+CREATE TABLE IF NOT EXISTS product_sales_hourly (
+    store_id      INTEGER NOT NULL REFERENCES stores(store_id),
+    bucket_start  TIMESTAMP NOT NULL,
+    product_id    INTEGER NOT NULL REFERENCES products(product_id),
+    units         INTEGER NOT NULL DEFAULT 0,
+    revenue       DECIMAL(12,2) NOT NULL DEFAULT 0,
+    cost          DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (store_id, bucket_start, product_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_sales_hourly_product ON product_sales_hourly(product_id, bucket_start);
+
+ALTER TABLE sales_hourly_totals ADD COLUMN IF NOT EXISTS tax_amount DECIMAL(12,2) NOT NULL DEFAULT 0;
+ALTER TABLE product_sales_hourly ADD COLUMN IF NOT EXISTS cost DECIMAL(12,2) NOT NULL DEFAULT 0;
+
+ALTER TABLE sale_items ADD COLUMN IF NOT EXISTS unit_cost DECIMAL(10,2);
+UPDATE sale_items si
+SET unit_cost = COALESCE(
+    (SELECT pv.base_price FROM product_variants pv WHERE pv.variant_id = si.variant_id),
+    (SELECT p.base_price FROM products p WHERE p.product_id = si.product_id),
+    0
+)
+WHERE si.unit_cost IS NULL;
+
+DELETE FROM sales_hourly_totals;
+DELETE FROM product_sales_hourly;
+
+INSERT INTO sales_hourly_totals (store_id, bucket_start, sales_count, revenue, tax_amount)
+SELECT store_id, date_trunc('hour', sale_date), COUNT(*), SUM(grand_total), SUM(COALESCE(tax_amount, 0))
+FROM sales_transactions
+WHERE payment_status != 'VOID'
+GROUP BY 1, 2;
+
+-- sale_id alone identifies a sale both before and after 0006 partitions the sales tables
+INSERT INTO product_sales_hourly (store_id, bucket_start, product_id, units, revenue, cost)
+SELECT st.store_id, date_trunc('hour', st.sale_date), si.product_id,
+       SUM(si.quantity), SUM(si.line_total), SUM(si.quantity * COALESCE(si.unit_cost, 0))
+FROM sale_items si
+JOIN sales_transactions st ON st.sale_id = si.sale_id
+WHERE st.payment_status != 'VOID'
+GROUP BY 1, 2, 3;
@@ -0,0 +1,22 @@
+-- 0003: inventory.reserved_stock, the units held for open advance orders.
+-- Rebuilt from the PENDING/CONFIRMED advance orders; afterwards the advance
+-- order endpoints keep it current.
+
+ALTER TABLE inventory
+    ADD COLUMN IF NOT EXISTS reserved_stock INTEGER NOT NULL DEFAULT 0 CHECK (reserved_stock >= 0);
+
+WITH open_reservations AS (
+    SELECT ao.store_id, aoi.product_id, aoi.variant_id, SUM(aoi.quantity) AS quantity
+    FROM advance_order_items aoi
+    JOIN advance_orders ao ON ao.advance_order_id = aoi.advance_order_id
+    WHERE ao.status IN ('PENDING', 'CONFIRMED')
+    GROUP BY ao.store_id, aoi.product_id, aoi.variant_id
+)
+UPDATE inventory i
+SET reserved_stock = COALESCE(r.quantity, 0)
+FROM inventory target
+LEFT JOIN open_reservations r ON r.store_id = target.store_id
+     AND r.product_id = target.product_id
+     AND r.variant_id IS NOT DISTINCT FROM target.variant_id
+WHERE i.inventory_id = target.inventory_id
+  AND i.reserved_stock IS DISTINCT FROM COALESCE(r.quantity, 0);
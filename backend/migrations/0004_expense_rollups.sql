@@ -0,0 +1,21 @@
+-- 0004: expense totals per store, month and category for profit and loss,
+-- filled from the expenses table; afterwards every expense write keeps them
+-- current (see expenses.crud.rebuild_expense_rollups).
+
+CREATE TABLE IF NOT EXISTS expense_monthly_totals (
+    store_id            INTEGER NOT NULL REFERENCES stores(store_id),
+    month               DATE NOT NULL,
+    expense_category_id INTEGER NOT NULL REFERENCES expense_categories(category_id),
+    total_amount        DECIMAL(12,2) NOT NULL DEFAULT 0,
+    expense_count       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (store_id, month, expense_category_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_expenses_store_date ON expenses(store_id, expense_date);
+
+DELETE FROM expense_monthly_totals;
+
+INSERT INTO expense_monthly_totals (store_id, month, expense_category_id, total_amount, expense_count)
+SELECT store_id, CAST(date_trunc('month', expense_date) AS DATE), expense_category_id, SUM(amount), COUNT(*)
+FROM expenses
+GROUP BY 1, 2, 3;
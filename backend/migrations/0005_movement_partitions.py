@@ -0,0 +1,73 @@
+"""
+0005: inventory_movements partitioned by month on movement_date (see
+backend/partitions.py). The old table is renamed, a partition is attached for
+every month from its first movement through three months ahead, the rows are
+copied and the old table dropped, all in one transaction; the movement_id
+sequence is kept so ids continue where they left off. A store already
+partitioned is left as it is.
+"""
+
+from datetime import date
+
+RENAME_LEGACY = """
+ALTER TABLE inventory_movements RENAME TO inventory_movements_legacy;
+ALTER TABLE inventory_movements_legacy RENAME CONSTRAINT inventory_movements_pkey TO inventory_movements_legacy_pkey;
+DROP INDEX IF EXISTS idx_movements_product;
+DROP INDEX IF EXISTS idx_movements_store;
+DROP INDEX IF EXISTS idx_movements_product_date;
+DROP INDEX IF EXISTS idx_movements_store_date;
+DROP INDEX IF EXISTS idx_movements_sales_date;
+DROP INDEX IF EXISTS idx_movements_date;
+DROP INDEX IF EXISTS idx_movements_type;
+"""
+
+CREATE_PARTITIONED = """
+CREATE TABLE inventory_movements (
+    movement_id   INTEGER NOT NULL DEFAULT nextval('inventory_movements_movement_id_seq'),
+    product_id    INTEGER NOT NULL REFERENCES products(product_id),
+    variant_id    INTEGER REFERENCES product_variants(variant_id),
+    store_id      INTEGER NOT NULL REFERENCES stores(store_id),
+    movement_type VARCHAR(20) NOT NULL
+        CHECK (movement_type IN ('SALE','RETURN','PURCHASE','ADJUSTMENT','TRANSFER_OUT','TRANSFER_IN','WASTE')),
+    quantity      INTEGER NOT NULL,
+    reference_id  INTEGER,
+    movement_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    user_id       INTEGER NOT NULL REFERENCES users(user_id),
+    notes         TEXT,
+    PRIMARY KEY (movement_id, movement_date)
+) PARTITION BY RANGE (movement_date);
+
+CREATE TABLE inventory_movements_default PARTITION OF inventory_movements DEFAULT;
+
+CREATE INDEX idx_movements_product_date ON inventory_movements(product_id, movement_date);
+CREATE INDEX idx_movements_store_date ON inventory_movements(store_id, movement_date);
+CREATE INDEX idx_movements_sales_date ON inventory_movements(movement_date, store_id) WHERE movement_type = 'SALE';
+CREATE INDEX idx_movements_date    ON inventory_movements(movement_date);
+CREATE INDEX idx_movements_type    ON inventory_movements(movement_type);
+"""
+
+COPY_ROWS = """
+INSERT INTO inventory_movements
+    (movement_id, product_id, variant_id, store_id, movement_type, quantity,
+     reference_id, movement_date, user_id, notes)
+SELECT movement_id, product_id, variant_id, store_id, movement_type, quantity,
+       reference_id, COALESCE(movement_date, CURRENT_TIMESTAMP), user_id, notes
+FROM inventory_movements_legacy
+"""
+
+FINISH = """
+ALTER SEQUENCE inventory_movements_movement_id_seq OWNED BY inventory_movements.movement_id;
+DROP TABLE inventory_movements_legacy;
+"""
+
+
+def upgrade(op):
+    if op.is_partitioned("inventory_movements"):
+        return
+    first = op.scalar("SELECT CAST(date_trunc('month', MIN(movement_date)) AS DATE) FROM inventory_movements")
+    op.execute(RENAME_LEGACY)
+    op.execute(CREATE_PARTITIONED)
+    # Empty monthly partitions first, so the copy routes rows straight into them
+    op.create_month_partitions("inventory_movements", first or date.today())
+    op.execute(COPY_ROWS)
+    op.execute(FINISH)
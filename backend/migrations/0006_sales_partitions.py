@@ -0,0 +1,201 @@
+"""
+0006: sales_transactions, sale_items and payments partitioned by month on
+sale_date (see backend/partitions.py), all in one transaction:
+
+* foreign keys pointing at the old tables are dropped and the tables renamed;
+* the partitioned tables are created with a partition per month of history
+  and three months ahead;
+* rows are copied, child rows taking their sale's sale_date;
+* returns and return_items get a sale_date column and composite foreign keys;
+* invoice numbers, which a partitioned table can't keep unique on their own,
+  move to the invoice_numbers claim table;
+* the id sequences are kept, so ids continue where they left off.
+
+A store already partitioned only gets the invoice_numbers table.
+"""
+
+from datetime import date
+
+SALES_TABLES = ("sales_transactions", "sale_items", "payments")
+
+CREATE_PARTITIONED = """
+CREATE TABLE sales_transactions (
+    sale_id        INTEGER NOT NULL DEFAULT nextval('sales_transactions_sale_id_seq'),
+    invoice_number VARCHAR(100) NOT NULL,
+    store_id       INTEGER NOT NULL REFERENCES stores(store_id),
+    pos_terminal_id INTEGER NOT NULL REFERENCES pos_terminals(terminal_id),
+    customer_id    INTEGER REFERENCES customers(customer_id),
+    user_id        INTEGER NOT NULL REFERENCES users(user_id),
+    sale_date      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sub_total      DECIMAL(10,2) NOT NULL,
+    discount_amount DECIMAL(10,2) DEFAULT 0,
+    tax_amount     DECIMAL(10,2) DEFAULT 0,
+    grand_total    DECIMAL(10,2) NOT NULL,
+    amount_paid    DECIMAL(10,2) NOT NULL,
+    change_given   DECIMAL(10,2) DEFAULT 0,
+    payment_status VARCHAR(20) DEFAULT 'PAID'
+        CHECK (payment_status IN ('PAID','PARTIAL','REFUNDED','VOID')),
+    notes          TEXT,
+    created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sale_id, sale_date)
+) PARTITION BY RANGE (sale_date);
+
+CREATE TABLE sales_transactions_default PARTITION OF sales_transactions DEFAULT;
+
+CREATE TABLE sale_items (
+    sale_item_id   INTEGER NOT NULL DEFAULT nextval('sale_items_sale_item_id_seq'),
+    sale_id        INTEGER NOT NULL,
+    sale_date      TIMESTAMP NOT NULL,
+    product_id     INTEGER NOT NULL REFERENCES products(product_id),
+    variant_id     INTEGER REFERENCES product_variants(variant_id),
+    quantity       INTEGER NOT NULL,
+    unit_price     DECIMAL(10,2) NOT NULL,
+    discount_per_item DECIMAL(10,2) DEFAULT 0,
+    tax_per_item   DECIMAL(10,2) DEFAULT 0,
+    line_total     DECIMAL(10,2) NOT NULL,
+    unit_cost      DECIMAL(10,2),
+    return_quantity INTEGER DEFAULT 0,
+    batch_number   VARCHAR(100),
+    expiry_date    DATE,
+    PRIMARY KEY (sale_item_id, sale_date),
+    FOREIGN KEY (sale_id, sale_date) REFERENCES sales_transactions(sale_id, sale_date) ON DELETE CASCADE
+) PARTITION BY RANGE (sale_date);
+
+CREATE TABLE sale_items_default PARTITION OF sale_items DEFAULT;
+
+CREATE TABLE payments (
+    payment_id            INTEGER NOT NULL DEFAULT nextval('payments_payment_id_seq'),
+    sale_id               INTEGER NOT NULL,
+    sale_date             TIMESTAMP NOT NULL,
+    payment_method_id     INTEGER NOT NULL REFERENCES payment_methods(payment_method_id),
+    amount                DECIMAL(10,2) NOT NULL,
+    transaction_reference VARCHAR(255),
+    payment_date          TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (payment_id, sale_date),
+    FOREIGN KEY (sale_id, sale_date) REFERENCES sales_transactions(sale_id, sale_date) ON DELETE CASCADE
+) PARTITION BY RANGE (sale_date);
+
+CREATE TABLE payments_default PARTITION OF payments DEFAULT;
+"""
+
+COPY_ROWS = """
+INSERT INTO sales_transactions
+    (sale_id, invoice_number, store_id, pos_terminal_id, customer_id, user_id, sale_date,
+     sub_total, discount_amount, tax_amount, grand_total, amount_paid, change_given,
+     payment_status, notes, created_at, updated_at)
+SELECT sale_id, invoice_number, store_id, pos_terminal_id, customer_id, user_id,
+       COALESCE(sale_date, created_at, CURRENT_TIMESTAMP),
+       sub_total, discount_amount, tax_amount, grand_total, amount_paid, change_given,
+       payment_status, notes, created_at, updated_at
+FROM sales_transactions_legacy;
+
+INSERT INTO sale_items
+    (sale_item_id, sale_id, sale_date, product_id, variant_id, quantity, unit_price,
+     discount_per_item, tax_per_item, line_total, unit_cost, return_quantity, batch_number, expiry_date)
+SELECT si.sale_item_id, si.sale_id, st.sale_date, si.product_id, si.variant_id, si.quantity, si.unit_price,
+       si.discount_per_item, si.tax_per_item, si.line_total, si.unit_cost, si.return_quantity,
+       si.batch_number, si.expiry_date
+FROM sale_items_legacy si
+JOIN sales_transactions st ON st.sale_id = si.sale_id;
+
+INSERT INTO payments
+    (payment_id, sale_id, sale_date, payment_method_id, amount, transaction_reference, payment_date)
+SELECT pay.payment_id, pay.sale_id, st.sale_date, pay.payment_method_id, pay.amount,
+       pay.transaction_reference, pay.payment_date
+FROM payments_legacy pay
+JOIN sales_transactions st ON st.sale_id = pay.sale_id;
+"""
+
+CLAIM_INVOICE_NUMBERS = """
+CREATE TABLE IF NOT EXISTS invoice_numbers (
+    invoice_number VARCHAR(100) PRIMARY KEY,
+    claimed_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO invoice_numbers (invoice_number, claimed_at)
+SELECT invoice_number, MIN(sale_date) FROM sales_transactions GROUP BY invoice_number
+ON CONFLICT (invoice_number) DO NOTHING;
+"""
+
+RELINK_RETURNS = """
+ALTER TABLE returns ADD COLUMN IF NOT EXISTS sale_date TIMESTAMP;
+UPDATE returns r SET sale_date = st.sale_date
+FROM sales_transactions st WHERE st.sale_id = r.sale_id;
+ALTER TABLE returns ALTER COLUMN sale_date SET NOT NULL;
+ALTER TABLE returns ADD FOREIGN KEY (sale_id, sale_date) REFERENCES sales_transactions(sale_id, sale_date);
+
+ALTER TABLE return_items ADD COLUMN IF NOT EXISTS sale_date TIMESTAMP;
+UPDATE return_items ri SET sale_date = si.sale_date
+FROM sale_items si WHERE si.sale_item_id = ri.sale_item_id;
+ALTER TABLE return_items ALTER COLUMN sale_date SET NOT NULL;
+ALTER TABLE return_items ADD FOREIGN KEY (sale_item_id, sale_date) REFERENCES sale_items(sale_item_id, sale_date);
+"""
+
+FINISH = """
+ALTER SEQUENCE sales_transactions_sale_id_seq OWNED BY sales_transactions.sale_id;
+ALTER SEQUENCE sale_items_sale_item_id_seq OWNED BY sale_items.sale_item_id;
+ALTER SEQUENCE payments_payment_id_seq OWNED BY payments.payment_id;
+
+DROP TABLE payments_legacy;
+DROP TABLE sale_items_legacy;
+DROP TABLE sales_transactions_legacy;
+
+CREATE INDEX idx_sales_date         ON sales_transactions(sale_date);
+CREATE INDEX idx_sales_invoice      ON sales_transactions(invoice_number);
+CREATE INDEX idx_sales_store_date   ON sales_transactions(store_id, sale_date);
+CREATE INDEX idx_sales_active_date  ON sales_transactions(sale_date, store_id) WHERE payment_status <> 'VOID';
+CREATE INDEX idx_sales_customer     ON sales_transactions(customer_id);
+CREATE INDEX idx_sale_items_sale    ON sale_items(sale_id);
+CREATE INDEX idx_payments_sale      ON payments(sale_id);
+CREATE INDEX idx_sale_items_product ON sale_items(product_id);
+"""
+
+
+def _set_aside_legacy_tables(op):
+    """Drop foreign keys into the sales tables and rename them (and their keys/indexes) out of the way"""
+    foreign_keys = op.query("""
+        SELECT CAST(conrelid AS regclass)::text, conname
+        FROM pg_constraint
+        WHERE contype = 'f'
+          AND confrelid IN (to_regclass('sales_transactions'), to_regclass('sale_items'), to_regclass('payments'))
+    """)
+    for table_name, constraint in foreign_keys:
+        op.execute(f'ALTER TABLE {table_name} DROP CONSTRAINT "{constraint}"')
+
+    for table in SALES_TABLES:
+        keys = op.query("""
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u')
+        """, (table,))
+        indexes = op.query("""
+            SELECT CAST(i.indexrelid AS regclass)::text
+            FROM pg_index i
+            LEFT JOIN pg_constraint c ON c.conindid = i.indexrelid
+            WHERE i.indrelid = to_regclass(%s) AND c.oid IS NULL
+        """, (table,))
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+        for (constraint,) in keys:
+            op.execute(f'ALTER TABLE {table}_legacy RENAME CONSTRAINT "{constraint}" TO "{constraint}_legacy"')
+        for (index,) in indexes:
+            op.execute(f"DROP INDEX {index}")
+
+
+def upgrade(op):
+    if op.is_partitioned("sales_transactions"):
+        # Partitioned before invoice numbers had their own table
+        op.execute(CLAIM_INVOICE_NUMBERS)
+        op.execute("ALTER TABLE sales_transactions "
+                   "DROP CONSTRAINT IF EXISTS sales_transactions_invoice_number_sale_date_key")
+        return
+    first = op.scalar(
+        "SELECT CAST(date_trunc('month', MIN(COALESCE(sale_date, created_at))) AS DATE) FROM sales_transactions"
+    )
+    _set_aside_legacy_tables(op)
+    op.execute(CREATE_PARTITIONED)
+    # Empty monthly partitions first, so the copy routes rows straight into them
+    for table in SALES_TABLES:
+        op.create_month_partitions(table, first or date.today())
+    op.execute(COPY_ROWS)
+    op.execute(CLAIM_INVOICE_NUMBERS)
+    op.execute(RELINK_RETURNS)
+    op.execute(FINISH)
@@ -0,0 +1,58 @@
+"""
+0007: composite and partial indexes matched to the CRUD query shapes.
+Indexes whose leading columns are covered by a new composite index are dropped.
+Built concurrently (per partition on partitioned tables) so stores stay open.
+"""
+
+TRANSACTIONAL = False
+
+
+def upgrade(op):
+    # sales.crud.decrement_inventory_for_sale / transfer_stock / advance order reservations:
+    # product_id = ? AND store_id = ? AND variant_id IS NOT DISTINCT FROM ?
+    # (IS NOT DISTINCT FROM is not indexable, so product/store lead and variant filters in the index)
+    op.create_index("idx_inventory_product_store_variant", "inventory", ["product_id", "store_id", "variant_id"])
+    op.drop_index("idx_inventory_product_store")
+
+    # get_sales / list endpoints: store_id = ? ORDER BY sale_date DESC, date ranges per store
+    op.create_index("idx_sales_store_date", "sales_transactions", ["store_id", "sale_date"])
+    op.drop_index("idx_sales_store")
+
+    # sales reports, bucket rebuilds, stats: sale_date range AND payment_status != 'VOID'
+    op.create_index("idx_sales_active_date", "sales_transactions", ["sale_date", "store_id"],
+                    where="payment_status <> 'VOID'")
+
+    # get_inventory_movements: store_id = ? ORDER BY movement_date DESC
+    op.create_index("idx_movements_store_date", "inventory_movements", ["store_id", "movement_date"])
+    op.drop_index("idx_movements_store")
+
+    # get_inventory_movements by product, newest first
+    op.create_index("idx_movements_product_date", "inventory_movements", ["product_id", "movement_date"])
+    op.drop_index("idx_movements_product")
+
+    # reorder suggestions: movement_type = 'SALE' AND movement_date >= ? [AND store_id = ?]
+    op.create_index("idx_movements_sales_date", "inventory_movements", ["movement_date", "store_id"],
+                    where="movement_type = 'SALE'")
+
+    # returns: refunds per sale, returns listing by date, items per return
+    op.create_index("idx_returns_sale", "returns", ["sale_id", "sale_date"])
+    op.create_index("idx_returns_date", "returns", ["return_date"])
+    op.create_index("idx_return_items_return", "return_items", ["return_id"])
+
+    # purchasing: items per order / receipt, open orders in reorder suggestions
+    op.create_index("idx_po_items_po", "purchase_order_items", ["po_id"])
+    op.create_index("idx_po_open_store", "purchase_orders", ["store_id"],
+                    where="status IN ('DRAFT', 'SENT', 'RECEIVED_PARTIAL')")
+    op.create_index("idx_grn_items_grn", "grn_items", ["grn_id"])
+
+    # advance orders: items per order, open reservations per store
+    op.create_index("idx_advance_order_items_order", "advance_order_items", ["advance_order_id"])
+    op.create_index("idx_advance_orders_open_store", "advance_orders", ["store_id"],
+                    where="status IN ('PENDING', 'CONFIRMED')")
+
+    # customer loyalty history, newest first
+    op.create_index("idx_loyalty_history_customer", "loyalty_points_history", ["customer_id", "change_date"])
+
+    # audit log listing: newest first, optionally by event type
+    op.create_index("idx_audit_logs_time", "audit_logs", ["timestamp"])
+    op.create_index("idx_audit_logs_event_time", "audit_logs", ["event_type", "timestamp"])
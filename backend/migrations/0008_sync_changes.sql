@@ -0,0 +1,63 @@
+-- 0008: change log for terminal delta sync (GET /sync/changes).
+-- Row triggers on the synced tables record which row changed and in which
+-- transaction; readers use transaction ids as version tokens (see backend/sync).
+
+CREATE TABLE sync_changes (
+    change_id  BIGSERIAL PRIMARY KEY,
+    txid       BIGINT NOT NULL DEFAULT txid_current(),
+    entity     VARCHAR(30) NOT NULL,
+    row_id     INTEGER NOT NULL,
+    store_id   INTEGER,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_sync_changes_txid ON sync_changes(txid);
+CREATE INDEX idx_sync_changes_time ON sync_changes(changed_at);
+
+-- TG_ARGV[0] names the key column, TG_ARGV[1] (optional) the store column
+CREATE OR REPLACE FUNCTION log_sync_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    rec JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        rec := to_jsonb(OLD);
+    ELSE
+        rec := to_jsonb(NEW);
+    END IF;
+    INSERT INTO sync_changes (entity, row_id, store_id)
+    VALUES (TG_TABLE_NAME, (rec ->> TG_ARGV[0])::INTEGER,
+            CASE WHEN TG_NARGS > 1 THEN (rec ->> TG_ARGV[1])::INTEGER END);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trig_products_sync
+AFTER INSERT OR UPDATE OR DELETE ON products
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('product_id');
+
+CREATE TRIGGER trig_product_variants_sync
+AFTER INSERT OR UPDATE OR DELETE ON product_variants
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('variant_id');
+
+CREATE TRIGGER trig_tax_categories_sync
+AFTER INSERT OR UPDATE OR DELETE ON tax_categories
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('tax_category_id');
+
+CREATE TRIGGER trig_payment_methods_sync
+AFTER INSERT OR UPDATE OR DELETE ON payment_methods
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('payment_method_id');
+
+CREATE TRIGGER trig_inventory_sync
+AFTER INSERT OR UPDATE OR DELETE ON inventory
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('inventory_id', 'store_id');
+
+-- One row: changes from transactions below pruned_txid have been deleted, so
+-- tokens older than it must resync from the bulk endpoints
+CREATE TABLE sync_log_state (
+    id          BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    pruned_txid BIGINT NOT NULL DEFAULT 0,
+    pruned_at   TIMESTAMP
+);
+
+INSERT INTO sync_log_state DEFAULT VALUES;
@@ -0,0 +1,17 @@
+-- 0009: idempotency keys for offline sale uploads (POST /sales/offline-batch).
+-- One row per client-generated sale UUID; payload_hash tells a retried upload
+-- apart from a reused id. sale_id/sale_date are a plain reference, not a
+-- foreign key: keys outlive their sale's month, and a foreign key would stop
+-- backend/partitions.py from archiving it.
+
+CREATE TABLE offline_sales (
+    client_sale_id  UUID PRIMARY KEY,
+    payload_hash    CHAR(64) NOT NULL,
+    pos_terminal_id INTEGER NOT NULL REFERENCES pos_terminals(terminal_id),
+    -- Set in the same transaction as the claim, once the sale is inserted
+    sale_id         INTEGER,
+    sale_date       TIMESTAMP,
+    received_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_offline_sales_sale ON offline_sales(sale_id, sale_date);
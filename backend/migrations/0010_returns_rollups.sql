@@ -0,0 +1,31 @@
+-- 0010: refunds per store and month of return, so profit and loss can take
+-- returned sales back out of the sales buckets; filled from the returns
+-- table, afterwards every return keeps it current (see
+-- returns.crud.rebuild_returns_rollups).
+
+CREATE TABLE IF NOT EXISTS returns_monthly_totals (
+    store_id       INTEGER NOT NULL REFERENCES stores(store_id),
+    month          DATE NOT NULL,
+    refund_amount  DECIMAL(12,2) NOT NULL DEFAULT 0,
+    tax_refunded   DECIMAL(12,2) NOT NULL DEFAULT 0,
+    cost_returned  DECIMAL(12,2) NOT NULL DEFAULT 0,
+    return_count   INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (store_id, month)
+);
+
+DELETE FROM returns_monthly_totals;
+
+INSERT INTO returns_monthly_totals (store_id, month, refund_amount, tax_refunded, cost_returned, return_count)
+SELECT store_id, month, SUM(refund_amount), SUM(tax_refunded), SUM(cost_returned), COUNT(*)
+FROM (
+    SELECT st.store_id, CAST(date_trunc('month', r.return_date) AS DATE) AS month, r.refund_amount,
+           COALESCE(SUM(ri.quantity_returned * COALESCE(si.tax_per_item, 0)), 0) AS tax_refunded,
+           COALESCE(SUM(ri.quantity_returned * COALESCE(si.unit_cost, 0)), 0) AS cost_returned
+    FROM returns r
+    JOIN sales_transactions st ON st.sale_id = r.sale_id AND st.sale_date = r.sale_date
+    LEFT JOIN return_items ri ON ri.return_id = r.return_id
+    LEFT JOIN sale_items si ON si.sale_item_id = ri.sale_item_id AND si.sale_date = ri.sale_date
+    WHERE st.payment_status != 'VOID'
+    GROUP BY r.return_id, st.store_id, r.return_date, r.refund_amount
+) per_return
+GROUP BY 1, 2;
@@ -0,0 +1,326 @@
+"""
+Monthly range partition maintenance.
+
+Partitioned tables are split by month on a timestamp column into children
+named ``<parent>_YYYY_MM``, plus a ``<parent>_default`` partition that
+catches rows outside every monthly range so inserts never fail when
+maintenance falls behind. The maintenance command:
+
+* creates the partitions for the current month and ``ahead`` months after it,
+  moving any rows the default partition already holds for those months;
+* detaches partitions that ended more than ``retain`` months ago, writes each
+  to ``<archive dir>/<partition>.csv.gz`` and drops it. Sales history is kept
+  unless ``--retain`` is given; referencing tables are archived first, and a
+  month that returns (or tables not being archived with it) still reference
+  is refused before anything is detached.
+
+The detach is committed on its own, so the ACCESS EXCLUSIVE lock it takes on
+the parent lasts only as long as the catalog change, not the COPY and DROP;
+checkout keeps inserting while a month is archived. (DETACH ... CONCURRENTLY
+is not an option: PostgreSQL refuses it while a default partition exists.)
+A partition left detached by an interrupted run is archived on the next one.
+
+Rows of tables other tables reference (sales_transactions, sale_items) can't
+be moved out of the default partition without firing ON DELETE actions, so
+creating a month those tables already have default rows for is refused; run
+maintenance ahead of time so the default partitions stay empty.
+
+Usage:
+    python -m backend.partitions [--table inventory_movements] [--ahead 3]
+                                 [--retain 24] [--archive-dir DIR] [--dry-run]
+"""
+
+import argparse
+import gzip
+import os
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+
+# parent table -> partition key column, referenced tables before their referrers
+PARTITIONED_TABLES: Dict[str, str] = {
+    "sales_transactions": "sale_date",
+    "sale_items": "sale_date",
+    "payments": "sale_date",
+    "inventory_movements": "movement_date",
+}
+
+# Months of partitions kept attached when --retain is not given (None keeps all)
+DEFAULT_RETAIN: Dict[str, Optional[int]] = {
+    "inventory_movements": 24,
+}
+
+# Tables referenced by foreign keys: rows can't be moved out of their default partition
+REFERENCED_TABLES = frozenset({"sales_transactions", "sale_items"})
+
+# referenced table -> tables whose rows point at it by sale_date; a month can
+# only be detached once none of them hold rows for it
+REFERENCED_BY: Dict[str, Tuple[str, ...]] = {
+    "sales_transactions": ("sale_items", "payments", "returns"),
+    "sale_items": ("return_items",),
+}
+
+ARCHIVE_DIR = os.getenv(
+    'PARTITION_ARCHIVE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive')
+)
+
+
+def add_months(value: date, months: int) -> date:
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(parent: str, month: date) -> str:
+    return f"{parent}_{month:%Y_%m}"
+
+
+def _monthly(parent: str, names: List[str]) -> Dict[str, date]:
+    """Map the ``<parent>_YYYY_MM`` names among names to the month they hold"""
+    pattern = re.compile(rf"^{re.escape(parent)}_(\d{{4}})_(\d{{2}})$")
+    months = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            months[name] = date(int(match.group(1)), int(match.group(2)), 1)
+    return months
+
+
+def list_partitions(db: Session, parent: str) -> Dict[str, date]:
+    """Monthly partitions attached to parent, mapped to the month they hold"""
+    names = db.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+    """), {"parent": parent}).scalars().all()
+    return _monthly(parent, names)
+
+
+def list_detached(db: Session, parent: str) -> Dict[str, date]:
+    """Monthly tables of parent left detached by an interrupted archive run"""
+    names = db.execute(text("""
+        SELECT c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = current_schema()
+          AND c.relkind = 'r'
+          AND c.relname LIKE :prefix
+          AND NOT c.relispartition
+    """), {"prefix": f"{parent}%"}).scalars().all()
+    return _monthly(parent, names)
+
+
+def create_partition(db: Session, parent: str, month: date) -> int:
+    """
+    Create and attach the partition for month, returning the number of rows
+    moved into it from the default partition.
+
+    The child is created standalone, filled from the default partition and
+    then attached, so attaching never fails on rows the default already holds.
+    """
+    column = PARTITIONED_TABLES[parent]
+    name = partition_name(parent, month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    if parent in REFERENCED_TABLES:
+        stray = db.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {parent}_default WHERE {column} >= :start AND {column} < :end)"
+        ), bounds).scalar()
+        if stray:
+            raise ValueError(
+                f"{parent}_default holds rows for {month:%Y-%m}; move them out before creating {name}"
+            )
+    db.execute(text(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {parent}_default
+            WHERE {column} >= :start AND {column} < :end
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), bounds).rowcount
+    db.execute(text(
+        f"ALTER TABLE {parent} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    ))
+    return moved
+
+
+def archive_partition(db: Session, parent: str, name: str, archive_dir: str, detach: bool = True) -> Dict[str, object]:
+    """
+    Detach a partition, copy it to a gzipped CSV and drop it. The detach is
+    committed before the copy so the parent is locked only for the detach.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    if detach:
+        db.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {name}"))
+        db.commit()
+    rows = db.execute(text(f"SELECT COUNT(*) FROM {name}")).scalar()
+    cursor = db.connection().connection.cursor()
+    try:
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as archive:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER true)", archive)
+    finally:
+        cursor.close()
+    db.execute(text(f"DROP TABLE {name}"))
+    db.commit()
+    return {"partition": name, "rows": rows, "file": path}
+
+
+def archive_candidates(db: Session, parent: str, retain: int, today: Optional[date] = None) -> Dict[str, date]:
+    """Attached partitions of parent older than `retain` months"""
+    cutoff = add_months((today or date.today()).replace(day=1), -retain)
+    return {name: month for name, month in list_partitions(db, parent).items() if month < cutoff}
+
+
+def check_unreferenced(db: Session, plan: Dict[str, Dict[str, date]]) -> None:
+    """
+    Raise ValueError if any month in plan (parent -> partitions to archive)
+    still has rows pointing at it from a table that isn't archived with it.
+    """
+    blocked = []
+    for parent, partitions in plan.items():
+        for month in sorted(set(partitions.values())):
+            for referrer in REFERENCED_BY.get(parent, ()):
+                if month in plan.get(referrer, {}).values():
+                    continue
+                count = db.execute(text(
+                    f"SELECT COUNT(*) FROM {referrer} WHERE sale_date >= :start AND sale_date < :end"
+                ), {"start": month, "end": add_months(month, 1)}).scalar()
+                if count:
+                    blocked.append(f"{count} {referrer} rows reference {parent} for {month:%Y-%m}")
+    if blocked:
+        raise ValueError(
+            "Cannot archive; archive or remove the referencing rows first, or retain more months: "
+            + "; ".join(blocked)
+        )
+
+
+def create_future_partitions(
+    db: Session,
+    parent: str,
+    ahead: int = 3,
+    today: Optional[date] = None,
+    dry_run: bool = False
+) -> List[Dict[str, object]]:
+    """Create the current and next `ahead` months' partitions, committing each"""
+    if parent not in PARTITIONED_TABLES:
+        raise ValueError(f"{parent} is not a partitioned table")
+    current = (today or date.today()).replace(day=1)
+    existing = list_partitions(db, parent)
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(parent, month)
+        if name in existing:
+            continue
+        if dry_run:
+            created.append({"partition": name, "rows_moved": None})
+            continue
+        moved = create_partition(db, parent, month)
+        db.commit()
+        created.append({"partition": name, "rows_moved": moved})
+    return created
+
+
+def archive_old_partitions(
+    db: Session,
+    parent: str,
+    retain: int,
+    archive_dir: Optional[str] = None,
+    today: Optional[date] = None,
+    dry_run: bool = False,
+    checked: bool = False
+) -> List[Dict[str, object]]:
+    """Archive and drop partitions older than `retain` months, committing each"""
+    if parent not in PARTITIONED_TABLES:
+        raise ValueError(f"{parent} is not a partitioned table")
+    archive_dir = archive_dir or ARCHIVE_DIR
+    candidates = archive_candidates(db, parent, retain, today=today)
+    if not checked:
+        check_unreferenced(db, {parent: candidates})
+    archived = []
+    if not dry_run:
+        for name in sorted(list_detached(db, parent)):
+            archived.append(archive_partition(db, parent, name, archive_dir, detach=False))
+    for name, month in sorted(candidates.items(), key=lambda item: item[1]):
+        if dry_run:
+            archived.append({"partition": name, "rows": None, "file": None})
+            continue
+        archived.append(archive_partition(db, parent, name, archive_dir))
+    return archived
+
+
+def maintain(
+    db: Session,
+    tables: List[str],
+    ahead: int = 3,
+    retain: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    today: Optional[date] = None,
+    dry_run: bool = False
+) -> Dict[str, Dict[str, List]]:
+    """
+    Bring the tables' partitions up to date. retain=None uses each table's
+    DEFAULT_RETAIN. Partitions are created in PARTITIONED_TABLES order and
+    archived in reverse, so referencing rows leave before the rows they reference.
+    """
+    ordered = [table for table in PARTITIONED_TABLES if table in tables]
+    result: Dict[str, Dict[str, List]] = {table: {"created": [], "archived": []} for table in ordered}
+    for table in ordered:
+        result[table]["created"] = create_future_partitions(db, table, ahead=ahead, today=today, dry_run=dry_run)
+    retained = {table: retain if retain is not None else DEFAULT_RETAIN.get(table) for table in ordered}
+    plan = {
+        table: archive_candidates(db, table, months, today=today)
+        for table, months in retained.items() if months is not None
+    }
+    # Refuse before detaching anything rather than stopping half way through
+    check_unreferenced(db, plan)
+    for table in reversed(ordered):
+        if retained[table] is not None:
+            result[table]["archived"] = archive_old_partitions(
+                db, table, retained[table], archive_dir=archive_dir, today=today, dry_run=dry_run, checked=True
+            )
+    return result
+
+
+def run(tables: List[str], ahead: int, retain: Optional[int], archive_dir: Optional[str], dry_run: bool):
+    db = SessionLocal()
+    try:
+        print(f"=== Partition maintenance{' (dry run)' if dry_run else ''} ===\n")
+        results = maintain(db, tables, ahead=ahead, retain=retain, archive_dir=archive_dir, dry_run=dry_run)
+        for table, result in results.items():
+            print(f"{table}:")
+            for created in result["created"]:
+                moved = created["rows_moved"]
+                print(f"  ✅ Create {created['partition']}" + (f" ({moved} rows moved from default)" if moved else ""))
+            for archived in result["archived"]:
+                print(f"  ✅ Archive {archived['partition']}"
+                      + (f" ({archived['rows']} rows -> {archived['file']})" if archived["file"] else ""))
+            if not result["created"] and not result["archived"]:
+                print("  ✅ Nothing to do")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create future monthly partitions and archive old ones")
+    parser.add_argument("--table", action="append", choices=sorted(PARTITIONED_TABLES),
+                        help="Table to maintain (repeatable, default all)")
+    parser.add_argument("--ahead", type=int, default=3, help="Months to create beyond the current one")
+    parser.add_argument("--retain", type=int, default=None,
+                        help="Months of partitions to keep attached (default: 24 for inventory_movements, "
+                             "all sales history)")
+    parser.add_argument("--archive-dir", default=None, help=f"Archive directory (default {ARCHIVE_DIR})")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args()
+    run(args.table or list(PARTITIONED_TABLES), args.ahead, args.retain, args.archive_dir, args.dry_run)
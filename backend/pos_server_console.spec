@@ -5,8 +5,8 @@ a = Analysis(
     ['run_server.py'],
     pathex=[],
     binaries=[],
-    datas=[('*.py', '.'), ('settings', 'settings'), ('inventory', 'inventory'), ('..\\database\\dataschema.sql', '.')],
-    hiddenimports=['fastapi', 'uvicorn', 'pydantic', 'starlette', 'psycopg2', 'requests', 'psutil', 'dotenv', 'settings.crud', 'settings.api', 'settings.schemas', 'inventory.crud', 'inventory.api', 'inventory.schemas', 'database_exe', 'main_exe', 'database_setup'],
+    datas=[('*.py', '.'), ('settings', 'settings'), ('inventory', 'inventory'), ('migrations', 'migrations'), ('..\\database\\dataschema.sql', '.')],
+    hiddenimports=['fastapi', 'uvicorn', 'pydantic', 'starlette', 'psycopg2', 'requests', 'psutil', 'dotenv', 'settings.crud', 'settings.api', 'settings.schemas', 'inventory.crud', 'inventory.api', 'inventory.schemas', 'database_exe', 'main_exe', 'database_setup', 'migrate', 'fastjson', 'orjson', 'compression'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
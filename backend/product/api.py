@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import tempfile
 from backend.database import get_db
-from . import crud, schemas
+from backend import fastjson
+from . import crud, schemas, bulk_import
 
 router = APIRouter(prefix="/products", tags=["products"])
 
@@ -13,7 +16,95 @@ def get_products(
     db: Session = Depends(get_db)
 ):
     """Get all products with optional filtering"""
-    return crud.get_products(db, skip=skip, limit=limit)
+    products = crud.get_products(db, skip=skip, limit=limit)
+    if fastjson.ENABLED:
+        return fastjson.model_response(List[schemas.Product], products)
+    return products
+
+@router.get("/catalogue", response_model=schemas.CataloguePage)
+def get_catalogue(
+    category_id: Optional[int] = Query(None, description="Filter by category"),
+    brand_id: Optional[int] = Query(None, description="Filter by brand"),
+    supplier_id: Optional[int] = Query(None, description="Filter by supplier"),
+    is_active: Optional[bool] = Query(None, description="Filter by active status"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum retail price"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum retail price"),
+    search: Optional[str] = Query(None, description="Search by name, code or barcode"),
+    sort: str = Query("name", pattern="^(name|code|price)$", description="Sort key"),
+    descending: bool = Query(False, description="Sort descending"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    include_variants: bool = Query(False, description="Include variants"),
+    include_stock: bool = Query(False, description="Include per-store stock"),
+    store_id: Optional[int] = Query(None, description="Limit stock to one store"),
+    db: Session = Depends(get_db)
+):
+    """Get a filtered, keyset-paginated page of the product catalogue"""
+    try:
+        return crud.get_catalogue(
+            db,
+            category_id=category_id,
+            brand_id=brand_id,
+            supplier_id=supplier_id,
+            is_active=is_active,
+            min_price=min_price,
+            max_price=max_price,
+            search=search,
+            sort=sort,
+            descending=descending,
+            cursor=cursor,
+            limit=limit,
+            include_variants=include_variants,
+            include_stock=include_stock,
+            store_id=store_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/import")
+async def import_products(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|json|ndjson)$", description="Body format"),
+    batch_size: int = Query(bulk_import.DEFAULT_BATCH_SIZE, ge=100, le=50000)
+):
+    """Bulk import products and variants from a CSV, NDJSON or JSON request body"""
+    # Spool the upload to disk as it arrives so large catalogues never sit in memory
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            return await run_in_threadpool(bulk_import.import_file, spool, format, batch_size)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid import file: {str(e)}")
+
+@router.post("/bulk-update")
+def bulk_update_products(update: schemas.ProductBulkUpdate, db: Session = Depends(get_db)):
+    """Change prices, tax category or status for every product matching a filter"""
+    try:
+        return crud.bulk_update_products(db, update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/bulk-price-update")
+async def bulk_update_prices(
+    request: Request,
+    user_id: int = Query(..., description="ID of the user making the change"),
+    db: Session = Depends(get_db)
+):
+    """Reprice products from a CSV body with product_code,new_price[,new_base_price] columns"""
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            # Parsing a large price file is CPU-bound; keep it off the event loop
+            prices, errors = await run_in_threadpool(crud.parse_price_rows, bulk_import.read_rows(spool, "csv"))
+        except (ValueError, UnicodeDecodeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid price file: {str(e)}")
+    result = await run_in_threadpool(crud.bulk_update_prices, db, prices, user_id)
+    result["errors"] = errors
+    return result
 
 @router.get("/{product_id}", response_model=schemas.Product)
 def get_product(product_id: int, db: Session = Depends(get_db)):
@@ -29,9 +120,18 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
     return crud.create_product(db, product=product)
 
 @router.put("/{product_id}", response_model=schemas.Product)
-def update_product(product_id: int, product: schemas.ProductUpdate, db: Session = Depends(get_db)):
+def update_product(
+    product_id: int,
+    product: schemas.ProductUpdate,
+    user_id: Optional[int] = Query(None, description="ID of the user making the change"),
+    db: Session = Depends(get_db)
+):
     """Update an existing product"""
-    updated_product = crud.update_product(db, product_id=product_id, product=product)
+    try:
+        updated_product = crud.update_product(db, product_id=product_id, product=product, user_id=user_id)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
     if updated_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return updated_product
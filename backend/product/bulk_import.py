@@ -0,0 +1,615 @@
+"""
+Bulk product import pipeline.
+
+Rows are streamed from CSV, NDJSON or a JSON array, validated in Python, and
+loaded batch by batch into a temporary staging table with COPY. Each batch is
+then merged into ``products`` and ``product_variants`` with a handful of
+set-based statements:
+
+1. category / brand names are resolved to IDs in bulk (missing ones are created),
+   supplier / tax category names are resolved in bulk (unknown ones are errors)
+2. rows that would violate barcode uniqueness, against the database or within
+   the file, are rejected
+3. products are upserted on ``product_code``
+4. variants are upserted on ``barcode`` (or on size/color when no barcode is given)
+
+Invalid rows are reported with their row number and never abort the batch.
+Each batch is committed on its own, so a failing batch only affects its rows.
+
+Usage from the command line:
+
+    python -m backend.product.bulk_import catalogue.csv [--format csv|json|ndjson] [--batch-size 5000]
+"""
+
+import csv
+import io
+import json
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from backend import cache
+from backend.database import engine
+from backend.suppliers.crud import STATS_CACHE as SUPPLIER_STATS_CACHE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+# Staging columns, in COPY order
+STAGING_COLUMNS = [
+    "row_no",
+    "product_code",
+    "product_name",
+    "description",
+    "category_name",
+    "brand_name",
+    "supplier_name",
+    "tax_category_name",
+    "base_price",
+    "retail_price",
+    "is_active",
+    "barcode",
+    "unit_of_measure",
+    "weight",
+    "reorder_level",
+    "max_stock_level",
+    "variant_size",
+    "variant_color",
+    "variant_sku_suffix",
+    "variant_barcode",
+    "variant_retail_price",
+    "variant_base_price",
+    "variant_is_active",
+]
+
+VARIANT_FIELDS = {
+    "size": "variant_size",
+    "color": "variant_color",
+    "sku_suffix": "variant_sku_suffix",
+    "barcode": "variant_barcode",
+    "retail_price": "variant_retail_price",
+    "base_price": "variant_base_price",
+    "is_active": "variant_is_active",
+}
+
+_STAGING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS product_import_staging (
+        row_no               INTEGER PRIMARY KEY,
+        product_code         VARCHAR(50) NOT NULL,
+        product_name         VARCHAR(255) NOT NULL,
+        description          TEXT,
+        category_name        VARCHAR(100),
+        brand_name           VARCHAR(100),
+        supplier_name        VARCHAR(255),
+        tax_category_name    VARCHAR(100),
+        base_price           DECIMAL(10,2) NOT NULL,
+        retail_price         DECIMAL(10,2) NOT NULL,
+        is_active            BOOLEAN NOT NULL,
+        barcode              VARCHAR(100),
+        unit_of_measure      VARCHAR(50),
+        weight               DECIMAL(10,3),
+        reorder_level        INTEGER,
+        max_stock_level      INTEGER,
+        variant_size         VARCHAR(50),
+        variant_color        VARCHAR(50),
+        variant_sku_suffix   VARCHAR(50),
+        variant_barcode      VARCHAR(100),
+        variant_retail_price DECIMAL(10,2),
+        variant_base_price   DECIMAL(10,2),
+        variant_is_active    BOOLEAN,
+        category_id          INTEGER,
+        brand_id             INTEGER,
+        supplier_id          INTEGER,
+        tax_category_id      INTEGER
+    )
+"""
+
+
+class ImportReport:
+    """Accumulates counters and row-level errors for an import or a single batch"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.products_inserted = 0
+        self.products_updated = 0
+        self.variants_inserted = 0
+        self.variants_updated = 0
+        self.error_count = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def add_error(self, row_no: int, product_code: Optional[str], error: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_no, "product_code": product_code, "error": error})
+
+    def merge(self, other: "ImportReport") -> None:
+        self.products_inserted += other.products_inserted
+        self.products_updated += other.products_updated
+        self.variants_inserted += other.variants_inserted
+        self.variants_updated += other.variants_updated
+        for error in other.errors:
+            self.add_error(error["row"], error["product_code"], error["error"])
+        # Errors the batch already truncated still count
+        self.error_count += other.error_count - len(other.errors)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total_rows": self.total_rows,
+            "imported_rows": self.total_rows - self.error_count,
+            "products_inserted": self.products_inserted,
+            "products_updated": self.products_updated,
+            "variants_inserted": self.variants_inserted,
+            "variants_updated": self.variants_updated,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+
+# ============================================================================
+# READERS
+# ============================================================================
+
+def _flatten(record: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Expand a JSON record with a nested ``variants`` list into one row per variant"""
+    variants = record.get("variants")
+    if not variants:
+        yield record
+        return
+    base = {key: value for key, value in record.items() if key != "variants"}
+    for variant in variants:
+        row = dict(base)
+        for field, column in VARIANT_FIELDS.items():
+            if field in variant:
+                row[column] = variant[field]
+        yield row
+
+
+def read_rows(stream: IO[bytes], fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield raw row dicts from a binary stream in csv, ndjson or json format"""
+    fmt = fmt.lower()
+    if fmt == "csv":
+        text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        for record in csv.DictReader(text_stream):
+            yield record
+    elif fmt == "ndjson":
+        for line in io.TextIOWrapper(stream, encoding="utf-8"):
+            line = line.strip()
+            if line:
+                yield from _flatten(json.loads(line))
+    elif fmt == "json":
+        records = json.load(io.TextIOWrapper(stream, encoding="utf-8"))
+        if isinstance(records, dict):
+            records = records.get("products", [])
+        for record in records:
+            yield from _flatten(record)
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+def _text(value: Any, max_length: Optional[int] = None) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    if max_length and len(value) > max_length:
+        raise ValueError(f"value '{value[:20]}...' exceeds {max_length} characters")
+    return value
+
+
+def _decimal(value: Any, field: str) -> Optional[Decimal]:
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"{field} must be a number")
+    if not number.is_finite():
+        raise ValueError(f"{field} must be a number")
+    if number < 0:
+        raise ValueError(f"{field} cannot be negative")
+    return number
+
+
+def _int(value: Any, field: str) -> Optional[int]:
+    number = _decimal(value, field)
+    if number is None:
+        return None
+    if number != number.to_integral_value():
+        raise ValueError(f"{field} must be a whole number")
+    return int(number)
+
+
+def _bool(value: Any, default: bool = True) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y", "t")
+
+
+def validate_row(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalise a raw row into staging values, raising ValueError on bad input"""
+    product_code = _text(raw.get("product_code"), 50)
+    if not product_code:
+        raise ValueError("product_code is required")
+    product_name = _text(raw.get("product_name"), 255)
+    if not product_name:
+        raise ValueError("product_name is required")
+    base_price = _decimal(raw.get("base_price"), "base_price")
+    retail_price = _decimal(raw.get("retail_price"), "retail_price")
+    if base_price is None or retail_price is None:
+        raise ValueError("base_price and retail_price are required")
+
+    return {
+        "product_code": product_code,
+        "product_name": product_name,
+        "description": _text(raw.get("description")),
+        "category_name": _text(raw.get("category_name") or raw.get("category"), 100),
+        "brand_name": _text(raw.get("brand_name") or raw.get("brand"), 100),
+        "supplier_name": _text(raw.get("supplier_name") or raw.get("supplier"), 255),
+        "tax_category_name": _text(raw.get("tax_category_name") or raw.get("tax_category"), 100),
+        "base_price": base_price,
+        "retail_price": retail_price,
+        "is_active": _bool(raw.get("is_active")),
+        "barcode": _text(raw.get("barcode"), 100),
+        "unit_of_measure": _text(raw.get("unit_of_measure"), 50),
+        "weight": _decimal(raw.get("weight"), "weight"),
+        "reorder_level": _int(raw.get("reorder_level"), "reorder_level"),
+        "max_stock_level": _int(raw.get("max_stock_level"), "max_stock_level"),
+        "variant_size": _text(raw.get("variant_size"), 50),
+        "variant_color": _text(raw.get("variant_color"), 50),
+        "variant_sku_suffix": _text(raw.get("variant_sku_suffix"), 50),
+        "variant_barcode": _text(raw.get("variant_barcode"), 100),
+        "variant_retail_price": _decimal(raw.get("variant_retail_price"), "variant_retail_price"),
+        "variant_base_price": _decimal(raw.get("variant_base_price"), "variant_base_price"),
+        "variant_is_active": _bool(raw.get("variant_is_active")),
+    }
+
+
+# ============================================================================
+# STAGING + MERGE
+# ============================================================================
+
+def _copy_batch(cur, batch: List[Tuple[int, Dict[str, Any]]]) -> None:
+    """COPY a validated batch into the staging table"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row_no, row in batch:
+        writer.writerow(
+            [row_no] + ["" if row[column] is None else row[column] for column in STAGING_COLUMNS[1:]]
+        )
+    buffer.seek(0)
+    cur.execute("TRUNCATE product_import_staging")
+    cur.copy_expert(
+        f"COPY product_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+
+
+def _reject(cur, report: ImportReport, query: str) -> None:
+    """Run a query returning (row_no, product_code, error) and drop those rows from staging"""
+    cur.execute(query)
+    rejected = cur.fetchall()
+    if not rejected:
+        return
+    for row_no, product_code, error in rejected:
+        report.add_error(row_no, product_code, error)
+    cur.execute(
+        "DELETE FROM product_import_staging WHERE row_no = ANY(%s)",
+        ([row_no for row_no, _, _ in rejected],)
+    )
+
+
+def _resolve_references(cur, report: ImportReport) -> None:
+    """Resolve all reference names in the batch to IDs with one statement per table"""
+    # Categories and brands are created on demand, like the dropdown endpoints do
+    cur.execute("""
+        INSERT INTO categories (category_name)
+        SELECT DISTINCT s.category_name FROM product_import_staging s
+        WHERE s.category_name IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM categories c WHERE lower(c.category_name) = lower(s.category_name))
+        ON CONFLICT (category_name) DO NOTHING
+    """)
+    cur.execute("""
+        INSERT INTO brands (brand_name)
+        SELECT DISTINCT s.brand_name FROM product_import_staging s
+        WHERE s.brand_name IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM brands b WHERE lower(b.brand_name) = lower(s.brand_name))
+        ON CONFLICT (brand_name) DO NOTHING
+    """)
+    cur.execute("""
+        UPDATE product_import_staging s
+        SET category_id = c.category_id
+        FROM categories c
+        WHERE lower(c.category_name) = lower(s.category_name)
+    """)
+    cur.execute("""
+        UPDATE product_import_staging s
+        SET brand_id = b.brand_id
+        FROM brands b
+        WHERE lower(b.brand_name) = lower(s.brand_name)
+    """)
+    cur.execute("""
+        UPDATE product_import_staging s
+        SET supplier_id = sp.supplier_id
+        FROM suppliers sp
+        WHERE lower(sp.supplier_name) = lower(s.supplier_name)
+    """)
+    cur.execute("""
+        UPDATE product_import_staging s
+        SET tax_category_id = t.tax_category_id
+        FROM tax_categories t
+        WHERE lower(t.tax_category_name) = lower(s.tax_category_name)
+    """)
+
+    # Suppliers and tax categories are business records and are never auto-created
+    _reject(cur, report, """
+        SELECT row_no, product_code, 'Unknown supplier: ' || supplier_name
+        FROM product_import_staging
+        WHERE supplier_name IS NOT NULL AND supplier_id IS NULL
+    """)
+    _reject(cur, report, """
+        SELECT row_no, product_code, 'Unknown tax category: ' || tax_category_name
+        FROM product_import_staging
+        WHERE tax_category_name IS NOT NULL AND tax_category_id IS NULL
+    """)
+
+
+def _reject_conflicts(cur, report: ImportReport) -> None:
+    """Reject rows whose barcodes collide with other products or other rows"""
+    _reject(cur, report, """
+        SELECT s.row_no, s.product_code, 'Barcode ' || s.barcode || ' belongs to product ' || p.product_code
+        FROM product_import_staging s
+        JOIN products p ON p.barcode = s.barcode
+        WHERE p.product_code <> s.product_code
+    """)
+    _reject(cur, report, """
+        SELECT s.row_no, s.product_code, 'Barcode ' || s.variant_barcode || ' belongs to a variant of product ' || p.product_code
+        FROM product_import_staging s
+        JOIN product_variants v ON v.barcode = s.variant_barcode
+        JOIN products p ON p.product_id = v.product_id
+        WHERE p.product_code <> s.product_code
+    """)
+    _reject(cur, report, """
+        SELECT row_no, product_code, 'Barcode ' || barcode || ' is used by more than one product in this file'
+        FROM (
+            SELECT row_no, product_code, barcode,
+                   MIN(product_code) OVER (PARTITION BY barcode) AS first_owner,
+                   MAX(product_code) OVER (PARTITION BY barcode) AS last_owner
+            FROM product_import_staging
+            WHERE barcode IS NOT NULL
+        ) d
+        WHERE first_owner <> last_owner
+    """)
+    _reject(cur, report, """
+        SELECT row_no, product_code, 'Variant barcode ' || variant_barcode || ' is used by more than one product in this file'
+        FROM (
+            SELECT row_no, product_code, variant_barcode,
+                   MIN(product_code) OVER (PARTITION BY variant_barcode) AS first_owner,
+                   MAX(product_code) OVER (PARTITION BY variant_barcode) AS last_owner
+            FROM product_import_staging
+            WHERE variant_barcode IS NOT NULL
+        ) d
+        WHERE first_owner <> last_owner
+    """)
+
+
+_PLAIN_VARIANTS_CTE = """
+    WITH plain_variants AS (
+        SELECT DISTINCT ON (s.product_code, s.variant_size, s.variant_color)
+            p.product_id, s.variant_size, s.variant_color, s.variant_sku_suffix,
+            s.variant_retail_price, s.variant_base_price, s.variant_is_active
+        FROM product_import_staging s
+        JOIN products p ON p.product_code = s.product_code
+        WHERE s.variant_barcode IS NULL
+          AND (s.variant_size IS NOT NULL OR s.variant_color IS NOT NULL)
+        ORDER BY s.product_code, s.variant_size, s.variant_color, s.row_no DESC
+    )
+"""
+
+
+def _merge_batch(cur, report: ImportReport) -> None:
+    """Upsert staged rows into products and product_variants"""
+    # Last row wins when a product appears more than once in the batch
+    cur.execute("""
+        INSERT INTO products (
+            product_code, product_name, description, category_id, brand_id, supplier_id,
+            base_price, retail_price, tax_category_id, is_active, barcode, unit_of_measure,
+            weight, reorder_level, max_stock_level
+        )
+        SELECT DISTINCT ON (product_code)
+            product_code, product_name, description, category_id, brand_id, supplier_id,
+            base_price, retail_price, tax_category_id, is_active, barcode, unit_of_measure,
+            weight, COALESCE(reorder_level, 0), max_stock_level
+        FROM product_import_staging
+        ORDER BY product_code, row_no DESC
+        ON CONFLICT (product_code) DO UPDATE SET
+            product_name    = EXCLUDED.product_name,
+            description     = COALESCE(EXCLUDED.description, products.description),
+            category_id     = COALESCE(EXCLUDED.category_id, products.category_id),
+            brand_id        = COALESCE(EXCLUDED.brand_id, products.brand_id),
+            supplier_id     = COALESCE(EXCLUDED.supplier_id, products.supplier_id),
+            base_price      = EXCLUDED.base_price,
+            retail_price    = EXCLUDED.retail_price,
+            tax_category_id = COALESCE(EXCLUDED.tax_category_id, products.tax_category_id),
+            is_active       = EXCLUDED.is_active,
+            barcode         = COALESCE(EXCLUDED.barcode, products.barcode),
+            unit_of_measure = COALESCE(EXCLUDED.unit_of_measure, products.unit_of_measure),
+            weight          = COALESCE(EXCLUDED.weight, products.weight),
+            reorder_level   = EXCLUDED.reorder_level,
+            max_stock_level = COALESCE(EXCLUDED.max_stock_level, products.max_stock_level),
+            updated_at      = CURRENT_TIMESTAMP
+        RETURNING (xmax = 0) AS inserted
+    """)
+    for (inserted,) in cur.fetchall():
+        if inserted:
+            report.products_inserted += 1
+        else:
+            report.products_updated += 1
+
+    # Variants with a barcode are keyed on the barcode
+    cur.execute("""
+        INSERT INTO product_variants (
+            product_id, size, color, sku_suffix, barcode, retail_price, base_price, is_active
+        )
+        SELECT DISTINCT ON (s.variant_barcode)
+            p.product_id, s.variant_size, s.variant_color, s.variant_sku_suffix, s.variant_barcode,
+            s.variant_retail_price, s.variant_base_price, s.variant_is_active
+        FROM product_import_staging s
+        JOIN products p ON p.product_code = s.product_code
+        WHERE s.variant_barcode IS NOT NULL
+        ORDER BY s.variant_barcode, s.row_no DESC
+        ON CONFLICT (barcode) DO UPDATE SET
+            size         = EXCLUDED.size,
+            color        = EXCLUDED.color,
+            sku_suffix   = EXCLUDED.sku_suffix,
+            retail_price = EXCLUDED.retail_price,
+            base_price   = EXCLUDED.base_price,
+            is_active    = EXCLUDED.is_active,
+            updated_at   = CURRENT_TIMESTAMP
+        WHERE product_variants.product_id = EXCLUDED.product_id
+        RETURNING (xmax = 0) AS inserted
+    """)
+    for (inserted,) in cur.fetchall():
+        if inserted:
+            report.variants_inserted += 1
+        else:
+            report.variants_updated += 1
+
+    # Variants without a barcode are keyed on (product, size, color)
+    cur.execute(_PLAIN_VARIANTS_CTE + """
+        UPDATE product_variants v SET
+            sku_suffix   = pv.variant_sku_suffix,
+            retail_price = pv.variant_retail_price,
+            base_price   = pv.variant_base_price,
+            is_active    = pv.variant_is_active,
+            updated_at   = CURRENT_TIMESTAMP
+        FROM plain_variants pv
+        WHERE v.product_id = pv.product_id
+          AND v.size IS NOT DISTINCT FROM pv.variant_size
+          AND v.color IS NOT DISTINCT FROM pv.variant_color
+    """)
+    report.variants_updated += cur.rowcount
+    cur.execute(_PLAIN_VARIANTS_CTE + """
+        INSERT INTO product_variants (
+            product_id, size, color, sku_suffix, retail_price, base_price, is_active
+        )
+        SELECT pv.product_id, pv.variant_size, pv.variant_color, pv.variant_sku_suffix,
+               pv.variant_retail_price, pv.variant_base_price, pv.variant_is_active
+        FROM plain_variants pv
+        WHERE NOT EXISTS (
+            SELECT 1 FROM product_variants v
+            WHERE v.product_id = pv.product_id
+              AND v.size IS NOT DISTINCT FROM pv.variant_size
+              AND v.color IS NOT DISTINCT FROM pv.variant_color
+        )
+    """)
+    report.variants_inserted += cur.rowcount
+
+
+def _process_batch(conn, batch: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+    """Stage and merge one batch in its own transaction"""
+    batch_report = ImportReport()
+    cur = conn.cursor()
+    try:
+        _copy_batch(cur, batch)
+        _resolve_references(cur, batch_report)
+        _reject_conflicts(cur, batch_report)
+        _merge_batch(cur, batch_report)
+        conn.commit()
+        report.merge(batch_report)
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Product import batch starting at row {batch[0][0]} failed: {e}")
+        for row_no, row in batch:
+            report.add_error(row_no, row["product_code"], f"Batch failed: {e}")
+    finally:
+        cur.close()
+
+
+def import_products(
+    rows: Iterable[Dict[str, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """Validate, stage and merge an iterable of raw product rows"""
+    report = ImportReport()
+    conn = engine.raw_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute(_STAGING_DDL)
+        conn.commit()
+        cur.close()
+
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        rows = iter(rows)
+        # Row numbers are 1-based and count data rows (the CSV header is not a row)
+        row_no = 0
+        while True:
+            row_no += 1
+            try:
+                raw = next(rows)
+            except StopIteration:
+                break
+            except (ValueError, UnicodeDecodeError, csv.Error) as e:
+                # The reader cannot resume after a malformed line; earlier batches
+                # are already committed, so report the rest of the file as unread
+                report.total_rows += 1
+                report.add_error(row_no, None, f"Unreadable input, import stopped here: {e}")
+                break
+            report.total_rows += 1
+            try:
+                batch.append((row_no, validate_row(raw)))
+            except (ValueError, TypeError, AttributeError) as e:
+                report.add_error(row_no, raw.get("product_code") if isinstance(raw, dict) else None, str(e))
+                continue
+            if len(batch) >= batch_size:
+                _process_batch(conn, batch, report)
+                batch = []
+        if batch:
+            _process_batch(conn, batch, report)
+    finally:
+        conn.close()
+        # Earlier batches may have committed even when a later one raised
+        cache.invalidate(SUPPLIER_STATS_CACHE)
+
+    logger.info(
+        f"Product import finished: {report.total_rows} rows, "
+        f"{report.products_inserted} products inserted, {report.products_updated} updated, "
+        f"{report.error_count} errors"
+    )
+    return report.as_dict()
+
+
+def import_file(stream: IO[bytes], fmt: str = "csv", batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
+    """Import products from a binary file-like object"""
+    return import_products(read_rows(stream, fmt), batch_size=batch_size)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Bulk import products and variants")
+    parser.add_argument("path", help="CSV, NDJSON or JSON file to import")
+    parser.add_argument("--format", choices=["csv", "json", "ndjson"], default=None,
+                        help="Input format (defaults to the file extension)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    fmt = args.format or os.path.splitext(args.path)[1].lstrip(".").lower() or "csv"
+    with open(args.path, "rb") as f:
+        result = import_file(f, fmt=fmt, batch_size=args.batch_size)
+    errors = result.pop("errors")
+    print(json.dumps(result, indent=2))
+    for error in errors:
+        print(f"row {error['row']} ({error['product_code']}): {error['error']}")
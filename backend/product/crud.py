@@ -1,13 +1,175 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from . import models, schemas
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
+from decimal import Decimal
+import base64
+import json
 from sqlalchemy import text
+from backend import audit, cache
+from backend.suppliers.crud import STATS_CACHE as SUPPLIER_STATS_CACHE
 
 def get_product(db: Session, product_id: int) -> Optional[models.Product]:
     return db.query(models.Product).filter(models.Product.product_id == product_id).first()
 
 def get_products(db: Session, skip: int = 0, limit: int = 100) -> List[models.Product]:
-    return db.query(models.Product).offset(skip).limit(limit).all()
+    # Variants are part of the response model; load them in one extra query instead of one per product
+    return db.query(models.Product).options(
+        selectinload(models.Product.variants)
+    ).order_by(models.Product.product_id).offset(skip).limit(limit).all()
+
+# Keyset sort columns: (SQL expression, SQL type used to cast the cursor value back)
+CATALOGUE_SORTS = {
+    "name": ("p.product_name", "VARCHAR"),
+    "code": ("p.product_code", "VARCHAR"),
+    "price": ("p.retail_price", "NUMERIC"),
+}
+
+def encode_catalogue_cursor(sort: str, descending: bool, sort_value: Any, product_id: int) -> str:
+    # The ordering travels with the position so a cursor can't be replayed against another one
+    payload = json.dumps([sort, descending, str(sort_value), product_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def decode_catalogue_cursor(cursor: str) -> Tuple[str, bool, str, int]:
+    try:
+        sort, descending, sort_value, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(sort), bool(descending), str(sort_value), int(product_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+def get_catalogue(
+    db: Session,
+    category_id: Optional[int] = None,
+    brand_id: Optional[int] = None,
+    supplier_id: Optional[int] = None,
+    is_active: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search: Optional[str] = None,
+    sort: str = "name",
+    descending: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    include_variants: bool = False,
+    include_stock: bool = False,
+    store_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Keyset-paginated product catalogue with reference names resolved.
+
+    Everything a page needs (category/brand/supplier/tax names, optional variants
+    and per-store stock aggregated as JSON) comes back from a single statement.
+    """
+    if sort not in CATALOGUE_SORTS:
+        raise ValueError(f"Unsupported sort: {sort}")
+    sort_column, sort_type = CATALOGUE_SORTS[sort]
+    direction = "DESC" if descending else "ASC"
+
+    select_extra, join_extra = "", ""
+    if include_variants:
+        select_extra += ", COALESCE(v.variants, '[]') AS variants"
+        join_extra += """
+            LEFT JOIN LATERAL (
+                SELECT json_agg(json_build_object(
+                    'variant_id', pv.variant_id,
+                    'size', pv.size,
+                    'color', pv.color,
+                    'sku_suffix', pv.sku_suffix,
+                    'barcode', pv.barcode,
+                    'retail_price', pv.retail_price,
+                    'base_price', pv.base_price,
+                    'is_active', pv.is_active
+                ) ORDER BY pv.variant_id) AS variants
+                FROM product_variants pv
+                WHERE pv.product_id = p.product_id
+            ) v ON TRUE
+        """
+    if include_stock:
+        select_extra += ", COALESCE(st.stock, '[]') AS stock"
+        join_extra += """
+            LEFT JOIN LATERAL (
+                SELECT json_agg(json_build_object(
+                    'store_id', i.store_id,
+                    'variant_id', i.variant_id,
+                    'current_stock', i.current_stock
+                ) ORDER BY i.store_id, i.variant_id) AS stock
+                FROM inventory i
+                WHERE i.product_id = p.product_id
+                  AND (CAST(:store_id AS INTEGER) IS NULL OR i.store_id = :store_id)
+            ) st ON TRUE
+        """
+
+    where_clauses = ["1=1"]
+    params: Dict[str, Any] = {"limit": limit + 1, "store_id": store_id}
+    if category_id is not None:
+        where_clauses.append("p.category_id = :category_id")
+        params["category_id"] = category_id
+    if brand_id is not None:
+        where_clauses.append("p.brand_id = :brand_id")
+        params["brand_id"] = brand_id
+    if supplier_id is not None:
+        where_clauses.append("p.supplier_id = :supplier_id")
+        params["supplier_id"] = supplier_id
+    if is_active is not None:
+        where_clauses.append("p.is_active = :is_active")
+        params["is_active"] = is_active
+    if min_price is not None:
+        where_clauses.append("p.retail_price >= :min_price")
+        params["min_price"] = min_price
+    if max_price is not None:
+        where_clauses.append("p.retail_price <= :max_price")
+        params["max_price"] = max_price
+    if search:
+        where_clauses.append("""(
+            p.product_name ILIKE :search OR p.product_code ILIKE :search OR p.barcode ILIKE :search
+            OR EXISTS (SELECT 1 FROM product_variants sv WHERE sv.product_id = p.product_id AND sv.barcode ILIKE :search)
+        )""")
+        params["search"] = f"%{search}%"
+    if cursor:
+        cursor_sort, cursor_descending, after_value, after_id = decode_catalogue_cursor(cursor)
+        if (cursor_sort, cursor_descending) != (sort, descending):
+            raise ValueError(
+                f"Cursor belongs to sort={cursor_sort}, descending={str(cursor_descending).lower()}; "
+                "request the first page again to change the ordering"
+            )
+        comparison = "<" if descending else ">"
+        where_clauses.append(
+            f"({sort_column}, p.product_id) {comparison} (CAST(:after_value AS {sort_type}), :after_id)"
+        )
+        params["after_value"] = after_value
+        params["after_id"] = after_id
+
+    rows = db.execute(
+        text(f"""
+            SELECT
+                p.product_id, p.product_code, p.product_name, p.description,
+                p.category_id, c.category_name,
+                p.brand_id, b.brand_name,
+                p.supplier_id, s.supplier_name,
+                p.base_price, p.retail_price,
+                p.tax_category_id, t.tax_category_name, t.tax_rate,
+                p.is_active, p.barcode, p.unit_of_measure, p.weight,
+                p.reorder_level, p.max_stock_level, p.created_at, p.updated_at
+                {select_extra}
+            FROM products p
+            LEFT JOIN categories c ON c.category_id = p.category_id
+            LEFT JOIN brands b ON b.brand_id = p.brand_id
+            LEFT JOIN suppliers s ON s.supplier_id = p.supplier_id
+            LEFT JOIN tax_categories t ON t.tax_category_id = p.tax_category_id
+            {join_extra}
+            WHERE {" AND ".join(where_clauses)}
+            ORDER BY {sort_column} {direction}, p.product_id {direction}
+            LIMIT :limit
+        """),
+        params
+    ).mappings().all()
+
+    items = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        sort_key = {"name": "product_name", "code": "product_code", "price": "retail_price"}[sort]
+        next_cursor = encode_catalogue_cursor(sort, descending, last[sort_key], last["product_id"])
+    return {"items": items, "next_cursor": next_cursor}
 
 def create_product(db: Session, product: schemas.ProductCreate) -> models.Product:
     db_product = models.Product(
@@ -44,101 +206,323 @@ def create_product(db: Session, product: schemas.ProductCreate) -> models.Produc
         db.add(db_variant)
     db.commit()
     db.refresh(db_product)
+    cache.invalidate(SUPPLIER_STATS_CACHE)
     return db_product
 
-def update_product(db: Session, product_id: int, product: schemas.ProductUpdate) -> Optional[models.Product]:
+def update_product(
+    db: Session,
+    product_id: int,
+    product: schemas.ProductUpdate,
+    user_id: Optional[int] = None
+) -> Optional[models.Product]:
     db_product = get_product(db, product_id)
     if not db_product:
-        print('[update_product] Product not found:', product_id)
         return None
+    price_changes = {}
     for field, value in product.dict(exclude_unset=True).items():
         if field != 'variants':
+            if field in PRICE_ATTRS and value is not None and Decimal(str(value)) != getattr(db_product, field):
+                price_changes[field] = {"old": getattr(db_product, field), "new": value}
             setattr(db_product, field, value)
     if product.variants is not None:
-        print('[update_product] Incoming variants:', product.variants)
-        existing_variants = db.query(models.ProductVariant).filter(models.ProductVariant.product_id == product_id).all()
-        print('[update_product] Existing variants:', existing_variants)
-        existing_variant_ids = set([v.variant_id for v in existing_variants if is_plain_int(v.variant_id)])
-        payload_variant_ids = set([getattr(v, 'variant_id', None) for v in product.variants if is_plain_int(getattr(v, 'variant_id', None))])
-        # Ensure both sets are only ints before subtraction
-        existing_variant_ids = set([vid for vid in existing_variant_ids if is_plain_int(vid)])
-        payload_variant_ids = set([vid for vid in payload_variant_ids if is_plain_int(vid)])
-        print('[update_product] existing_variant_ids:', existing_variant_ids)
-        print('[update_product] payload_variant_ids:', payload_variant_ids)
-
-        # Update or insert variants from payload
-        for v in product.variants:
-            print('[update_product] Processing variant:', v)
-            if hasattr(v, 'variant_id') and v.variant_id:
-                db_variant = db.query(models.ProductVariant).get(v.variant_id)
-                if db_variant:
-                    # Barcode uniqueness check (exclude self)
-                    if v.barcode:
-                        print(f'[update_product] Checking barcode uniqueness for update: {v.barcode}, variant_id: {v.variant_id}')
-                        existing = db.query(models.ProductVariant).filter(
-                            models.ProductVariant.barcode == v.barcode,
-                            models.ProductVariant.variant_id != v.variant_id
-                        ).first()
-                        print('[update_product] Barcode check result:', existing)
-                        if existing:
-                            print(f'[update_product] ERROR: Barcode {v.barcode} already exists for another variant.')
-                            raise Exception(f"Barcode {v.barcode} already exists for another variant.")
-                    for attr in ['size', 'color', 'sku_suffix', 'barcode', 'retail_price', 'base_price', 'is_active']:
-                        setattr(db_variant, attr, getattr(v, attr, getattr(db_variant, attr)))
-                    print('[update_product] Updated variant:', db_variant)
-            else:
-                # Barcode uniqueness check for new variant
-                if getattr(v, 'barcode', None):
-                    print(f'[update_product] Checking barcode uniqueness for new: {v.barcode}')
-                    existing = db.query(models.ProductVariant).filter(
-                        models.ProductVariant.barcode == v.barcode
-                    ).first()
-                    print('[update_product] Barcode check result:', existing)
-                    if existing:
-                        print(f'[update_product] ERROR: Barcode {v.barcode} already exists for another variant.')
-                        raise Exception(f"Barcode {v.barcode} already exists for another variant.")
-                db_variant = models.ProductVariant(
-                    product_id=product_id,
-                    size=getattr(v, 'size', None),
-                    color=getattr(v, 'color', None),
-                    sku_suffix=getattr(v, 'sku_suffix', None),
-                    barcode=getattr(v, 'barcode', None),
-                    retail_price=getattr(v, 'retail_price', None),
-                    base_price=getattr(v, 'base_price', None),
-                    is_active=getattr(v, 'is_active', True),
-                )
-                db.add(db_variant)
-                print('[update_product] Added new variant:', db_variant)
-
-        # For variants in DB but not in payload, try to delete or deactivate
-        to_remove = existing_variant_ids - payload_variant_ids
-        print('[update_product] Variants to remove:', to_remove)
-        for variant_id in to_remove:
-            inventory_ref = db.execute(
-                text('SELECT 1 FROM inventory WHERE variant_id = :variant_id LIMIT 1'),
-                {'variant_id': variant_id}
-            ).first()
-            db_variant = db.query(models.ProductVariant).get(variant_id)
-            if inventory_ref:
-                print(f'[update_product] Soft-deleting variant {variant_id} (referenced in inventory)')
-                if db_variant:
-                    db_variant.is_active = False
-            else:
-                print(f'[update_product] Deleting variant {variant_id} (not referenced)')
-                if db_variant:
-                    db.delete(db_variant)
+        sync_variants(db, product_id, product.variants)
+    if price_changes:
+        audit.record("PRODUCT_PRICE_UPDATE", {"product_id": product_id, "changes": price_changes},
+                     user_id=user_id, db=db)
     db.commit()
     db.refresh(db_product)
-    print('[update_product] Product update complete:', db_product)
+    cache.invalidate(SUPPLIER_STATS_CACHE)
     return db_product
 
+VARIANT_ATTRS = ('size', 'color', 'sku_suffix', 'barcode', 'retail_price', 'base_price', 'is_active')
+PRICE_ATTRS = ('retail_price', 'base_price')
+
+def _variant_values(source) -> tuple:
+    """Comparable tuple of variant attributes with prices normalised to 2dp Decimals"""
+    values = []
+    for attr in VARIANT_ATTRS:
+        value = source[attr] if isinstance(source, dict) else getattr(source, attr, None)
+        if attr in PRICE_ATTRS and value is not None:
+            value = Decimal(str(value)).quantize(Decimal("0.01"))
+        values.append(value)
+    return tuple(values)
+
+def _variant_arrays(rows: List[tuple]) -> dict:
+    """Transpose variant value tuples into one array parameter per column for unnest()"""
+    columns = list(zip(*rows)) if rows else [()] * len(VARIANT_ATTRS)
+    return {attr: list(column) for attr, column in zip(VARIANT_ATTRS, columns)}
+
+def sync_variants(db: Session, product_id: int, incoming: List[schemas.ProductVariantUpdate]) -> None:
+    """
+    Reconcile a product's variants with the incoming list.
+
+    The current state is read in one query and diffed in memory; the diff is then
+    applied with at most three set-based statements (remove, update, insert).
+    Variants whose values did not change are not touched.
+    """
+    barcodes = [v.barcode for v in incoming if v.barcode]
+    if len(barcodes) != len(set(barcodes)):
+        raise ValueError("Each variant must have a unique barcode.")
+
+    # Existing variants of this product plus any other variant already using an incoming barcode
+    rows = db.execute(
+        text("""
+            SELECT variant_id, product_id, size, color, sku_suffix, barcode,
+                   retail_price, base_price, is_active
+            FROM product_variants
+            WHERE product_id = :product_id OR barcode = ANY(:barcodes)
+        """),
+        {"product_id": product_id, "barcodes": barcodes}
+    ).mappings().all()
+    existing = {row["variant_id"]: _variant_values(dict(row)) for row in rows if row["product_id"] == product_id}
+    barcode_owner = {row["barcode"]: row["variant_id"] for row in rows if row["barcode"]}
+
+    updates, inserts, keep_ids = [], [], set()
+    for v in incoming:
+        values = _variant_values(v)
+        # Ids that do not belong to this product are treated as new variants
+        variant_id = v.variant_id if v.variant_id in existing else None
+        owner = barcode_owner.get(v.barcode) if v.barcode else None
+        if owner is not None and owner != variant_id:
+            raise ValueError(f"Barcode {v.barcode} already exists for another variant.")
+        if variant_id is None:
+            inserts.append(values)
+        else:
+            keep_ids.add(variant_id)
+            if existing[variant_id] != values:
+                updates.append((variant_id,) + values)
+    remove_ids = [variant_id for variant_id in existing if variant_id not in keep_ids]
+
+    if remove_ids:
+        # Variants with stock or sales history are deactivated, the rest are deleted
+        db.execute(
+            text("""
+                WITH removed AS (
+                    SELECT v.variant_id,
+                           EXISTS (SELECT 1 FROM inventory i WHERE i.variant_id = v.variant_id)
+                           OR EXISTS (SELECT 1 FROM sale_items si WHERE si.variant_id = v.variant_id)
+                           OR EXISTS (SELECT 1 FROM inventory_movements im WHERE im.variant_id = v.variant_id)
+                           AS referenced
+                    FROM product_variants v
+                    WHERE v.variant_id = ANY(:ids)
+                ),
+                deactivated AS (
+                    UPDATE product_variants v
+                    SET is_active = FALSE, updated_at = CURRENT_TIMESTAMP
+                    FROM removed r
+                    WHERE v.variant_id = r.variant_id AND r.referenced AND v.is_active IS DISTINCT FROM FALSE
+                    RETURNING v.variant_id
+                )
+                DELETE FROM product_variants v
+                USING removed r
+                WHERE v.variant_id = r.variant_id AND NOT r.referenced
+            """),
+            {"ids": remove_ids}
+        )
+
+    if updates:
+        params = _variant_arrays([row[1:] for row in updates])
+        params["ids"] = [row[0] for row in updates]
+        db.execute(
+            text("""
+                UPDATE product_variants v SET
+                    size = d.size,
+                    color = d.color,
+                    sku_suffix = d.sku_suffix,
+                    barcode = d.barcode,
+                    retail_price = d.retail_price,
+                    base_price = d.base_price,
+                    is_active = d.is_active,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM unnest(
+                    CAST(:ids AS INTEGER[]), CAST(:size AS VARCHAR[]), CAST(:color AS VARCHAR[]),
+                    CAST(:sku_suffix AS VARCHAR[]), CAST(:barcode AS VARCHAR[]),
+                    CAST(:retail_price AS NUMERIC[]), CAST(:base_price AS NUMERIC[]),
+                    CAST(:is_active AS BOOLEAN[])
+                ) AS d(variant_id, size, color, sku_suffix, barcode, retail_price, base_price, is_active)
+                WHERE v.variant_id = d.variant_id
+            """),
+            params
+        )
+
+    if inserts:
+        params = _variant_arrays(inserts)
+        params["product_id"] = product_id
+        db.execute(
+            text("""
+                INSERT INTO product_variants (
+                    product_id, size, color, sku_suffix, barcode, retail_price, base_price, is_active
+                )
+                SELECT :product_id, d.size, d.color, d.sku_suffix, d.barcode,
+                       d.retail_price, d.base_price, COALESCE(d.is_active, TRUE)
+                FROM unnest(
+                    CAST(:size AS VARCHAR[]), CAST(:color AS VARCHAR[]), CAST(:sku_suffix AS VARCHAR[]),
+                    CAST(:barcode AS VARCHAR[]), CAST(:retail_price AS NUMERIC[]),
+                    CAST(:base_price AS NUMERIC[]), CAST(:is_active AS BOOLEAN[])
+                ) AS d(size, color, sku_suffix, barcode, retail_price, base_price, is_active)
+            """),
+            params
+        )
+
 def delete_product(db: Session, product_id: int) -> bool:
     db_product = get_product(db, product_id)
     if not db_product:
         return False
     db.delete(db_product)
     db.commit()
-    return True 
+    cache.invalidate(SUPPLIER_STATS_CACHE)
+    return True
+
+# ============================================================================
+# BULK PRICE / ATTRIBUTE UPDATES
+# ============================================================================
 
-def is_plain_int(val):
-    return isinstance(val, int) and not hasattr(val, '__clause_element__') 
\ No newline at end of file
+def bulk_update_products(db: Session, update: schemas.ProductBulkUpdate) -> Dict[str, Any]:
+    """Apply one set of attribute changes to every product matching the filter in a single UPDATE"""
+    set_clauses = []
+    params: Dict[str, Any] = {}
+    if update.retail_price is not None and update.retail_price_change_percent is not None:
+        raise ValueError("Give either retail_price or retail_price_change_percent, not both")
+    if update.retail_price is not None:
+        set_clauses.append("retail_price = :retail_price")
+        params["retail_price"] = update.retail_price
+    elif update.retail_price_change_percent is not None:
+        set_clauses.append("retail_price = ROUND(retail_price * (1 + CAST(:percent AS NUMERIC) / 100), 2)")
+        params["percent"] = update.retail_price_change_percent
+    if update.base_price is not None:
+        set_clauses.append("base_price = :base_price")
+        params["base_price"] = update.base_price
+    if update.tax_category_id is not None:
+        set_clauses.append("tax_category_id = :tax_category_id")
+        params["tax_category_id"] = update.tax_category_id
+    if update.is_active is not None:
+        set_clauses.append("is_active = :is_active")
+        params["is_active"] = update.is_active
+    if not set_clauses:
+        raise ValueError("No changes specified")
+
+    where_clauses = []
+    product_filter = update.filter
+    if product_filter.category_id is not None:
+        where_clauses.append("category_id = :category_id")
+        params["category_id"] = product_filter.category_id
+    if product_filter.brand_id is not None:
+        where_clauses.append("brand_id = :brand_id")
+        params["brand_id"] = product_filter.brand_id
+    if product_filter.supplier_id is not None:
+        where_clauses.append("supplier_id = :supplier_id")
+        params["supplier_id"] = product_filter.supplier_id
+    if product_filter.product_ids:
+        where_clauses.append("product_id = ANY(:product_ids)")
+        params["product_ids"] = product_filter.product_ids
+    if not where_clauses:
+        raise ValueError("At least one filter is required for a bulk update")
+
+    result = db.execute(
+        text(f"""
+            UPDATE products
+            SET {", ".join(set_clauses)}, updated_at = CURRENT_TIMESTAMP
+            WHERE {" AND ".join(where_clauses)}
+        """),
+        params
+    )
+    updated = result.rowcount
+    audit.record("PRODUCT_BULK_UPDATE", {
+        "filter": product_filter.dict(exclude_none=True),
+        "changes": update.dict(exclude={"filter", "user_id"}, exclude_none=True),
+        "products_updated": updated
+    }, user_id=update.user_id, db=db)
+    db.commit()
+    return {"products_updated": updated}
+
+def parse_price_rows(rows) -> Tuple[List[Tuple[str, Decimal, Optional[Decimal]]], List[Dict[str, Any]]]:
+    """Validate (product_code, new_price[, new_base_price]) rows from a price file"""
+    prices, errors, seen = [], [], set()
+    for row_no, row in enumerate(rows, start=1):
+        product_code = (row.get("product_code") or "").strip()
+        try:
+            if not product_code:
+                raise ValueError("product_code is required")
+            if product_code in seen:
+                raise ValueError("product_code appears more than once")
+            new_price = Decimal(str(row.get("new_price") or row.get("retail_price") or "").strip())
+            raw_base = str(row.get("new_base_price") or row.get("base_price") or "").strip()
+            new_base_price = Decimal(raw_base) if raw_base else None
+            if not new_price.is_finite() or new_price < 0 or (new_base_price is not None and (not new_base_price.is_finite() or new_base_price < 0)):
+                raise ValueError("prices must be non-negative numbers")
+        except (ArithmeticError, ValueError) as e:
+            message = str(e) if isinstance(e, ValueError) else "new_price must be a number"
+            errors.append({"row": row_no, "product_code": product_code or None, "error": message})
+            continue
+        seen.add(product_code)
+        prices.append((product_code, new_price, new_base_price))
+    return prices, errors
+
+def bulk_update_prices(
+    db: Session,
+    prices: List[Tuple[str, Decimal, Optional[Decimal]]],
+    user_id: int
+) -> Dict[str, Any]:
+    """Reprice products by product_code with a single UPDATE ... FROM over the price list"""
+    if not prices:
+        return {"products_updated": 0, "unchanged": 0, "not_found": []}
+    codes = [code for code, _, _ in prices]
+    # unnest() over three arrays is the array form of a VALUES list: 20k rows bind as three parameters.
+    # The old CTE locks the rows and keeps their prices so the audit event can record both sides.
+    result = db.execute(
+        text("""
+            WITH old AS (
+                SELECT product_id, retail_price, base_price
+                FROM products
+                WHERE product_code = ANY(:codes)
+                FOR UPDATE
+            )
+            UPDATE products p
+            SET retail_price = v.new_price,
+                base_price = COALESCE(v.new_base_price, p.base_price),
+                updated_at = CURRENT_TIMESTAMP
+            FROM unnest(
+                CAST(:codes AS VARCHAR[]), CAST(:new_prices AS NUMERIC[]), CAST(:new_base_prices AS NUMERIC[])
+            ) AS v(product_code, new_price, new_base_price), old
+            WHERE p.product_code = v.product_code
+              AND old.product_id = p.product_id
+              AND (p.retail_price IS DISTINCT FROM v.new_price
+                   OR (v.new_base_price IS NOT NULL AND p.base_price IS DISTINCT FROM v.new_base_price))
+            RETURNING p.product_code, old.retail_price AS old_retail_price, p.retail_price,
+                      old.base_price AS old_base_price, p.base_price
+        """),
+        {
+            "codes": codes,
+            "new_prices": [price for _, price, _ in prices],
+            "new_base_prices": [base for _, _, base in prices]
+        }
+    ).all()
+    updated_codes = {row.product_code for row in result}
+    changes = []
+    for row in result:
+        price_changes = {}
+        for field in ("retail_price", "base_price"):
+            if getattr(row, f"old_{field}") != getattr(row, field):
+                price_changes[field] = {"old": getattr(row, f"old_{field}"), "new": getattr(row, field)}
+        changes.append({"product_code": row.product_code, "changes": price_changes})
+    unchanged_or_missing = [code for code in codes if code not in updated_codes]
+    not_found = []
+    if unchanged_or_missing:
+        existing = db.execute(
+            text("SELECT product_code FROM products WHERE product_code = ANY(:codes)"),
+            {"codes": unchanged_or_missing}
+        )
+        existing_codes = {row[0] for row in existing}
+        not_found = [code for code in unchanged_or_missing if code not in existing_codes]
+    audit.record("PRODUCT_BULK_PRICE_UPDATE", {
+        "rows": len(prices),
+        "products_updated": len(updated_codes),
+        "not_found": len(not_found),
+        "products": changes
+    }, user_id=user_id, db=db)
+    db.commit()
+    return {
+        "products_updated": len(updated_codes),
+        "unchanged": len(unchanged_or_missing) - len(not_found),
+        "not_found": not_found
+    }
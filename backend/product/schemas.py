@@ -14,6 +14,9 @@ class ProductVariantBase(BaseModel):
 class ProductVariantCreate(ProductVariantBase):
     pass
 
+class ProductVariantUpdate(ProductVariantBase):
+    variant_id: Optional[int] = None
+
 class ProductVariant(ProductVariantBase):
     variant_id: int
     created_at: Optional[datetime]
@@ -40,7 +43,7 @@ class ProductBase(BaseModel):
     max_stock_level: Optional[int] = None
 
 class ProductCreate(ProductBase):
-    pass
+    variants: List[ProductVariantCreate] = []
 
 class ProductUpdate(BaseModel):
     product_code: Optional[str] = None
@@ -58,6 +61,7 @@ class ProductUpdate(BaseModel):
     weight: Optional[float] = None
     reorder_level: Optional[int] = None
     max_stock_level: Optional[int] = None
+    variants: Optional[List[ProductVariantUpdate]] = None
 
 class Product(ProductBase):
     product_id: int
@@ -66,4 +70,43 @@ class Product(ProductBase):
     variants: List[ProductVariant] = []
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class ProductBulkFilter(BaseModel):
+    category_id: Optional[int] = None
+    brand_id: Optional[int] = None
+    supplier_id: Optional[int] = None
+    product_ids: Optional[List[int]] = None
+
+class ProductBulkUpdate(BaseModel):
+    filter: ProductBulkFilter
+    retail_price: Optional[float] = Field(None, ge=0)
+    retail_price_change_percent: Optional[float] = Field(None, gt=-100)
+    base_price: Optional[float] = Field(None, ge=0)
+    tax_category_id: Optional[int] = None
+    is_active: Optional[bool] = None
+    user_id: int
+
+class CatalogueVariant(ProductVariantBase):
+    variant_id: int
+
+class CatalogueStock(BaseModel):
+    store_id: int
+    variant_id: Optional[int] = None
+    current_stock: int
+
+class CatalogueProduct(ProductBase):
+    product_id: int
+    category_name: Optional[str] = None
+    brand_name: Optional[str] = None
+    supplier_name: Optional[str] = None
+    tax_category_name: Optional[str] = None
+    tax_rate: Optional[float] = None
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    variants: Optional[List[CatalogueVariant]] = None
+    stock: Optional[List[CatalogueStock]] = None
+
+class CataloguePage(BaseModel):
+    items: List[CatalogueProduct]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,336 @@
+"""
+Query-level profiling for the API.
+
+Every SQL statement is timed, whether it goes through SQLAlchemy (cursor
+execute events on the engine) or through the raw psycopg2 pools in
+inventory/crud.py, settings/crud.py and the dashboard endpoints
+(``ProfiledDictCursor`` / ``ProfiledCursor``). Statements
+are attributed to the endpoint serving the current request, so
+``ProfilingMiddleware`` can keep per-endpoint request counts, query counts
+and database time; ``render_metrics()`` formats them in the Prometheus text
+format for ``GET /metrics``. Queries run outside a request (audit writer,
+scripts) are counted under the ``background`` endpoint.
+
+Statements slower than the threshold go to the ``backend.slow_queries``
+logger (and to a file if configured) and the slowest ones are kept for
+``GET /metrics/slow-queries``:
+
+    PROFILING_ENABLED       1 (default) | 0
+    SLOW_QUERY_MS           slow-query threshold in milliseconds (default 200)
+    SLOW_QUERY_LOG          file to append slow queries to (default: logger only)
+    SLOW_QUERY_KEEP         slowest statements kept (default 50)
+
+The middleware also detects N+1 query patterns: statements are fingerprinted
+(literals and bind parameters replaced by ``?``, IN lists collapsed) and a
+request that runs one fingerprint more than N_PLUS_ONE_THRESHOLD times is
+logged to ``backend.n_plus_one`` (``warn``) or answered with a 500 naming
+the statement (``raise``, for test runs and staging):
+
+    N_PLUS_ONE_MODE         off (default) | warn | raise
+    N_PLUS_ONE_THRESHOLD    repeats of one statement allowed per request (default 10)
+"""
+
+import contextvars
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2.extensions import cursor
+from psycopg2.extras import RealDictCursor
+
+ENABLED = os.getenv('PROFILING_ENABLED', '1') not in ('0', 'false', 'False')
+SLOW_QUERY_SECONDS = float(os.getenv('SLOW_QUERY_MS', '200')) / 1000
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG')
+SLOW_QUERY_KEEP = int(os.getenv('SLOW_QUERY_KEEP', '50'))
+N_PLUS_ONE_MODE = os.getenv('N_PLUS_ONE_MODE', 'off').lower()
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', '10'))
+DETECT_N_PLUS_ONE = N_PLUS_ONE_MODE in ('warn', 'raise')
+
+BACKGROUND = "background"
+UNMATCHED = "unmatched"
+
+slow_query_logger = logging.getLogger("backend.slow_queries")
+n_plus_one_logger = logging.getLogger("backend.n_plus_one")
+if SLOW_QUERY_LOG:
+    _handler = logging.FileHandler(SLOW_QUERY_LOG, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(_handler)
+    slow_query_logger.setLevel(logging.WARNING)
+
+
+@dataclass
+class RequestProfile:
+    """Queries made while serving one request"""
+    scope: dict = field(default_factory=dict)
+    query_count: int = 0
+    db_seconds: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    @property
+    def endpoint(self) -> str:
+        """The matched route ("GET /sales/{sale_id}"), known once routing has run"""
+        path = getattr(self.scope.get("route"), "path", None)
+        return f"{self.scope.get('method')} {path}" if path else UNMATCHED
+
+    def repeated_statements(self) -> List[Tuple[str, int]]:
+        """Fingerprints run more than N_PLUS_ONE_THRESHOLD times, most repeated first"""
+        return [(fp, count) for fp, count in self.fingerprints.most_common() if count > N_PLUS_ONE_THRESHOLD]
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    request_seconds: float = 0.0
+    queries: int = 0
+    db_seconds: float = 0.0
+    slow_queries: int = 0
+    max_queries: int = 0
+    n_plus_one: int = 0
+
+
+@dataclass(order=True)
+class SlowQuery:
+    seconds: float
+    endpoint: str
+    statement: str
+    at: datetime
+
+
+_current: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar("request_profile", default=None)
+_lock = threading.Lock()
+_endpoints: Dict[str, EndpointStats] = {}
+_slowest: List[SlowQuery] = []  # min-heap of the SLOW_QUERY_KEEP slowest statements
+
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|%s|(?<![:\w]):\w+|\$\d+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement template: literals and bind parameters become ?, IN lists collapse"""
+    statement = _LITERAL.sub("?", " ".join(statement.split()))
+    return _IN_LIST.sub("(...)", statement)
+
+
+def _normalize(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= 500 else statement[:497] + "..."
+
+
+def record_query(statement, seconds: float) -> None:
+    """Account one executed statement to the current request (or background)"""
+    if not ENABLED:
+        return
+    profile = _current.get()
+    if profile is not None:
+        profile.query_count += 1
+        profile.db_seconds += seconds
+    endpoint = profile.endpoint if profile is not None else BACKGROUND
+    if isinstance(statement, bytes):
+        statement = statement.decode("utf-8", "replace")
+    if profile is not None and DETECT_N_PLUS_ONE:
+        profile.fingerprints[fingerprint(str(statement))] += 1
+    is_slow = seconds >= SLOW_QUERY_SECONDS
+    with _lock:
+        stats = _endpoints.setdefault(endpoint, EndpointStats())
+        if profile is None:
+            # Request-scoped queries are added when the request finishes
+            stats.queries += 1
+            stats.db_seconds += seconds
+        if is_slow:
+            stats.slow_queries += 1
+        if len(_slowest) < SLOW_QUERY_KEEP or seconds > _slowest[0].seconds:
+            entry = SlowQuery(seconds, endpoint, _normalize(str(statement)), datetime.now())
+            if len(_slowest) < SLOW_QUERY_KEEP:
+                heapq.heappush(_slowest, entry)
+            else:
+                heapq.heapreplace(_slowest, entry)
+    if is_slow:
+        slow_query_logger.warning(f"{seconds * 1000:.1f} ms [{endpoint}] {_normalize(str(statement))}")
+
+
+class _TimedCursorMixin:
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(query, time.perf_counter() - started)
+
+
+class ProfiledCursor(_TimedCursorMixin, cursor):
+    """psycopg2 tuple cursor that times execute/executemany for the profiler"""
+
+
+class ProfiledDictCursor(_TimedCursorMixin, RealDictCursor):
+    """RealDictCursor that times execute/executemany for the profiler"""
+
+
+def install(engine) -> None:
+    """Time every statement executed through a SQLAlchemy engine"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        record_query(statement, time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that opens a RequestProfile per HTTP request and adds
+    its totals to the matched endpoint's stats. Also sets a Server-Timing
+    header with the request's DB time and applies N_PLUS_ONE_MODE once the
+    endpoint has produced its response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope)
+        token = _current.set(profile)
+        started = time.perf_counter()
+
+        replaced = False
+
+        async def send_with_timing(message):
+            nonlocal replaced
+            if replaced:
+                return
+            if message["type"] == "http.response.start":
+                repeated = profile.repeated_statements() if DETECT_N_PLUS_ONE else []
+                if repeated:
+                    _report_n_plus_one(profile, repeated)
+                    if N_PLUS_ONE_MODE == "raise":
+                        replaced = True
+                        await _send_n_plus_one_error(send, repeated)
+                        return
+                header = f'db;dur={profile.db_seconds * 1000:.1f};desc="{profile.query_count} queries"'
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            with _lock:
+                stats = _endpoints.setdefault(profile.endpoint, EndpointStats())
+                stats.requests += 1
+                stats.request_seconds += elapsed
+                stats.queries += profile.query_count
+                stats.db_seconds += profile.db_seconds
+                stats.max_queries = max(stats.max_queries, profile.query_count)
+
+
+def _report_n_plus_one(profile: RequestProfile, repeated: List[Tuple[str, int]]) -> None:
+    with _lock:
+        _endpoints.setdefault(profile.endpoint, EndpointStats()).n_plus_one += 1
+    for statement, count in repeated:
+        n_plus_one_logger.warning(f"N+1 suspected in {profile.endpoint}: {count} x {_normalize(statement)}")
+
+
+async def _send_n_plus_one_error(send, repeated: List[Tuple[str, int]]) -> None:
+    body = json.dumps({
+        "detail": f"N+1 query pattern: statement repeated more than {N_PLUS_ONE_THRESHOLD} times",
+        "statements": [{"count": count, "statement": _normalize(statement)} for statement, count in repeated],
+    }).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 500,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+def snapshot() -> Dict[str, EndpointStats]:
+    with _lock:
+        return {endpoint: EndpointStats(**vars(stats)) for endpoint, stats in _endpoints.items()}
+
+
+def slowest_queries(limit: Optional[int] = None) -> List[dict]:
+    """The slowest statements seen since startup, slowest first"""
+    with _lock:
+        entries = sorted(_slowest, reverse=True)
+    return [
+        {
+            "duration_ms": round(entry.seconds * 1000, 2),
+            "endpoint": entry.endpoint,
+            "statement": entry.statement,
+            "at": entry.at.isoformat(),
+        }
+        for entry in entries[:limit]
+    ]
+
+
+def reset() -> None:
+    with _lock:
+        _endpoints.clear()
+        _slowest.clear()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_METRICS = (
+    ("pos_http_requests_total", "counter", "HTTP requests served", "requests"),
+    ("pos_http_request_seconds_total", "counter", "Time spent serving HTTP requests", "request_seconds"),
+    ("pos_db_queries_total", "counter", "SQL statements executed", "queries"),
+    ("pos_db_query_seconds_total", "counter", "Time spent executing SQL statements", "db_seconds"),
+    ("pos_db_slow_queries_total", "counter", "SQL statements slower than SLOW_QUERY_MS", "slow_queries"),
+    ("pos_db_queries_per_request_max", "gauge", "Most SQL statements executed by a single request", "max_queries"),
+    ("pos_db_n_plus_one_requests_total", "counter", "Requests that repeated a statement past N_PLUS_ONE_THRESHOLD",
+     "n_plus_one"),
+)
+
+
+def render_metrics() -> str:
+    """Per-endpoint stats in the Prometheus text exposition format"""
+    stats = snapshot()
+    lines = []
+    for name, kind, help_text, attribute in _METRICS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for endpoint in sorted(stats):
+            value = getattr(stats[endpoint], attribute)
+            lines.append(f'{name}{{endpoint="{_label(endpoint)}"}} {value:g}' if isinstance(value, float)
+                         else f'{name}{{endpoint="{_label(endpoint)}"}} {value}')
+    lines.append("# HELP pos_db_slow_query_threshold_seconds Slow query threshold")
+    lines.append("# TYPE pos_db_slow_query_threshold_seconds gauge")
+    lines.append(f"pos_db_slow_query_threshold_seconds {SLOW_QUERY_SECONDS:g}")
+    return "\n".join(lines) + "\n"
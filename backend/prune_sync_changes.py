@@ -0,0 +1,31 @@
+"""
+Delete delta sync changes older than the retention window (default 30 days).
+Terminals whose token predates the pruned changes get reset=True from
+GET /sync/changes and reload the full lists. Run daily, e.g. from cron.
+
+Usage:
+    python -m backend.prune_sync_changes [--days 30]
+"""
+
+import argparse
+
+from backend.database import SessionLocal
+from backend.sync import crud
+
+
+def prune_sync_changes(days: int):
+    db = SessionLocal()
+    try:
+        deleted = crud.prune(db, retention_days=days)
+        print(f"✅ Deleted {deleted} sync changes older than {days} days")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune the delta sync change log")
+    parser.add_argument("--days", type=int, default=crud.RETENTION_DAYS, help="Days of changes to keep")
+    prune_sync_changes(parser.parse_args().days)
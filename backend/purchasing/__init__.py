@@ -0,0 +1 @@
+# Purchasing module
\ No newline at end of file
@@ -0,0 +1,136 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from backend.database import get_db
+from . import crud, schemas, replenishment
+
+router = APIRouter(prefix="/purchasing", tags=["purchasing"])
+
+@router.get("/reorder-suggestions", response_model=List[schemas.ReorderSuggestion])
+def get_reorder_suggestions(
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    supplier_id: Optional[int] = Query(None, description="Filter by supplier"),
+    window_days: int = Query(replenishment.DEFAULT_WINDOW_DAYS, ge=1, le=365, description="Demand averaging window"),
+    lead_time_days: int = Query(replenishment.DEFAULT_LEAD_TIME_DAYS, ge=0, le=365, description="Supplier lead time"),
+    safety_days: int = Query(replenishment.DEFAULT_SAFETY_DAYS, ge=0, le=365, description="Extra days of safety stock"),
+    target_days: int = Query(replenishment.DEFAULT_TARGET_DAYS, ge=1, le=365, description="Days of cover to order up to"),
+    db: Session = Depends(get_db)
+):
+    """Suggest reorder quantities from moving-average demand and days of cover"""
+    return replenishment.get_reorder_suggestions(
+        db,
+        store_id=store_id,
+        supplier_id=supplier_id,
+        window_days=window_days,
+        lead_time_days=lead_time_days,
+        safety_days=safety_days,
+        target_days=target_days
+    )
+
+@router.post("/reorder-suggestions/drafts", response_model=schemas.ReorderDraftResult)
+def create_reorder_drafts(
+    user_id: int = Query(..., description="ID of the user creating the drafts"),
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    supplier_id: Optional[int] = Query(None, description="Filter by supplier"),
+    window_days: int = Query(replenishment.DEFAULT_WINDOW_DAYS, ge=1, le=365),
+    lead_time_days: int = Query(replenishment.DEFAULT_LEAD_TIME_DAYS, ge=0, le=365),
+    safety_days: int = Query(replenishment.DEFAULT_SAFETY_DAYS, ge=0, le=365),
+    target_days: int = Query(replenishment.DEFAULT_TARGET_DAYS, ge=1, le=365),
+    db: Session = Depends(get_db)
+):
+    """Create DRAFT purchase orders (one per supplier and store) from the suggestions"""
+    return replenishment.create_reorder_drafts(
+        db,
+        user_id=user_id,
+        store_id=store_id,
+        supplier_id=supplier_id,
+        window_days=window_days,
+        lead_time_days=lead_time_days,
+        safety_days=safety_days,
+        target_days=target_days
+    )
+
+# Purchase order endpoints
+@router.post("/orders", response_model=schemas.PurchaseOrder)
+def create_purchase_order(
+    po: schemas.PurchaseOrderCreate,
+    user_id: int = Query(..., description="ID of the user creating the order"),
+    db: Session = Depends(get_db)
+):
+    try:
+        return crud.create_purchase_order(db, po, user_id)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/orders", response_model=List[schemas.PurchaseOrderSummary])
+def list_purchase_orders(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    supplier_id: Optional[int] = Query(None, description="Filter by supplier"),
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    db: Session = Depends(get_db)
+):
+    return crud.get_purchase_orders(
+        db, skip=skip, limit=limit, supplier_id=supplier_id, store_id=store_id, status=status
+    )
+
+@router.get("/orders/{po_id}", response_model=schemas.PurchaseOrder)
+def get_purchase_order(po_id: int, db: Session = Depends(get_db)):
+    po = crud.get_purchase_order(db, po_id)
+    if not po:
+        raise HTTPException(status_code=404, detail="Purchase order not found")
+    return po
+
+@router.put("/orders/{po_id}/status", response_model=schemas.PurchaseOrder)
+def update_purchase_order_status(
+    po_id: int,
+    update: schemas.PurchaseOrderStatusUpdate,
+    db: Session = Depends(get_db)
+):
+    try:
+        return crud.update_purchase_order_status(db, po_id, update.status)
+    except LookupError as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Goods receipt endpoints
+@router.post("/receipts", response_model=schemas.GoodsReceipt)
+def receive_goods(
+    grn: schemas.GoodsReceiptCreate,
+    user_id: int = Query(..., description="ID of the user receiving the goods"),
+    db: Session = Depends(get_db)
+):
+    """Record a goods receipt (optionally against a purchase order) and post it to stock"""
+    try:
+        return crud.receive_goods(db, grn, user_id)
+    except LookupError as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/receipts", response_model=List[schemas.GoodsReceiptSummary])
+def list_goods_receipts(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    po_id: Optional[int] = Query(None, description="Filter by purchase order"),
+    supplier_id: Optional[int] = Query(None, description="Filter by supplier"),
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    db: Session = Depends(get_db)
+):
+    return crud.get_goods_receipts(
+        db, skip=skip, limit=limit, po_id=po_id, supplier_id=supplier_id, store_id=store_id
+    )
+
+@router.get("/receipts/{grn_id}", response_model=schemas.GoodsReceipt)
+def get_goods_receipt(grn_id: int, db: Session = Depends(get_db)):
+    grn = crud.get_goods_receipt(db, grn_id)
+    if not grn:
+        raise HTTPException(status_code=404, detail="Goods receipt not found")
+    return grn
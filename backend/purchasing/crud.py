@@ -0,0 +1,515 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from decimal import Decimal
+from . import schemas
+import random
+import string
+
+
+def generate_po_numbers(db: Session, count: int) -> List[str]:
+    """Generate `count` unique purchase order numbers for today"""
+    prefix = f"PO-{datetime.now().strftime('%Y%m%d')}"
+    existing = db.execute(
+        text("SELECT COUNT(*) FROM purchase_orders WHERE po_number LIKE :pattern"),
+        {"pattern": f"{prefix}-%"}
+    ).scalar() or 0
+    numbers = [f"{prefix}-{existing + i + 1:04d}" for i in range(count)]
+
+    # Ensure uniqueness
+    taken = {
+        row.po_number for row in db.execute(
+            text("SELECT po_number FROM purchase_orders WHERE po_number = ANY(:numbers)"),
+            {"numbers": numbers}
+        )
+    }
+    for i, number in enumerate(numbers):
+        if number in taken:
+            random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
+            numbers[i] = f"{number}-{random_suffix}"
+    return numbers
+
+
+def insert_purchase_orders(
+    db: Session,
+    orders: List[Dict[str, Any]],
+    user_id: int,
+    status: str = "DRAFT"
+) -> List[Dict[str, Any]]:
+    """
+    Insert purchase orders and their items with one statement per table.
+
+    Each order is a dict with supplier_id, store_id, optional
+    expected_delivery_date / notes, and items (product_id, variant_id,
+    ordered_quantity, unit_cost). Does not commit.
+    """
+    if not orders:
+        return []
+    po_numbers = generate_po_numbers(db, len(orders))
+    for order, po_number in zip(orders, po_numbers):
+        order["po_number"] = po_number
+        order["total_amount"] = sum(
+            (Decimal(str(item["unit_cost"])) * item["ordered_quantity"] for item in order["items"]),
+            Decimal("0.00")
+        )
+
+    created = db.execute(text("""
+        INSERT INTO purchase_orders
+            (po_number, supplier_id, store_id, expected_delivery_date, status, total_amount, user_id, notes)
+        SELECT t.po_number, t.supplier_id, t.store_id, t.expected_delivery_date, :status, t.total_amount, :user_id, t.notes
+        FROM unnest(
+            CAST(:po_numbers AS VARCHAR[]),
+            CAST(:supplier_ids AS INTEGER[]),
+            CAST(:store_ids AS INTEGER[]),
+            CAST(:expected_dates AS DATE[]),
+            CAST(:totals AS NUMERIC[]),
+            CAST(:notes AS TEXT[])
+        ) AS t(po_number, supplier_id, store_id, expected_delivery_date, total_amount, notes)
+        RETURNING po_id, po_number, supplier_id, store_id, status, total_amount
+    """), {
+        "status": status,
+        "user_id": user_id,
+        "po_numbers": [o["po_number"] for o in orders],
+        "supplier_ids": [o["supplier_id"] for o in orders],
+        "store_ids": [o["store_id"] for o in orders],
+        "expected_dates": [o.get("expected_delivery_date") for o in orders],
+        "totals": [o["total_amount"] for o in orders],
+        "notes": [o.get("notes") for o in orders],
+    }).mappings().all()
+    po_ids = {row["po_number"]: row["po_id"] for row in created}
+
+    items = [
+        (po_ids[order["po_number"]], item)
+        for order in orders
+        for item in order["items"]
+    ]
+    db.execute(text("""
+        INSERT INTO purchase_order_items
+            (po_id, product_id, variant_id, ordered_quantity, received_quantity, unit_cost, line_total)
+        SELECT t.po_id, t.product_id, t.variant_id, t.quantity, 0, t.unit_cost, ROUND(t.quantity * t.unit_cost, 2)
+        FROM unnest(
+            CAST(:po_ids AS INTEGER[]),
+            CAST(:product_ids AS INTEGER[]),
+            CAST(:variant_ids AS INTEGER[]),
+            CAST(:quantities AS INTEGER[]),
+            CAST(:unit_costs AS NUMERIC[])
+        ) AS t(po_id, product_id, variant_id, quantity, unit_cost)
+    """), {
+        "po_ids": [po_id for po_id, _ in items],
+        "product_ids": [item["product_id"] for _, item in items],
+        "variant_ids": [item.get("variant_id") for _, item in items],
+        "quantities": [item["ordered_quantity"] for _, item in items],
+        "unit_costs": [Decimal(str(item["unit_cost"])) for _, item in items],
+    })
+
+    item_counts = {}
+    for po_id, _ in items:
+        item_counts[po_id] = item_counts.get(po_id, 0) + 1
+    return [
+        {**dict(row), "items_count": item_counts.get(row["po_id"], 0)}
+        for row in created
+    ]
+
+
+# Purchase orders
+
+PO_STATUS_TRANSITIONS = {
+    "DRAFT": {"SENT", "CANCELLED"},
+    "SENT": {"CANCELLED"},
+    "RECEIVED_PARTIAL": {"CANCELLED"},
+    "RECEIVED_FULL": set(),
+    "CANCELLED": set(),
+}
+RECEIVABLE_PO_STATUSES = ("DRAFT", "SENT", "RECEIVED_PARTIAL")
+
+
+def _check_products(db: Session, items) -> None:
+    """Raise ValueError if any product/variant pair in items does not exist"""
+    missing = db.execute(text("""
+        SELECT t.product_id, t.variant_id
+        FROM unnest(CAST(:product_ids AS INTEGER[]), CAST(:variant_ids AS INTEGER[])) AS t(product_id, variant_id)
+        LEFT JOIN products p ON p.product_id = t.product_id
+        LEFT JOIN product_variants pv ON pv.variant_id = t.variant_id AND pv.product_id = t.product_id
+        WHERE p.product_id IS NULL OR (t.variant_id IS NOT NULL AND pv.variant_id IS NULL)
+    """), {
+        "product_ids": [item.product_id for item in items],
+        "variant_ids": [item.variant_id for item in items],
+    }).all()
+    if missing:
+        pairs = ", ".join(
+            f"{row.product_id}" + (f"/{row.variant_id}" if row.variant_id else "") for row in missing
+        )
+        raise ValueError(f"Unknown products or variants: {pairs}")
+
+
+def create_purchase_order(db: Session, po: schemas.PurchaseOrderCreate, user_id: int) -> Dict[str, Any]:
+    """Create a purchase order with its items"""
+    _check_products(db, po.items)
+    created = insert_purchase_orders(db, [{
+        "supplier_id": po.supplier_id,
+        "store_id": po.store_id,
+        "expected_delivery_date": po.expected_delivery_date,
+        "notes": po.notes,
+        "items": [item.dict() for item in po.items],
+    }], user_id=user_id, status=po.status)
+    db.commit()
+    return get_purchase_order(db, created[0]["po_id"])
+
+
+def get_purchase_orders(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    supplier_id: Optional[int] = None,
+    store_id: Optional[int] = None,
+    status: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """List purchase orders with supplier/store names and item progress"""
+    where_clauses = ["1=1"]
+    params: Dict[str, Any] = {"skip": skip, "limit": limit}
+    if supplier_id is not None:
+        where_clauses.append("po.supplier_id = :supplier_id")
+        params["supplier_id"] = supplier_id
+    if store_id is not None:
+        where_clauses.append("po.store_id = :store_id")
+        params["store_id"] = store_id
+    if status:
+        where_clauses.append("po.status = :status")
+        params["status"] = status
+
+    rows = db.execute(text(f"""
+        SELECT po.po_id, po.po_number, po.supplier_id, s.supplier_name, po.store_id, st.store_name,
+               po.order_date, po.expected_delivery_date, po.status, po.total_amount,
+               COALESCE(items.items_count, 0) AS items_count,
+               COALESCE(items.ordered_quantity, 0) AS ordered_quantity,
+               COALESCE(items.received_quantity, 0) AS received_quantity
+        FROM purchase_orders po
+        JOIN suppliers s ON s.supplier_id = po.supplier_id
+        JOIN stores st ON st.store_id = po.store_id
+        LEFT JOIN (
+            SELECT po_id, COUNT(*) AS items_count, SUM(ordered_quantity) AS ordered_quantity,
+                   SUM(COALESCE(received_quantity, 0)) AS received_quantity
+            FROM purchase_order_items
+            GROUP BY po_id
+        ) items ON items.po_id = po.po_id
+        WHERE {" AND ".join(where_clauses)}
+        ORDER BY po.order_date DESC, po.po_id DESC
+        OFFSET :skip LIMIT :limit
+    """), params).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def get_purchase_order(db: Session, po_id: int) -> Optional[Dict[str, Any]]:
+    """Get a purchase order with its items"""
+    header = db.execute(text("""
+        SELECT po.*, s.supplier_name, st.store_name
+        FROM purchase_orders po
+        JOIN suppliers s ON s.supplier_id = po.supplier_id
+        JOIN stores st ON st.store_id = po.store_id
+        WHERE po.po_id = :po_id
+    """), {"po_id": po_id}).mappings().first()
+    if header is None:
+        return None
+    items = db.execute(text("""
+        SELECT poi.*, p.product_code, p.product_name
+        FROM purchase_order_items poi
+        JOIN products p ON p.product_id = poi.product_id
+        WHERE poi.po_id = :po_id
+        ORDER BY poi.po_item_id
+    """), {"po_id": po_id}).mappings().all()
+    return {**dict(header), "items": [dict(item) for item in items]}
+
+
+def update_purchase_order_status(db: Session, po_id: int, status: str) -> Dict[str, Any]:
+    """Move a purchase order to SENT or CANCELLED"""
+    current = db.execute(
+        text("SELECT status FROM purchase_orders WHERE po_id = :po_id FOR UPDATE"),
+        {"po_id": po_id}
+    ).scalar()
+    if current is None:
+        raise LookupError("Purchase order not found")
+    if status not in PO_STATUS_TRANSITIONS.get(current, set()):
+        raise ValueError(f"Cannot change purchase order status from {current} to {status}")
+    db.execute(
+        text("UPDATE purchase_orders SET status = :status, updated_at = CURRENT_TIMESTAMP WHERE po_id = :po_id"),
+        {"po_id": po_id, "status": status}
+    )
+    db.commit()
+    return get_purchase_order(db, po_id)
+
+
+# Goods receipt notes
+
+def generate_grn_number(db: Session) -> str:
+    """Generate a unique goods receipt number for today"""
+    prefix = f"GRN-{datetime.now().strftime('%Y%m%d')}"
+    count = db.execute(
+        text("SELECT COUNT(*) FROM goods_receipt_notes WHERE grn_number LIKE :pattern"),
+        {"pattern": f"{prefix}-%"}
+    ).scalar() or 0
+    grn_number = f"{prefix}-{count + 1:04d}"
+
+    # Ensure uniqueness
+    while db.execute(
+        text("SELECT 1 FROM goods_receipt_notes WHERE grn_number = :grn_number"),
+        {"grn_number": grn_number}
+    ).first():
+        random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
+        grn_number = f"{prefix}-{count + 1:04d}-{random_suffix}"
+    return grn_number
+
+
+def receive_goods(db: Session, grn: schemas.GoodsReceiptCreate, user_id: int) -> Dict[str, Any]:
+    """
+    Record a goods receipt and post it to stock.
+
+    The whole receipt is one transaction with a fixed number of statements,
+    regardless of line count: GRN header and lines, purchase order progress,
+    inventory upserts and PURCHASE movements are all set-based.
+    """
+    _check_products(db, grn.items)
+    supplier_id, store_id = grn.supplier_id, grn.store_id
+    lines = [item.dict() for item in grn.items]
+
+    if grn.po_id is not None:
+        po = db.execute(
+            text("SELECT supplier_id, store_id, status FROM purchase_orders WHERE po_id = :po_id FOR UPDATE"),
+            {"po_id": grn.po_id}
+        ).mappings().first()
+        if po is None:
+            raise LookupError("Purchase order not found")
+        if po["status"] not in RECEIVABLE_PO_STATUSES:
+            raise ValueError(f"Cannot receive against a purchase order with status {po['status']}")
+        supplier_id, store_id = po["supplier_id"], po["store_id"]
+
+        # Match each line to its purchase order item and check the outstanding quantity
+        outstanding = db.execute(text("""
+            SELECT DISTINCT ON (product_id, variant_id)
+                   product_id, variant_id, unit_cost,
+                   SUM(GREATEST(ordered_quantity - COALESCE(received_quantity, 0), 0))
+                       OVER (PARTITION BY product_id, variant_id) AS outstanding
+            FROM purchase_order_items
+            WHERE po_id = :po_id
+            ORDER BY product_id, variant_id, po_item_id
+        """), {"po_id": grn.po_id}).mappings().all()
+        outstanding_by_key = {(row["product_id"], row["variant_id"]): row for row in outstanding}
+
+        received_by_key: Dict[tuple, int] = {}
+        for line in lines:
+            key = (line["product_id"], line["variant_id"])
+            if key not in outstanding_by_key:
+                raise ValueError(f"Product {line['product_id']} is not on purchase order {grn.po_id}")
+            received_by_key[key] = received_by_key.get(key, 0) + line["received_quantity"]
+            if line["unit_cost"] is None:
+                line["unit_cost"] = outstanding_by_key[key]["unit_cost"]
+        if not grn.allow_over_receipt:
+            over = [
+                f"{key[0]}: received {quantity}, outstanding {outstanding_by_key[key]['outstanding']}"
+                for key, quantity in received_by_key.items()
+                if quantity > outstanding_by_key[key]["outstanding"]
+            ]
+            if over:
+                raise ValueError("Received quantity exceeds outstanding quantity for products " + "; ".join(over))
+    elif supplier_id is None or store_id is None:
+        raise ValueError("supplier_id and store_id are required for a receipt without a purchase order")
+
+    missing_cost = [line["product_id"] for line in lines if line["unit_cost"] is None]
+    if missing_cost:
+        raise ValueError(f"unit_cost is required for products {missing_cost}")
+
+    total_received_amount = sum(
+        (Decimal(str(line["unit_cost"])) * line["received_quantity"] for line in lines),
+        Decimal("0.00")
+    )
+    grn_id = db.execute(text("""
+        INSERT INTO goods_receipt_notes
+            (grn_number, po_id, supplier_id, store_id, user_id, total_received_amount, notes)
+        VALUES (:grn_number, :po_id, :supplier_id, :store_id, :user_id, :total_received_amount, :notes)
+        RETURNING grn_id
+    """), {
+        "grn_number": generate_grn_number(db),
+        "po_id": grn.po_id,
+        "supplier_id": supplier_id,
+        "store_id": store_id,
+        "user_id": user_id,
+        "total_received_amount": total_received_amount,
+        "notes": grn.notes,
+    }).scalar()
+
+    params = {
+        "grn_id": grn_id,
+        "po_id": grn.po_id,
+        "store_id": store_id,
+        "user_id": user_id,
+        "notes": f"Goods receipt {grn_id}",
+        "product_ids": [line["product_id"] for line in lines],
+        "variant_ids": [line["variant_id"] for line in lines],
+        "quantities": [line["received_quantity"] for line in lines],
+        "unit_costs": [Decimal(str(line["unit_cost"])) for line in lines],
+        "batch_numbers": [line["batch_number"] for line in lines],
+        "expiry_dates": [line["expiry_date"] for line in lines],
+    }
+    lines_cte = """
+        lines AS (
+            SELECT * FROM unnest(
+                CAST(:product_ids AS INTEGER[]),
+                CAST(:variant_ids AS INTEGER[]),
+                CAST(:quantities AS INTEGER[]),
+                CAST(:unit_costs AS NUMERIC[]),
+                CAST(:batch_numbers AS VARCHAR[]),
+                CAST(:expiry_dates AS DATE[])
+            ) AS t(product_id, variant_id, quantity, unit_cost, batch_number, expiry_date)
+        ),
+        totals AS (
+            SELECT product_id, variant_id, SUM(quantity) AS quantity
+            FROM lines
+            GROUP BY product_id, variant_id
+        )
+    """
+
+    db.execute(text(f"""
+        WITH {lines_cte}
+        INSERT INTO grn_items (grn_id, product_id, variant_id, received_quantity, unit_cost, batch_number, expiry_date)
+        SELECT :grn_id, product_id, variant_id, quantity, unit_cost, batch_number, expiry_date
+        FROM lines
+    """), params)
+
+    if grn.po_id is not None:
+        # Fill the order's lines for each product/variant in po_item_id order,
+        # each up to its outstanding quantity; the last line takes any over-receipt
+        db.execute(text(f"""
+            WITH {lines_cte},
+            open_lines AS (
+                SELECT po_item_id, product_id, variant_id,
+                       GREATEST(ordered_quantity - COALESCE(received_quantity, 0), 0) AS open_quantity
+                FROM purchase_order_items
+                WHERE po_id = :po_id
+            ),
+            allocation AS (
+                SELECT o.po_item_id, o.open_quantity,
+                       totals.quantity - COALESCE(SUM(o.open_quantity) OVER (
+                           PARTITION BY o.product_id, o.variant_id ORDER BY o.po_item_id
+                           ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                       ), 0) AS remaining,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY o.product_id, o.variant_id ORDER BY o.po_item_id DESC
+                       ) = 1 AS is_last
+                FROM open_lines o
+                JOIN totals ON totals.product_id = o.product_id
+                     AND totals.variant_id IS NOT DISTINCT FROM o.variant_id
+            )
+            UPDATE purchase_order_items poi
+            SET received_quantity = COALESCE(poi.received_quantity, 0) + CASE
+                    WHEN a.is_last THEN GREATEST(a.remaining, 0)
+                    ELSE LEAST(a.open_quantity, GREATEST(a.remaining, 0))
+                END
+            FROM allocation a
+            WHERE poi.po_item_id = a.po_item_id
+              AND a.remaining > 0
+        """), params)
+        db.execute(text("""
+            UPDATE purchase_orders
+            SET status = CASE
+                    WHEN NOT EXISTS (
+                        SELECT 1 FROM purchase_order_items
+                        WHERE po_id = :po_id AND COALESCE(received_quantity, 0) < ordered_quantity
+                    ) THEN 'RECEIVED_FULL'
+                    ELSE 'RECEIVED_PARTIAL'
+                END,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE po_id = :po_id
+        """), params)
+
+    # Post to stock: bump existing inventory rows, create the missing ones, log PURCHASE movements
+    db.execute(text(f"""
+        WITH {lines_cte}
+        UPDATE inventory i
+        SET current_stock = i.current_stock + totals.quantity,
+            last_reorder_date = CURRENT_TIMESTAMP,
+            updated_at = CURRENT_TIMESTAMP
+        FROM totals
+        WHERE i.store_id = :store_id
+          AND i.product_id = totals.product_id
+          AND i.variant_id IS NOT DISTINCT FROM totals.variant_id
+    """), params)
+    db.execute(text(f"""
+        WITH {lines_cte}
+        INSERT INTO inventory (product_id, variant_id, store_id, current_stock, last_reorder_date)
+        SELECT totals.product_id, totals.variant_id, :store_id, totals.quantity, CURRENT_TIMESTAMP
+        FROM totals
+        WHERE NOT EXISTS (
+            SELECT 1 FROM inventory i
+            WHERE i.store_id = :store_id
+              AND i.product_id = totals.product_id
+              AND i.variant_id IS NOT DISTINCT FROM totals.variant_id
+        )
+    """), params)
+    db.execute(text(f"""
+        WITH {lines_cte}
+        INSERT INTO inventory_movements
+            (product_id, variant_id, store_id, movement_type, quantity, reference_id, user_id, notes)
+        SELECT product_id, variant_id, :store_id, 'PURCHASE', quantity, :grn_id, :user_id, :notes
+        FROM lines
+    """), params)
+
+    db.commit()
+    return get_goods_receipt(db, grn_id)
+
+
+def get_goods_receipts(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    po_id: Optional[int] = None,
+    supplier_id: Optional[int] = None,
+    store_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """List goods receipts with supplier/store names"""
+    where_clauses = ["1=1"]
+    params: Dict[str, Any] = {"skip": skip, "limit": limit}
+    if po_id is not None:
+        where_clauses.append("g.po_id = :po_id")
+        params["po_id"] = po_id
+    if supplier_id is not None:
+        where_clauses.append("g.supplier_id = :supplier_id")
+        params["supplier_id"] = supplier_id
+    if store_id is not None:
+        where_clauses.append("g.store_id = :store_id")
+        params["store_id"] = store_id
+
+    rows = db.execute(text(f"""
+        SELECT g.grn_id, g.grn_number, g.po_id, po.po_number, g.supplier_id, s.supplier_name,
+               g.store_id, st.store_name, g.receipt_date, g.total_received_amount,
+               (SELECT COUNT(*) FROM grn_items gi WHERE gi.grn_id = g.grn_id) AS items_count
+        FROM goods_receipt_notes g
+        LEFT JOIN purchase_orders po ON po.po_id = g.po_id
+        JOIN suppliers s ON s.supplier_id = g.supplier_id
+        JOIN stores st ON st.store_id = g.store_id
+        WHERE {" AND ".join(where_clauses)}
+        ORDER BY g.receipt_date DESC, g.grn_id DESC
+        OFFSET :skip LIMIT :limit
+    """), params).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def get_goods_receipt(db: Session, grn_id: int) -> Optional[Dict[str, Any]]:
+    """Get a goods receipt with its items"""
+    header = db.execute(text("""
+        SELECT g.*, po.po_number, s.supplier_name, st.store_name
+        FROM goods_receipt_notes g
+        LEFT JOIN purchase_orders po ON po.po_id = g.po_id
+        JOIN suppliers s ON s.supplier_id = g.supplier_id
+        JOIN stores st ON st.store_id = g.store_id
+        WHERE g.grn_id = :grn_id
+    """), {"grn_id": grn_id}).mappings().first()
+    if header is None:
+        return None
+    items = db.execute(text("""
+        SELECT gi.*, p.product_code, p.product_name
+        FROM grn_items gi
+        JOIN products p ON p.product_id = gi.product_id
+        WHERE gi.grn_id = :grn_id
+        ORDER BY gi.grn_item_id
+    """), {"grn_id": grn_id}).mappings().all()
+    return {**dict(header), "items": [dict(item) for item in items]}
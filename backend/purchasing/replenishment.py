@@ -0,0 +1,159 @@
+"""
+Reorder suggestions from sales velocity.
+
+Daily demand is the moving average of SALE movements over a trailing window,
+computed for every inventory row (SKU x store) in one set-based query. Stock
+counts only what is not reserved for advance orders. Rows whose projected
+cover (available stock plus open purchase orders) falls below the lead
+time plus safety days, or below the product reorder level, get a suggested
+quantity that brings them up to the target cover, capped at max_stock_level.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import crud
+
+DEFAULT_WINDOW_DAYS = 28
+DEFAULT_LEAD_TIME_DAYS = 7
+DEFAULT_SAFETY_DAYS = 3
+DEFAULT_TARGET_DAYS = 21
+
+_SUGGESTIONS_QUERY = """
+    WITH demand AS (
+        SELECT product_id, variant_id, store_id, -SUM(quantity) AS units
+        FROM inventory_movements
+        WHERE movement_type = 'SALE' AND movement_date >= :since
+          AND (CAST(:store_id AS INTEGER) IS NULL OR store_id = :store_id)
+        GROUP BY product_id, variant_id, store_id
+    ),
+    on_order AS (
+        SELECT poi.product_id, poi.variant_id, po.store_id,
+               SUM(poi.ordered_quantity - COALESCE(poi.received_quantity, 0)) AS units
+        FROM purchase_order_items poi
+        JOIN purchase_orders po ON po.po_id = poi.po_id
+        WHERE po.status IN ('DRAFT', 'SENT', 'RECEIVED_PARTIAL')
+          AND (CAST(:store_id AS INTEGER) IS NULL OR po.store_id = :store_id)
+        GROUP BY poi.product_id, poi.variant_id, po.store_id
+    ),
+    levels AS (
+        SELECT i.product_id, i.variant_id, i.store_id, i.current_stock, i.reserved_stock,
+               i.current_stock - i.reserved_stock AS available_stock,
+               p.product_code, p.product_name, p.supplier_id, s.supplier_name,
+               COALESCE(p.reorder_level, 0) AS reorder_level, p.max_stock_level,
+               COALESCE(pv.base_price, p.base_price) AS unit_cost,
+               GREATEST(COALESCE(d.units, 0), 0) / CAST(:window_days AS NUMERIC) AS daily_demand,
+               GREATEST(COALESCE(o.units, 0), 0) AS on_order
+        FROM inventory i
+        JOIN products p ON p.product_id = i.product_id AND p.is_active = TRUE
+        LEFT JOIN product_variants pv ON pv.variant_id = i.variant_id
+        LEFT JOIN suppliers s ON s.supplier_id = p.supplier_id
+        LEFT JOIN demand d ON d.product_id = i.product_id AND d.store_id = i.store_id
+             AND d.variant_id IS NOT DISTINCT FROM i.variant_id
+        LEFT JOIN on_order o ON o.product_id = i.product_id AND o.store_id = i.store_id
+             AND o.variant_id IS NOT DISTINCT FROM i.variant_id
+        WHERE (CAST(:store_id AS INTEGER) IS NULL OR i.store_id = :store_id)
+          AND (CAST(:supplier_id AS INTEGER) IS NULL OR p.supplier_id = :supplier_id)
+    ),
+    targets AS (
+        SELECT *,
+               CASE WHEN daily_demand > 0 THEN available_stock / daily_demand END AS days_of_cover,
+               CASE WHEN daily_demand > 0 THEN (available_stock + on_order) / daily_demand END AS projected_cover,
+               GREATEST(CEIL(daily_demand * :target_days), reorder_level + 1) AS uncapped_target
+        FROM levels
+    ),
+    suggestions AS (
+        SELECT *,
+               CASE WHEN max_stock_level > 0 THEN LEAST(uncapped_target, max_stock_level)
+                    ELSE uncapped_target END - available_stock - on_order AS suggested_quantity
+        FROM targets
+        WHERE available_stock + on_order <= reorder_level
+           OR projected_cover < :lead_time_days + :safety_days
+    )
+    SELECT product_id, variant_id, store_id, product_code, product_name, supplier_id, supplier_name,
+           current_stock, reserved_stock, on_order, reorder_level, max_stock_level, unit_cost,
+           ROUND(daily_demand, 3) AS daily_demand, ROUND(days_of_cover, 1) AS days_of_cover,
+           CAST(suggested_quantity AS INTEGER) AS suggested_quantity
+    FROM suggestions
+    WHERE suggested_quantity > 0
+    ORDER BY days_of_cover NULLS LAST, store_id, product_id, variant_id
+"""
+
+
+def get_reorder_suggestions(
+    db: Session,
+    store_id: Optional[int] = None,
+    supplier_id: Optional[int] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+    safety_days: int = DEFAULT_SAFETY_DAYS,
+    target_days: int = DEFAULT_TARGET_DAYS
+) -> List[Dict[str, Any]]:
+    """Compute reorder suggestions for every SKU/store in one query"""
+    rows = db.execute(text(_SUGGESTIONS_QUERY), {
+        "since": datetime.now() - timedelta(days=window_days),
+        "store_id": store_id,
+        "supplier_id": supplier_id,
+        "window_days": window_days,
+        "lead_time_days": lead_time_days,
+        "safety_days": safety_days,
+        "target_days": target_days,
+    }).mappings().all()
+    return [dict(row) for row in rows]
+
+
+def create_reorder_drafts(
+    db: Session,
+    user_id: int,
+    store_id: Optional[int] = None,
+    supplier_id: Optional[int] = None,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+    safety_days: int = DEFAULT_SAFETY_DAYS,
+    target_days: int = DEFAULT_TARGET_DAYS
+) -> Dict[str, Any]:
+    """
+    Turn the current suggestions into DRAFT purchase orders, one per
+    supplier and store. Suggestions for products without a supplier are
+    returned as skipped.
+    """
+    suggestions = get_reorder_suggestions(
+        db,
+        store_id=store_id,
+        supplier_id=supplier_id,
+        window_days=window_days,
+        lead_time_days=lead_time_days,
+        safety_days=safety_days,
+        target_days=target_days
+    )
+
+    orders: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+    skipped = []
+    expected_delivery_date = (datetime.now() + timedelta(days=lead_time_days)).date()
+    for suggestion in suggestions:
+        if suggestion["supplier_id"] is None:
+            skipped.append(suggestion)
+            continue
+        key = (suggestion["supplier_id"], suggestion["store_id"])
+        if key not in orders:
+            orders[key] = {
+                "supplier_id": suggestion["supplier_id"],
+                "store_id": suggestion["store_id"],
+                "expected_delivery_date": expected_delivery_date,
+                "notes": f"Generated from reorder suggestions ({window_days}-day demand)",
+                "items": [],
+            }
+        orders[key]["items"].append({
+            "product_id": suggestion["product_id"],
+            "variant_id": suggestion["variant_id"],
+            "ordered_quantity": suggestion["suggested_quantity"],
+            "unit_cost": suggestion["unit_cost"],
+        })
+
+    created = crud.insert_purchase_orders(db, list(orders.values()), user_id=user_id)
+    db.commit()
+    return {"purchase_orders": created, "skipped_without_supplier": skipped}
@@ -0,0 +1,155 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import date, datetime
+from decimal import Decimal
+
+class ReorderSuggestion(BaseModel):
+    product_id: int
+    variant_id: Optional[int] = None
+    store_id: int
+    product_code: str
+    product_name: str
+    supplier_id: Optional[int] = None
+    supplier_name: Optional[str] = None
+    current_stock: int
+    # Held for advance orders; suggestions cover current_stock - reserved_stock
+    reserved_stock: int = 0
+    on_order: int
+    reorder_level: int
+    max_stock_level: Optional[int] = None
+    unit_cost: Decimal
+    daily_demand: Decimal
+    days_of_cover: Optional[Decimal] = None
+    suggested_quantity: int
+
+class PurchaseOrderDraft(BaseModel):
+    po_id: int
+    po_number: str
+    supplier_id: int
+    store_id: int
+    status: str
+    total_amount: Decimal
+    items_count: int
+
+class ReorderDraftResult(BaseModel):
+    purchase_orders: List[PurchaseOrderDraft]
+    skipped_without_supplier: List[ReorderSuggestion]
+
+# Purchase orders
+class PurchaseOrderItemCreate(BaseModel):
+    product_id: int
+    variant_id: Optional[int] = None
+    ordered_quantity: int = Field(..., gt=0)
+    unit_cost: Decimal = Field(..., ge=0)
+
+class PurchaseOrderCreate(BaseModel):
+    supplier_id: int
+    store_id: int
+    expected_delivery_date: Optional[date] = None
+    status: str = Field("DRAFT", pattern="^(DRAFT|SENT)$")
+    notes: Optional[str] = None
+    items: List[PurchaseOrderItemCreate] = Field(..., min_length=1)
+
+class PurchaseOrderStatusUpdate(BaseModel):
+    status: str = Field(..., pattern="^(SENT|CANCELLED)$")
+
+class PurchaseOrderItem(BaseModel):
+    po_item_id: int
+    product_id: int
+    product_code: str
+    product_name: str
+    variant_id: Optional[int] = None
+    ordered_quantity: int
+    received_quantity: Optional[int] = 0
+    unit_cost: Decimal
+    line_total: Decimal
+
+class PurchaseOrderSummary(BaseModel):
+    po_id: int
+    po_number: str
+    supplier_id: int
+    supplier_name: str
+    store_id: int
+    store_name: str
+    order_date: Optional[datetime] = None
+    expected_delivery_date: Optional[date] = None
+    status: str
+    total_amount: Decimal
+    items_count: int
+    ordered_quantity: int
+    received_quantity: int
+
+class PurchaseOrder(BaseModel):
+    po_id: int
+    po_number: str
+    supplier_id: int
+    supplier_name: str
+    store_id: int
+    store_name: str
+    order_date: Optional[datetime] = None
+    expected_delivery_date: Optional[date] = None
+    status: str
+    total_amount: Decimal
+    user_id: int
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    items: List[PurchaseOrderItem]
+
+# Goods receipts
+class GoodsReceiptItemCreate(BaseModel):
+    product_id: int
+    variant_id: Optional[int] = None
+    received_quantity: int = Field(..., gt=0)
+    # Defaults to the purchase order cost when receiving against an order
+    unit_cost: Optional[Decimal] = Field(None, ge=0)
+    batch_number: Optional[str] = Field(None, max_length=100)
+    expiry_date: Optional[date] = None
+
+class GoodsReceiptCreate(BaseModel):
+    po_id: Optional[int] = None
+    # Required only for receipts without a purchase order
+    supplier_id: Optional[int] = None
+    store_id: Optional[int] = None
+    allow_over_receipt: bool = False
+    notes: Optional[str] = None
+    items: List[GoodsReceiptItemCreate] = Field(..., min_length=1)
+
+class GoodsReceiptItem(BaseModel):
+    grn_item_id: int
+    product_id: int
+    product_code: str
+    product_name: str
+    variant_id: Optional[int] = None
+    received_quantity: int
+    unit_cost: Decimal
+    batch_number: Optional[str] = None
+    expiry_date: Optional[date] = None
+
+class GoodsReceiptSummary(BaseModel):
+    grn_id: int
+    grn_number: str
+    po_id: Optional[int] = None
+    po_number: Optional[str] = None
+    supplier_id: int
+    supplier_name: str
+    store_id: int
+    store_name: str
+    receipt_date: Optional[datetime] = None
+    total_received_amount: Decimal
+    items_count: int
+
+class GoodsReceipt(BaseModel):
+    grn_id: int
+    grn_number: str
+    po_id: Optional[int] = None
+    po_number: Optional[str] = None
+    supplier_id: int
+    supplier_name: str
+    store_id: int
+    store_name: str
+    receipt_date: Optional[datetime] = None
+    user_id: int
+    total_received_amount: Decimal
+    notes: Optional[str] = None
+    items: List[GoodsReceiptItem]
@@ -1,12 +1,73 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, func, desc, text
 from typing import List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from decimal import Decimal
 from . import models, schemas
 from backend.sales import models as sales_models
 from backend.product import models as product_models
 from backend.customer import models as customer_models
+from backend import audit
+
+# Refund, tax refunded and cost of the returned units per return, by the
+# store that made the sale and the month the goods came back. Voiding a sale
+# takes its returns back out along with the sale.
+_RETURN_TOTALS = """
+    SELECT st.store_id, CAST(date_trunc('month', r.return_date) AS DATE) AS month, r.refund_amount,
+           COALESCE(SUM(ri.quantity_returned * COALESCE(si.tax_per_item, 0)), 0) AS tax_refunded,
+           COALESCE(SUM(ri.quantity_returned * COALESCE(si.unit_cost, 0)), 0) AS cost_returned
+    FROM returns r
+    JOIN sales_transactions st ON st.sale_id = r.sale_id AND st.sale_date = r.sale_date
+    LEFT JOIN return_items ri ON ri.return_id = r.return_id
+    LEFT JOIN sale_items si ON si.sale_item_id = ri.sale_item_id AND si.sale_date = ri.sale_date
+    {where}
+    GROUP BY r.return_id, st.store_id, r.return_date, r.refund_amount
+"""
+
+
+def apply_returns_to_rollups(
+    db: Session,
+    return_id: Optional[int] = None,
+    sale_id: Optional[int] = None,
+    sign: int = 1
+) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) one return, or every return on a sale,
+    from returns_monthly_totals.
+
+    Runs inside the caller's transaction so the totals commit or roll back
+    with the return (or the void) itself.
+    """
+    returns = _RETURN_TOTALS.format(where="""
+        WHERE (CAST(:return_id AS INTEGER) IS NULL OR r.return_id = :return_id)
+          AND (CAST(:sale_id AS INTEGER) IS NULL OR r.sale_id = :sale_id)
+    """)
+    db.execute(text(f"""
+        INSERT INTO returns_monthly_totals (store_id, month, refund_amount, tax_refunded, cost_returned, return_count)
+        SELECT store_id, month, :sign * SUM(refund_amount), :sign * SUM(tax_refunded),
+               :sign * SUM(cost_returned), :sign * COUNT(*)
+        FROM ({returns}) t
+        GROUP BY 1, 2
+        ON CONFLICT (store_id, month) DO UPDATE
+        SET refund_amount = returns_monthly_totals.refund_amount + EXCLUDED.refund_amount,
+            tax_refunded = returns_monthly_totals.tax_refunded + EXCLUDED.tax_refunded,
+            cost_returned = returns_monthly_totals.cost_returned + EXCLUDED.cost_returned,
+            return_count = returns_monthly_totals.return_count + EXCLUDED.return_count
+    """), {"return_id": return_id, "sale_id": sale_id, "sign": sign})
+
+
+def rebuild_returns_rollups(db: Session) -> int:
+    """Recompute returns_monthly_totals from the returns table"""
+    db.execute(text("DELETE FROM returns_monthly_totals"))
+    count = db.execute(text(f"""
+        INSERT INTO returns_monthly_totals (store_id, month, refund_amount, tax_refunded, cost_returned, return_count)
+        SELECT store_id, month, SUM(refund_amount), SUM(tax_refunded), SUM(cost_returned), COUNT(*)
+        FROM ({_RETURN_TOTALS.format(where="WHERE st.payment_status != 'VOID'")}) t
+        GROUP BY 1, 2
+    """)).rowcount
+    db.commit()
+    return count
+
 
 def create_return(db: Session, return_data: schemas.ReturnCreate, user_id: int) -> models.Return:
     """Create a new return transaction"""
@@ -53,12 +114,14 @@ def create_return(db: Session, return_data: schemas.ReturnCreate, user_id: int)
         return_items_data.append({
             **item.dict(),
             "product_id": sale_item.product_id,
-            "variant_id": sale_item.variant_id
+            "variant_id": sale_item.variant_id,
+            "sale_date": sale_item.sale_date
         })
     
     # Create return transaction
     db_return = models.Return(
         sale_id=return_data.sale_id,
+        sale_date=sale.sale_date,
         returned_by_user_id=user_id,
         reason=return_data.reason,
         refund_amount=refund_amount,
@@ -77,10 +140,8 @@ def create_return(db: Session, return_data: schemas.ReturnCreate, user_id: int)
         )
         db.add(db_item)
         
-        # Update the original sale item's return quantity
-        sale_item = db.query(sales_models.SaleItem).filter(
-            sales_models.SaleItem.sale_item_id == item_data["sale_item_id"]
-        ).first()
+        # Update the original sale item's return quantity (already loaded with the sale)
+        sale_item = next((si for si in sale.sale_items if si.sale_item_id == item_data["sale_item_id"]), None)
         if sale_item:
             sale_item.return_quantity = (sale_item.return_quantity or 0) + item_data["quantity_returned"]
         
@@ -132,6 +193,13 @@ def create_return(db: Session, return_data: schemas.ReturnCreate, user_id: int)
                 )
                 db.add(loyalty_history)
     
+    db.flush()
+    apply_returns_to_rollups(db, return_id=db_return.return_id)
+    audit.record("SALE_RETURN", {
+        "return_id": db_return.return_id,
+        "sale_id": return_data.sale_id,
+        "refund_amount": refund_amount
+    }, user_id=user_id, db=db)
     db.commit()
     db.refresh(db_return)
     
@@ -161,7 +229,11 @@ def get_returns(
         query = query.filter(models.Return.return_date >= start_date)
     
     if end_date:
-        query = query.filter(models.Return.return_date <= end_date)
+        # A sale precedes its returns, so this also prunes later sales partitions
+        query = query.filter(
+            models.Return.return_date <= end_date,
+            sales_models.SalesTransaction.sale_date <= end_date
+        )
     
     if search:
         query = query.filter(
@@ -229,7 +301,11 @@ def get_returns_stats(
         query = query.filter(models.Return.return_date >= start_date)
     
     if end_date:
-        query = query.filter(models.Return.return_date <= end_date)
+        # A sale precedes its returns, so this also prunes later sales partitions
+        query = query.filter(
+            models.Return.return_date <= end_date,
+            sales_models.SalesTransaction.sale_date <= end_date
+        )
     
     result = query.first()
     
@@ -255,7 +331,10 @@ def get_returns_stats(
         product_query = product_query.filter(models.Return.return_date >= start_date)
     
     if end_date:
-        product_query = product_query.filter(models.Return.return_date <= end_date)
+        product_query = product_query.filter(
+            models.Return.return_date <= end_date,
+            sales_models.SalesTransaction.sale_date <= end_date
+        )
     
     most_returned = product_query.group_by(
         product_models.Product.product_id,
@@ -285,8 +364,6 @@ def get_returnable_sales(
     limit: int = 50
 ) -> List[sales_models.SalesTransaction]:
     """Get sales that have items available for return"""
-    print(f"[DEBUG] get_returnable_sales called with search='{search}', store_id={store_id}, limit={limit}")
-    
     query = db.query(sales_models.SalesTransaction).options(
         joinedload(sales_models.SalesTransaction.sale_items).joinedload(sales_models.SaleItem.product),
         joinedload(sales_models.SalesTransaction.customer)
@@ -300,7 +377,6 @@ def get_returnable_sales(
     if search:
         # Use a simpler search approach that works better with SQLAlchemy
         search_term = f"%{search}%"
-        print(f"[DEBUG] Applying search filter with term: {search_term}")
         query = query.filter(
             or_(
                 sales_models.SalesTransaction.invoice_number.ilike(search_term),
@@ -325,9 +401,16 @@ def get_returnable_sales(
             )
         )
     
-    # Order by most recent first
-    sales = query.order_by(desc(sales_models.SalesTransaction.sale_date)).limit(limit).all()
-    print(f"[DEBUG] Found {len(sales)} sales before filtering for returnable items")
+    # Order by most recent first. Sales are partitioned by month, so look in the
+    # current and previous month first and only search all history when those
+    # hold fewer than `limit` matches
+    recent_since = (datetime.now().replace(day=1) - timedelta(days=1)).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    ordered = query.order_by(desc(sales_models.SalesTransaction.sale_date))
+    sales = ordered.filter(sales_models.SalesTransaction.sale_date >= recent_since).limit(limit).all()
+    if len(sales) < limit:
+        sales = ordered.limit(limit).all()
     
     # Filter out sales with no returnable items
     returnable_sales = []
@@ -344,5 +427,4 @@ def get_returnable_sales(
                 sale.customer_name = f"{sale.customer.first_name} {sale.customer.last_name}"
             returnable_sales.append(sale)
     
-    print(f"[DEBUG] Returning {len(returnable_sales)} sales with returnable items")
     return returnable_sales 
\ No newline at end of file
@@ -1,13 +1,20 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, DECIMAL, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, DECIMAL, ForeignKey, ForeignKeyConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.database import Base
 
 class Return(Base):
     __tablename__ = "returns"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["sale_id", "sale_date"],
+            ["sales_transactions.sale_id", "sales_transactions.sale_date"]
+        ),
+    )
 
     return_id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales_transactions.sale_id"), nullable=False)
+    sale_id = Column(Integer, nullable=False)
+    sale_date = Column(DateTime(timezone=True), nullable=False)  # the original sale's date
     return_date = Column(DateTime(timezone=True), server_default=func.now())
     returned_by_user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     reason = Column(Text)
@@ -22,10 +29,17 @@ class Return(Base):
 
 class ReturnItem(Base):
     __tablename__ = "return_items"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["sale_item_id", "sale_date"],
+            ["sale_items.sale_item_id", "sale_items.sale_date"]
+        ),
+    )
 
     return_item_id = Column(Integer, primary_key=True, index=True)
     return_id = Column(Integer, ForeignKey("returns.return_id", ondelete="CASCADE"), nullable=False)
-    sale_item_id = Column(Integer, ForeignKey("sale_items.sale_item_id"), nullable=False)
+    sale_item_id = Column(Integer, nullable=False)
+    sale_date = Column(DateTime(timezone=True), nullable=False)  # the original sale's date
     product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False)
     variant_id = Column(Integer, ForeignKey("product_variants.variant_id"))
     quantity_returned = Column(Integer, nullable=False)
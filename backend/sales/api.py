@@ -5,6 +5,7 @@ from typing import List, Optional
 from datetime import datetime, date
 from . import schemas, crud, models
 from backend.database import get_db
+from backend import fastjson
 
 router = APIRouter(prefix="/sales", tags=["sales"])
 
@@ -30,6 +31,15 @@ def create_sale(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/offline-batch", response_model=schemas.OfflineSaleBatchResult)
+def ingest_offline_sales(batch: schemas.OfflineSaleBatch, db: Session = Depends(get_db)):
+    """
+    Upload sales a till queued while offline. Idempotent per client_sale_id:
+    resending a batch reports DUPLICATE for sales already recorded. Sales
+    reported REJECTED were not recorded and can be fixed and resent.
+    """
+    return crud.ingest_offline_sales(db, batch.sales)
+
 @router.get("/", response_model=List[schemas.SalesTransactionSummary])
 def list_sales(
     skip: int = 0,
@@ -63,12 +73,7 @@ def list_sales(
         if sale.customer:
             customer_name = f"{sale.customer.first_name} {sale.customer.last_name}"
         
-        # Get cashier name
-        from backend.inventory import models as inventory_models
-        user = db.query(inventory_models.User).filter(
-            inventory_models.User.user_id == sale.user_id
-        ).first()
-        cashier_name = f"{user.first_name} {user.last_name}" if user else None
+        cashier_name = f"{sale.cashier.first_name} {sale.cashier.last_name}" if sale.cashier else None
         
         summaries.append(schemas.SalesTransactionSummary(
             sale_id=sale.sale_id,
@@ -81,6 +86,8 @@ def list_sales(
             cashier_name=cashier_name
         ))
     
+    if fastjson.ENABLED:
+        return fastjson.model_response(List[schemas.SalesTransactionSummary], summaries)
     return summaries
 
 @router.get("/{sale_id}", response_model=schemas.SalesTransaction)
@@ -120,6 +127,52 @@ def get_daily_sales_report(
 ):
     return crud.get_daily_sales_report(db, report_date=report_date, store_id=store_id)
 
+@router.get("/stats/report", response_model=schemas.SalesReportMatrix)
+def get_sales_report(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    store_ids: Optional[List[int]] = Query(None, description="Stores to include (default all)"),
+    db: Session = Depends(get_db)
+):
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    return crud.get_sales_report(db, start_date=start_date, end_date=end_date, store_ids=store_ids)
+
+@router.get("/stats/hourly-heatmap", response_model=schemas.HourlyHeatmap)
+def get_hourly_heatmap(
+    store_id: int = Query(..., description="Store ID"),
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    db: Session = Depends(get_db)
+):
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    return crud.get_hourly_heatmap(db, store_id=store_id, start_date=start_date, end_date=end_date)
+
+@router.get("/stats/top-movers", response_model=List[schemas.ProductVelocity])
+def get_top_movers(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    limit: int = Query(20, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    return crud.get_product_velocity(db, start_date, end_date, store_id=store_id, limit=limit)
+
+@router.get("/stats/slow-movers", response_model=List[schemas.ProductVelocity])
+def get_slow_movers(
+    start_date: date = Query(..., description="Start date"),
+    end_date: date = Query(..., description="End date (inclusive)"),
+    store_id: Optional[int] = Query(None, description="Filter by store"),
+    limit: int = Query(20, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    return crud.get_product_velocity(db, start_date, end_date, store_id=store_id, slowest=True, limit=limit)
+
 # Product search endpoint for POS
 @router.get("/products/search")
 def search_products_for_sale(
@@ -135,12 +188,18 @@ def search_products_for_sale(
     # Use left join to include products even if they don't have inventory
     query = db.query(
         product_models.Product,
-        inventory_models.Inventory.current_stock
+        inventory_models.Inventory.current_stock,
+        inventory_models.Inventory.reserved_stock,
+        product_models.TaxCategory.tax_rate,
+        product_models.TaxCategory.is_active
     ).outerjoin(
         inventory_models.Inventory,
         (inventory_models.Inventory.product_id == product_models.Product.product_id) &
         (inventory_models.Inventory.store_id == store_id) &
         (inventory_models.Inventory.variant_id.is_(None))
+    ).outerjoin(
+        product_models.TaxCategory,
+        product_models.TaxCategory.tax_category_id == product_models.Product.tax_category_id
     ).filter(
         product_models.Product.is_active == True,
         or_(
@@ -151,15 +210,8 @@ def search_products_for_sale(
     ).limit(limit)
     
     results = []
-    for product, stock in query:
-        # Get tax rate
-        tax_rate = 0
-        if product.tax_category_id:
-            tax_category = db.query(product_models.TaxCategory).filter(
-                product_models.TaxCategory.tax_category_id == product.tax_category_id
-            ).first()
-            if tax_category and tax_category.is_active:
-                tax_rate = float(tax_category.tax_rate) if tax_category.tax_rate else 0
+    for product, stock, reserved, category_tax_rate, category_is_active in query:
+        tax_rate = float(category_tax_rate) if category_is_active and category_tax_rate else 0
         
         results.append({
             "product_id": product.product_id,
@@ -169,6 +221,7 @@ def search_products_for_sale(
             "retail_price": float(product.retail_price),
             "tax_rate": tax_rate,
             "current_stock": stock,
+            "available_stock": stock - (reserved or 0) if stock is not None else None,
             "unit_of_measure": product.unit_of_measure
         })
     
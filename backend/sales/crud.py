@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, func, desc, cast, Date
+from sqlalchemy import and_, or_, func, desc, text
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional, Dict
 from datetime import datetime, date, timedelta
 from decimal import Decimal
@@ -7,31 +8,42 @@ from . import models, schemas
 from backend.product import models as product_models
 from backend.customer import models as customer_models
 from backend.inventory import crud as inventory_crud
-import random
-import string
+from backend import audit
+import hashlib
 
-def generate_invoice_number(db: Session) -> str:
-    """Generate a unique invoice number"""
+def generate_invoice_number(db: Session, sale_date: Optional[datetime] = None) -> str:
+    """
+    Generate an invoice number for a sale on sale_date (default now) and claim
+    it in invoice_numbers within the caller's transaction.
+
+    Two tills counting the same day's sales at once pick the same number; the
+    second claim waits for the first transaction and, once it commits, finds
+    the number taken and moves on to the next one. The claim rolls back with
+    the sale, so an abandoned checkout frees its number.
+    """
     prefix = "INV"
-    date_str = datetime.now().strftime("%Y%m%d")
+    sale_date = sale_date or datetime.now()
+    date_str = sale_date.strftime("%Y%m%d")
     
-    # Get the count of invoices for today
-    today = date.today()
+    # Get the count of invoices for the sale's day; a range on sale_date (not a
+    # cast) lets the planner prune to that month's partition
+    today = datetime.combine(sale_date.date(), datetime.min.time())
     count = db.query(func.count(models.SalesTransaction.sale_id)).filter(
-        cast(models.SalesTransaction.sale_date, Date) == today
+        models.SalesTransaction.sale_date >= today,
+        models.SalesTransaction.sale_date < today + timedelta(days=1)
     ).scalar() or 0
     
-    # Generate invoice number
-    invoice_number = f"{prefix}-{date_str}-{count + 1:04d}"
-    
-    # Ensure uniqueness
-    while db.query(models.SalesTransaction).filter(
-        models.SalesTransaction.invoice_number == invoice_number
-    ).first():
-        random_suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-        invoice_number = f"{prefix}-{date_str}-{count + 1:04d}-{random_suffix}"
-    
-    return invoice_number
+    sequence = count + 1
+    while True:
+        invoice_number = f"{prefix}-{date_str}-{sequence:04d}"
+        claimed = db.execute(text("""
+            INSERT INTO invoice_numbers (invoice_number) VALUES (:invoice_number)
+            ON CONFLICT (invoice_number) DO NOTHING
+            RETURNING invoice_number
+        """), {"invoice_number": invoice_number}).first()
+        if claimed is not None:
+            return invoice_number
+        sequence += 1
 
 def get_payment_methods(db: Session, is_active: Optional[bool] = None) -> List[models.PaymentMethod]:
     """Get all payment methods"""
@@ -46,34 +58,55 @@ def get_payment_method(db: Session, payment_method_id: int) -> Optional[models.P
         models.PaymentMethod.payment_method_id == payment_method_id
     ).first()
 
-def create_sale(db: Session, sale: schemas.SalesTransactionCreate, user_id: int) -> models.SalesTransaction:
-    """Create a new sales transaction"""
+def _insert_sale(
+    db: Session,
+    sale: schemas.SalesTransactionCreate,
+    user_id: int,
+    sale_date: Optional[datetime] = None,
+    shortfalls: Optional[List[str]] = None
+) -> models.SalesTransaction:
+    """
+    Add a sale with its items, payments, inventory movements, sales buckets
+    and loyalty points to the caller's transaction, without committing.
+    Raises ValueError for unknown products or insufficient stock; when a
+    shortfalls list is given, short lines are recorded anyway and described
+    in it (see decrement_inventory_for_sale).
+    """
+    sale_date = sale_date or datetime.now()
     # Generate invoice number
-    invoice_number = generate_invoice_number(db)
+    invoice_number = generate_invoice_number(db, sale_date)
     
     # Calculate totals
     sub_total = Decimal("0.00")
     tax_amount = Decimal("0.00")
     
+    # Tax rates (active tax categories only) and costs for every product in the basket in one query
+    product_ids = {item.product_id for item in sale.sale_items}
+    tax_rates = {}
+    product_costs = {}
+    for product_id, base_price, tax_rate, is_active in db.query(
+        product_models.Product.product_id,
+        product_models.Product.base_price,
+        product_models.TaxCategory.tax_rate,
+        product_models.TaxCategory.is_active
+    ).outerjoin(
+        product_models.TaxCategory,
+        product_models.TaxCategory.tax_category_id == product_models.Product.tax_category_id
+    ).filter(product_models.Product.product_id.in_(product_ids)):
+        tax_rates[product_id] = Decimal(str(tax_rate)) if tax_rate is not None and is_active is True else Decimal("0.00")
+        product_costs[product_id] = base_price
+    variant_ids = {item.variant_id for item in sale.sale_items if item.variant_id is not None}
+    variant_costs = dict(db.query(
+        product_models.ProductVariant.variant_id,
+        product_models.ProductVariant.base_price
+    ).filter(product_models.ProductVariant.variant_id.in_(variant_ids))) if variant_ids else {}
+    
     # Create sale items and calculate totals
     sale_items_data = []
     for item in sale.sale_items:
-        # Get product details
-        product = db.query(product_models.Product).filter(
-            product_models.Product.product_id == item.product_id
-        ).first()
-        
-        if not product:
+        if item.product_id not in tax_rates:
             raise ValueError(f"Product with ID {item.product_id} not found")
-        
-        # Get tax rate
-        tax_rate = Decimal("0.00")
-        if product.tax_category_id is not None:
-            tax_category = db.query(product_models.TaxCategory).filter(
-                product_models.TaxCategory.tax_category_id == product.tax_category_id
-            ).first()
-            if tax_category and tax_category.is_active is True:
-                tax_rate = Decimal(str(tax_category.tax_rate))
+        tax_rate = tax_rates[item.product_id]
         
         # Calculate item totals
         item_subtotal = item.quantity * item.unit_price
@@ -85,10 +118,16 @@ def create_sale(db: Session, sale: schemas.SalesTransactionCreate, user_id: int)
         sub_total += item_subtotal
         tax_amount += item_tax
         
+        # Cost is frozen on the line so voids and bucket rebuilds never re-price history
+        unit_cost = variant_costs.get(item.variant_id)
+        if unit_cost is None:
+            unit_cost = product_costs[item.product_id]
+        
         sale_items_data.append({
             **item.dict(),
             "tax_per_item": item_tax / item.quantity if item.quantity > 0 else Decimal("0.00"),
-            "line_total": line_total
+            "line_total": line_total,
+            "unit_cost": unit_cost if unit_cost is not None else Decimal("0.00")
         })
     
     # Apply overall discount
@@ -121,7 +160,9 @@ def create_sale(db: Session, sale: schemas.SalesTransactionCreate, user_id: int)
         amount_paid=total_paid,
         change_given=change_given,
         payment_status=payment_status,
-        notes=sale.notes
+        notes=sale.notes,
+        # Set here rather than by the server default so child rows can carry it
+        sale_date=sale_date
     )
     
     db.add(db_sale)
@@ -131,29 +172,29 @@ def create_sale(db: Session, sale: schemas.SalesTransactionCreate, user_id: int)
     for item_data in sale_items_data:
         db_item = models.SaleItem(
             sale_id=db_sale.sale_id,
+            sale_date=db_sale.sale_date,
             **item_data
         )
         db.add(db_item)
-        
-        # Update inventory
-        from backend.inventory import crud as inventory_crud
-        inventory_crud.update_inventory_for_sale(
-            product_id=item_data["product_id"],
-            variant_id=item_data.get("variant_id"),
-            store_id=sale.store_id,
-            quantity=item_data["quantity"],
-            sale_id=int(db_sale.sale_id),
-            user_id=user_id
-        )
+    
+    # Update inventory for the whole basket in the sale's transaction
+    decrement_inventory_for_sale(
+        db, sale.store_id, int(db_sale.sale_id), db_sale.sale_date, user_id, sale_items_data, shortfalls
+    )
     
     # Create payments
     for payment in sale.payments:
         db_payment = models.Payment(
             sale_id=db_sale.sale_id,
+            sale_date=db_sale.sale_date,
             **payment.dict()
         )
         db.add(db_payment)
     
+    if payment_status != schemas.PaymentStatus.VOID:
+        db.flush()
+        apply_sale_to_buckets(db, int(db_sale.sale_id), db_sale.sale_date)
+    
     # Update customer loyalty points if applicable
     if sale.customer_id:
         # Award 1 point per 100 currency units spent
@@ -164,7 +205,7 @@ def create_sale(db: Session, sale: schemas.SalesTransactionCreate, user_id: int)
             ).first()
             if customer:
                 setattr(customer, 'total_loyalty_points', customer.total_loyalty_points + points_earned)
-                setattr(customer, 'last_purchase_date', datetime.now())
+                setattr(customer, 'last_purchase_date', sale_date)
                 
                 # Create loyalty history record
                 loyalty_history = customer_models.LoyaltyPointsHistory(
@@ -175,10 +216,206 @@ def create_sale(db: Session, sale: schemas.SalesTransactionCreate, user_id: int)
                 )
                 db.add(loyalty_history)
     
+    db.flush()
+    return db_sale
+
+def create_sale(db: Session, sale: schemas.SalesTransactionCreate, user_id: int) -> models.SalesTransaction:
+    """Create a new sales transaction"""
+    db_sale = _insert_sale(db, sale, user_id)
+    audit.record("SALE_CREATE", {
+        "sale_id": db_sale.sale_id,
+        "invoice_number": db_sale.invoice_number,
+        "store_id": sale.store_id,
+        "grand_total": db_sale.grand_total
+    }, user_id=user_id, db=db)
     db.commit()
     db.refresh(db_sale)
     
-    return get_sale(db, int(db_sale.sale_id))
+    return get_sale(db, int(db_sale.sale_id), db_sale.sale_date)
+
+def _offline_sale_result(client_sale_id, status, sale=None, detail=None) -> Dict:
+    return {
+        "client_sale_id": client_sale_id,
+        "status": status,
+        "sale_id": sale.sale_id if sale is not None else None,
+        "invoice_number": sale.invoice_number if sale is not None else None,
+        "detail": detail,
+    }
+
+def ingest_offline_sales(db: Session, sales: List[schemas.OfflineSaleCreate]) -> Dict:
+    """
+    Record sales queued by a till while it was offline, in one transaction.
+
+    Each sale first claims its client_sale_id in offline_sales. If the claim
+    already exists the sale is a DUPLICATE (same payload, e.g. a retried
+    upload) or a CONFLICT (different payload) and nothing is written for it.
+    New sales go through the same checkout logic as POST /sales/, each in a
+    savepoint so one REJECTED sale (unknown product, product not stocked at
+    the store, invalid reference) doesn't undo the rest of the batch.
+
+    The goods already left the shop, so a sale is never rejected for stock:
+    short lines take stock negative, are named in the result's detail and
+    in the SALE_CREATE audit event, and are left for a stock take to fix.
+    """
+    results = []
+    now = datetime.now()
+    for sale in sales:
+        client_sale_id = str(sale.client_sale_id)
+        payload_hash = hashlib.sha256(sale.model_dump_json().encode()).hexdigest()
+        sale_date = sale.sale_date or now
+        if sale_date.tzinfo is not None:
+            sale_date = sale_date.astimezone().replace(tzinfo=None)
+        # A till clock running ahead can't date sales in the future
+        sale_date = min(sale_date, now)
+        try:
+            with db.begin_nested():
+                claimed = db.execute(text("""
+                    INSERT INTO offline_sales (client_sale_id, payload_hash, pos_terminal_id)
+                    VALUES (CAST(:client_sale_id AS UUID), :payload_hash, :pos_terminal_id)
+                    ON CONFLICT (client_sale_id) DO NOTHING
+                    RETURNING client_sale_id
+                """), {
+                    "client_sale_id": client_sale_id,
+                    "payload_hash": payload_hash,
+                    "pos_terminal_id": sale.pos_terminal_id
+                }).first()
+                if claimed is None:
+                    existing = db.execute(text("""
+                        SELECT o.payload_hash, s.sale_id, s.invoice_number
+                        FROM offline_sales o
+                        LEFT JOIN sales_transactions s ON s.sale_id = o.sale_id AND s.sale_date = o.sale_date
+                        WHERE o.client_sale_id = CAST(:client_sale_id AS UUID)
+                    """), {"client_sale_id": client_sale_id}).first()
+                    if existing.payload_hash == payload_hash:
+                        results.append(_offline_sale_result(
+                            sale.client_sale_id, schemas.OfflineSaleStatus.DUPLICATE, existing
+                        ))
+                    else:
+                        results.append(_offline_sale_result(
+                            sale.client_sale_id, schemas.OfflineSaleStatus.CONFLICT, existing,
+                            detail="client_sale_id was already used for a different sale"
+                        ))
+                    continue
+
+                shortfalls = []
+                db_sale = _insert_sale(db, sale, sale.user_id, sale_date, shortfalls=shortfalls)
+                db.execute(text("""
+                    UPDATE offline_sales SET sale_id = :sale_id, sale_date = :sale_date
+                    WHERE client_sale_id = CAST(:client_sale_id AS UUID)
+                """), {
+                    "sale_id": db_sale.sale_id,
+                    "sale_date": db_sale.sale_date,
+                    "client_sale_id": client_sale_id
+                })
+                audit.record("SALE_CREATE", {
+                    "sale_id": db_sale.sale_id,
+                    "invoice_number": db_sale.invoice_number,
+                    "store_id": sale.store_id,
+                    "grand_total": db_sale.grand_total,
+                    "client_sale_id": client_sale_id,
+                    "stock_shortfalls": shortfalls
+                }, user_id=sale.user_id, db=db)
+        except (ValueError, IntegrityError) as e:
+            detail = str(e.orig) if isinstance(e, IntegrityError) else str(e)
+            results.append(_offline_sale_result(
+                sale.client_sale_id, schemas.OfflineSaleStatus.REJECTED, detail=detail
+            ))
+            continue
+        results.append(_offline_sale_result(
+            sale.client_sale_id, schemas.OfflineSaleStatus.CREATED, db_sale,
+            detail="Recorded with stock shortfall: " + "; ".join(shortfalls) if shortfalls else None
+        ))
+    db.commit()
+
+    counts = {status: 0 for status in schemas.OfflineSaleStatus}
+    for result in results:
+        counts[result["status"]] += 1
+    return {
+        "created": counts[schemas.OfflineSaleStatus.CREATED],
+        "duplicates": counts[schemas.OfflineSaleStatus.DUPLICATE],
+        "conflicts": counts[schemas.OfflineSaleStatus.CONFLICT],
+        "rejected": counts[schemas.OfflineSaleStatus.REJECTED],
+        "results": results,
+    }
+
+def decrement_inventory_for_sale(
+    db: Session,
+    store_id: int,
+    sale_id: int,
+    sale_date: datetime,
+    user_id: int,
+    items: List[Dict],
+    shortfalls: Optional[List[str]] = None
+) -> None:
+    """
+    Take sold quantities out of unreserved stock and record SALE movements,
+    dated at the sale, for every line in two statements. The check and
+    decrement happen in one UPDATE so concurrent sales and advance-order
+    reservations cannot oversell; raises ValueError (leaving the caller to
+    roll back) when any line is short or not stocked at the store.
+
+    Sales that already happened (uploaded from an offline till) pass a
+    shortfalls list: short lines are then decremented anyway, which may take
+    stock negative, and described in the list instead of raising.
+    """
+    params = {
+        "store_id": store_id,
+        "sale_id": sale_id,
+        "sale_date": sale_date,
+        "user_id": user_id,
+        "allow_shortfall": shortfalls is not None,
+        "notes": f"Sale transaction {sale_id}",
+        "product_ids": [item["product_id"] for item in items],
+        "variant_ids": [item.get("variant_id") for item in items],
+        "quantities": [item["quantity"] for item in items],
+    }
+    requested = db.execute(text("""
+        WITH lines AS (
+            SELECT t.product_id, t.variant_id, SUM(t.quantity) AS quantity
+            FROM unnest(CAST(:product_ids AS INTEGER[]), CAST(:variant_ids AS INTEGER[]), CAST(:quantities AS INTEGER[]))
+                 AS t(product_id, variant_id, quantity)
+            GROUP BY t.product_id, t.variant_id
+        ),
+        sold AS (
+            UPDATE inventory i
+            SET current_stock = i.current_stock - lines.quantity,
+                updated_at = CURRENT_TIMESTAMP
+            FROM lines
+            WHERE i.store_id = :store_id
+              AND i.product_id = lines.product_id
+              AND i.variant_id IS NOT DISTINCT FROM lines.variant_id
+              AND (:allow_shortfall OR i.current_stock - i.reserved_stock >= lines.quantity)
+            RETURNING i.product_id, i.variant_id
+        )
+        SELECT lines.product_id, lines.variant_id, lines.quantity, sold.product_id IS NOT NULL AS is_sold,
+               i.current_stock - i.reserved_stock AS available, i.reserved_stock
+        FROM lines
+        LEFT JOIN sold ON sold.product_id = lines.product_id
+             AND sold.variant_id IS NOT DISTINCT FROM lines.variant_id
+        LEFT JOIN inventory i ON i.store_id = :store_id
+             AND i.product_id = lines.product_id
+             AND i.variant_id IS NOT DISTINCT FROM lines.variant_id
+    """), params).all()
+    for row in requested:
+        if row.available is None:
+            raise ValueError(f"No inventory found for product {row.product_id} in store {store_id}")
+        if row.is_sold and row.available >= row.quantity:
+            continue
+        reserved_note = f" ({row.reserved_stock} reserved for advance orders)" if row.reserved_stock else ""
+        if not row.is_sold:
+            raise ValueError(f"Insufficient stock. Available: {row.available}{reserved_note}, Required: {row.quantity}")
+        variant_note = f" variant {row.variant_id}" if row.variant_id is not None else ""
+        shortfalls.append(
+            f"product {row.product_id}{variant_note}: sold {row.quantity}, available {row.available}{reserved_note}"
+        )
+
+    db.execute(text("""
+        INSERT INTO inventory_movements
+            (product_id, variant_id, store_id, movement_type, quantity, reference_id, movement_date, user_id, notes)
+        SELECT t.product_id, t.variant_id, :store_id, 'SALE', -t.quantity, :sale_id, :sale_date, :user_id, :notes
+        FROM unnest(CAST(:product_ids AS INTEGER[]), CAST(:variant_ids AS INTEGER[]), CAST(:quantities AS INTEGER[]))
+             AS t(product_id, variant_id, quantity)
+    """), params)
 
 def get_sales(
     db: Session,
@@ -195,6 +432,7 @@ def get_sales(
     """Get sales transactions with filters"""
     query = db.query(models.SalesTransaction).options(
         joinedload(models.SalesTransaction.customer),
+        joinedload(models.SalesTransaction.cashier),
         joinedload(models.SalesTransaction.sale_items).joinedload(models.SaleItem.product)
     )
     
@@ -223,33 +461,28 @@ def get_sales(
     
     return query.order_by(desc(models.SalesTransaction.sale_date)).offset(skip).limit(limit).all()
 
-def get_sale(db: Session, sale_id: int) -> Optional[models.SalesTransaction]:
-    """Get a specific sale with all details"""
-    sale = db.query(models.SalesTransaction).options(
+def get_sale(db: Session, sale_id: int, sale_date: Optional[datetime] = None) -> Optional[models.SalesTransaction]:
+    """Get a specific sale with all details; passing sale_date prunes to its partition"""
+    query = db.query(models.SalesTransaction).options(
         joinedload(models.SalesTransaction.sale_items).joinedload(models.SaleItem.product),
         joinedload(models.SalesTransaction.payments).joinedload(models.Payment.payment_method),
-        joinedload(models.SalesTransaction.customer)
-    ).filter(models.SalesTransaction.sale_id == sale_id).first()
+        joinedload(models.SalesTransaction.customer),
+        joinedload(models.SalesTransaction.cashier),
+        joinedload(models.SalesTransaction.store)
+    ).filter(models.SalesTransaction.sale_id == sale_id)
+    if sale_date is not None:
+        query = query.filter(models.SalesTransaction.sale_date == sale_date)
+    sale = query.first()
     
     if sale:
         # Add additional computed fields
         if sale.customer:
             sale.customer_name = f"{sale.customer.first_name} {sale.customer.last_name}"
         
-        # Get cashier name
-        from backend.inventory import models as inventory_models
-        user = db.query(inventory_models.User).filter(
-            inventory_models.User.user_id == sale.user_id
-        ).first()
-        if user:
-            sale.cashier_name = f"{user.first_name} {user.last_name}"
-        
-        # Get store name
-        store = db.query(inventory_models.Store).filter(
-            inventory_models.Store.store_id == sale.store_id
-        ).first()
-        if store:
-            sale.store_name = store.store_name
+        if sale.cashier:
+            sale.cashier_name = f"{sale.cashier.first_name} {sale.cashier.last_name}"
+        if sale.store:
+            sale.store_name = sale.store.store_name
         
         # Add product details to sale items
         for item in sale.sale_items:
@@ -284,6 +517,11 @@ def void_sale(db: Session, sale_id: int, user_id: int, reason: str) -> models.Sa
             user_id=user_id
         )
     
+    apply_sale_to_buckets(db, int(sale.sale_id), sale.sale_date, sign=-1)
+    # The buckets just lost the whole sale; refunds already taken off it must go too
+    from backend.returns import crud as returns_crud
+    returns_crud.apply_returns_to_rollups(db, sale_id=int(sale.sale_id), sign=-1)
+    
     # Reverse loyalty points if applicable
     if sale.customer_id:
         points_to_reverse = int(float(sale.grand_total) / 100)
@@ -304,6 +542,12 @@ def void_sale(db: Session, sale_id: int, user_id: int, reason: str) -> models.Sa
                 )
                 db.add(loyalty_history)
     
+    audit.record("SALE_VOID", {
+        "sale_id": sale.sale_id,
+        "invoice_number": sale.invoice_number,
+        "grand_total": sale.grand_total,
+        "reason": reason
+    }, user_id=user_id, db=db)
     db.commit()
     db.refresh(sale)
     
@@ -360,64 +604,284 @@ def get_daily_sales_report(
     store_id: Optional[int] = None
 ) -> schemas.DailySalesReport:
     """Get daily sales report"""
-    start_datetime = datetime.combine(report_date, datetime.min.time())
-    end_datetime = datetime.combine(report_date, datetime.max.time())
-    
-    # Base query
-    base_query = db.query(models.SalesTransaction).filter(
-        models.SalesTransaction.sale_date >= start_datetime,
-        models.SalesTransaction.sale_date <= end_datetime,
-        models.SalesTransaction.payment_status != schemas.PaymentStatus.VOID
-    )
-    
-    if store_id:
-        base_query = base_query.filter(models.SalesTransaction.store_id == store_id)
-    
-    # Get total sales
-    total_result = base_query.with_entities(
-        func.sum(models.SalesTransaction.grand_total).label("total"),
-        func.count(models.SalesTransaction.sale_id).label("count")
-    ).first()
-    
-    # Get sales by payment method
-    payment_totals = db.query(
-        models.PaymentMethod.method_name,
-        func.sum(models.Payment.amount).label("total")
-    ).join(
-        models.Payment,
-        models.Payment.payment_method_id == models.PaymentMethod.payment_method_id
-    ).join(
-        models.SalesTransaction,
-        models.SalesTransaction.sale_id == models.Payment.sale_id
-    ).filter(
-        models.SalesTransaction.sale_date >= start_datetime,
-        models.SalesTransaction.sale_date <= end_datetime,
-        models.SalesTransaction.payment_status != schemas.PaymentStatus.VOID
+    report = get_sales_report(
+        db,
+        start_date=report_date,
+        end_date=report_date,
+        store_ids=[store_id] if store_id else None
     )
-    
-    if store_id:
-        payment_totals = payment_totals.filter(models.SalesTransaction.store_id == store_id)
-    
-    payment_totals = payment_totals.group_by(models.PaymentMethod.method_name).all()
-    
-    # Organize payment totals
-    cash_sales = Decimal("0.00")
-    card_sales = Decimal("0.00")
-    other_sales = Decimal("0.00")
-    
-    for method_name, total in payment_totals:
-        if method_name.lower() == "cash":
-            cash_sales = total or Decimal("0.00")
-        elif method_name.lower() in ["credit card", "debit card"]:
-            card_sales += total or Decimal("0.00")
-        else:
-            other_sales += total or Decimal("0.00")
+    totals = report.grand_total
+    cash_sales = totals.payments["CASH"]
+    card_sales = totals.payments["CARD"]
     
     return schemas.DailySalesReport(
         date=report_date,
-        total_sales=total_result.total or Decimal("0.00"),
-        sales_count=total_result.count or 0,
+        total_sales=totals.total_sales,
+        sales_count=totals.sales_count,
         cash_sales=cash_sales,
         card_sales=card_sales,
-        other_sales=other_sales
-    ) 
\ No newline at end of file
+        other_sales=sum(totals.payments.values(), Decimal("0.00")) - cash_sales - card_sales
+    )
+
+PAYMENT_METHOD_TYPES = ("CASH", "CARD", "MOBILE", "BANK", "CHEQUE", "OTHER")
+
+def get_sales_report(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    store_ids: Optional[List[int]] = None
+) -> schemas.SalesReportMatrix:
+    """
+    Day x store sales matrix for a date range.
+
+    One grouped query returns every cell plus the per-day and overall totals
+    (GROUPING SETS); payments are summed per stored method_type with FILTER.
+    """
+    payment_columns = ",\n".join(
+        f"SUM(p.amount) FILTER (WHERE pm.method_type = '{method_type}') AS pay_{method_type.lower()}"
+        for method_type in PAYMENT_METHOD_TYPES
+    )
+    payment_sums = ",\n".join(
+        f"COALESCE(SUM(pay.pay_{method_type.lower()}), 0) AS pay_{method_type.lower()}"
+        for method_type in PAYMENT_METHOD_TYPES
+    )
+    rows = db.execute(text(f"""
+        SELECT
+            GROUPING(st.store_id) AS all_stores,
+            GROUPING(CAST(st.sale_date AS DATE)) AS all_days,
+            st.store_id,
+            CAST(st.sale_date AS DATE) AS day,
+            COUNT(*) AS sales_count,
+            COALESCE(SUM(st.grand_total), 0) AS total_sales,
+            COALESCE(SUM(st.tax_amount), 0) AS total_tax,
+            COALESCE(SUM(st.discount_amount), 0) AS total_discount,
+            {payment_sums}
+        FROM sales_transactions st
+        LEFT JOIN LATERAL (
+            SELECT {payment_columns}
+            FROM payments p
+            JOIN payment_methods pm ON pm.payment_method_id = p.payment_method_id
+            WHERE p.sale_id = st.sale_id AND p.sale_date = st.sale_date
+        ) pay ON TRUE
+        WHERE st.sale_date >= :start AND st.sale_date < :end
+          AND st.payment_status != 'VOID'
+          AND (CAST(:store_ids AS INTEGER[]) IS NULL OR st.store_id = ANY(CAST(:store_ids AS INTEGER[])))
+        GROUP BY GROUPING SETS (
+            (st.store_id, CAST(st.sale_date AS DATE)),
+            (CAST(st.sale_date AS DATE)),
+            ()
+        )
+        ORDER BY day, st.store_id
+    """), {
+        "start": datetime.combine(start_date, datetime.min.time()),
+        "end": datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+        "store_ids": store_ids or None
+    }).mappings().all()
+
+    def to_cell(row) -> schemas.SalesReportCell:
+        return schemas.SalesReportCell(
+            day=None if row["all_days"] else row["day"],
+            store_id=None if row["all_stores"] else row["store_id"],
+            sales_count=row["sales_count"],
+            total_sales=row["total_sales"],
+            total_tax=row["total_tax"],
+            total_discount=row["total_discount"],
+            payments={
+                method_type: row[f"pay_{method_type.lower()}"]
+                for method_type in PAYMENT_METHOD_TYPES
+            }
+        )
+
+    cells, daily_totals = [], []
+    grand_total = schemas.SalesReportCell(
+        sales_count=0,
+        total_sales=Decimal("0.00"),
+        total_tax=Decimal("0.00"),
+        total_discount=Decimal("0.00"),
+        payments={method_type: Decimal("0.00") for method_type in PAYMENT_METHOD_TYPES}
+    )
+    for row in rows:
+        if row["all_days"]:
+            grand_total = to_cell(row)
+        elif row["all_stores"]:
+            daily_totals.append(to_cell(row))
+        else:
+            cells.append(to_cell(row))
+
+    return schemas.SalesReportMatrix(
+        start_date=start_date,
+        end_date=end_date,
+        store_ids=sorted({cell.store_id for cell in cells}),
+        method_types=list(PAYMENT_METHOD_TYPES),
+        cells=cells,
+        daily_totals=daily_totals,
+        grand_total=grand_total
+    )
+
+# Pre-aggregated hourly buckets for the heatmap and velocity reports
+
+# Cost of goods for a sale line, at the unit cost stored when the sale was written
+_LINE_COST = "si.quantity * COALESCE(si.unit_cost, 0)"
+
+def apply_sale_to_buckets(db: Session, sale_id: int, sale_date: datetime, sign: int = 1) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) one sale from the hourly buckets.
+
+    Runs inside the caller's transaction so the buckets commit or roll back
+    with the sale itself.
+    """
+    params = {"sale_id": sale_id, "sale_date": sale_date, "sign": sign}
+    db.execute(text("""
+        INSERT INTO sales_hourly_totals (store_id, bucket_start, sales_count, revenue, tax_amount)
+        SELECT store_id, date_trunc('hour', sale_date), :sign, :sign * grand_total, :sign * COALESCE(tax_amount, 0)
+        FROM sales_transactions
+        WHERE sale_id = :sale_id AND sale_date = :sale_date
+        ON CONFLICT (store_id, bucket_start) DO UPDATE
+        SET sales_count = sales_hourly_totals.sales_count + EXCLUDED.sales_count,
+            revenue = sales_hourly_totals.revenue + EXCLUDED.revenue,
+            tax_amount = sales_hourly_totals.tax_amount + EXCLUDED.tax_amount
+    """), params)
+    db.execute(text(f"""
+        INSERT INTO product_sales_hourly (store_id, bucket_start, product_id, units, revenue, cost)
+        SELECT st.store_id, date_trunc('hour', st.sale_date), si.product_id,
+               :sign * SUM(si.quantity), :sign * SUM(si.line_total), :sign * SUM({_LINE_COST})
+        FROM sale_items si
+        JOIN sales_transactions st ON st.sale_id = si.sale_id AND st.sale_date = si.sale_date
+        WHERE si.sale_id = :sale_id AND si.sale_date = :sale_date
+        GROUP BY st.store_id, date_trunc('hour', st.sale_date), si.product_id
+        ON CONFLICT (store_id, bucket_start, product_id) DO UPDATE
+        SET units = product_sales_hourly.units + EXCLUDED.units,
+            revenue = product_sales_hourly.revenue + EXCLUDED.revenue,
+            cost = product_sales_hourly.cost + EXCLUDED.cost
+    """), params)
+
+def rebuild_sales_buckets(db: Session, since: Optional[date] = None) -> Dict[str, int]:
+    """Recompute the hourly buckets from sales history (all of it, or from `since`)"""
+    since_datetime = datetime.combine(since, datetime.min.time()) if since else datetime.min
+    params = {"since": since_datetime}
+    db.execute(text("DELETE FROM sales_hourly_totals WHERE bucket_start >= :since"), params)
+    db.execute(text("DELETE FROM product_sales_hourly WHERE bucket_start >= :since"), params)
+    totals = db.execute(text("""
+        INSERT INTO sales_hourly_totals (store_id, bucket_start, sales_count, revenue, tax_amount)
+        SELECT store_id, date_trunc('hour', sale_date), COUNT(*), SUM(grand_total), SUM(COALESCE(tax_amount, 0))
+        FROM sales_transactions
+        WHERE payment_status != 'VOID' AND sale_date >= :since
+        GROUP BY 1, 2
+    """), params).rowcount
+    products = db.execute(text(f"""
+        INSERT INTO product_sales_hourly (store_id, bucket_start, product_id, units, revenue, cost)
+        SELECT st.store_id, date_trunc('hour', st.sale_date), si.product_id,
+               SUM(si.quantity), SUM(si.line_total), SUM({_LINE_COST})
+        FROM sale_items si
+        JOIN sales_transactions st ON st.sale_id = si.sale_id AND st.sale_date = si.sale_date
+        WHERE st.payment_status != 'VOID' AND st.sale_date >= :since AND si.sale_date >= :since
+        GROUP BY 1, 2, 3
+    """), params).rowcount
+    db.commit()
+    return {"hourly_totals": totals, "product_buckets": products}
+
+def _range_bounds(start_date: date, end_date: date):
+    return (
+        datetime.combine(start_date, datetime.min.time()),
+        datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+    )
+
+def get_hourly_heatmap(
+    db: Session,
+    store_id: int,
+    start_date: date,
+    end_date: date
+) -> schemas.HourlyHeatmap:
+    """Sales count and revenue by weekday (Mon=0) x hour of day from the hourly buckets"""
+    start, end = _range_bounds(start_date, end_date)
+    rows = db.execute(text("""
+        SELECT CAST(EXTRACT(ISODOW FROM bucket_start) AS INTEGER) - 1 AS weekday,
+               CAST(EXTRACT(HOUR FROM bucket_start) AS INTEGER) AS hour,
+               SUM(sales_count) AS sales_count,
+               SUM(revenue) AS revenue
+        FROM sales_hourly_totals
+        WHERE store_id = :store_id AND bucket_start >= :start AND bucket_start < :end
+        GROUP BY 1, 2
+    """), {"store_id": store_id, "start": start, "end": end}).all()
+
+    sales_count = [[0] * 24 for _ in range(7)]
+    revenue = [[Decimal("0.00")] * 24 for _ in range(7)]
+    for row in rows:
+        sales_count[row.weekday][row.hour] = int(row.sales_count)
+        revenue[row.weekday][row.hour] = row.revenue
+    return schemas.HourlyHeatmap(
+        store_id=store_id,
+        start_date=start_date,
+        end_date=end_date,
+        sales_count=sales_count,
+        revenue=revenue
+    )
+
+def get_product_velocity(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    store_id: Optional[int] = None,
+    slowest: bool = False,
+    limit: int = 20
+) -> List[schemas.ProductVelocity]:
+    """
+    Top (or slow) movers by units sold per day over the range.
+
+    Slow movers are drawn from products stocked in the store(s), so items that
+    did not sell at all are listed with zero velocity.
+    """
+    start, end = _range_bounds(start_date, end_date)
+    days = (end_date - start_date).days + 1
+    params = {"store_id": store_id, "start": start, "end": end, "days": days, "limit": limit}
+    sold = """
+        SELECT product_id, SUM(units) AS units, SUM(revenue) AS revenue
+        FROM product_sales_hourly
+        WHERE bucket_start >= :start AND bucket_start < :end
+          AND (CAST(:store_id AS INTEGER) IS NULL OR store_id = :store_id)
+        GROUP BY product_id
+    """
+    if slowest:
+        query = f"""
+            WITH sold AS ({sold}),
+            stocked AS (
+                SELECT product_id, SUM(current_stock) AS current_stock
+                FROM inventory
+                WHERE CAST(:store_id AS INTEGER) IS NULL OR store_id = :store_id
+                GROUP BY product_id
+                HAVING SUM(current_stock) > 0
+            )
+            SELECT p.product_id, p.product_code, p.product_name,
+                   COALESCE(sold.units, 0) AS units, COALESCE(sold.revenue, 0) AS revenue,
+                   stocked.current_stock
+            FROM stocked
+            JOIN products p ON p.product_id = stocked.product_id
+            LEFT JOIN sold ON sold.product_id = stocked.product_id
+            WHERE p.is_active = TRUE
+            ORDER BY COALESCE(sold.units, 0) ASC, p.product_id
+            LIMIT :limit
+        """
+    else:
+        query = f"""
+            WITH sold AS ({sold})
+            SELECT p.product_id, p.product_code, p.product_name, sold.units, sold.revenue,
+                   NULL AS current_stock
+            FROM sold
+            JOIN products p ON p.product_id = sold.product_id
+            WHERE sold.units > 0
+            ORDER BY sold.units DESC, p.product_id
+            LIMIT :limit
+        """
+    rows = db.execute(text(query), params).all()
+    return [
+        schemas.ProductVelocity(
+            product_id=row.product_id,
+            product_code=row.product_code,
+            product_name=row.product_name,
+            units_sold=int(row.units),
+            revenue=row.revenue,
+            units_per_day=round(float(row.units) / days, 3),
+            current_stock=row.current_stock
+        )
+        for row in rows
+    ]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, DECIMAL, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, DECIMAL, ForeignKey, ForeignKeyConstraint, Enum
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.database import Base
@@ -11,6 +11,7 @@ class PaymentStatus(str, enum.Enum):
     VOID = "VOID"
 
 class SalesTransaction(Base):
+    # Partitioned by month on sale_date; child tables reference (sale_id, sale_date)
     __tablename__ = "sales_transactions"
 
     sale_id = Column(Integer, primary_key=True, index=True)
@@ -19,7 +20,7 @@ class SalesTransaction(Base):
     pos_terminal_id = Column(Integer, ForeignKey("pos_terminals.terminal_id"), nullable=False)
     customer_id = Column(Integer, ForeignKey("customers.customer_id"))
     user_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
-    sale_date = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    sale_date = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
     sub_total = Column(DECIMAL(10, 2), nullable=False)
     discount_amount = Column(DECIMAL(10, 2), default=0)
     tax_amount = Column(DECIMAL(10, 2), default=0)
@@ -35,12 +36,22 @@ class SalesTransaction(Base):
     sale_items = relationship("SaleItem", back_populates="sale", cascade="all, delete-orphan")
     payments = relationship("Payment", back_populates="sale", cascade="all, delete-orphan")
     customer = relationship("Customer", backref="sales")
+    cashier = relationship("User")
+    store = relationship("Store")
 
 class SaleItem(Base):
     __tablename__ = "sale_items"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["sale_id", "sale_date"],
+            ["sales_transactions.sale_id", "sales_transactions.sale_date"],
+            ondelete="CASCADE"
+        ),
+    )
 
     sale_item_id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales_transactions.sale_id", ondelete="CASCADE"), nullable=False, index=True)
+    sale_id = Column(Integer, nullable=False, index=True)
+    sale_date = Column(DateTime(timezone=True), nullable=False)  # partition key, copied from the sale
     product_id = Column(Integer, ForeignKey("products.product_id"), nullable=False, index=True)
     variant_id = Column(Integer, ForeignKey("product_variants.variant_id"))
     quantity = Column(Integer, nullable=False)
@@ -48,6 +59,7 @@ class SaleItem(Base):
     discount_per_item = Column(DECIMAL(10, 2), default=0)
     tax_per_item = Column(DECIMAL(10, 2), default=0)
     line_total = Column(DECIMAL(10, 2), nullable=False)
+    unit_cost = Column(DECIMAL(10, 2))  # product/variant base price at the time of sale
     return_quantity = Column(Integer, default=0)
     batch_number = Column(String(100))
     expiry_date = Column(DateTime)
@@ -59,9 +71,17 @@ class SaleItem(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["sale_id", "sale_date"],
+            ["sales_transactions.sale_id", "sales_transactions.sale_date"],
+            ondelete="CASCADE"
+        ),
+    )
 
     payment_id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales_transactions.sale_id", ondelete="CASCADE"), nullable=False)
+    sale_id = Column(Integer, nullable=False)
+    sale_date = Column(DateTime(timezone=True), nullable=False)  # partition key, copied from the sale
     payment_method_id = Column(Integer, ForeignKey("payment_methods.payment_method_id"), nullable=False)
     amount = Column(DECIMAL(10, 2), nullable=False)
     transaction_reference = Column(String(255))
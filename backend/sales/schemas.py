@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
-from datetime import datetime
+from typing import Optional, List, Dict
+from datetime import datetime, date
 from decimal import Decimal
 from enum import Enum
+from uuid import UUID
 
 class PaymentStatus(str, Enum):
     PAID = "PAID"
@@ -13,6 +14,7 @@ class PaymentStatus(str, Enum):
 # Payment Method Schemas
 class PaymentMethodBase(BaseModel):
     method_name: str
+    method_type: str = "OTHER"
     is_active: bool = True
 
 class PaymentMethodCreate(PaymentMethodBase):
@@ -140,6 +142,37 @@ class SalesTransactionSummary(BaseModel):
     class Config:
         from_attributes = True
 
+# Offline Sale Schemas
+class OfflineSaleCreate(SalesTransactionCreate):
+    # Generated by the till when the sale is queued; retries resend the same id
+    client_sale_id: UUID
+    user_id: int
+    # When the sale happened at the till (defaults to upload time)
+    sale_date: Optional[datetime] = None
+
+class OfflineSaleBatch(BaseModel):
+    sales: List[OfflineSaleCreate] = Field(..., min_length=1, max_length=500)
+
+class OfflineSaleStatus(str, Enum):
+    CREATED = "CREATED"
+    DUPLICATE = "DUPLICATE"    # already ingested with the same payload
+    CONFLICT = "CONFLICT"      # id already used for a different payload
+    REJECTED = "REJECTED"      # failed checkout validation (unknown product, not stocked, ...)
+
+class OfflineSaleResult(BaseModel):
+    client_sale_id: UUID
+    status: OfflineSaleStatus
+    sale_id: Optional[int] = None
+    invoice_number: Optional[str] = None
+    detail: Optional[str] = None
+
+class OfflineSaleBatchResult(BaseModel):
+    created: int
+    duplicates: int
+    conflicts: int
+    rejected: int
+    results: List[OfflineSaleResult]
+
 # Statistics Schemas
 class SalesStats(BaseModel):
     total_sales: Decimal
@@ -154,4 +187,41 @@ class DailySalesReport(BaseModel):
     sales_count: int
     cash_sales: Decimal
     card_sales: Decimal
-    other_sales: Decimal 
\ No newline at end of file
+    other_sales: Decimal
+
+class SalesReportCell(BaseModel):
+    day: Optional[date] = None
+    store_id: Optional[int] = None
+    sales_count: int
+    total_sales: Decimal
+    total_tax: Decimal
+    total_discount: Decimal
+    # Payment totals keyed by payment method type (CASH, CARD, ...)
+    payments: Dict[str, Decimal]
+
+class SalesReportMatrix(BaseModel):
+    start_date: date
+    end_date: date
+    store_ids: List[int]
+    method_types: List[str]
+    # One cell per (day, store) with sales; daily_totals sum every store per day
+    cells: List[SalesReportCell]
+    daily_totals: List[SalesReportCell]
+    grand_total: SalesReportCell
+
+class HourlyHeatmap(BaseModel):
+    store_id: int
+    start_date: date
+    end_date: date
+    # 7 rows (Monday first) x 24 hourly columns
+    sales_count: List[List[int]]
+    revenue: List[List[Decimal]]
+
+class ProductVelocity(BaseModel):
+    product_id: int
+    product_code: str
+    product_name: str
+    units_sold: int
+    revenue: Decimal
+    units_per_day: float
+    current_stock: Optional[int] = None
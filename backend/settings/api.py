@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional, List
+from datetime import datetime
+from backend import audit, fastjson
 from . import crud, schemas
 
 router = APIRouter(prefix="/settings", tags=["settings"])
@@ -25,10 +27,14 @@ def create_tax_category(tax_category: schemas.TaxCategoryCreate):
         raise HTTPException(status_code=500, detail=f"Failed to create tax category: {str(e)}")
 
 @router.put("/tax-categories/{tax_category_id}", response_model=schemas.TaxCategoryResponse)
-def update_tax_category(tax_category_id: int, tax_category: schemas.TaxCategoryUpdate):
+def update_tax_category(
+    tax_category_id: int,
+    tax_category: schemas.TaxCategoryUpdate,
+    user_id: Optional[int] = Query(None, description="ID of the user making the change")
+):
     """Update a tax category"""
     try:
-        updated = crud.update_tax_category(tax_category_id, tax_category)
+        updated = crud.update_tax_category(tax_category_id, tax_category, user_id=user_id)
         if not updated:
             raise HTTPException(status_code=404, detail="Tax category not found")
         return updated
@@ -40,6 +46,7 @@ def delete_tax_category(tax_category_id: int):
     """Delete a tax category"""
     try:
         if crud.delete_tax_category(tax_category_id):
+            audit.record("TAX_CATEGORY_DELETE", {"tax_category_id": tax_category_id})
             return {"message": "Tax category deleted successfully"}
         raise HTTPException(status_code=404, detail="Tax category not found")
     except Exception as e:
@@ -72,6 +79,10 @@ def update_payment_method(payment_method_id: int, payment_method: schemas.Paymen
         updated = crud.update_payment_method(payment_method_id, payment_method)
         if not updated:
             raise HTTPException(status_code=404, detail="Payment method not found")
+        audit.record("PAYMENT_METHOD_UPDATE", {
+            "payment_method_id": payment_method_id,
+            "changes": payment_method.dict(exclude_unset=True)
+        })
         return updated
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update payment method: {str(e)}")
@@ -81,6 +92,7 @@ def delete_payment_method(payment_method_id: int):
     """Delete a payment method"""
     try:
         if crud.delete_payment_method(payment_method_id):
+            audit.record("PAYMENT_METHOD_DELETE", {"payment_method_id": payment_method_id})
             return {"message": "Payment method deleted successfully"}
         raise HTTPException(status_code=404, detail="Payment method not found")
     except Exception as e:
@@ -231,10 +243,34 @@ def update_system_setting(setting_id: int, setting: schemas.SettingUpdate):
         updated = crud.update_setting(setting_id, setting)
         if not updated:
             raise HTTPException(status_code=404, detail="Setting not found")
+        audit.record("SETTING_UPDATE", {"setting_id": setting_id, "changes": setting.dict(exclude_unset=True)})
         return updated
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update setting: {str(e)}")
 
+# Audit Logs
+@router.get("/audit-logs", response_model=schemas.AuditLogListResponse)
+def get_audit_logs(
+    event_type: Optional[str] = Query(None, description="Filter by event type"),
+    user_id: Optional[int] = Query(None, description="Filter by user"),
+    start: Optional[datetime] = Query(None, description="From this time"),
+    end: Optional[datetime] = Query(None, description="Before this time"),
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=500)
+):
+    """Get audit log entries, newest first"""
+    try:
+        # Make queued events visible to the reader
+        audit.flush()
+        return crud.get_audit_logs(event_type=event_type, user_id=user_id, start=start, end=end, page=page, size=size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch audit logs: {str(e)}")
+
+@router.get("/audit-logs/writer-stats")
+def get_audit_writer_stats():
+    """Queue depth and counters of the background audit writer"""
+    return audit.stats()
+
 # POS Terminals
 @router.get("/pos-terminals", response_model=List[schemas.POSTerminalResponse])
 def get_pos_terminals(
@@ -281,7 +317,10 @@ def delete_pos_terminal(terminal_id: int):
 def get_bulk_settings_data():
     """Get all settings data in a single optimized request for faster loading"""
     try:
-        return crud.get_all_settings_data()
+        data = crud.get_all_settings_data()
+        if fastjson.ENABLED:
+            return fastjson.response(data)
+        return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch bulk settings data: {str(e)}")
 
@@ -293,6 +332,9 @@ def get_bulk_settings_data():
 def get_all_settings_data():
     """Get all settings data in a single optimized call for faster loading"""
     try:
-        return crud.get_all_settings_data()
+        data = crud.get_all_settings_data()
+        if fastjson.ENABLED:
+            return fastjson.response(data)
+        return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch bulk data: {str(e)}") 
\ No newline at end of file
@@ -17,6 +17,7 @@ except ImportError:
 
 # Import schemas
 from . import schemas
+from backend import audit, profiling
 
 # Load environment variables
 load_dotenv()
@@ -46,7 +47,7 @@ def get_connection_pool():
             password=DB_PASS,
             host=DB_HOST,
             port=DB_PORT,
-            cursor_factory=RealDictCursor
+            cursor_factory=profiling.ProfiledDictCursor
         )
     return _connection_pool
 
@@ -167,9 +168,10 @@ def get_tax_categories(
 
 def update_tax_category(
     tax_category_id: int, 
-    tax_category: 'schemas.TaxCategoryUpdate'
+    tax_category: 'schemas.TaxCategoryUpdate',
+    user_id: Optional[int] = None
 ) -> Optional[Dict[str, Any]]:
-    """Update a tax category."""
+    """Update a tax category, auditing the change in the same transaction."""
     conn = get_db_connection()
     cur = conn.cursor()
     try:
@@ -207,6 +209,10 @@ def update_tax_category(
         if not updated:
             return None
         
+        audit.record("TAX_CATEGORY_UPDATE", {
+            "tax_category_id": tax_category_id,
+            "changes": update_data
+        }, user_id=user_id, cursor=cur)
         conn.commit()
         logger.info(f"Successfully updated tax category {tax_category_id}")
         return dict(updated)
@@ -262,11 +268,12 @@ def create_payment_method(payment_method: 'schemas.PaymentMethodCreate') -> Dict
         
         cur.execute("""
             INSERT INTO payment_methods (
-                method_name, is_active
-            ) VALUES (%s, %s)
+                method_name, method_type, is_active
+            ) VALUES (%s, %s, %s)
             RETURNING *
         """, (
             payment_method.method_name,
+            payment_method.method_type,
             payment_method.is_active
         ))
         
@@ -1437,6 +1444,61 @@ def delete_pos_terminal(terminal_id: int) -> bool:
         cur.close()
         return_db_connection(conn) 
 
+# ============================================================================
+# AUDIT LOGS
+# ============================================================================
+
+def get_audit_logs(
+    event_type: Optional[str] = None,
+    user_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    page: int = 1,
+    size: int = 50
+) -> Dict[str, Any]:
+    """Get a page of audit log entries, newest first, with the user's name."""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        where = " WHERE 1=1"
+        params = []
+
+        if event_type:
+            where += " AND a.event_type = %s"
+            params.append(event_type)
+
+        if user_id is not None:
+            where += " AND a.user_id = %s"
+            params.append(user_id)
+
+        if start:
+            where += " AND a.timestamp >= %s"
+            params.append(start)
+
+        if end:
+            where += " AND a.timestamp < %s"
+            params.append(end)
+
+        cur.execute("SELECT COUNT(*) AS total FROM audit_logs a" + where, params)
+        total = cur.fetchone()["total"]
+
+        cur.execute(
+            """
+            SELECT a.*, u.first_name || ' ' || u.last_name AS user_name
+            FROM audit_logs a
+            LEFT JOIN users u ON u.user_id = a.user_id
+            """ + where + " ORDER BY a.timestamp DESC, a.log_id DESC OFFSET %s LIMIT %s",
+            params + [(page - 1) * size, size]
+        )
+        items = [dict(row) for row in cur.fetchall()]
+        return {"items": items, "total": total, "page": page, "size": size}
+    except Exception as e:
+        handle_db_error(e, "get_audit_logs")
+    finally:
+        cur.close()
+        return_db_connection(conn)
+
+
 # ============================================================================
 # BULK DATA OPTIMIZATION
 # ============================================================================
@@ -24,6 +24,7 @@ class PaymentMethod(Base):
     
     payment_method_id = Column(Integer, primary_key=True, index=True)
     method_name = Column(String(100), unique=True, nullable=False, index=True)
+    method_type = Column(String(20), nullable=False, default='OTHER')
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -12,8 +12,12 @@ class TaxCategoryBase(BaseModel):
     is_active: bool = Field(default=True, description="Whether the tax category is active")
 
 
+PAYMENT_METHOD_TYPE_PATTERN = "^(CASH|CARD|MOBILE|BANK|CHEQUE|OTHER)$"
+
+
 class PaymentMethodBase(BaseModel):
     method_name: str = Field(..., min_length=1, max_length=100, description="Name of the payment method")
+    method_type: str = Field(default="OTHER", pattern=PAYMENT_METHOD_TYPE_PATTERN, description="Reporting bucket of the payment method")
     is_active: bool = Field(default=True, description="Whether the payment method is active")
 
 
@@ -92,6 +96,7 @@ class TaxCategoryUpdate(BaseModel):
 
 class PaymentMethodUpdate(BaseModel):
     method_name: Optional[str] = Field(None, min_length=1, max_length=100)
+    method_type: Optional[str] = Field(None, pattern=PAYMENT_METHOD_TYPE_PATTERN)
     is_active: Optional[bool] = None
 
 
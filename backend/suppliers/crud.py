@@ -1,8 +1,11 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, text
 from typing import List, Optional
+from backend import cache
 from . import models, schemas
 
+STATS_CACHE = "supplier_stats"
+
 def get_supplier(db: Session, supplier_id: int) -> Optional[models.Supplier]:
     """Get a single supplier by ID"""
     return db.query(models.Supplier).filter(models.Supplier.supplier_id == supplier_id).first()
@@ -39,6 +42,7 @@ def create_supplier(db: Session, supplier: schemas.SupplierCreate) -> models.Sup
     db.add(db_supplier)
     db.commit()
     db.refresh(db_supplier)
+    cache.invalidate(STATS_CACHE)
     return db_supplier
 
 def update_supplier(db: Session, supplier_id: int, supplier: schemas.SupplierUpdate) -> Optional[models.Supplier]:
@@ -54,6 +58,7 @@ def update_supplier(db: Session, supplier_id: int, supplier: schemas.SupplierUpd
     
     db.commit()
     db.refresh(db_supplier)
+    cache.invalidate(STATS_CACHE)
     return db_supplier
 
 def delete_supplier(db: Session, supplier_id: int) -> bool:
@@ -77,32 +82,41 @@ def delete_supplier(db: Session, supplier_id: int) -> bool:
         # Soft delete - set is_active to False
         setattr(db_supplier, 'is_active', False)
         db.commit()
+        cache.invalidate(STATS_CACHE)
         return True
     else:
         # Hard delete if no dependencies
         db.delete(db_supplier)
         db.commit()
+        cache.invalidate(STATS_CACHE)
         return True
 
 def get_supplier_stats(db: Session) -> dict:
-    """Get supplier statistics"""
-    total_suppliers = db.query(models.Supplier).count()
-    active_suppliers = db.query(models.Supplier).filter(models.Supplier.is_active == True).count()
-    inactive_suppliers = total_suppliers - active_suppliers
+    """Get supplier statistics (cached until the next supplier write)"""
+    return cache.get_or_load(STATS_CACHE, lambda: _compute_supplier_stats(db))
+
+def _compute_supplier_stats(db: Session) -> dict:
+    """Compute all supplier counters in a single FILTER-aggregate statement"""
+    row = db.execute(
+        text("""
+            SELECT
+                COUNT(*) AS total_suppliers,
+                COUNT(*) FILTER (WHERE s.is_active = TRUE) AS active_suppliers,
+                COUNT(*) FILTER (
+                    WHERE EXISTS (SELECT 1 FROM products p WHERE p.supplier_id = s.supplier_id)
+                ) AS suppliers_with_products
+            FROM suppliers s
+        """)
+    ).mappings().first()
     
-    # Count suppliers with products using raw SQL
-    try:
-        suppliers_with_products = db.execute(
-            text("SELECT COUNT(DISTINCT s.supplier_id) FROM suppliers s JOIN products p ON s.supplier_id = p.supplier_id")
-        ).scalar()
-    except Exception:
-        suppliers_with_products = 0
+    total_suppliers = row["total_suppliers"] if row else 0
+    active_suppliers = row["active_suppliers"] if row else 0
     
     return {
         "total_suppliers": total_suppliers,
         "active_suppliers": active_suppliers,
-        "inactive_suppliers": inactive_suppliers,
-        "suppliers_with_products": suppliers_with_products or 0
+        "inactive_suppliers": total_suppliers - active_suppliers,
+        "suppliers_with_products": (row["suppliers_with_products"] if row else 0) or 0
     }
 
 def check_supplier_name_exists(db: Session, supplier_name: str, exclude_id: Optional[int] = None) -> bool:
@@ -0,0 +1 @@
+# Delta sync module 
\ No newline at end of file
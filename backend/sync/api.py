@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from backend.database import get_db
+from backend import fastjson
+from . import crud, schemas
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+@router.get("/changes", response_model=schemas.SyncChanges)
+def get_changes(
+    token: Optional[str] = Query(None, description="Token from the previous call; omit for the first sync"),
+    store_id: Optional[int] = Query(None, description="Terminal's store; limits inventory changes to it"),
+    limit: int = Query(crud.DEFAULT_LIMIT, ge=1, le=50000, description="Maximum change log entries per call"),
+    db: Session = Depends(get_db)
+):
+    """
+    Products, variants, prices, tax categories, payment methods and inventory
+    changed since token. Poll with the returned token; repeat immediately
+    while has_more is true, and reload the full lists when reset is true.
+    """
+    try:
+        changes = crud.get_changes(db, token=token, store_id=store_id, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if fastjson.ENABLED:
+        return fastjson.model_response(schemas.SyncChanges, changes)
+    return changes
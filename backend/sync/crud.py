@@ -0,0 +1,149 @@
+"""
+Change feed for terminal delta sync.
+
+Row triggers (migration 0008) append the key of every inserted, updated or
+deleted product, variant, tax category, payment method and inventory row to
+``sync_changes`` together with the writing transaction's id. Tokens are
+transaction-id horizons rather than change ids: ids are handed out before
+commit, so a change with a lower id can become visible after a higher one,
+while every transaction below the snapshot's xmin has finished. A call
+returns the changes of transactions at or above the token and hands back
+the horizon captured before reading, so a change is never skipped; one that
+commits mid-call may be sent twice, which clients apply as an upsert.
+
+A token is either ``<since>`` or, while has_more pages a large backlog,
+``<since>:<after change_id>:<next since>``. Changes collapse to their row's
+current state, so a product edited ten times is sent once.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Dict, Any, Optional, Tuple
+
+DEFAULT_LIMIT = 5000
+RETENTION_DAYS = 30
+
+# sync_changes.entity -> (response key, key column, current rows for :ids)
+ENTITIES = {
+    "products": ("products", "product_id", """
+        SELECT product_id, product_code, product_name, description, category_id, brand_id, supplier_id,
+               base_price, retail_price, tax_category_id, is_active, barcode, unit_of_measure, weight,
+               reorder_level, max_stock_level, created_at, updated_at
+        FROM products WHERE product_id = ANY(CAST(:ids AS INTEGER[]))
+    """),
+    "product_variants": ("variants", "variant_id", """
+        SELECT variant_id, product_id, size, color, sku_suffix, barcode, retail_price, base_price,
+               is_active, created_at, updated_at
+        FROM product_variants WHERE variant_id = ANY(CAST(:ids AS INTEGER[]))
+    """),
+    "tax_categories": ("tax_categories", "tax_category_id", """
+        SELECT tax_category_id, tax_category_name, tax_rate, effective_date, is_active, created_at, updated_at
+        FROM tax_categories WHERE tax_category_id = ANY(CAST(:ids AS INTEGER[]))
+    """),
+    "payment_methods": ("payment_methods", "payment_method_id", """
+        SELECT payment_method_id, method_name, method_type, is_active, created_at, updated_at
+        FROM payment_methods WHERE payment_method_id = ANY(CAST(:ids AS INTEGER[]))
+    """),
+    "inventory": ("inventory", "inventory_id", """
+        SELECT inventory_id, product_id, variant_id, store_id, current_stock, reserved_stock, updated_at
+        FROM inventory WHERE inventory_id = ANY(CAST(:ids AS INTEGER[]))
+    """),
+}
+
+
+def encode_token(since: int, after: int = 0, next_since: Optional[int] = None) -> str:
+    return str(since) if next_since is None else f"{since}:{after}:{next_since}"
+
+
+def decode_token(token: str) -> Tuple[int, int, Optional[int]]:
+    """(since, after change_id, next since); raises ValueError for a malformed token"""
+    parts = [int(part) for part in token.split(":")]
+    if len(parts) == 1:
+        return parts[0], 0, None
+    if len(parts) == 3:
+        return parts[0], parts[1], parts[2]
+    raise ValueError(f"Invalid sync token: {token}")
+
+
+def current_horizon(db: Session) -> int:
+    """Oldest transaction id still running; everything below it has committed or aborted"""
+    return db.execute(text("SELECT txid_snapshot_xmin(txid_current_snapshot())")).scalar()
+
+
+def _reset(db: Session) -> Dict[str, Any]:
+    return {"token": encode_token(current_horizon(db)), "reset": True}
+
+
+def get_changes(
+    db: Session,
+    token: Optional[str] = None,
+    store_id: Optional[int] = None,
+    limit: int = DEFAULT_LIMIT
+) -> Dict[str, Any]:
+    """
+    Rows changed since token, as current state plus deleted keys. Without a
+    token, or with one older than the retained log, returns reset=True and a
+    fresh token: the client reloads the full lists and polls from there.
+    store_id limits inventory changes to one store.
+    """
+    if token is None:
+        return _reset(db)
+    since, after, next_since = decode_token(token)
+
+    pruned_txid = db.execute(text("SELECT pruned_txid FROM sync_log_state")).scalar() or 0
+    if since < pruned_txid:
+        return _reset(db)
+    if next_since is None:
+        # Captured before reading the log: the next call starts at this horizon
+        next_since = current_horizon(db)
+
+    rows = db.execute(text("""
+        SELECT change_id, entity, row_id
+        FROM sync_changes
+        WHERE txid >= :since AND change_id > :after
+          AND (entity <> 'inventory' OR CAST(:store_id AS INTEGER) IS NULL OR store_id = :store_id)
+        ORDER BY change_id
+        LIMIT :limit
+    """), {"since": since, "after": after, "store_id": store_id, "limit": limit + 1}).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed: Dict[str, set] = {}
+    for row in rows:
+        changed.setdefault(row.entity, set()).add(row.row_id)
+
+    result: Dict[str, Any] = {
+        "token": encode_token(since, rows[-1].change_id, next_since) if has_more else encode_token(next_since),
+        "has_more": has_more,
+        "reset": False,
+        "deleted": {},
+    }
+    for entity, (key, column, query) in ENTITIES.items():
+        ids = sorted(changed.get(entity, ()))
+        current = db.execute(text(query), {"ids": ids}).mappings().all() if ids else []
+        result[key] = [dict(row) for row in current]
+        result["deleted"][key] = sorted(set(ids) - {row[column] for row in current})
+    return result
+
+
+def prune(db: Session, retention_days: int = RETENTION_DAYS) -> int:
+    """
+    Delete changes older than retention_days and raise the retention horizon
+    past them, so tokens that still needed them get reset=True. Returns the
+    number of changes deleted.
+    """
+    deleted = db.execute(text("""
+        WITH deleted AS (
+            DELETE FROM sync_changes
+            WHERE changed_at < CURRENT_TIMESTAMP - make_interval(days => :days)
+            RETURNING txid
+        )
+        SELECT COUNT(*) AS deleted_count, MAX(txid) AS max_txid FROM deleted
+    """), {"days": retention_days}).one()
+    if deleted.deleted_count:
+        db.execute(text("""
+            UPDATE sync_log_state
+            SET pruned_txid = GREATEST(pruned_txid, :max_txid + 1), pruned_at = CURRENT_TIMESTAMP
+        """), {"max_txid": deleted.max_txid})
+    db.commit()
+    return deleted.deleted_count
@@ -0,0 +1,45 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+from backend.product.schemas import ProductBase, ProductVariantBase
+from backend.settings.schemas import TaxCategoryResponse, PaymentMethodResponse
+
+class SyncProduct(ProductBase):
+    product_id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class SyncVariant(ProductVariantBase):
+    variant_id: int
+    product_id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class SyncInventory(BaseModel):
+    inventory_id: int
+    product_id: int
+    variant_id: Optional[int] = None
+    store_id: int
+    current_stock: int
+    reserved_stock: int = 0
+    updated_at: Optional[datetime] = None
+
+class SyncDeleted(BaseModel):
+    """Keys of rows deleted since the token; clients drop them locally"""
+    products: List[int] = []
+    variants: List[int] = []
+    tax_categories: List[int] = []
+    payment_methods: List[int] = []
+    inventory: List[int] = []
+
+class SyncChanges(BaseModel):
+    token: str = Field(..., description="Pass as ?token= on the next call")
+    has_more: bool = Field(False, description="More changes are waiting; call again right away with token")
+    reset: bool = Field(False, description="Token missing or expired: reload the full lists (/products/, "
+                                           "/inventory/bulk-data, /settings/bulk-data), then poll with token")
+    products: List[SyncProduct] = []
+    variants: List[SyncVariant] = []
+    tax_categories: List[TaxCategoryResponse] = []
+    payment_methods: List[PaymentMethodResponse] = []
+    inventory: List[SyncInventory] = []
+    deleted: SyncDeleted = SyncDeleted()
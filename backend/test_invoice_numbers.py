@@ -0,0 +1,112 @@
+"""
+Invoice number tests against a live database.
+
+Two tills checking out at the same moment count the same day's sales and pick
+the same number; the claim in invoice_numbers must make the second one move on.
+
+These need a PostgreSQL database with the POS schema and some reference data
+(see conftest.py). Point them at one with the command below; importlib mode
+keeps backend/ off sys.path, where inventory.models would load the product
+models a second time:
+
+    POS_TEST_DATABASE=pos_test python -m pytest --import-mode=importlib backend/test_invoice_numbers.py
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+if not os.getenv("POS_TEST_DATABASE"):
+    pytest.skip("POS_TEST_DATABASE is not set", allow_module_level=True)
+
+os.environ["DB_NAME"] = os.environ["POS_TEST_DATABASE"]
+
+from sqlalchemy import text
+
+from backend.database import SessionLocal
+from backend.sales import crud, schemas
+
+
+@pytest.fixture
+def checkout(store_refs):
+    """A one-line sale request and the user ringing it up"""
+    sale = schemas.SalesTransactionCreate(
+        store_id=store_refs["store_id"],
+        pos_terminal_id=store_refs["terminal_id"],
+        sale_items=[{"product_id": store_refs["product_id"], "quantity": 1, "unit_price": 10}],
+        payments=[{"payment_method_id": store_refs["payment_method_id"], "amount": 100}],
+    )
+    return sale, store_refs["user_id"]
+
+
+def test_concurrent_checkouts_get_different_invoice_numbers(checkout):
+    sale, user_id = checkout
+    first_inserted = threading.Event()
+    results = {}
+    errors = []
+
+    def first_till():
+        db = SessionLocal()
+        try:
+            db_sale = crud._insert_sale(db, sale, user_id)
+            results["first"] = db_sale.invoice_number
+            first_inserted.set()
+            # Hold the transaction open so the second till counts the same
+            # committed sales and reaches for the same number
+            time.sleep(1)
+            db.commit()
+        except Exception as e:
+            errors.append(e)
+            db.rollback()
+        finally:
+            first_inserted.set()
+            db.close()
+
+    def second_till():
+        db = SessionLocal()
+        try:
+            first_inserted.wait()
+            results["second"] = crud.create_sale(db, sale, user_id).invoice_number
+        except Exception as e:
+            errors.append(e)
+            db.rollback()
+        finally:
+            db.close()
+
+    tills = [threading.Thread(target=first_till), threading.Thread(target=second_till)]
+    for till in tills:
+        till.start()
+    for till in tills:
+        till.join(timeout=30)
+
+    assert not errors
+    assert results["first"] != results["second"]
+
+    db = SessionLocal()
+    try:
+        committed = db.execute(text("""
+            SELECT COUNT(*) FROM sales_transactions WHERE invoice_number IN (:first, :second)
+        """), results).scalar()
+        claimed = db.execute(text("""
+            SELECT COUNT(*) FROM invoice_numbers WHERE invoice_number IN (:first, :second)
+        """), results).scalar()
+    finally:
+        db.close()
+    assert committed == 2
+    assert claimed == 2
+
+
+def test_rolled_back_sale_releases_its_invoice_number(checkout):
+    sale, user_id = checkout
+    db = SessionLocal()
+    try:
+        invoice_number = crud._insert_sale(db, sale, user_id).invoice_number
+        db.rollback()
+        claimed = db.execute(text(
+            "SELECT COUNT(*) FROM invoice_numbers WHERE invoice_number = :invoice_number"
+        ), {"invoice_number": invoice_number}).scalar()
+    finally:
+        db.close()
+    assert claimed == 0
@@ -0,0 +1,149 @@
+"""
+Offline sale upload tests against a live database: idempotency per
+client_sale_id, per-sale savepoints, and sales that took stock negative at a
+till that couldn't check it.
+
+These need a PostgreSQL database with the POS schema and some reference data
+(see conftest.py):
+
+    POS_TEST_DATABASE=pos_test python -m pytest --import-mode=importlib backend/test_offline_sales.py
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+if not os.getenv("POS_TEST_DATABASE"):
+    pytest.skip("POS_TEST_DATABASE is not set", allow_module_level=True)
+
+os.environ["DB_NAME"] = os.environ["POS_TEST_DATABASE"]
+
+from sqlalchemy import text
+
+from backend.database import SessionLocal
+from backend.sales import crud, schemas
+
+Status = schemas.OfflineSaleStatus
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def offline_sale(store_refs, discard_sales):
+    """
+    Build a queued sale of `quantity` units of the reference product.
+
+    ingest_offline_sales commits, so whatever the built sales created is
+    handed to discard_sales afterwards.
+    """
+    client_sale_ids = []
+
+    def build(quantity=1, client_sale_id=None, product_id=None, sale_date=None, notes=None):
+        client_sale_id = client_sale_id or uuid.uuid4()
+        client_sale_ids.append(str(client_sale_id))
+        return schemas.OfflineSaleCreate(
+            client_sale_id=client_sale_id,
+            user_id=store_refs["user_id"],
+            sale_date=sale_date,
+            store_id=store_refs["store_id"],
+            pos_terminal_id=store_refs["terminal_id"],
+            sale_items=[{"product_id": product_id or store_refs["product_id"], "quantity": quantity,
+                         "unit_price": 10}],
+            payments=[{"payment_method_id": store_refs["payment_method_id"], "amount": 10 * quantity}],
+            notes=notes,
+        )
+    yield build
+
+    db = SessionLocal()
+    try:
+        discard_sales.extend(db.execute(text("""
+            SELECT sale_id FROM offline_sales
+            WHERE client_sale_id = ANY(CAST(:client_sale_ids AS UUID[])) AND sale_id IS NOT NULL
+        """), {"client_sale_ids": client_sale_ids}).scalars())
+    finally:
+        db.close()
+
+
+def _available(db, store_refs):
+    return db.execute(text("""
+        SELECT current_stock - reserved_stock FROM inventory
+        WHERE store_id = :store_id AND product_id = :product_id AND variant_id IS NULL
+    """), store_refs).scalar()
+
+
+def _recorded(db, client_sale_id):
+    """(offline_sales rows, sales rows) recorded for client_sale_id"""
+    return db.execute(text("""
+        SELECT COUNT(o.client_sale_id), COUNT(s.sale_id)
+        FROM offline_sales o
+        LEFT JOIN sales_transactions s ON s.sale_id = o.sale_id AND s.sale_date = o.sale_date
+        WHERE o.client_sale_id = CAST(:client_sale_id AS UUID)
+    """), {"client_sale_id": str(client_sale_id)}).one()
+
+
+def test_resent_sale_is_a_duplicate(db, offline_sale):
+    sale = offline_sale()
+    first = crud.ingest_offline_sales(db, [sale])
+    again = crud.ingest_offline_sales(db, [sale])
+
+    assert first["results"][0]["status"] == Status.CREATED
+    assert again["duplicates"] == 1 and again["created"] == 0
+    assert again["results"][0]["sale_id"] == first["results"][0]["sale_id"]
+    assert tuple(_recorded(db, sale.client_sale_id)) == (1, 1)
+
+
+def test_reused_id_with_another_payload_is_a_conflict(db, offline_sale):
+    sale = offline_sale()
+    crud.ingest_offline_sales(db, [sale])
+    other = offline_sale(quantity=2, client_sale_id=sale.client_sale_id)
+    result = crud.ingest_offline_sales(db, [other])
+
+    assert result["conflicts"] == 1
+    assert result["results"][0]["status"] == Status.CONFLICT
+    assert tuple(_recorded(db, sale.client_sale_id)) == (1, 1)
+
+
+def test_rejected_sale_rolls_back_alone(db, offline_sale):
+    unknown_product = db.execute(text("SELECT COALESCE(MAX(product_id), 0) + 1 FROM products")).scalar()
+    before = db.execute(text("SELECT COUNT(*) FROM invoice_numbers")).scalar()
+    batch = [offline_sale(), offline_sale(product_id=unknown_product), offline_sale()]
+    result = crud.ingest_offline_sales(db, batch)
+
+    assert [r["status"] for r in result["results"]] == [Status.CREATED, Status.REJECTED, Status.CREATED]
+    assert result["results"][1]["detail"]
+    # The rejected sale's savepoint took its claim and invoice number with it
+    assert tuple(_recorded(db, batch[0].client_sale_id)) == (1, 1)
+    assert tuple(_recorded(db, batch[1].client_sale_id)) == (0, 0)
+    assert tuple(_recorded(db, batch[2].client_sale_id)) == (1, 1)
+    assert db.execute(text("SELECT COUNT(*) FROM invoice_numbers")).scalar() == before + 2
+
+
+def test_shortfall_is_recorded_and_flagged(db, store_refs, offline_sale):
+    available = _available(db, store_refs)
+    result = crud.ingest_offline_sales(db, [offline_sale(quantity=available + 3)])
+
+    assert result["results"][0]["status"] == Status.CREATED
+    assert "shortfall" in result["results"][0]["detail"]
+    assert _available(db, store_refs) == -3
+
+
+def test_movements_carry_the_till_sale_date(db, offline_sale):
+    sold_at = (datetime.now() - timedelta(days=2)).replace(microsecond=0)
+    result = crud.ingest_offline_sales(db, [offline_sale(sale_date=sold_at)])
+    sale_id = result["results"][0]["sale_id"]
+
+    movement_dates = db.execute(text("""
+        SELECT movement_date FROM inventory_movements
+        WHERE movement_type = 'SALE' AND reference_id = :sale_id
+    """), {"sale_id": sale_id}).scalars().all()
+    assert movement_dates == [sold_at]
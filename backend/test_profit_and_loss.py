@@ -0,0 +1,82 @@
+"""
+Profit and loss tests against a live database: refunds come off the month the
+goods came back.
+
+These need a PostgreSQL database with the POS schema and some reference data
+(see conftest.py):
+
+    POS_TEST_DATABASE=pos_test python -m pytest --import-mode=importlib backend/test_profit_and_loss.py
+"""
+
+import os
+from decimal import Decimal
+
+import pytest
+
+if not os.getenv("POS_TEST_DATABASE"):
+    pytest.skip("POS_TEST_DATABASE is not set", allow_module_level=True)
+
+os.environ["DB_NAME"] = os.environ["POS_TEST_DATABASE"]
+
+from backend.database import SessionLocal
+from backend.expenses import crud as expenses_crud
+from backend.returns import crud as returns_crud, schemas as returns_schemas
+from backend.sales import crud as sales_crud, schemas as sales_schemas
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _month(db, store_id, month):
+    rows = expenses_crud.get_profit_and_loss(db, month, month, store_id=store_id)
+    assert len(rows) == 1
+    return rows[0]
+
+
+def _sell_and_return(db, store_refs, discard_sales):
+    """Sell two units and take one back; (sale, its line, the month before the return)"""
+    sale = sales_crud.create_sale(db, sales_schemas.SalesTransactionCreate(
+        store_id=store_refs["store_id"],
+        pos_terminal_id=store_refs["terminal_id"],
+        sale_items=[{"product_id": store_refs["product_id"], "quantity": 2, "unit_price": 10}],
+        payments=[{"payment_method_id": store_refs["payment_method_id"], "amount": 100}],
+    ), store_refs["user_id"])
+    discard_sales.append(sale.sale_id)
+    line = sale.sale_items[0]
+    sold = _month(db, store_refs["store_id"], sale.sale_date.date())
+
+    returns_crud.create_return(db, returns_schemas.ReturnCreate(
+        sale_id=sale.sale_id,
+        reason="Damaged",
+        refund_method_id=store_refs["payment_method_id"],
+        return_items=[{"sale_item_id": line.sale_item_id, "quantity_returned": 1, "refund_per_item": 10}],
+    ), store_refs["user_id"])
+    return sale, line, sold
+
+
+def test_return_lowers_the_months_net_sales(db, store_refs, discard_sales):
+    sale, line, sold = _sell_and_return(db, store_refs, discard_sales)
+    returned = _month(db, store_refs["store_id"], sale.sale_date.date())
+
+    tax_refunded = line.tax_per_item or Decimal("0")
+    assert returned.gross_sales == sold.gross_sales - 10
+    assert returned.tax_collected == sold.tax_collected - tax_refunded
+    assert returned.net_sales == sold.net_sales - (10 - tax_refunded)
+    assert returned.cost_of_goods == sold.cost_of_goods - (line.unit_cost or 0)
+    assert returned.sales_count == sold.sales_count
+
+
+def test_voiding_a_returned_sale_does_not_refund_it_twice(db, store_refs, discard_sales):
+    sale, line, sold = _sell_and_return(db, store_refs, discard_sales)
+    sales_crud.void_sale(db, sale.sale_id, store_refs["user_id"], "Test")
+    voided = _month(db, store_refs["store_id"], sale.sale_date.date())
+
+    assert voided.gross_sales == sold.gross_sales - sale.grand_total
+    assert voided.cost_of_goods == sold.cost_of_goods - 2 * (line.unit_cost or 0)
+    assert voided.sales_count == sold.sales_count - 1
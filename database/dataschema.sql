@@ -175,6 +175,7 @@ CREATE TABLE inventory (
     variant_id          INTEGER REFERENCES product_variants(variant_id),
     store_id            INTEGER NOT NULL REFERENCES stores(store_id),
     current_stock       INTEGER NOT NULL DEFAULT 0,
+    reserved_stock      INTEGER NOT NULL DEFAULT 0 CHECK (reserved_stock >= 0),
     last_reorder_date   TIMESTAMP,
     last_stock_take_date TIMESTAMP,
     updated_at          TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -187,8 +188,11 @@ ON inventory (product_id, store_id)
 WHERE variant_id IS NULL;
 
 -- Inventory Movements table
+-- Partitioned by month on movement_date; monthly partitions are created and
+-- archived by `python -m backend.partitions`. Rows outside every monthly
+-- partition land in the default partition until maintenance moves them.
 CREATE TABLE inventory_movements (
-    movement_id   SERIAL PRIMARY KEY,
+    movement_id   SERIAL,
     product_id    INTEGER NOT NULL REFERENCES products(product_id),
     variant_id    INTEGER REFERENCES product_variants(variant_id),
     store_id      INTEGER NOT NULL REFERENCES stores(store_id),
@@ -196,10 +200,13 @@ CREATE TABLE inventory_movements (
         CHECK (movement_type IN ('SALE','RETURN','PURCHASE','ADJUSTMENT','TRANSFER_OUT','TRANSFER_IN','WASTE')),
     quantity      INTEGER NOT NULL,
     reference_id  INTEGER,
-    movement_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    movement_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     user_id       INTEGER NOT NULL REFERENCES users(user_id),
-    notes         TEXT
-);
+    notes         TEXT,
+    PRIMARY KEY (movement_id, movement_date)
+) PARTITION BY RANGE (movement_date);
+
+CREATE TABLE inventory_movements_default PARTITION OF inventory_movements DEFAULT;
 
 -- =============================================
 -- 4. CUSTOMER & LOYALTY MANAGEMENT
@@ -243,20 +250,28 @@ CREATE TABLE loyalty_points_history (
 CREATE TABLE payment_methods (
     payment_method_id SERIAL PRIMARY KEY,
     method_name       VARCHAR(100) UNIQUE NOT NULL,
+    method_type       VARCHAR(20) NOT NULL DEFAULT 'OTHER'
+        CHECK (method_type IN ('CASH','CARD','MOBILE','BANK','CHEQUE','OTHER')),
     is_active         BOOLEAN DEFAULT TRUE,
     created_at        TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at        TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Sales Transactions table
+-- sales_transactions, sale_items and payments are partitioned by month on
+-- sale_date (maintained by `python -m backend.partitions`). sale_date is part
+-- of every key, and child rows carry their sale's sale_date so joins and
+-- lookups prune to the same month. A unique constraint on a partitioned
+-- table must include sale_date, so invoice numbers are kept unique by
+-- invoice_numbers below instead.
 CREATE TABLE sales_transactions (
-    sale_id        SERIAL PRIMARY KEY,
-    invoice_number VARCHAR(100) UNIQUE NOT NULL,
+    sale_id        SERIAL,
+    invoice_number VARCHAR(100) NOT NULL,
     store_id       INTEGER NOT NULL REFERENCES stores(store_id),
     pos_terminal_id INTEGER NOT NULL REFERENCES pos_terminals(terminal_id),
     customer_id    INTEGER REFERENCES customers(customer_id),
     user_id        INTEGER NOT NULL REFERENCES users(user_id),
-    sale_date      TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sale_date      TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     sub_total      DECIMAL(10,2) NOT NULL,
     discount_amount DECIMAL(10,2) DEFAULT 0,
     tax_amount     DECIMAL(10,2) DEFAULT 0,
@@ -267,13 +282,26 @@ CREATE TABLE sales_transactions (
         CHECK (payment_status IN ('PAID','PARTIAL','REFUNDED','VOID')),
     notes          TEXT,
     created_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (sale_id, sale_date)
+) PARTITION BY RANGE (sale_date);
+
+CREATE TABLE sales_transactions_default PARTITION OF sales_transactions DEFAULT;
+
+-- Invoice Numbers table
+-- Every invoice number ever issued; a sale claims its number here inside its
+-- own transaction, so two tills racing for the same number can't both commit.
+-- Rows outlive archived sales partitions, so numbers are never reused.
+CREATE TABLE invoice_numbers (
+    invoice_number VARCHAR(100) PRIMARY KEY,
+    claimed_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Sale Items table
 CREATE TABLE sale_items (
-    sale_item_id   SERIAL PRIMARY KEY,
-    sale_id        INTEGER NOT NULL REFERENCES sales_transactions(sale_id) ON DELETE CASCADE,
+    sale_item_id   SERIAL,
+    sale_id        INTEGER NOT NULL,
+    sale_date      TIMESTAMP NOT NULL,
     product_id     INTEGER NOT NULL REFERENCES products(product_id),
     variant_id     INTEGER REFERENCES product_variants(variant_id),
     quantity       INTEGER NOT NULL,
@@ -281,42 +309,72 @@ CREATE TABLE sale_items (
     discount_per_item DECIMAL(10,2) DEFAULT 0,
     tax_per_item   DECIMAL(10,2) DEFAULT 0,
     line_total     DECIMAL(10,2) NOT NULL,
+    unit_cost      DECIMAL(10,2),
     return_quantity INTEGER DEFAULT 0,
     batch_number   VARCHAR(100),
-    expiry_date    DATE
-);
+    expiry_date    DATE,
+    PRIMARY KEY (sale_item_id, sale_date),
+    FOREIGN KEY (sale_id, sale_date) REFERENCES sales_transactions(sale_id, sale_date) ON DELETE CASCADE
+) PARTITION BY RANGE (sale_date);
+
+CREATE TABLE sale_items_default PARTITION OF sale_items DEFAULT;
 
 -- Payments table
 CREATE TABLE payments (
-    payment_id            SERIAL PRIMARY KEY,
-    sale_id               INTEGER NOT NULL REFERENCES sales_transactions(sale_id) ON DELETE CASCADE,
+    payment_id            SERIAL,
+    sale_id               INTEGER NOT NULL,
+    sale_date             TIMESTAMP NOT NULL,
     payment_method_id     INTEGER NOT NULL REFERENCES payment_methods(payment_method_id),
     amount                DECIMAL(10,2) NOT NULL,
     transaction_reference VARCHAR(255),
-    payment_date          TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    payment_date          TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (payment_id, sale_date),
+    FOREIGN KEY (sale_id, sale_date) REFERENCES sales_transactions(sale_id, sale_date) ON DELETE CASCADE
+) PARTITION BY RANGE (sale_date);
+
+CREATE TABLE payments_default PARTITION OF payments DEFAULT;
+
+-- Offline Sales table
+-- Idempotency keys for sales uploaded by tills after an outage
+-- (POST /sales/offline-batch): one row per client-generated sale UUID, and
+-- payload_hash tells a retried upload apart from a reused id. sale_id and
+-- sale_date are a plain reference, not a foreign key: keys outlive their
+-- sale's month, and a foreign key would stop that month being archived.
+CREATE TABLE offline_sales (
+    client_sale_id  UUID PRIMARY KEY,
+    payload_hash    CHAR(64) NOT NULL,
+    pos_terminal_id INTEGER NOT NULL REFERENCES pos_terminals(terminal_id),
+    -- Set in the same transaction as the claim, once the sale is inserted
+    sale_id         INTEGER,
+    sale_date       TIMESTAMP,
+    received_at     TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Returns table
 CREATE TABLE returns (
     return_id          SERIAL PRIMARY KEY,
-    sale_id            INTEGER NOT NULL REFERENCES sales_transactions(sale_id),
+    sale_id            INTEGER NOT NULL,
+    sale_date          TIMESTAMP NOT NULL,
     return_date        TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     returned_by_user_id INTEGER NOT NULL REFERENCES users(user_id),
     reason             TEXT,
     refund_amount      DECIMAL(10,2) NOT NULL,
     refund_method_id   INTEGER NOT NULL REFERENCES payment_methods(payment_method_id),
-    notes              TEXT
+    notes              TEXT,
+    FOREIGN KEY (sale_id, sale_date) REFERENCES sales_transactions(sale_id, sale_date)
 );
 
 -- Return Items table
 CREATE TABLE return_items (
     return_item_id    SERIAL PRIMARY KEY,
     return_id         INTEGER NOT NULL REFERENCES returns(return_id) ON DELETE CASCADE,
-    sale_item_id      INTEGER NOT NULL REFERENCES sale_items(sale_item_id),
+    sale_item_id      INTEGER NOT NULL,
+    sale_date         TIMESTAMP NOT NULL,
     product_id        INTEGER NOT NULL REFERENCES products(product_id),
     variant_id        INTEGER REFERENCES product_variants(variant_id),
     quantity_returned INTEGER NOT NULL,
-    refund_per_item   DECIMAL(10,2) NOT NULL
+    refund_per_item   DECIMAL(10,2) NOT NULL,
+    FOREIGN KEY (sale_item_id, sale_date) REFERENCES sale_items(sale_item_id, sale_date)
 );
 
 -- =============================================
@@ -461,13 +519,59 @@ CREATE TABLE audit_logs (
     ip_address   VARCHAR(50)
 );
 
+-- =============================================
+-- 10. REPORTING AGGREGATES
+-- =============================================
+
+-- Hourly sales totals per store, maintained when a sale is committed or voided
+CREATE TABLE sales_hourly_totals (
+    store_id      INTEGER NOT NULL REFERENCES stores(store_id),
+    bucket_start  TIMESTAMP NOT NULL,
+    sales_count   INTEGER NOT NULL DEFAULT 0,
+    revenue       DECIMAL(12,2) NOT NULL DEFAULT 0,
+    tax_amount    DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (store_id, bucket_start)
+);
+
+-- Hourly units sold per store and product
+CREATE TABLE product_sales_hourly (
+    store_id      INTEGER NOT NULL REFERENCES stores(store_id),
+    bucket_start  TIMESTAMP NOT NULL,
+    product_id    INTEGER NOT NULL REFERENCES products(product_id),
+    units         INTEGER NOT NULL DEFAULT 0,
+    revenue       DECIMAL(12,2) NOT NULL DEFAULT 0,
+    cost          DECIMAL(12,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (store_id, bucket_start, product_id)
+);
+
+-- Expense totals per store, month and category, maintained on every expense write
+CREATE TABLE expense_monthly_totals (
+    store_id            INTEGER NOT NULL REFERENCES stores(store_id),
+    month               DATE NOT NULL,
+    expense_category_id INTEGER NOT NULL REFERENCES expense_categories(category_id),
+    total_amount        DECIMAL(12,2) NOT NULL DEFAULT 0,
+    expense_count       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (store_id, month, expense_category_id)
+);
+
+-- Refunds, tax refunded and cost of returned units per store and month of
+-- return, maintained on every return
+CREATE TABLE returns_monthly_totals (
+    store_id       INTEGER NOT NULL REFERENCES stores(store_id),
+    month          DATE NOT NULL,
+    refund_amount  DECIMAL(12,2) NOT NULL DEFAULT 0,
+    tax_refunded   DECIMAL(12,2) NOT NULL DEFAULT 0,
+    cost_returned  DECIMAL(12,2) NOT NULL DEFAULT 0,
+    return_count   INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (store_id, month)
+);
+
 -- =============================================
 -- FOREIGN KEYS
 -- =============================================
 
-ALTER TABLE loyalty_points_history 
-  ADD CONSTRAINT fk_loyalty_points_sale_id 
-  FOREIGN KEY (sale_id) REFERENCES sales_transactions(sale_id);
+-- loyalty_points_history.sale_id is a plain reference: sales_transactions is
+-- partitioned and can only be referenced together with sale_date.
 
 -- =============================================
 -- INDEXES
@@ -481,22 +585,30 @@ CREATE INDEX idx_products_active     ON products(is_active);
 CREATE INDEX idx_variants_product    ON product_variants(product_id);
 CREATE INDEX idx_variants_barcode    ON product_variants(barcode);
 
-CREATE INDEX idx_inventory_product_store ON inventory(product_id, store_id);
+CREATE INDEX idx_inventory_product_store_variant ON inventory(product_id, store_id, variant_id);
 CREATE INDEX idx_inventory_store     ON inventory(store_id);
 
 CREATE INDEX idx_sales_date          ON sales_transactions(sale_date);
 CREATE INDEX idx_sales_invoice       ON sales_transactions(invoice_number);
-CREATE INDEX idx_sales_store         ON sales_transactions(store_id);
+CREATE INDEX idx_sales_store_date    ON sales_transactions(store_id, sale_date);
+CREATE INDEX idx_sales_active_date   ON sales_transactions(sale_date, store_id) WHERE payment_status <> 'VOID';
 CREATE INDEX idx_sales_customer      ON sales_transactions(customer_id);
 
 CREATE INDEX idx_sale_items_sale     ON sale_items(sale_id);
+CREATE INDEX idx_payments_sale       ON payments(sale_id);
+CREATE INDEX idx_offline_sales_sale  ON offline_sales(sale_id, sale_date);
 CREATE INDEX idx_sale_items_product  ON sale_items(product_id);
 
-CREATE INDEX idx_movements_product   ON inventory_movements(product_id);
-CREATE INDEX idx_movements_store     ON inventory_movements(store_id);
+CREATE INDEX idx_movements_product_date ON inventory_movements(product_id, movement_date);
+CREATE INDEX idx_movements_store_date ON inventory_movements(store_id, movement_date);
+CREATE INDEX idx_movements_sales_date ON inventory_movements(movement_date, store_id) WHERE movement_type = 'SALE';
 CREATE INDEX idx_movements_date      ON inventory_movements(movement_date);
 CREATE INDEX idx_movements_type      ON inventory_movements(movement_type);
 
+CREATE INDEX idx_returns_sale        ON returns(sale_id, sale_date);
+CREATE INDEX idx_returns_date        ON returns(return_date);
+CREATE INDEX idx_return_items_return ON return_items(return_id);
+
 CREATE INDEX idx_customers_phone     ON customers(phone_number);
 CREATE INDEX idx_customers_email     ON customers(email);
 CREATE INDEX idx_customers_loyalty   ON customers(loyalty_member_id);
@@ -505,12 +617,27 @@ CREATE INDEX idx_po_number           ON purchase_orders(po_number);
 CREATE INDEX idx_po_supplier         ON purchase_orders(supplier_id);
 CREATE INDEX idx_po_store            ON purchase_orders(store_id);
 CREATE INDEX idx_po_date             ON purchase_orders(order_date);
+CREATE INDEX idx_po_open_store       ON purchase_orders(store_id) WHERE status IN ('DRAFT', 'SENT', 'RECEIVED_PARTIAL');
+CREATE INDEX idx_po_items_po         ON purchase_order_items(po_id);
+CREATE INDEX idx_grn_items_grn       ON grn_items(grn_id);
+
+CREATE INDEX idx_advance_order_items_order ON advance_order_items(advance_order_id);
+CREATE INDEX idx_advance_orders_open_store ON advance_orders(store_id) WHERE status IN ('PENDING', 'CONFIRMED');
+
+CREATE INDEX idx_loyalty_history_customer ON loyalty_points_history(customer_id, change_date);
+
+CREATE INDEX idx_audit_logs_time       ON audit_logs(timestamp);
+CREATE INDEX idx_audit_logs_event_time ON audit_logs(event_type, timestamp);
 
 CREATE INDEX idx_users_username      ON users(username);
 CREATE INDEX idx_users_email         ON users(email);
 CREATE INDEX idx_users_store         ON users(store_id);
 CREATE INDEX idx_users_active        ON users(is_active);
 
+CREATE INDEX idx_expenses_store_date ON expenses(store_id, expense_date);
+
+CREATE INDEX idx_product_sales_hourly_product ON product_sales_hourly(product_id, bucket_start);
+
 -- =============================================
 -- TRIGGERS TO MAINTAIN updated_at
 -- =============================================
@@ -542,6 +669,72 @@ BEGIN
 END;
 $$;
 
+-- =============================================
+-- DELTA SYNC CHANGE LOG (migration 0008)
+-- =============================================
+
+-- Row triggers record which synced row changed in which transaction;
+-- GET /sync/changes uses transaction ids as version tokens (see backend/sync).
+CREATE TABLE sync_changes (
+    change_id  BIGSERIAL PRIMARY KEY,
+    txid       BIGINT NOT NULL DEFAULT txid_current(),
+    entity     VARCHAR(30) NOT NULL,
+    row_id     INTEGER NOT NULL,
+    store_id   INTEGER,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_sync_changes_txid ON sync_changes(txid);
+CREATE INDEX idx_sync_changes_time ON sync_changes(changed_at);
+
+-- TG_ARGV[0] names the key column, TG_ARGV[1] (optional) the store column
+CREATE OR REPLACE FUNCTION log_sync_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    rec JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        rec := to_jsonb(OLD);
+    ELSE
+        rec := to_jsonb(NEW);
+    END IF;
+    INSERT INTO sync_changes (entity, row_id, store_id)
+    VALUES (TG_TABLE_NAME, (rec ->> TG_ARGV[0])::INTEGER,
+            CASE WHEN TG_NARGS > 1 THEN (rec ->> TG_ARGV[1])::INTEGER END);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trig_products_sync
+AFTER INSERT OR UPDATE OR DELETE ON products
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('product_id');
+
+CREATE TRIGGER trig_product_variants_sync
+AFTER INSERT OR UPDATE OR DELETE ON product_variants
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('variant_id');
+
+CREATE TRIGGER trig_tax_categories_sync
+AFTER INSERT OR UPDATE OR DELETE ON tax_categories
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('tax_category_id');
+
+CREATE TRIGGER trig_payment_methods_sync
+AFTER INSERT OR UPDATE OR DELETE ON payment_methods
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('payment_method_id');
+
+CREATE TRIGGER trig_inventory_sync
+AFTER INSERT OR UPDATE OR DELETE ON inventory
+FOR EACH ROW EXECUTE FUNCTION log_sync_change('inventory_id', 'store_id');
+
+-- One row: changes from transactions below pruned_txid have been deleted, so
+-- tokens older than it must resync from the bulk endpoints
+CREATE TABLE sync_log_state (
+    id          BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    pruned_txid BIGINT NOT NULL DEFAULT 0,
+    pruned_at   TIMESTAMP
+);
+
+INSERT INTO sync_log_state DEFAULT VALUES;
+
 -- =============================================
 -- INITIAL DATA
 -- =============================================
@@ -552,13 +745,13 @@ INSERT INTO tax_categories (tax_category_name, tax_rate, effective_date) VALUES
   ('Zero Rate',          0.00, '2024-01-01'),
   ('Exempt',             0.00, '2024-01-01');
 
-INSERT INTO payment_methods (method_name) VALUES
-  ('Cash'),
-  ('Credit Card'),
-  ('Debit Card'),
-  ('Mobile Wallet'),
-  ('Bank Transfer'),
-  ('Cheque');
+INSERT INTO payment_methods (method_name, method_type) VALUES
+  ('Cash',          'CASH'),
+  ('Credit Card',   'CARD'),
+  ('Debit Card',    'CARD'),
+  ('Mobile Wallet', 'MOBILE'),
+  ('Bank Transfer', 'BANK'),
+  ('Cheque',        'CHEQUE');
 
 INSERT INTO roles (role_name, description) VALUES
   ('Administrator', 'Full system access'),
@@ -595,5 +788,26 @@ INSERT INTO expense_categories (category_name) VALUES
   ('Professional Services'),
   ('Other');
 
+-- Versioned migrations in backend/migrations already reflected in this file.
+-- Schema changes ship as a new migration (python -m backend.migrate) plus the
+-- same DDL and its version row here.
+CREATE TABLE schema_migrations (
+    version     VARCHAR(20) PRIMARY KEY,
+    name        VARCHAR(200) NOT NULL,
+    applied_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_migrations (version, name) VALUES
+  ('0001', 'payment_method_types'),
+  ('0002', 'sales_buckets'),
+  ('0003', 'inventory_reservations'),
+  ('0004', 'expense_rollups'),
+  ('0005', 'movement_partitions'),
+  ('0006', 'sales_partitions'),
+  ('0007', 'query_indexes'),
+  ('0008', 'sync_changes'),
+  ('0009', 'offline_sales'),
+  ('0010', 'returns_rollups');
+
 -- Complete
 SELECT 'Candela POS Schema (no FBR) created successfully!' AS status;